@@ -1,12 +1,21 @@
-import json, os, logging
+import json, os, logging, threading, time
+from contextlib import contextmanager
 import boto3
 import pg8000.native
-from pg8000.exceptions import DatabaseError
+from pg8000.exceptions import DatabaseError, InterfaceError
 
 logger = logging.getLogger()
 _sm = boto3.client("secretsmanager")
 _creds_cache = {}
 
+# Connections are kept across warm invocations; ones idle longer than this are
+# probed with SELECT 1 before reuse.
+HEALTH_CHECK_IDLE_SECONDS = float(os.environ.get("DB_POOL_HEALTH_CHECK_IDLE_SECONDS", "30"))
+MAX_IDLE_CONNECTIONS = int(os.environ.get("DB_POOL_MAX_IDLE", "2"))
+_idle = []  # [(connection, returned_at)]
+_lock = threading.Lock()
+_stats = {"connections_opened": 0, "borrows": 0, "reuses": 0, "health_check_failures": 0, "discarded": 0}
+
 def _creds():
     arn = os.environ["DB_SECRET_ARN"]
     if arn not in _creds_cache:
@@ -24,25 +33,78 @@ def _conn():
         ssl_context=True,
     )
 
-def execute(sql, params=None):
-    conn = _conn()
+def _close(conn):
+    _stats["discarded"] += 1
     try:
-        result = conn.run(sql, **params) if params else conn.run(sql)
-        logger.debug(f"Query executed successfully")
-        return result
-    except DatabaseError as e:
-        logger.error(f"Database error: {e}")
-        raise
-    finally:
         conn.close()
+    except Exception:
+        pass
 
-def execute_write(sql, params=None):
+def _healthy(conn, returned_at):
+    if time.monotonic() - returned_at < HEALTH_CHECK_IDLE_SECONDS:
+        return True
+    try:
+        conn.run("SELECT 1")
+        return True
+    except (DatabaseError, InterfaceError, OSError):
+        return False
+
+def _borrow():
+    while True:
+        with _lock:
+            if not _idle:
+                break
+            conn, returned_at = _idle.pop()
+        if _healthy(conn, returned_at):
+            _stats["borrows"] += 1
+            _stats["reuses"] += 1
+            return conn
+        _stats["health_check_failures"] += 1
+        _close(conn)
     conn = _conn()
+    _stats["borrows"] += 1
+    _stats["connections_opened"] += 1
+    return conn
+
+def _return(conn, broken=False):
+    with _lock:
+        if not broken and len(_idle) < MAX_IDLE_CONNECTIONS:
+            _idle.append((conn, time.monotonic()))
+            return
+    _close(conn)
+
+@contextmanager
+def connection():
+    """Borrow a pooled connection for one unit of work."""
+    conn = _borrow()
+    broken = False
     try:
-        conn.run(sql, **params) if params else conn.run(sql)
-        logger.debug(f"Write executed successfully")
-    except DatabaseError as e:
-        logger.error(f"Database error: {e}")
+        yield conn
+    except (InterfaceError, OSError):
+        broken = True
         raise
     finally:
-        conn.close()
+        _return(conn, broken)
+
+def pool_stats():
+    with _lock:
+        return dict(_stats, idle=len(_idle))
+
+def execute(sql, params=None):
+    with connection() as conn:
+        try:
+            result = conn.run(sql, **params) if params else conn.run(sql)
+            logger.debug(f"Query executed successfully")
+            return result
+        except DatabaseError as e:
+            logger.error(f"Database error: {e}")
+            raise
+
+def execute_write(sql, params=None):
+    with connection() as conn:
+        try:
+            conn.run(sql, **params) if params else conn.run(sql)
+            logger.debug(f"Write executed successfully")
+        except DatabaseError as e:
+            logger.error(f"Database error: {e}")
+            raise
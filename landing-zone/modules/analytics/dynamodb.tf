@@ -123,7 +123,41 @@ resource "aws_dynamodb_table" "report_cache" {
   })
 }
 
-# Metrics table for analytics queries
+resource "aws_dynamodb_table" "export_jobs" {
+  name         = "securebase-${var.environment}-export-jobs"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "customer_id"
+  range_key    = "job_id"
+
+  attribute {
+    name = "customer_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "job_id"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "ttl"
+    enabled        = true
+  }
+
+  server_side_encryption {
+    enabled = true
+  }
+
+  tags = merge(var.tags, {
+    Name      = "securebase-${var.environment}-export-jobs"
+    Component = "Analytics"
+    Phase     = "4"
+  })
+}
+
+# Metrics table for analytics queries. Raw rows use "<ISO timestamp>#<metric_name>"
+# as the range key (one run writes all its metrics at the same timestamp);
+# rollup partitions use the bucket's ISO start (see metrics_store.py).
 resource "aws_dynamodb_table" "metrics" {
   name         = "securebase-${var.environment}-metrics"
   billing_mode = "PAY_PER_REQUEST"
@@ -230,6 +264,12 @@ resource "aws_s3_bucket_lifecycle_configuration" "reports" {
     noncurrent_version_expiration {
       noncurrent_days = 30
     }
+
+    # Streamed exports abort their multipart upload on error; this catches
+    # uploads a timed-out invocation never got to abort.
+    abort_incomplete_multipart_upload {
+      days_after_initiation = 1
+    }
   }
 }
 
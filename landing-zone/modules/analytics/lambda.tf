@@ -98,7 +98,7 @@ resource "aws_lambda_function" "report_engine" {
   role          = aws_iam_role.analytics_write_role.arn
   handler       = "report_engine.lambda_handler"
   runtime       = "python3.11"
-  timeout       = 30
+  timeout       = 300 # async export jobs; API Gateway still cuts sync requests at 29s
   memory_size   = 512
 
   source_code_hash = fileexists("${path.root}/../phase2-backend/deploy/report_engine.zip") ? filebase64sha256("${path.root}/../phase2-backend/deploy/report_engine.zip") : null
@@ -108,13 +108,14 @@ resource "aws_lambda_function" "report_engine" {
 
   environment {
     variables = {
-      REPORTS_TABLE   = aws_dynamodb_table.reports.name
-      SCHEDULES_TABLE = aws_dynamodb_table.report_schedules.name
-      CACHE_TABLE     = aws_dynamodb_table.report_cache.name
-      METRICS_TABLE   = aws_dynamodb_table.metrics.name
-      S3_BUCKET       = aws_s3_bucket.reports.bucket
-      ENVIRONMENT     = var.environment
-      LOG_LEVEL       = "INFO"
+      REPORTS_TABLE     = aws_dynamodb_table.reports.name
+      SCHEDULES_TABLE   = aws_dynamodb_table.report_schedules.name
+      CACHE_TABLE       = aws_dynamodb_table.report_cache.name
+      METRICS_TABLE     = aws_dynamodb_table.metrics.name
+      EXPORT_JOBS_TABLE = aws_dynamodb_table.export_jobs.name
+      S3_BUCKET         = aws_s3_bucket.reports.bucket
+      ENVIRONMENT       = var.environment
+      LOG_LEVEL         = "INFO"
     }
   }
 
@@ -252,6 +253,7 @@ resource "aws_iam_role_policy" "analytics_write_permissions" {
           aws_dynamodb_table.report_schedules.arn,
           aws_dynamodb_table.report_cache.arn,
           aws_dynamodb_table.metrics.arn,
+          aws_dynamodb_table.export_jobs.arn,
           "${aws_dynamodb_table.reports.arn}/index/*",
           "${aws_dynamodb_table.report_schedules.arn}/index/*",
           "${aws_dynamodb_table.metrics.arn}/index/*"
@@ -263,6 +265,7 @@ resource "aws_iam_role_policy" "analytics_write_permissions" {
           "s3:PutObject",
           "s3:GetObject",
           "s3:DeleteObject",
+          "s3:AbortMultipartUpload",
           "s3:ListBucket"
         ]
         Resource = [
@@ -279,6 +282,14 @@ resource "aws_iam_role_policy" "analytics_write_permissions" {
         # cloudwatch:GetMetricData removed — not required for write-path Lambdas.
         Resource = "*"
       },
+      {
+        # report_engine hands asynchronous export jobs to itself
+        Effect = "Allow"
+        Action = [
+          "lambda:InvokeFunction"
+        ]
+        Resource = "arn:aws:lambda:${var.aws_region}:${data.aws_caller_identity.current.account_id}:function:securebase-${var.environment}-report-engine"
+      },
       {
         Effect = "Allow"
         Action = [
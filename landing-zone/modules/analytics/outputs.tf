@@ -28,6 +28,16 @@ output "cache_table_arn" {
   value       = aws_dynamodb_table.report_cache.arn
 }
 
+output "export_jobs_table_name" {
+  description = "DynamoDB export jobs table name"
+  value       = aws_dynamodb_table.export_jobs.name
+}
+
+output "export_jobs_table_arn" {
+  description = "DynamoDB export jobs table ARN"
+  value       = aws_dynamodb_table.export_jobs.arn
+}
+
 output "metrics_table_name" {
   description = "DynamoDB metrics table name"
   value       = aws_dynamodb_table.metrics.name
@@ -411,10 +411,17 @@ resource "aws_api_gateway_integration" "analytics_get" {
   uri                     = var.analytics_lambda_invoke_arn != null ? "arn:aws:apigateway:${var.aws_region}:lambda:path/2015-03-31/functions/${var.analytics_lambda_arn}/invocations" : ""
 }
 
+# /analytics/export resource
+resource "aws_api_gateway_resource" "analytics_export" {
+  rest_api_id = aws_api_gateway_rest_api.securebase_api.id
+  parent_id   = aws_api_gateway_resource.analytics.id
+  path_part   = "export"
+}
+
 # POST /analytics/export - Export report
 resource "aws_api_gateway_method" "analytics_export" {
   rest_api_id   = aws_api_gateway_rest_api.securebase_api.id
-  resource_id   = aws_api_gateway_resource.analytics.id
+  resource_id   = aws_api_gateway_resource.analytics_export.id
   http_method   = "POST"
   authorization = "CUSTOM"
   authorizer_id = aws_api_gateway_authorizer.jwt_authorizer.id
@@ -422,13 +429,38 @@ resource "aws_api_gateway_method" "analytics_export" {
 
 resource "aws_api_gateway_integration" "analytics_export" {
   rest_api_id             = aws_api_gateway_rest_api.securebase_api.id
-  resource_id             = aws_api_gateway_resource.analytics.id
+  resource_id             = aws_api_gateway_resource.analytics_export.id
   http_method             = aws_api_gateway_method.analytics_export.http_method
   integration_http_method = "POST"
   type                    = "AWS_PROXY"
   uri                     = var.analytics_lambda_invoke_arn != null ? "arn:aws:apigateway:${var.aws_region}:lambda:path/2015-03-31/functions/${var.analytics_lambda_arn}/invocations" : ""
 }
 
+# /analytics/export/{jobId} resource
+resource "aws_api_gateway_resource" "analytics_export_job" {
+  rest_api_id = aws_api_gateway_rest_api.securebase_api.id
+  parent_id   = aws_api_gateway_resource.analytics_export.id
+  path_part   = "{jobId}"
+}
+
+# GET /analytics/export/{jobId} - Export job status and download URL
+resource "aws_api_gateway_method" "analytics_export_job_get" {
+  rest_api_id   = aws_api_gateway_rest_api.securebase_api.id
+  resource_id   = aws_api_gateway_resource.analytics_export_job.id
+  http_method   = "GET"
+  authorization = "CUSTOM"
+  authorizer_id = aws_api_gateway_authorizer.jwt_authorizer.id
+}
+
+resource "aws_api_gateway_integration" "analytics_export_job_get" {
+  rest_api_id             = aws_api_gateway_rest_api.securebase_api.id
+  resource_id             = aws_api_gateway_resource.analytics_export_job.id
+  http_method             = aws_api_gateway_method.analytics_export_job_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.analytics_lambda_invoke_arn != null ? "arn:aws:apigateway:${var.aws_region}:lambda:path/2015-03-31/functions/${var.analytics_lambda_arn}/invocations" : ""
+}
+
 # /analytics/reports resource
 resource "aws_api_gateway_resource" "reports" {
   rest_api_id = aws_api_gateway_rest_api.securebase_api.id
@@ -832,6 +864,10 @@ resource "aws_api_gateway_deployment" "main" {
       try(aws_api_gateway_method.marketplace_resolve_post[0].id, null),
       try(aws_api_gateway_integration.marketplace_resolve_post[0].id, null),
       try(aws_lambda_permission.marketplace_resolve_api_gateway[0].id, null),
+      aws_api_gateway_method.analytics_export.id,
+      aws_api_gateway_integration.analytics_export.id,
+      aws_api_gateway_method.analytics_export_job_get.id,
+      aws_api_gateway_integration.analytics_export_job_get.id,
     ]))
   }
 
@@ -842,7 +878,9 @@ resource "aws_api_gateway_deployment" "main" {
   depends_on = [
     aws_api_gateway_integration.auth_login_post,
     aws_api_gateway_integration.auth_lambda,
-    aws_api_gateway_integration.marketplace_resolve_post
+    aws_api_gateway_integration.marketplace_resolve_post,
+    aws_api_gateway_integration.analytics_export,
+    aws_api_gateway_integration.analytics_export_job_get
   ]
 }
 
@@ -435,7 +435,8 @@ resource "aws_iam_role_policy" "notification_worker" {
         Action = [
           "sqs:ReceiveMessage",
           "sqs:DeleteMessage",
-          "sqs:GetQueueAttributes"
+          "sqs:GetQueueAttributes",
+          "sqs:ChangeMessageVisibility"
         ]
         Resource = aws_sqs_queue.notifications.arn
       },
@@ -444,7 +445,9 @@ resource "aws_iam_role_policy" "notification_worker" {
         Action = [
           "dynamodb:PutItem",
           "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
           "dynamodb:UpdateItem",
+          "dynamodb:DeleteItem",
           "dynamodb:Query"
         ]
         Resource = [
@@ -506,13 +509,15 @@ resource "aws_lambda_function" "notification_worker" {
       SES_FROM_EMAIL      = var.ses_from_email
       WEBHOOK_TIMEOUT     = "5"
       MAX_RETRIES         = "3"
-      NOTIFICATION_DEDUP_TABLE             = aws_dynamodb_table.notification_dedup.name
-      NOTIFICATION_DELIVERY_LOG_TABLE      = aws_dynamodb_table.notification_delivery_log.name
-      NOTIFICATION_DEDUP_WINDOW_SECONDS    = "300"
-      NOTIFICATION_MAX_RETRIES             = "3"
-      NOTIFICATION_RETRY_BACKOFF_BASE_MS   = "500"
-      NOTIFICATION_DELIVERY_LOG_TTL_DAYS   = "30"
-      DASHBOARD_ALERT_BASE_URL             = "https://app.securebase.io/alerts"
+      NOTIFICATION_DEDUP_TABLE                = aws_dynamodb_table.notification_dedup.name
+      NOTIFICATION_DELIVERY_LOG_TABLE         = aws_dynamodb_table.notification_delivery_log.name
+      NOTIFICATION_DEDUP_WINDOW_SECONDS       = "300"
+      NOTIFICATION_MAX_RETRIES                = "3"
+      NOTIFICATION_RETRY_BACKOFF_BASE_MS      = "500"
+      NOTIFICATION_DISPATCH_CONCURRENCY       = "16"
+      NOTIFICATION_TEMPLATE_CACHE_TTL_SECONDS = "60"
+      NOTIFICATION_DELIVERY_LOG_TTL_DAYS      = "30"
+      DASHBOARD_ALERT_BASE_URL                = "https://app.securebase.io/alerts"
     }
   }
   
@@ -526,6 +531,9 @@ resource "aws_lambda_event_source_mapping" "notifications" {
   event_source_arn = aws_sqs_queue.notifications.arn
   function_name    = aws_lambda_function.notification_worker.arn
   batch_size       = 10
+
+  # The worker returns batchItemFailures; only those records are redelivered
+  function_response_types = ["ReportBatchItemFailures"]
   
   enabled = true
 }
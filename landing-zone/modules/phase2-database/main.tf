@@ -417,6 +417,33 @@ resource "aws_dynamodb_table" "cloud_connections" {
   })
 }
 
+# Scan progress table — per-shard checkpoints for the sharded scheduled AWS scan
+resource "aws_dynamodb_table" "scan_progress" {
+  name         = "securebase-scan-progress"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "run_id"
+  range_key    = "shard"
+
+  attribute {
+    name = "run_id"
+    type = "S"
+  }
+
+  attribute {
+    name = "shard"
+    type = "N"
+  }
+
+  ttl {
+    attribute_name = "ttl"
+    enabled        = true
+  }
+
+  tags = merge(var.tags, {
+    Name = "securebase-scan-progress"
+  })
+}
+
 # ============================================
 # KMS Keys for Encryption
 # ============================================
@@ -96,3 +96,8 @@ output "cost_forecasts_table_name" {
   description = "DynamoDB cost forecasts table name"
   value       = aws_dynamodb_table.cost_forecasts.name
 }
+
+output "scan_progress_table_name" {
+  description = "DynamoDB scan progress table name"
+  value       = aws_dynamodb_table.scan_progress.name
+}
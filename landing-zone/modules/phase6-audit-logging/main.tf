@@ -196,6 +196,7 @@ resource "aws_s3_bucket_policy" "evidence" {
         }
         Action = [
           "s3:PutObject",
+          "s3:AbortMultipartUpload",
           "s3:GetObject",
           "s3:ListBucket"
         ]
@@ -264,6 +265,7 @@ resource "aws_iam_role_policy" "packager_s3" {
         Effect = "Allow"
         Action = [
           "s3:PutObject",
+          "s3:AbortMultipartUpload",
           "s3:GetObject",
           "s3:ListBucket"
         ]
@@ -73,7 +73,7 @@ resource "aws_iam_role_policy" "phase6_permissions" {
         Effect = "Allow"
         Action = [
           "dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:UpdateItem",
-          "dynamodb:Query", "dynamodb:Scan"
+          "dynamodb:BatchWriteItem", "dynamodb:Query", "dynamodb:Scan"
         ]
         Resource = [
           "arn:aws:dynamodb:${data.aws_region.current.name}:${data.aws_caller_identity.current.account_id}:table/securebase-compliance-scores",
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-control SQL vs the single-pass customer summary used by the
+Texas fintech compliance collector.
+
+The collector used to run one aggregate per control (TX-MT-R1 … TX-DASP-R1),
+re-reading tx_transaction_records for R1 and again, through
+check_ctr_filing_compliance(), for R2a, and reading the wallet table twice
+when both TX-MT-R4 and TX-DASP-R1 were collected.  It now computes every
+counter in one statement per customer (_CustomerSummary).  This script times
+both on the same seeded data and checks that they return the same numbers.
+
+Data comes from the generators in seed_texas_fintech_data.py, mapped onto
+the tx_* tables the collector reads (migration 005).  The seed script has no
+wallet or AML-alert generator, so wallets are synthesised and one alert is
+raised per suspicious transaction.  Everything runs in one transaction that
+is rolled back at the end unless --keep is given.
+
+The detect_structuring() lookup in TX-MT-R2a is unchanged and not timed.
+
+Usage:
+    python benchmark_texas_collector_sql.py --customer-id <UUID> --transactions 200000
+    python benchmark_texas_collector_sql.py --customer-id <UUID> --skip-load --iterations 20
+
+Environment Variables:
+    DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD (as seed_texas_fintech_data.py)
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime
+
+from psycopg2.extras import Json, RealDictCursor, execute_values
+
+from seed_texas_fintech_data import (
+    generate_customer_details,
+    generate_ctr_filings,
+    generate_sar_filings,
+    generate_transactions,
+    get_db_connection,
+)
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_HERE, "..", "lambda_layer", "python"))
+sys.path.insert(0, os.path.join(_HERE, "..", "functions"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+from texas_fintech_compliance_collector import (  # noqa: E402
+    ALL_CONTROLS,
+    _CONTROL_SUMMARY_SECTIONS,
+    _SUMMARY_SECTIONS,
+    _summary_query,
+)
+
+# Seed payment methods → tx_transaction_type
+TX_TYPES = {
+    'wire': 'wire_transfer',
+    'ACH': 'ach',
+    'check': 'check',
+    'card': 'prepaid_card',
+    'cash': 'cash',
+    'crypto': 'crypto',
+}
+
+# The collector's queries before the single-pass summary, one per section
+LEGACY_QUERIES = {
+    "txn": """
+        SELECT
+          COUNT(*) FILTER (WHERE transaction_date >= NOW() - INTERVAL '30 days')  AS last_30d,
+          COUNT(*) FILTER (WHERE transaction_date >= NOW() - INTERVAL '365 days') AS last_year,
+          COUNT(*)                                                                  AS total,
+          MIN(transaction_date)                                                     AS oldest,
+          MAX(transaction_date)                                                     AS newest,
+          COUNT(*) FILTER (WHERE sender_name IS NULL OR sender_account IS NULL)    AS missing_sender_fields,
+          COUNT(*) FILTER (WHERE amount >= 10000 AND transaction_type IN
+                           ('cash','money_order'))                                  AS ctr_eligible
+        FROM tx_transaction_records
+        WHERE customer_id = %(customer_id)s
+    """,
+    "ctr": """
+        SELECT
+          COUNT(*) AS eligible_transactions,
+          COUNT(*) FILTER (WHERE ctr_status = 'filed')    AS filed,
+          COUNT(*) FILTER (WHERE ctr_status = 'pending')  AS pending,
+          COUNT(*) FILTER (WHERE ctr_status = 'MISSING')  AS missing,
+          COUNT(*) FILTER (WHERE ctr_status = 'exempt')   AS exempt
+        FROM check_ctr_filing_compliance(%(customer_id)s)
+    """,
+    "aml": """
+        SELECT
+          COUNT(*) AS total_alerts,
+          COUNT(*) FILTER (WHERE status = 'open')            AS open_alerts,
+          COUNT(*) FILTER (WHERE status = 'escalated')       AS escalated,
+          COUNT(*) FILTER (WHERE sar_filed = TRUE)           AS sar_filed,
+          AVG(EXTRACT(EPOCH FROM
+            (COALESCE(dispositioned_at, NOW()) - alert_date)) / 86400
+          )::NUMERIC(6,1)                                     AS avg_days_to_disposition
+        FROM tx_aml_alerts
+        WHERE customer_id = %(customer_id)s
+    """,
+    "sar": """
+        SELECT filing_status, COUNT(*) AS count
+        FROM tx_sar_filings
+        WHERE customer_id = %(customer_id)s
+        GROUP BY filing_status
+    """,
+    "cip": """
+        SELECT
+          COUNT(*) AS total_customers,
+          COUNT(*) FILTER (WHERE identity_verified_at IS NULL)         AS unverified,
+          COUNT(*) FILTER (WHERE risk_rating = 'high'
+            AND enhanced_due_diligence = FALSE)                        AS high_risk_no_edd,
+          COUNT(*) FILTER (WHERE risk_rating = 'pep')                  AS pep_count,
+          COUNT(*) FILTER (WHERE last_reviewed_at < NOW() - INTERVAL '365 days'
+            OR last_reviewed_at IS NULL)                               AS overdue_review,
+          ROUND(AVG(CASE WHEN identity_verified_at IS NOT NULL THEN 1.0 ELSE 0.0 END) * 100, 1)
+                                                                        AS verification_rate_pct
+        FROM tx_cip_records
+        WHERE customer_id = %(customer_id)s
+    """,
+    "wallets": """
+        SELECT
+          COUNT(*) AS total_wallets,
+          COUNT(*) FILTER (WHERE is_customer_funds = TRUE)              AS customer_wallets,
+          COUNT(*) FILTER (WHERE is_customer_funds = TRUE
+            AND is_segregated = FALSE)                                   AS non_segregated,
+          COUNT(*) FILTER (WHERE is_customer_funds = TRUE
+            AND cold_storage = TRUE)                                     AS cold_storage,
+          COUNT(*) FILTER (WHERE is_customer_funds = TRUE
+            AND multi_sig_required = TRUE)                               AS multi_sig,
+          COUNT(DISTINCT asset_type)                                     AS asset_types,
+          SUM(CASE WHEN is_customer_funds AND balance_snapshot IS NOT NULL
+                   THEN balance_snapshot ELSE 0 END)                     AS total_balance_approx
+        FROM tx_digital_asset_wallets
+        WHERE customer_id = %(customer_id)s
+    """,
+}
+
+
+def load_dataset(cur, customer_id, num_customers, num_transactions, num_wallets):
+    """Generate seed data and insert it into the collector's tx_* tables."""
+    details = generate_customer_details(customer_id, num_customers)
+    transactions = generate_transactions(customer_id, details, num_transactions)
+    ctr_filings = generate_ctr_filings(transactions)
+    sar_filings = generate_sar_filings(customer_id, transactions)
+
+    execute_values(cur, """
+        INSERT INTO tx_cip_records (
+            customer_id, end_customer_ref, identity_verified_at, verification_method,
+            id_type, id_issuing_country, id_expiry_date, risk_rating,
+            enhanced_due_diligence, edd_completed_at, last_reviewed_at
+        ) VALUES %s
+        """, [
+        (
+            customer_id, d['id'], d['id_verification_date'],
+            d['id_verification_method'] or 'documentary', d['id_type'], 'US',
+            d['id_expiration_date'],
+            'standard' if d['risk_rating'] == 'medium' else d['risk_rating'],
+            d['edd_completion_date'] is not None, d['edd_completion_date'],
+            d['cdd_completion_date'],
+        ) for d in details
+    ], page_size=1000)
+
+    execute_values(cur, """
+        INSERT INTO tx_transaction_records (
+            id, customer_id, external_txn_id, transaction_date, transaction_type,
+            amount, currency, sender_name, sender_account, sender_id_type,
+            sender_id_number, recipient_name, recipient_account, channel, status
+        ) VALUES %s
+        """, [
+        (
+            t['transaction_id'], customer_id, f"{t['receipt_number']}-{i}",
+            t['transaction_timestamp'], TX_TYPES[t['method_of_payment']],
+            t['amount_usd'], t['currency_code'], t['sender_name'], t['sender_customer_id'],
+            t['sender_id_type'], t['sender_id_number'], t['recipient_name'],
+            t['recipient_account_number_encrypted'], 'branch', 'completed',
+        ) for i, t in enumerate(transactions)
+    ], page_size=1000)
+
+    execute_values(cur, """
+        INSERT INTO tx_ctr_filings (
+            customer_id, filing_reference, transaction_date, amount, subject_name,
+            filing_status, filing_date, related_transaction_ids
+        ) VALUES %s
+        """, [
+        (
+            customer_id, c['bsae_number'], c['transaction_date'], c['transaction_amount'],
+            c['customer_name'], 'filed' if c['filed_on_time'] else 'pending',
+            c['ctr_file_date'], [c['transaction_id']],
+        ) for c in ctr_filings
+    ], template="(%s, %s, %s, %s, %s, %s, %s, %s::uuid[])", page_size=1000)
+
+    execute_values(cur, """
+        INSERT INTO tx_sar_filings (
+            id, customer_id, filing_reference, activity_date_start, activity_date_end,
+            amount, activity_type, narrative, filing_status, filing_date,
+            related_transaction_ids
+        ) VALUES %s
+        """, [
+        (
+            s['sar_id'], customer_id, s['bsae_number'], s['detection_date'],
+            s['detection_date'], s['total_amount'], s['activity_type'], s['narrative'],
+            'filed', s['filing_date'], s['transaction_ids'],
+        ) for s in sar_filings
+    ], template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::uuid[])", page_size=1000)
+
+    sar_by_txn = {tx_id: s for s in sar_filings for tx_id in s['transaction_ids']}
+    alerts = [t for t in transactions if t['suspicious_activity_flagged']]
+    execute_values(cur, """
+        INSERT INTO tx_aml_alerts (
+            customer_id, external_alert_id, alert_type, alert_date, risk_score,
+            status, dispositioned_at, sar_filed, sar_id, related_transaction_ids,
+            raw_alert_payload
+        ) VALUES %s
+        """, [
+        (
+            customer_id, f"ALERT-{t['transaction_id'][:8]}",
+            sar_by_txn[t['transaction_id']]['activity_type'], t['transaction_timestamp'],
+            t['structuring_risk_score'], 'closed_sar',
+            sar_by_txn[t['transaction_id']]['filing_date'], True,
+            sar_by_txn[t['transaction_id']]['sar_id'], [t['transaction_id']],
+            Json({'source': 'benchmark'}),
+        ) for t in alerts
+    ], template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s::uuid[], %s)", page_size=1000)
+
+    snapshot_at = datetime.now()
+    execute_values(cur, """
+        INSERT INTO tx_digital_asset_wallets (
+            customer_id, wallet_address, asset_type, wallet_type, is_customer_funds,
+            is_segregated, balance_snapshot, snapshot_at, cold_storage, multi_sig_required
+        ) VALUES %s
+        """, [
+        (
+            customer_id, f"0x{uuid.uuid4().hex}", random.choice(['BTC', 'ETH', 'USDC']),
+            'segregated', random.random() < 0.8, random.random() < 0.95,
+            round(random.uniform(0, 100), 6), snapshot_at, random.random() < 0.5,
+            random.random() < 0.7,
+        ) for _ in range(num_wallets)
+    ], page_size=1000)
+
+    for table in ("tx_transaction_records", "tx_ctr_filings", "tx_sar_filings",
+                  "tx_cip_records", "tx_aml_alerts", "tx_digital_asset_wallets"):
+        cur.execute(f"ANALYZE {table}")
+
+    return {
+        'cip_records': len(details),
+        'transactions': len(transactions),
+        'ctr_filings': len(ctr_filings),
+        'sar_filings': len(sar_filings),
+        'aml_alerts': len(alerts),
+        'wallets': num_wallets,
+    }
+
+
+def legacy_statements():
+    """The per-control statements one full collection used to run, in order."""
+    return [
+        LEGACY_QUERIES[section]
+        for ctrl in ALL_CONTROLS
+        for section in _CONTROL_SUMMARY_SECTIONS[ctrl]
+    ]
+
+
+def summary_statements():
+    return [_summary_query(set(_SUMMARY_SECTIONS))]
+
+
+def run_statements(cur, statements, params):
+    rows = []
+    for sql in statements:
+        cur.execute(sql, params)
+        rows.append(cur.fetchall())
+    return rows
+
+
+def time_statements(cur, statements, params, iterations):
+    run_statements(cur, statements, params)  # warm the cache
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        run_statements(cur, statements, params)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def buffer_blocks(cur, statements, params):
+    """Shared buffers (hit + read) touched by the statements, per EXPLAIN."""
+    total = 0
+    for sql in statements:
+        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+        plan = cur.fetchone()["QUERY PLAN"][0]["Plan"]
+        total += plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+    return total
+
+
+def check_results(cur, params):
+    """Return the sections whose single-pass values differ from the legacy queries."""
+    summary_row = run_statements(cur, summary_statements(), params)[0][0]
+    mismatched = []
+    for section, sql in LEGACY_QUERIES.items():
+        legacy = run_statements(cur, [sql], params)[0]
+        if section == "sar":
+            expected = {r['filing_status']: r['count'] for r in legacy}
+            actual = summary_row['sar__by_status']
+        else:
+            expected = dict(legacy[0])
+            prefix = f"{section}__"
+            actual = {k[len(prefix):]: v for k, v in summary_row.items() if k.startswith(prefix)}
+        if expected != actual:
+            mismatched.append(section)
+    return mismatched
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Texas collector control SQL')
+    parser.add_argument('--customer-id', required=True, help='Customer UUID')
+    parser.add_argument('--customers', type=int, default=2000, help='CIP records to generate')
+    parser.add_argument('--transactions', type=int, default=200000, help='Transactions to generate')
+    parser.add_argument('--wallets', type=int, default=50, help='Digital asset wallets to generate')
+    parser.add_argument('--iterations', type=int, default=10, help='Timed runs per variant')
+    parser.add_argument('--skip-load', action='store_true', help='Benchmark the existing rows only')
+    parser.add_argument('--keep', action='store_true', help='Commit the generated rows')
+    args = parser.parse_args()
+
+    try:
+        uuid.UUID(args.customer_id)
+    except ValueError:
+        print("❌ Invalid customer_id format: must be UUID")
+        sys.exit(1)
+
+    conn = get_db_connection()
+    cur = conn.cursor(cursor_factory=RealDictCursor)
+    params = {'customer_id': args.customer_id}
+
+    try:
+        cur.execute("SET app.current_customer_id = %s", (args.customer_id,))
+        cur.execute("SET app.role = %s", ('admin',))
+
+        if not args.skip_load:
+            print(f"🌱 Loading {args.transactions} transactions for {args.customer_id}...")
+            counts = load_dataset(
+                cur, args.customer_id, args.customers, args.transactions, args.wallets
+            )
+            for name, count in counts.items():
+                print(f"   ✓ {name}: {count}")
+
+        mismatched = check_results(cur, params)
+        if mismatched:
+            print(f"❌ Single-pass results differ from legacy queries: {', '.join(mismatched)}")
+            sys.exit(1)
+        print("✅ Single-pass summary matches the per-control queries")
+
+        variants = {
+            'per-control': legacy_statements(),
+            'single-pass': summary_statements(),
+        }
+        results = {}
+        for name, statements in variants.items():
+            samples = time_statements(cur, statements, params, args.iterations)
+            results[name] = {
+                'statements': len(statements),
+                'median_ms': statistics.median(samples),
+                'min_ms': min(samples),
+                'buffers': buffer_blocks(cur, statements, params),
+            }
+
+        print(f"\n{'variant':<12} {'stmts':>5} {'median ms':>10} {'min ms':>10} {'buffers':>9}")
+        for name, r in results.items():
+            print(f"{name:<12} {r['statements']:>5} {r['median_ms']:>10.1f} "
+                  f"{r['min_ms']:>10.1f} {r['buffers']:>9}")
+        before, after = results['per-control'], results['single-pass']
+        print(f"\n⚡ {before['median_ms'] / max(after['median_ms'], 1e-9):.1f}x faster, "
+              f"{before['buffers'] / max(after['buffers'], 1):.1f}x fewer buffer accesses")
+    finally:
+        if args.keep:
+            conn.commit()
+        else:
+            conn.rollback()
+        cur.close()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
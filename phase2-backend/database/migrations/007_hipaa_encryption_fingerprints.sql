@@ -0,0 +1,8 @@
+-- 2026-10-17: Configuration fingerprints for incremental AWS scanner runs
+--
+-- aws_scanner stores a SHA-256 of each resource's configuration responses
+-- next to its encryption status. Delta scans compare against it and skip
+-- re-classification and writes for resources whose configuration is unchanged.
+
+ALTER TABLE IF EXISTS hipaa_encryption_status
+  ADD COLUMN IF NOT EXISTS config_fingerprint TEXT;
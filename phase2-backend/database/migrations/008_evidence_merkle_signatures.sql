@@ -0,0 +1,20 @@
+-- 2026-10-17: Merkle-batched evidence signatures
+--
+-- The HIPAA and Texas collectors can sign a whole run with one KMS call: the
+-- content hashes of every evidence item become the leaves of a Merkle tree
+-- and only the root is signed. kms_signature_b64 then holds the root
+-- signature, and these columns carry what is needed to check one item
+-- against it offline (phase2-backend/lambda_layer/python/evidence_merkle.py).
+-- Rows signed per item leave them NULL.
+
+ALTER TABLE IF EXISTS hipaa_evidence_signatures
+  ADD COLUMN IF NOT EXISTS merkle_root       TEXT,
+  ADD COLUMN IF NOT EXISTS merkle_proof      JSONB,
+  ADD COLUMN IF NOT EXISTS merkle_leaf_index INTEGER,
+  ADD COLUMN IF NOT EXISTS merkle_leaf_count INTEGER;
+
+ALTER TABLE IF EXISTS tx_evidence_signatures
+  ADD COLUMN IF NOT EXISTS merkle_root       TEXT,
+  ADD COLUMN IF NOT EXISTS merkle_proof      JSONB,
+  ADD COLUMN IF NOT EXISTS merkle_leaf_index INTEGER,
+  ADD COLUMN IF NOT EXISTS merkle_leaf_count INTEGER;
@@ -0,0 +1,23 @@
+-- 2026-10-17: Checkpoints for resumable scheduled HIPAA collection
+--
+-- The scheduled hipaa_compliance_collector run splits customers into chunks
+-- collected in parallel. Each completed (customer, control) pair is recorded
+-- here under the run's id (the EventBridge event id), so a retried or
+-- continued invocation of the same run skips work that is already done.
+-- Rows are operational metadata only (no PHI) and are read across customers
+-- by the run coordinator, so the table is not under RLS. The collector
+-- prunes rows older than 14 days.
+
+CREATE TABLE IF NOT EXISTS hipaa_collection_checkpoints (
+  run_id        TEXT NOT NULL,
+  customer_id   UUID NOT NULL REFERENCES customers(id) ON DELETE CASCADE,
+  control_id    TEXT NOT NULL,
+  completed_at  TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+  PRIMARY KEY (run_id, customer_id, control_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_hipaa_checkpoints_completed_at
+  ON hipaa_collection_checkpoints(completed_at);
+
+COMMENT ON TABLE hipaa_collection_checkpoints IS
+  'Completed (customer, control) pairs per scheduled HIPAA collection run.';
@@ -0,0 +1,14 @@
+-- 2026-10-17: Index for incremental session revocation reads
+--
+-- session_management validates signed session tokens locally and keeps a
+-- per-container Bloom filter of revoked sessions. Every few seconds each
+-- warm container reads sessions deactivated since its last refresh:
+--
+--   SELECT session_token_hash, logged_out_at FROM user_sessions
+--   WHERE is_active = false AND logged_out_at >= $1 AND expires_at > NOW()
+--
+-- The partial index keeps that read proportional to recent revocations.
+
+CREATE INDEX IF NOT EXISTS idx_user_sessions_logged_out
+  ON user_sessions(logged_out_at)
+  WHERE is_active = false;
@@ -2,6 +2,11 @@
 Analytics Aggregator Lambda - Phase 4
 Aggregates customer usage metrics from various AWS services
 Triggered by CloudWatch Events (cron schedule)
+
+Each run also folds the new metric rows into the hourly and daily rollup
+items that analytics queries read (see lambda_layer metrics_store).
+Invoke with {"action": "rebuild_rollups", "days": N} to backfill or repair
+rollups from raw rows.
 """
 
 import json
@@ -12,6 +17,8 @@ from decimal import Decimal
 import logging
 from typing import Dict, List, Any
 
+from metrics_store import raw_sort_key, rebuild_rollups, update_rollups
+
 # Setup logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
@@ -46,6 +53,9 @@ def lambda_handler(event, context):
     Triggered by EventBridge rule (runs every hour)
     """
     try:
+        if event.get('action') == 'rebuild_rollups':
+            return handle_rebuild_rollups(event)
+        
         logger.info(f"Starting metrics aggregation for environment: {ENVIRONMENT}")
         
         # Get all customers
@@ -71,6 +81,8 @@ def lambda_handler(event, context):
                 
                 # Store in DynamoDB
                 store_metrics(customer_id, metrics)
+                if metrics:
+                    update_rollups(metrics_table, customer_id, metrics, metrics[0]['timestamp'])
                 
                 results['customers_processed'] += 1
                 results['metrics_stored'] += len(metrics)
@@ -95,6 +107,28 @@ def lambda_handler(event, context):
         }
 
 
+def handle_rebuild_rollups(event: Dict) -> Dict:
+    """Recompute rollups from raw rows for the last N days (all customers or one)"""
+    days = int(event.get('days', 1))
+    end_time = datetime.utcnow()
+    start_time = end_time - timedelta(days=days)
+    
+    if event.get('customer_id'):
+        customer_ids = [event['customer_id']]
+    else:
+        customer_ids = [c['id'] for c in get_all_customers()]
+    
+    written = 0
+    for customer_id in customer_ids:
+        written += rebuild_rollups(metrics_table, customer_id, start_time, end_time)
+    
+    logger.info(f"Rebuilt {written} rollup items for {len(customer_ids)} customers over {days} days")
+    return {
+        'statusCode': 200,
+        'body': json.dumps({'customers': len(customer_ids), 'rollups_written': written})
+    }
+
+
 def get_all_customers() -> List[Dict[str, Any]]:
     """Retrieve all active customers from DynamoDB"""
     try:
@@ -355,7 +389,10 @@ def store_metrics(customer_id: str, metrics: List[Dict[str, Any]]):
             for metric in metrics:
                 # Add region for GSI
                 metric['region'] = os.environ.get('AWS_REGION', 'us-east-1')
-                batch.put_item(Item=metric)
+                # Every metric of a run shares its timestamp; key each row on
+                # timestamp#metric_name so they do not overwrite each other
+                item = dict(metric, timestamp=raw_sort_key(metric['timestamp'], metric['metric_name']))
+                batch.put_item(Item=item)
         
         logger.info(f"Stored {len(metrics)} metrics for customer {customer_id}")
     except Exception as e:
@@ -11,7 +11,9 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 import logging
 from typing import Dict, List, Any, Optional
-import hashlib
+
+from analytics_cache import TieredCache, canonical_cache_key, emit_cache_metrics
+from metrics_store import read_metric_summaries
 
 # Setup logging
 logger = logging.getLogger()
@@ -30,6 +32,9 @@ CACHE_TTL_SECONDS = int(os.environ.get('CACHE_TTL_SECONDS', '3600'))  # 1 hour d
 metrics_table = dynamodb.Table(METRICS_TABLE)
 cache_table = dynamodb.Table(CACHE_TABLE)
 
+# Two-tier result cache; the in-process tier survives across warm invocations
+query_cache = TieredCache(cache_table, ttl=CACHE_TTL_SECONDS)
+
 
 class DecimalEncoder(json.JSONEncoder):
     """Helper to convert Decimal to float/int for JSON serialization"""
@@ -87,6 +92,9 @@ def lambda_handler(event, context):
     except Exception as e:
         logger.error(f"Request failed: {str(e)}")
         return error_response(str(e), 500)
+    
+    finally:
+        emit_cache_metrics('analytics_query', query_cache.local)
 
 
 def handle_usage_query(customer_id: str, params: Dict) -> Dict:
@@ -98,36 +106,12 @@ def handle_usage_query(customer_id: str, params: Dict) -> Dict:
     try:
         period = params.get('period', '30d')
         
-        # Check cache first
-        cache_key = generate_cache_key(customer_id, 'usage', period)
-        cached = get_from_cache(cache_key)
-        if cached:
-            logger.info(f"Cache hit for {cache_key}")
-            return success_response(cached)
-        
-        # Query metrics
-        days = parse_period(period)
-        metrics = query_metrics(customer_id, days)
-        
-        # Aggregate usage metrics
-        usage_data = {
-            'customer_id': customer_id,
-            'period': period,
-            'metrics': {
-                'api_calls': sum_metric(metrics, 'api_calls'),
-                'storage_gb': sum_metric(metrics, 'storage_gb'),
-                'compute_hours': sum_metric(metrics, 'compute_hours'),
-                'data_transfer_gb': sum_metric(metrics, 'data_transfer_gb')
-            },
-            'trends': {
-                'api_calls_change': calculate_change(metrics, 'api_calls', days),
-                'storage_change': calculate_change(metrics, 'storage_gb', days)
-            },
-            'generated_at': datetime.utcnow().isoformat()
-        }
-        
-        # Cache result
-        store_in_cache(cache_key, usage_data)
+        # Served from cache; computed by the first caller on a miss
+        usage_data = query_cache.get_or_compute(
+            canonical_cache_key(customer_id, 'usage', {'period': period}),
+            lambda: build_usage(customer_id, period),
+            is_negative=lambda data: not any(data['metrics'].values()),
+        )
         
         return success_response(usage_data)
         
@@ -136,67 +120,41 @@ def handle_usage_query(customer_id: str, params: Dict) -> Dict:
         return error_response(str(e), 500)
 
 
+def build_usage(customer_id: str, period: str) -> Dict:
+    """Build the usage payload from metric summaries"""
+    days = parse_period(period)
+    metrics = query_metrics(
+        customer_id, days, ['api_calls', 'storage_gb', 'compute_hours', 'data_transfer_gb']
+    )
+    
+    return {
+        'customer_id': customer_id,
+        'period': period,
+        'metrics': {
+            'api_calls': sum_metric(metrics, 'api_calls'),
+            'storage_gb': sum_metric(metrics, 'storage_gb'),
+            'compute_hours': sum_metric(metrics, 'compute_hours'),
+            'data_transfer_gb': sum_metric(metrics, 'data_transfer_gb')
+        },
+        'trends': {
+            'api_calls_change': calculate_change(metrics, 'api_calls', days),
+            'storage_change': calculate_change(metrics, 'storage_gb', days)
+        },
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+
 def handle_compliance_query(customer_id: str, params: Dict) -> Dict:
     """
     GET /analytics/compliance
     Returns compliance score and findings
     """
     try:
-        # Check cache
-        cache_key = generate_cache_key(customer_id, 'compliance', '')
-        cached = get_from_cache(cache_key)
-        if cached:
-            logger.info(f"Cache hit for {cache_key}")
-            return success_response(cached)
-        
-        # Query metrics
-        metrics = query_metrics(customer_id, 30)  # Last 30 days
-        
-        # Get latest compliance metrics
-        compliance_metrics = [m for m in metrics if m.get('metric_name') == 'compliance_score']
-        security_metrics = [m for m in metrics if m.get('metric_name') == 'security_findings']
-        
-        latest_score = 0
-        findings = {'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
-        
-        if compliance_metrics:
-            latest_score = float(compliance_metrics[-1].get('value', 0))
-        
-        if security_metrics:
-            latest_security = security_metrics[-1]
-            metadata = latest_security.get('metadata', {})
-            findings = {
-                'critical': metadata.get('critical', 0),
-                'high': metadata.get('high', 0),
-                'medium': metadata.get('medium', 0),
-                'low': metadata.get('low', 0)
-            }
-        
-        # Calculate trend
-        if len(compliance_metrics) >= 2:
-            previous_score = float(compliance_metrics[0].get('value', 0))
-            score_change = latest_score - previous_score
-            trend = f"+{score_change:.1f} from last month" if score_change > 0 else f"{score_change:.1f} from last month"
-        else:
-            trend = "Insufficient data"
-        
-        # Top issues (mocked - in production, query from Security Hub)
-        top_issues = [
-            "S3 bucket encryption not enabled",
-            "CloudTrail logging gaps"
-        ] if findings['high'] > 0 or findings['medium'] > 0 else []
-        
-        compliance_data = {
-            'customer_id': customer_id,
-            'current_score': int(latest_score),
-            'trend': trend,
-            'findings': findings,
-            'top_issues': top_issues,
-            'generated_at': datetime.utcnow().isoformat()
-        }
-        
-        # Cache result
-        store_in_cache(cache_key, compliance_data)
+        compliance_data = query_cache.get_or_compute(
+            canonical_cache_key(customer_id, 'compliance'),
+            lambda: build_compliance(customer_id),
+            is_negative=lambda data: not data['current_score'] and data['trend'] == 'Insufficient data',
+        )
         
         return success_response(compliance_data)
         
@@ -205,6 +163,53 @@ def handle_compliance_query(customer_id: str, params: Dict) -> Dict:
         return error_response(str(e), 500)
 
 
+def build_compliance(customer_id: str) -> Dict:
+    """Build the compliance payload from the last 30 days of metrics"""
+    metrics = query_metrics(customer_id, 30, ['compliance_score', 'security_findings'])
+    
+    # Get latest compliance metrics
+    compliance_metrics = metrics.get('compliance_score')
+    security_metrics = metrics.get('security_findings')
+    
+    latest_score = 0
+    findings = {'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
+    
+    if compliance_metrics:
+        latest_score = float(compliance_metrics['last'] or 0)
+    
+    if security_metrics:
+        metadata = security_metrics.get('last_metadata', {})
+        findings = {
+            'critical': metadata.get('critical', 0),
+            'high': metadata.get('high', 0),
+            'medium': metadata.get('medium', 0),
+            'low': metadata.get('low', 0)
+        }
+    
+    # Calculate trend
+    if compliance_metrics and compliance_metrics['count'] >= 2:
+        previous_score = float(compliance_metrics['first'] or 0)
+        score_change = latest_score - previous_score
+        trend = f"+{score_change:.1f} from last month" if score_change > 0 else f"{score_change:.1f} from last month"
+    else:
+        trend = "Insufficient data"
+    
+    # Top issues (mocked - in production, query from Security Hub)
+    top_issues = [
+        "S3 bucket encryption not enabled",
+        "CloudTrail logging gaps"
+    ] if findings['high'] > 0 or findings['medium'] > 0 else []
+    
+    return {
+        'customer_id': customer_id,
+        'current_score': int(latest_score),
+        'trend': trend,
+        'findings': findings,
+        'top_issues': top_issues,
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+
 def handle_costs_query(customer_id: str, params: Dict) -> Dict:
     """
     GET /analytics/costs
@@ -215,46 +220,11 @@ def handle_costs_query(customer_id: str, params: Dict) -> Dict:
         period = params.get('period', '30d')
         breakdown_by = params.get('breakdown', 'service')
         
-        # Check cache
-        cache_key = generate_cache_key(customer_id, f'costs_{breakdown_by}', period)
-        cached = get_from_cache(cache_key)
-        if cached:
-            logger.info(f"Cache hit for {cache_key}")
-            return success_response(cached)
-        
-        # Query metrics
-        days = parse_period(period)
-        metrics = query_metrics(customer_id, days)
-        
-        # Get cost metrics
-        cost_metrics = [m for m in metrics if m.get('metric_name') == 'daily_cost']
-        
-        total_cost = sum(float(m.get('value', 0)) for m in cost_metrics)
-        
-        # Aggregate breakdown
-        breakdown = {'compute': 0, 'storage': 0, 'networking': 0}
-        for metric in cost_metrics:
-            metadata = metric.get('metadata', {})
-            breakdown_data = metadata.get('breakdown', {})
-            for service, amount in breakdown_data.items():
-                if service in breakdown:
-                    breakdown[service] += amount
-        
-        # Calculate forecast (simple extrapolation)
-        avg_daily_cost = total_cost / max(days, 1)
-        forecast_next_month = avg_daily_cost * 30
-        
-        cost_data = {
-            'customer_id': customer_id,
-            'period': period,
-            'total': round(total_cost, 2),
-            'breakdown': {k: round(v, 2) for k, v in breakdown.items()},
-            'forecast_next_month': round(forecast_next_month, 2),
-            'generated_at': datetime.utcnow().isoformat()
-        }
-        
-        # Cache result
-        store_in_cache(cache_key, cost_data)
+        cost_data = query_cache.get_or_compute(
+            canonical_cache_key(customer_id, 'costs', {'period': period, 'breakdown': breakdown_by}),
+            lambda: build_costs(customer_id, period),
+            is_negative=lambda data: not data['total'],
+        )
         
         return success_response(cost_data)
         
@@ -263,6 +233,37 @@ def handle_costs_query(customer_id: str, params: Dict) -> Dict:
         return error_response(str(e), 500)
 
 
+def build_costs(customer_id: str, period: str) -> Dict:
+    """Build the cost breakdown and forecast payload"""
+    days = parse_period(period)
+    metrics = query_metrics(customer_id, days, ['daily_cost'])
+    
+    # Get cost metrics
+    cost_metrics = metrics.get('daily_cost')
+    
+    total_cost = float(cost_metrics['sum']) if cost_metrics else 0.0
+    
+    # Aggregate breakdown (summed per bucket by the rollups)
+    breakdown = {'compute': 0, 'storage': 0, 'networking': 0}
+    if cost_metrics:
+        for service, amount in cost_metrics['breakdown'].items():
+            if service in breakdown:
+                breakdown[service] += float(amount)
+    
+    # Calculate forecast (simple extrapolation)
+    avg_daily_cost = total_cost / max(days, 1)
+    forecast_next_month = avg_daily_cost * 30
+    
+    return {
+        'customer_id': customer_id,
+        'period': period,
+        'total': round(total_cost, 2),
+        'breakdown': {k: round(v, 2) for k, v in breakdown.items()},
+        'forecast_next_month': round(forecast_next_month, 2),
+        'generated_at': datetime.utcnow().isoformat()
+    }
+
+
 def handle_custom_report(customer_id: str, body: Dict) -> Dict:
     """
     POST /analytics/reports
@@ -276,13 +277,9 @@ def handle_custom_report(customer_id: str, body: Dict) -> Dict:
         
         logger.info(f"Custom report request: type={report_type}, fields={fields}")
         
-        # Query based on filters
+        # Query based on filters, restricted to the requested fields
         days = parse_period(filters.get('period', '30d'))
-        metrics = query_metrics(customer_id, days)
-        
-        # Filter metrics by requested fields
-        if fields:
-            metrics = [m for m in metrics if m.get('metric_name') in fields]
+        metrics = query_metrics(customer_id, days, fields or None)
         
         # Build custom report
         report_data = {
@@ -302,60 +299,59 @@ def handle_custom_report(customer_id: str, body: Dict) -> Dict:
         return error_response(str(e), 500)
 
 
-def query_metrics(customer_id: str, days: int) -> List[Dict]:
-    """Query metrics from DynamoDB for specified period"""
+def query_metrics(
+    customer_id: str, days: int, metric_names: Optional[List[str]] = None
+) -> Dict[str, Dict]:
+    """
+    Summarise metrics for the specified period, keyed by metric name
+    
+    Whole days and hours come from the rollups maintained by
+    analytics_aggregator; raw rows are read only for the partial hours at
+    either end of the range.  See metrics_store.read_metric_summaries.
+    """
     try:
         end_time = datetime.utcnow()
         start_time = end_time - timedelta(days=days)
         
-        response = metrics_table.query(
-            KeyConditionExpression='customer_id = :cid AND #ts BETWEEN :start AND :end',
-            ExpressionAttributeNames={'#ts': 'timestamp'},
-            ExpressionAttributeValues={
-                ':cid': customer_id,
-                ':start': start_time.isoformat(),
-                ':end': end_time.isoformat()
-            }
-        )
-        
-        metrics = response.get('Items', [])
+        metrics = read_metric_summaries(metrics_table, customer_id, start_time, end_time, metric_names)
         logger.info(f"Queried {len(metrics)} metrics for customer {customer_id}")
         
         return metrics
         
     except Exception as e:
         logger.error(f"Metrics query failed: {str(e)}")
-        return []
+        return {}
 
 
-def sum_metric(metrics: List[Dict], metric_name: str) -> float:
+def sum_metric(metrics: Dict[str, Dict], metric_name: str) -> float:
     """Sum all values for a specific metric"""
-    total = sum(
-        float(m.get('value', 0))
-        for m in metrics
-        if m.get('metric_name') == metric_name
-    )
-    return round(total, 2)
+    summary = metrics.get(metric_name)
+    return round(float(summary['sum']), 2) if summary else 0
 
 
-def calculate_change(metrics: List[Dict], metric_name: str, days: int) -> str:
+def calculate_change(metrics: Dict[str, Dict], metric_name: str, days: int) -> str:
     """Calculate percentage change over period"""
-    metric_values = [
-        (m.get('timestamp'), float(m.get('value', 0)))
-        for m in metrics
-        if m.get('metric_name') == metric_name
-    ]
-    
-    if len(metric_values) < 2:
+    summary = metrics.get(metric_name)
+    if not summary or summary['count'] < 2:
         return 'N/A'
     
-    # Sort by timestamp
-    metric_values.sort(key=lambda x: x[0])
+    # Compare the average of the first half of the samples against the
+    # second half, splitting on sample count across the (sorted) buckets
+    half = summary['count'] // 2
+    first_sum = second_sum = 0.0
+    first_count = 0
+    for point in summary['series']:
+        if first_count < half:
+            first_sum += float(point['sum'])
+            first_count += point['count']
+        else:
+            second_sum += float(point['sum'])
+    second_count = summary['count'] - first_count
+    if not first_count or not second_count:
+        return 'N/A'
     
-    # Compare first half vs second half
-    mid_point = len(metric_values) // 2
-    first_half_avg = sum(v[1] for v in metric_values[:mid_point]) / mid_point
-    second_half_avg = sum(v[1] for v in metric_values[mid_point:]) / (len(metric_values) - mid_point)
+    first_half_avg = first_sum / first_count
+    second_half_avg = second_sum / second_count
     
     if first_half_avg == 0:
         return '+100%' if second_half_avg > 0 else 'N/A'
@@ -364,30 +360,33 @@ def calculate_change(metrics: List[Dict], metric_name: str, days: int) -> str:
     return f"+{change_pct:.0f}%" if change_pct > 0 else f"{change_pct:.0f}%"
 
 
-def process_metrics(metrics: List[Dict]) -> List[Dict]:
-    """Process metrics for report output"""
+def process_metrics(metrics: Dict[str, Dict]) -> List[Dict]:
+    """Process metrics for report output (one row per metric per bucket)"""
     processed = []
     
-    for metric in metrics:
-        processed.append({
-            'name': metric.get('metric_name', 'unknown'),
-            'value': float(metric.get('value', 0)),
-            'unit': metric.get('unit', ''),
-            'service': metric.get('service', ''),
-            'timestamp': metric.get('timestamp', '')
-        })
+    for metric_name, summary in metrics.items():
+        for point in summary['series']:
+            processed.append({
+                'name': metric_name,
+                'value': float(point['sum']),
+                'count': point['count'],
+                'unit': summary.get('unit', ''),
+                'service': summary.get('service', ''),
+                'timestamp': point['timestamp']
+            })
     
+    processed.sort(key=lambda row: row['timestamp'])
     return processed
 
 
-def generate_summary(metrics: List[Dict]) -> Dict[str, Any]:
+def generate_summary(metrics: Dict[str, Dict]) -> Dict[str, Any]:
     """Generate summary statistics from metrics"""
     summary = {
-        'total_metrics': len(metrics),
-        'metric_types': len(set(m.get('metric_name') for m in metrics)),
+        'total_metrics': sum(m['count'] for m in metrics.values()),
+        'metric_types': len(metrics),
         'date_range': {
-            'start': min((m.get('timestamp') for m in metrics), default='N/A'),
-            'end': max((m.get('timestamp') for m in metrics), default='N/A')
+            'start': min((m['first_ts'] for m in metrics.values() if m['first_ts']), default='N/A'),
+            'end': max((m['last_ts'] for m in metrics.values() if m['last_ts']), default='N/A')
         }
     }
     
@@ -408,60 +407,6 @@ def parse_period(period: str) -> int:
         return 30
 
 
-def generate_cache_key(customer_id: str, query_type: str, params: str) -> str:
-    """Generate cache key for query"""
-    key_string = f"{customer_id}:{query_type}:{params}"
-    return hashlib.md5(key_string.encode()).hexdigest()
-
-
-def get_from_cache(cache_key: str) -> Optional[Dict]:
-    """Retrieve cached result if not expired"""
-    try:
-        response = cache_table.get_item(Key={'cache_key': cache_key})
-        item = response.get('Item')
-        
-        if not item:
-            return None
-        
-        # Check if expired
-        expires_at_str = item.get('expires_at')
-        if expires_at_str:
-            try:
-                expires_at = datetime.fromisoformat(expires_at_str)
-                if expires_at < datetime.utcnow():
-                    logger.info(f"Cache expired for {cache_key}")
-                    return None
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Invalid expires_at format for cache key {cache_key}: {e}")
-                return None
-        
-        return item.get('data')
-        
-    except Exception as e:
-        logger.error(f"Cache retrieval failed: {str(e)}")
-        return None
-
-
-def store_in_cache(cache_key: str, data: Dict):
-    """Store query result in cache"""
-    try:
-        expires_at = datetime.utcnow() + timedelta(seconds=CACHE_TTL_SECONDS)
-        
-        cache_table.put_item(
-            Item={
-                'cache_key': cache_key,
-                'data': data,
-                'created_at': datetime.utcnow().isoformat(),
-                'expires_at': expires_at.isoformat()
-            }
-        )
-        
-        logger.info(f"Cached result for {cache_key}")
-        
-    except Exception as e:
-        logger.error(f"Cache storage failed: {str(e)}")
-
-
 def success_response(data: Dict) -> Dict:
     """Generate success response"""
     return {
@@ -1,6 +1,6 @@
 """
 Analytics Reporter Lambda - Phase 4
-Generates analytics reports in various formats (CSV, JSON, PDF, Excel)
+Generates analytics reports in various formats (CSV, JSON, PDF, Excel, Parquet)
 Handles both on-demand and scheduled report generation
 """
 
@@ -15,6 +15,10 @@ import csv
 import io
 import base64
 
+from columnar_export import PARQUET_CONTENT_TYPE, to_parquet
+from metrics_kernel import MetricColumns, aggregate, to_decimal
+from metrics_store import query_raw_metrics
+
 # Setup logging
 logger = logging.getLogger()
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
@@ -176,18 +180,8 @@ def generate_report(customer_id: str, report_type: str, period: str) -> Dict[str
         
         logger.info(f"Querying metrics from {start_time} to {end_time}")
         
-        # Query metrics from DynamoDB
-        response = metrics_table.query(
-            KeyConditionExpression='customer_id = :cid AND #ts BETWEEN :start AND :end',
-            ExpressionAttributeNames={'#ts': 'timestamp'},
-            ExpressionAttributeValues={
-                ':cid': customer_id,
-                ':start': start_time.isoformat(),
-                ':end': end_time.isoformat()
-            }
-        )
-        
-        metrics = response.get('Items', [])
+        # Query metrics from DynamoDB (all pages)
+        metrics = list(query_raw_metrics(metrics_table, customer_id, start_time, end_time))
         logger.info(f"Found {len(metrics)} metrics")
         
         # Aggregate metrics by type
@@ -235,6 +229,10 @@ def format_report(report_data: Dict, format_type: str, customer_id: str, report_
             content = generate_excel(report_data)
             content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
             
+        elif format_type == 'parquet':
+            content = generate_parquet(report_data)
+            content_type = PARQUET_CONTENT_TYPE
+            
         else:
             raise ValueError(f"Unsupported format: {format_type}")
         
@@ -307,6 +305,28 @@ def generate_csv(report_data: Dict) -> str:
     return output.getvalue()
 
 
+def generate_parquet(report_data: Dict) -> bytes:
+    """
+    Generate Parquet format report
+    
+    One row per metric with the report context repeated on every row, so the
+    file can be loaded straight into Athena/pandas without reshaping.
+    """
+    rows = [
+        {
+            'customer_id': report_data['customer_id'],
+            'period': report_data['period'],
+            'generated_at': report_data['generated_at'],
+            'metric': metric_name,
+            'value': float(metric_data.get('value', 0)),
+            'unit': metric_data.get('unit', ''),
+            'service': metric_data.get('service', ''),
+        }
+        for metric_name, metric_data in report_data.get('metrics', {}).items()
+    ]
+    return to_parquet(rows)
+
+
 def generate_pdf(report_data: Dict) -> bytes:
     """
     Generate PDF format report (requires ReportLab layer)
@@ -431,37 +451,30 @@ def generate_excel(report_data: Dict) -> bytes:
 
 
 def aggregate_metrics(metrics: List[Dict]) -> Dict[str, Any]:
-    """Aggregate raw metrics by metric name"""
-    aggregated = {}
+    """
+    Aggregate raw metrics by metric name
     
-    for metric in metrics:
-        metric_name = metric.get('metric_name')
-        if not metric_name:
-            continue
-        
-        if metric_name not in aggregated:
-            aggregated[metric_name] = {
-                'value': Decimal('0'),
-                'count': 0,
-                'unit': metric.get('unit', ''),
-                'service': metric.get('service', ''),
-                'samples': []
-            }
-        
-        value = metric.get('value', Decimal('0'))
-        aggregated[metric_name]['value'] += value
-        aggregated[metric_name]['count'] += 1
-        aggregated[metric_name]['samples'].append({
-            'timestamp': metric.get('timestamp'),
-            'value': value
-        })
+    Totals, counts and the first-half/second-half averages used by
+    calculate_trends come out of one kernel pass over the rows; the
+    per-sample lists are no longer kept on the report.
+    """
+    metrics = [m for m in metrics if m.get('metric_name')]
+    columns = MetricColumns.from_rows(metrics, ('value',), ('metric_name',))
+    result = aggregate(columns, group_by=('metric_name',), trend_by='metric_name')
+    names = columns.keys['metric_name']
     
-    # Calculate averages where appropriate
-    for metric_name in aggregated:
-        if aggregated[metric_name]['count'] > 0:
-            aggregated[metric_name]['average'] = (
-                aggregated[metric_name]['value'] / aggregated[metric_name]['count']
-            )
+    aggregated = {}
+    for metric_name, group in result['groups']['metric_name'].items():
+        first = metrics[names.index(metric_name)]
+        value = to_decimal(group['value'])
+        aggregated[metric_name] = {
+            'value': value,
+            'count': int(group['count']),
+            'unit': first.get('unit', ''),
+            'service': first.get('service', ''),
+            'average': value / int(group['count']),
+            'trend': result['trends'][metric_name],
+        }
     
     return aggregated
 
@@ -489,20 +502,16 @@ def calculate_trends(aggregated: Dict, days: int) -> Dict[str, Any]:
     """Calculate trends over the period"""
     trends = {}
     
-    # For each metric, calculate trend (increase/decrease)
+    # For each metric, compare the first half of its samples with the second
     for metric_name, data in aggregated.items():
-        samples = data.get('samples', [])
-        if len(samples) < 2:
+        trend = data.get('trend', {})
+        if trend.get('count', 0) < 2:
             trends[metric_name] = 'insufficient_data'
             continue
         
-        # Compare first half vs second half
-        mid_point = len(samples) // 2
-        first_half = sum(float(s['value']) for s in samples[:mid_point]) / mid_point
-        second_half = sum(float(s['value']) for s in samples[mid_point:]) / (len(samples) - mid_point)
-        
+        first_half = trend['first_half_avg']
         if first_half > 0:
-            change_pct = ((second_half - first_half) / first_half) * 100
+            change_pct = ((trend['second_half_avg'] - first_half) / first_half) * 100
             trends[metric_name] = f"{'+' if change_pct > 0 else ''}{change_pct:.1f}%"
         else:
             trends[metric_name] = 'new_metric'
@@ -9,6 +9,7 @@ Environment variables:
   - RDS_DATABASE: securebase
   - RDS_USER: securebase_app
   - RDS_PASSWORD: (from Secrets Manager)
+  - CACHE_TABLE: auth session cache (revocation version for cached API keys)
 """
 
 import os
@@ -26,12 +27,15 @@ from botocore.exceptions import ClientError
 # Import database utilities
 sys.path.insert(0, '/opt/python')
 from db_utils import get_connection, release_connection, DatabaseError
+from api_key_revocation import bump_revocation_version
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 # Initialize AWS clients
 ses_client = boto3.client('ses')
+dynamodb = boto3.resource('dynamodb')
+cache_table = dynamodb.Table(os.environ.get('CACHE_TABLE', 'securebase-cache'))
 
 # Constants
 ROTATION_FREQUENCY_DAYS = {
@@ -108,6 +112,14 @@ def lambda_handler(event, context):
             
             conn.commit()
             
+            # Rotated keys are now inactive; drop them from authorizer caches
+            if total_rotated:
+                try:
+                    bump_revocation_version(cache_table)
+                except ClientError as e:
+                    # Cached entries still expire on their own TTL
+                    logger.error(f'Failed to bump API key revocation version: {str(e)}')
+            
             logger.info(f'Rotation complete: {total_rotated} keys rotated, {total_warned} warnings sent')
             
             return {
@@ -20,6 +20,8 @@ Env vars:
   LOG_LEVEL                DEBUG|INFO|WARNING|ERROR
   ACTIVATION_SNS_TOPIC_ARN SNS topic ARN for first-activation/first-login events
                            (optional; omit to disable activation alerts)
+  BCRYPT_ROUNDS            bcrypt cost for new hashes; older hashes are
+                           upgraded on login (see password_hashing)
 """
 
 import os
@@ -32,7 +34,8 @@ from datetime import datetime, timezone, timedelta
 from botocore.exceptions import ClientError
 
 import jwt
-import bcrypt
+
+from password_hashing import PasswordHashBusy, hash_password, rehash_if_needed, verify_password
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
@@ -214,7 +217,7 @@ def _mask_email(email: str) -> str:
 
 def _store_password(email: str, password: str, user: dict) -> None:
     email = _normalize_email(email)
-    pw_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    pw_hash = hash_password(password)
     _users_table.put_item(Item={
         **user,
         'email':        email,
@@ -223,6 +226,25 @@ def _store_password(email: str, password: str, user: dict) -> None:
     })
 
 
+def _upgrade_password_hash(email: str, password: str, pw_hash: str) -> None:
+    """Rehash at the configured bcrypt cost, unless the password changed meanwhile."""
+    new_hash = rehash_if_needed(password, pw_hash)
+    if not new_hash:
+        return
+    try:
+        _users_table.update_item(
+            Key={'email': _normalize_email(email)},
+            UpdateExpression='SET password_hash = :new',
+            ConditionExpression='password_hash = :old',
+            ExpressionAttributeValues={':new': new_hash, ':old': pw_hash},
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            logger.warning(f"Could not upgrade password hash: {e}")
+    except Exception as e:
+        logger.warning(f"Could not upgrade password hash: {e}")
+
+
 def _publish_activation_event(email: str, event_type: str, metadata: dict) -> None:
     if not _ACTIVATION_TOPIC_ARN:
         return
@@ -475,10 +497,18 @@ def login(event: dict, request_id: str) -> dict:
     if not pw_hash:
         return _resp(401, {'error': 'Account not yet activated — check your invite email', 'request_id': request_id})
 
-    if not bcrypt.checkpw(password.encode(), pw_hash.encode()):
+    try:
+        password_ok = verify_password(password, pw_hash)
+    except PasswordHashBusy:
+        logger.warning(f"Login shed: password hashing busy [{request_id}]")
+        return _resp(503, {'error': 'Too many concurrent logins, please retry', 'request_id': request_id})
+
+    if not password_ok:
         logger.warning(f"Bad password for {email} [{request_id}]")
         return _resp(401, {'error': 'Invalid email or password', 'request_id': request_id})
 
+    _upgrade_password_hash(email, password, pw_hash)
+
     marketplace_block = _block_inactive_marketplace_subscription(email, request_id)
     if marketplace_block is not None:
         return marketplace_block
@@ -4,10 +4,14 @@ AWS Scanner Lambda — cross-account compliance evidence collection.
 
 import json
 import logging
+import math
 import os
+import threading
 import time
 import csv
+import hashlib
 import io
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from typing import Any
 
@@ -15,7 +19,7 @@ import boto3
 import jwt
 from botocore.exceptions import ClientError
 
-from db_utils import execute_one, query_one
+from db_utils import execute_one, execute_values_batch, query_many, query_one
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.environ.get("LOG_LEVEL", "INFO"))
@@ -25,6 +29,21 @@ COLLECTOR_FUNCTION_NAME = os.environ.get(
     "HIPAA_COLLECTOR_FUNCTION_NAME", "securebase-hipaa-compliance-collector"
 )
 SERVICE_TIMEOUT_SECONDS = int(os.environ.get("SERVICE_TIMEOUT_SECONDS", "45"))
+# Worker bounds for concurrent scanning; 1 keeps the original sequential behaviour.
+SCAN_MAX_WORKERS = int(os.environ.get("SCAN_MAX_WORKERS", "4"))
+S3_BUCKET_WORKERS = int(os.environ.get("S3_BUCKET_WORKERS", "8"))
+SCAN_GRACE_SECONDS = int(os.environ.get("SCAN_GRACE_SECONDS", "5"))
+ENCRYPTION_STATUS_BATCH_SIZE = int(os.environ.get("ENCRYPTION_STATUS_BATCH_SIZE", "500"))
+# Scheduled fan-out: >1 splits connected customers into DynamoDB parallel-scan
+# segments, each scanned by its own asynchronous invocation.
+SCAN_SHARD_COUNT = int(os.environ.get("SCAN_SHARD_COUNT", "1"))
+SCAN_PROGRESS_TABLE = os.environ.get("SCAN_PROGRESS_TABLE", "securebase-scan-progress")
+SCANNER_FUNCTION_NAME = os.environ.get("AWS_LAMBDA_FUNCTION_NAME", "securebase-aws-scanner")
+SHARD_MIN_REMAINING_MS = int(os.environ.get("SHARD_MIN_REMAINING_MS", "120000"))
+MAX_SHARD_RESUMES = int(os.environ.get("MAX_SHARD_RESUMES", "10"))
+SCAN_PROGRESS_TTL_DAYS = 7
+# Delta scans skip unchanged resources; every Nth run per customer re-writes everything.
+FULL_RESCAN_EVERY_N_RUNS = int(os.environ.get("FULL_RESCAN_EVERY_N_RUNS", "7"))
 HIPAA_MIN_BACKUP_RETENTION_DAYS = 7
 IAM_CRED_REPORT_MIN_COLUMNS = 8
 
@@ -40,6 +59,31 @@ class JwtSecretError(Exception):
     """Raised when JWT secret configuration or retrieval fails."""
 
 
+class _SharedSession:
+    """Lets one assumed-role session back several scanner threads.
+
+    boto3 clients are thread-safe but ``Session.client`` is not, so client
+    creation is serialized while the clients themselves run concurrently.
+    """
+
+    def __init__(self, session):
+        self._session = session
+        self._lock = threading.Lock()
+
+    def client(self, service_name: str, **kwargs):
+        with self._lock:
+            return self._session.client(service_name, **kwargs)
+
+
+# Scanner threads share the module-level DB pool, which is not thread-safe.
+_db_lock = threading.Lock()
+
+
+def _execute(query: str, params: tuple) -> None:
+    with _db_lock:
+        execute_one(query, params)
+
+
 def _log_resource(service: str, resource: str, status: str, findings: dict | None = None, error: str | None = None) -> None:
     entry = {"service": service, "resource": resource, "status": status}
     if findings is not None:
@@ -134,6 +178,162 @@ def _assume_customer_session(customer_id: str, role_arn: str, external_id: str):
     )
 
 
+_ENCRYPTION_STATUS_COLUMNS = """
+    customer_id, resource_type, resource_id, resource_name, contains_phi,
+    encryption_enabled, kms_key_status, tls_version, access_control_configured,
+    overly_permissive, world_readable, config_fingerprint, snapshot_at
+"""
+_ENCRYPTION_STATUS_ON_CONFLICT = """
+    ON CONFLICT (customer_id, resource_type, resource_id)
+    DO UPDATE SET
+        resource_name = EXCLUDED.resource_name,
+        contains_phi = EXCLUDED.contains_phi,
+        encryption_enabled = EXCLUDED.encryption_enabled,
+        kms_key_status = EXCLUDED.kms_key_status,
+        tls_version = EXCLUDED.tls_version,
+        access_control_configured = EXCLUDED.access_control_configured,
+        overly_permissive = EXCLUDED.overly_permissive,
+        world_readable = EXCLUDED.world_readable,
+        config_fingerprint = EXCLUDED.config_fingerprint,
+        snapshot_at = NOW()
+"""
+_ENCRYPTION_STATUS_ROW_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())"
+_ENCRYPTION_STATUS_UPSERT = f"""
+    INSERT INTO hipaa_encryption_status ({_ENCRYPTION_STATUS_COLUMNS})
+    VALUES {_ENCRYPTION_STATUS_ROW_TEMPLATE}
+    {_ENCRYPTION_STATUS_ON_CONFLICT}
+"""
+
+
+class _EncryptionStatusBuffer:
+    """Collects hipaa_encryption_status rows and writes them as multi-row upserts.
+
+    Rows are keyed on the upsert conflict target, so a resource reported twice
+    before a flush is written once (Postgres rejects a multi-row upsert that
+    touches the same row twice). Safe to share between scanner threads.
+
+    A batch that fails is retried row by row with the same upsert, so one bad
+    row cannot drop the rest of the batch; rows that still fail are logged and
+    skipped. add() and flush() never raise.
+    """
+
+    def __init__(self, batch_size: int | None = None):
+        self.batch_size = max(1, batch_size or ENCRYPTION_STATUS_BATCH_SIZE)
+        self.rows_written = 0
+        self._rows: dict[tuple[str, str, str], tuple] = {}
+        self._lock = threading.Lock()
+
+    def add(self, params: tuple) -> None:
+        with self._lock:
+            self._rows[params[:3]] = params
+            if len(self._rows) < self.batch_size:
+                return
+            rows, self._rows = list(self._rows.values()), {}
+        self._write(rows)
+
+    def flush(self) -> int:
+        with self._lock:
+            rows, self._rows = list(self._rows.values()), {}
+        if rows:
+            self._write(rows)
+        return self.rows_written
+
+    def _write(self, rows: list[tuple]) -> None:
+        try:
+            with _db_lock:
+                execute_values_batch(
+                    f"INSERT INTO hipaa_encryption_status ({_ENCRYPTION_STATUS_COLUMNS}) VALUES %s"
+                    f"{_ENCRYPTION_STATUS_ON_CONFLICT}",
+                    rows,
+                    template=_ENCRYPTION_STATUS_ROW_TEMPLATE,
+                    page_size=self.batch_size,
+                )
+            written = len(rows)
+        except Exception as e:
+            logger.warning("Batch upsert of %d rows failed, retrying row by row: %s", len(rows), e)
+            written = 0
+            for params in rows:
+                try:
+                    _execute(_ENCRYPTION_STATUS_UPSERT, params)
+                    written += 1
+                except Exception as row_error:
+                    logger.error("Upsert failed for %s/%s, row skipped: %s", params[1], params[2], row_error)
+        with self._lock:
+            self.rows_written += written
+
+
+class _FingerprintCache:
+    """Configuration fingerprints recorded by a customer's previous scan."""
+
+    def __init__(self, known: dict[tuple[str, str], str] | None = None):
+        self._known = known or {}
+        self._lock = threading.Lock()
+        self._skipped: list[tuple[str, str]] = []
+        self.unchanged = 0
+
+    def unchanged_since_last_scan(self, resource_type: str, resource_id: str, fingerprint: str) -> bool:
+        if self._known.get((resource_type, resource_id)) != fingerprint:
+            return False
+        with self._lock:
+            self.unchanged += 1
+            self._skipped.append((resource_type, resource_id))
+        return True
+
+    def touch_skipped(self, customer_id: str) -> None:
+        """Refresh snapshot_at for skipped resources.
+
+        Audit exports publish snapshot_at as the time a resource was last
+        checked, so an unchanged resource still needs its timestamp bumped
+        even though its row is not rewritten.
+        """
+        with self._lock:
+            skipped, self._skipped = self._skipped, []
+        if not skipped:
+            return
+        try:
+            with _db_lock:
+                execute_values_batch(
+                    """
+                    UPDATE hipaa_encryption_status AS s
+                    SET snapshot_at = NOW()
+                    FROM (VALUES %s) AS v(customer_id, resource_type, resource_id)
+                    WHERE s.customer_id = v.customer_id
+                      AND s.resource_type = v.resource_type
+                      AND s.resource_id = v.resource_id
+                    """,
+                    [(customer_id, resource_type, resource_id) for resource_type, resource_id in skipped],
+                    page_size=ENCRYPTION_STATUS_BATCH_SIZE,
+                )
+        except Exception as e:
+            logger.warning("snapshot_at refresh failed for %d unchanged resources of %s: %s", len(skipped), customer_id, e)
+
+
+# Populated by _run_customer_scan for the duration of one customer's scan.
+_fingerprint_caches: dict[str, _FingerprintCache] = {}
+
+
+def _fingerprint(*responses: Any) -> str:
+    return hashlib.sha256(json.dumps(responses, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _fingerprints_for(customer_id: str) -> _FingerprintCache:
+    return _fingerprint_caches.get(customer_id) or _FingerprintCache()
+
+
+def _load_fingerprints(customer_id: str) -> _FingerprintCache:
+    rows = query_many(
+        """
+        SELECT resource_type, resource_id, config_fingerprint
+        FROM hipaa_encryption_status
+        WHERE customer_id = %s AND config_fingerprint IS NOT NULL
+        """,
+        (customer_id,),
+    )
+    return _FingerprintCache(
+        {(row["resource_type"], row["resource_id"]): row["config_fingerprint"] for row in rows or []}
+    )
+
+
 def _upsert_encryption_status(
     customer_id: str,
     resource_type: str,
@@ -146,26 +346,9 @@ def _upsert_encryption_status(
     access_control_configured: bool = False,
     overly_permissive: bool = False,
     world_readable: bool = False,
+    config_fingerprint: str | None = None,
+    buffer: _EncryptionStatusBuffer | None = None,
 ) -> None:
-    query = """
-        INSERT INTO hipaa_encryption_status (
-            customer_id, resource_type, resource_id, resource_name, contains_phi,
-            encryption_enabled, kms_key_status, tls_version, access_control_configured,
-            overly_permissive, world_readable, snapshot_at
-        )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
-        ON CONFLICT (customer_id, resource_type, resource_id)
-        DO UPDATE SET
-            resource_name = EXCLUDED.resource_name,
-            contains_phi = EXCLUDED.contains_phi,
-            encryption_enabled = EXCLUDED.encryption_enabled,
-            kms_key_status = EXCLUDED.kms_key_status,
-            tls_version = EXCLUDED.tls_version,
-            access_control_configured = EXCLUDED.access_control_configured,
-            overly_permissive = EXCLUDED.overly_permissive,
-            world_readable = EXCLUDED.world_readable,
-            snapshot_at = NOW()
-    """
     params = (
         customer_id,
         resource_type,
@@ -178,19 +361,20 @@ def _upsert_encryption_status(
         access_control_configured,
         overly_permissive,
         world_readable,
+        config_fingerprint,
     )
+    if buffer is not None:
+        buffer.add(params)
+        return
+
     try:
-        execute_one(query, params)
+        _execute(_ENCRYPTION_STATUS_UPSERT, params)
     except Exception:
         logger.warning("Upsert fallback insert for %s/%s", resource_type, resource_id)
-        execute_one(
-            """
-            INSERT INTO hipaa_encryption_status (
-                customer_id, resource_type, resource_id, resource_name, contains_phi,
-                encryption_enabled, kms_key_status, tls_version, access_control_configured,
-                overly_permissive, world_readable, snapshot_at
-            )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+        _execute(
+            f"""
+            INSERT INTO hipaa_encryption_status ({_ENCRYPTION_STATUS_COLUMNS})
+            VALUES {_ENCRYPTION_STATUS_ROW_TEMPLATE}
             """,
             params,
         )
@@ -209,7 +393,7 @@ def _insert_phi_access_log(
     document_status: str | None = None,
     remediation_items_open: int = 0,
 ) -> None:
-    execute_one(
+    _execute(
         """
         INSERT INTO hipaa_phi_access_logs (
             customer_id, record_type, user_id, action, resource_id, resource_type,
@@ -264,101 +448,146 @@ def _timed_out(deadline: float) -> bool:
     return time.monotonic() > deadline
 
 
+def _scan_s3_bucket(s3, customer_id: str, name: str, buffer: _EncryptionStatusBuffer | None = None) -> bool:
+    try:
+        try:
+            enc = s3.get_bucket_encryption(Bucket=name).get("ServerSideEncryptionConfiguration", {})
+        except ClientError as e:
+            code = e.response.get("Error", {}).get("Code")
+            if code not in (
+                "ServerSideEncryptionConfigurationNotFoundError",
+                "NoSuchBucket",
+            ):
+                raise
+            enc = {"error": code}
+
+        try:
+            pab = s3.get_public_access_block(Bucket=name).get("PublicAccessBlockConfiguration", {})
+        except ClientError as e:
+            pab = {"error": e.response.get("Error", {}).get("Code", "")}
+
+        try:
+            policy = s3.get_bucket_policy(Bucket=name).get("Policy", "{}")
+        except ClientError:
+            policy = None
+
+        fingerprint = _fingerprint(enc, pab, policy)
+        if _fingerprints_for(customer_id).unchanged_since_last_scan("s3", name, fingerprint):
+            _log_resource("s3", name, "unchanged")
+            return True
+
+        encryption_enabled = False
+        kms_key_status = None
+        rules = enc.get("Rules", [])
+        if rules:
+            encryption_enabled = True
+            default_rule = rules[0].get("ApplyServerSideEncryptionByDefault", {})
+            if default_rule.get("SSEAlgorithm") == "aws:kms":
+                kms_key_status = "active" if default_rule.get("KMSMasterKeyID") else None
+
+        if "error" in pab:
+            world_readable = pab["error"] in ("NoSuchPublicAccessBlockConfiguration", "NoSuchPublicAccessBlock")
+        else:
+            world_readable = not all(
+                [
+                    pab.get("BlockPublicAcls", False),
+                    pab.get("IgnorePublicAcls", False),
+                    pab.get("BlockPublicPolicy", False),
+                    pab.get("RestrictPublicBuckets", False),
+                ]
+            )
+
+        overly_permissive = False
+        policy_doc = json.loads(policy) if policy is not None else {}
+        for stmt in policy_doc.get("Statement", []):
+            if stmt.get("Effect") != "Allow":
+                continue
+            principal = stmt.get("Principal")
+            if principal == "*" or (isinstance(principal, dict) and any(v == "*" for v in principal.values())):
+                overly_permissive = True
+                break
+
+        _upsert_encryption_status(
+            customer_id=customer_id,
+            resource_type="s3",
+            resource_id=name,
+            resource_name=name,
+            contains_phi=_contains_phi(name),
+            encryption_enabled=encryption_enabled,
+            kms_key_status=kms_key_status,
+            access_control_configured=not world_readable,
+            overly_permissive=overly_permissive,
+            world_readable=world_readable,
+            config_fingerprint=fingerprint,
+            buffer=buffer,
+        )
+        _log_resource(
+            "s3",
+            name,
+            "ok",
+            {
+                "encryption_enabled": encryption_enabled,
+                "world_readable": world_readable,
+                "overly_permissive": overly_permissive,
+            },
+        )
+        return True
+    except Exception as e:
+        _log_resource("s3", name, "error", error=str(e))
+        return False
+
+
 def _scan_s3(session, customer_id: str) -> int:
     logger.info("Starting S3 scan")
     scanned = 0
     deadline = _service_deadline()
     s3 = session.client("s3")
+    buffer = _EncryptionStatusBuffer()
 
-    buckets = s3.list_buckets().get("Buckets", [])
-    for bucket in buckets:
-        if _timed_out(deadline):
-            logger.warning("S3 scan timed out")
-            break
-        name = bucket["Name"]
-        try:
-            encryption_enabled = False
-            kms_key_status = None
-            world_readable = False
-            overly_permissive = False
-
-            try:
-                enc = s3.get_bucket_encryption(Bucket=name)
-                rules = enc.get("ServerSideEncryptionConfiguration", {}).get("Rules", [])
-                if rules:
-                    encryption_enabled = True
-                    default_rule = rules[0].get("ApplyServerSideEncryptionByDefault", {})
-                    if default_rule.get("SSEAlgorithm") == "aws:kms":
-                        kms_key_status = "active" if default_rule.get("KMSMasterKeyID") else None
-            except ClientError as e:
-                if e.response.get("Error", {}).get("Code") not in (
-                    "ServerSideEncryptionConfigurationNotFoundError",
-                    "NoSuchBucket",
-                ):
-                    raise
-
-            try:
-                pab = s3.get_public_access_block(Bucket=name).get("PublicAccessBlockConfiguration", {})
-                world_readable = not all(
-                    [
-                        pab.get("BlockPublicAcls", False),
-                        pab.get("IgnorePublicAcls", False),
-                        pab.get("BlockPublicPolicy", False),
-                        pab.get("RestrictPublicBuckets", False),
-                    ]
-                )
-            except ClientError as e:
-                code = e.response.get("Error", {}).get("Code", "")
-                if code in ("NoSuchPublicAccessBlockConfiguration", "NoSuchPublicAccessBlock"):
-                    world_readable = True
-
-            try:
-                policy = s3.get_bucket_policy(Bucket=name)
-                policy_doc = json.loads(policy.get("Policy", "{}"))
-                for stmt in policy_doc.get("Statement", []):
-                    if stmt.get("Effect") != "Allow":
-                        continue
-                    principal = stmt.get("Principal")
-                    if principal == "*" or (isinstance(principal, dict) and any(v == "*" for v in principal.values())):
-                        overly_permissive = True
-                        break
-            except ClientError:
-                pass
+    names = [bucket["Name"] for bucket in s3.list_buckets().get("Buckets", [])]
+    if S3_BUCKET_WORKERS <= 1 or len(names) <= 1:
+        for name in names:
+            if _timed_out(deadline):
+                logger.warning("S3 scan timed out")
+                break
+            scanned += int(_scan_s3_bucket(s3, customer_id, name, buffer))
+        buffer.flush()
+        logger.info("Completed S3 scan")
+        return scanned
 
-            _upsert_encryption_status(
-                customer_id=customer_id,
-                resource_type="s3",
-                resource_id=name,
-                resource_name=name,
-                contains_phi=_contains_phi(name),
-                encryption_enabled=encryption_enabled,
-                kms_key_status=kms_key_status,
-                access_control_configured=not world_readable,
-                overly_permissive=overly_permissive,
-                world_readable=world_readable,
-            )
-            _log_resource(
-                "s3",
-                name,
-                "ok",
-                {
-                    "encryption_enabled": encryption_enabled,
-                    "world_readable": world_readable,
-                    "overly_permissive": overly_permissive,
-                },
-            )
-            scanned += 1
-        except Exception as e:
-            _log_resource("s3", name, "error", error=str(e))
+    def scan_before_deadline(name: str) -> bool | None:
+        if _timed_out(deadline):
+            return None
+        return _scan_s3_bucket(s3, customer_id, name, buffer)
+
+    with ThreadPoolExecutor(
+        max_workers=min(S3_BUCKET_WORKERS, len(names)), thread_name_prefix="scan-s3"
+    ) as pool:
+        outcomes = list(pool.map(scan_before_deadline, names))
+    if None in outcomes:
+        logger.warning("S3 scan timed out")
+    scanned = sum(1 for outcome in outcomes if outcome)
+    buffer.flush()
     logger.info("Completed S3 scan")
     return scanned
 
 
+_RDS_FINGERPRINT_FIELDS = (
+    "StorageEncrypted",
+    "KmsKeyId",
+    "IAMDatabaseAuthenticationEnabled",
+    "BackupRetentionPeriod",
+    "MultiAZ",
+)
+
+
 def _scan_rds(session, customer_id: str) -> int:
     logger.info("Starting RDS scan")
     scanned = 0
     deadline = _service_deadline()
     rds = session.client("rds")
+    buffer = _EncryptionStatusBuffer()
+    fingerprints = _fingerprints_for(customer_id)
     instances = rds.describe_db_instances().get("DBInstances", [])
 
     for instance in instances:
@@ -367,6 +596,11 @@ def _scan_rds(session, customer_id: str) -> int:
             break
         db_id = instance.get("DBInstanceIdentifier")
         try:
+            fingerprint = _fingerprint({field: instance.get(field) for field in _RDS_FINGERPRINT_FIELDS})
+            if fingerprints.unchanged_since_last_scan("rds", db_id, fingerprint):
+                _log_resource("rds", db_id or "unknown", "unchanged")
+                scanned += 1
+                continue
             encrypted = bool(instance.get("StorageEncrypted", False))
             _upsert_encryption_status(
                 customer_id=customer_id,
@@ -379,6 +613,8 @@ def _scan_rds(session, customer_id: str) -> int:
                 access_control_configured=bool(instance.get("IAMDatabaseAuthenticationEnabled", False)),
                 overly_permissive=instance.get("BackupRetentionPeriod", 0) < HIPAA_MIN_BACKUP_RETENTION_DAYS,
                 world_readable=False,
+                config_fingerprint=fingerprint,
+                buffer=buffer,
             )
             _log_resource(
                 "rds",
@@ -393,6 +629,7 @@ def _scan_rds(session, customer_id: str) -> int:
             scanned += 1
         except Exception as e:
             _log_resource("rds", db_id or "unknown", "error", error=str(e))
+    buffer.flush()
     logger.info("Completed RDS scan")
     return scanned
 
@@ -402,12 +639,15 @@ def _scan_kms(session, customer_id: str) -> int:
     scanned = 0
     deadline = _service_deadline()
     kms = session.client("kms")
+    buffer = _EncryptionStatusBuffer()
+    fingerprints = _fingerprints_for(customer_id)
     paginator = kms.get_paginator("list_keys")
 
     for page in paginator.paginate():
         for key in page.get("Keys", []):
             if _timed_out(deadline):
                 logger.warning("KMS scan timed out")
+                buffer.flush()
                 logger.info("Completed KMS scan")
                 return scanned
             key_id = key.get("KeyId")
@@ -420,6 +660,11 @@ def _scan_kms(session, customer_id: str) -> int:
                 kms_status = status_map.get(state, state or None)
                 rotation_enabled = kms.get_key_rotation_status(KeyId=key_id).get("KeyRotationEnabled", False)
 
+                fingerprint = _fingerprint(meta.get("KeyState"), meta.get("Description"), rotation_enabled)
+                if fingerprints.unchanged_since_last_scan("kms", key_id, fingerprint):
+                    _log_resource("kms", key_id or "unknown", "unchanged")
+                    scanned += 1
+                    continue
                 _upsert_encryption_status(
                     customer_id=customer_id,
                     resource_type="kms",
@@ -431,6 +676,8 @@ def _scan_kms(session, customer_id: str) -> int:
                     access_control_configured=True,
                     overly_permissive=not rotation_enabled,
                     world_readable=False,
+                    config_fingerprint=fingerprint,
+                    buffer=buffer,
                 )
                 _log_resource(
                     "kms",
@@ -441,6 +688,7 @@ def _scan_kms(session, customer_id: str) -> int:
                 scanned += 1
             except Exception as e:
                 _log_resource("kms", key_id or "unknown", "error", error=str(e))
+    buffer.flush()
     logger.info("Completed KMS scan")
     return scanned
 
@@ -558,6 +806,7 @@ def _scan_iam(session, customer_id: str) -> int:
     except Exception as e:
         logger.warning("Credential report unavailable: %s", e)
 
+    buffer = _EncryptionStatusBuffer()
     for username in users_without_mfa:
         try:
             _upsert_encryption_status(
@@ -570,6 +819,7 @@ def _scan_iam(session, customer_id: str) -> int:
                 access_control_configured=False,
                 overly_permissive=True,
                 world_readable=False,
+                buffer=buffer,
             )
             _insert_phi_access_log(
                 customer_id=customer_id,
@@ -585,6 +835,7 @@ def _scan_iam(session, customer_id: str) -> int:
             scanned += 1
         except Exception as e:
             _log_resource("iam", username, "error", error=str(e))
+    buffer.flush()
     logger.info("Completed IAM scan")
     return scanned
 
@@ -652,8 +903,71 @@ def _scan_securityhub(session, customer_id: str) -> int:
     return scanned
 
 
+def _timed_scan(service: str, scanner, session, customer_id: str) -> tuple[int, float]:
+    started = time.monotonic()
+    try:
+        scanned = scanner(session, customer_id)
+    except Exception as e:
+        logger.warning("Service scanner failed (%s): %s", service, e, exc_info=True)
+        scanned = 0
+    return scanned, round((time.monotonic() - started) * 1000, 1)
+
+
+def _run_service_scanners(session, customer_id: str, scanners: list[tuple[str, Any]]) -> tuple[int, dict[str, Any]]:
+    """Run each service scanner, concurrently when SCAN_MAX_WORKERS > 1.
+
+    Returns the total resource count and per-service wall-clock timings in
+    milliseconds. A scanner that raises contributes zero resources; one that
+    outlives its deadline is abandoned and reported as ``"timed_out"``.
+    """
+    total = 0
+    timings: dict[str, Any] = {}
+
+    if SCAN_MAX_WORKERS <= 1:
+        for service, scanner in scanners:
+            scanned, elapsed_ms = _timed_scan(service, scanner, session, customer_id)
+            total += scanned
+            timings[service] = elapsed_ms
+        return total, timings
+
+    workers = min(SCAN_MAX_WORKERS, len(scanners))
+    # Queued scanners only start their own deadline once a worker frees up.
+    wait_seconds = SERVICE_TIMEOUT_SECONDS * math.ceil(len(scanners) / workers) + SCAN_GRACE_SECONDS
+    shared = _SharedSession(session)
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+    try:
+        futures = {
+            pool.submit(_timed_scan, service, scanner, shared, customer_id): service
+            for service, scanner in scanners
+        }
+        done, not_done = wait(futures, timeout=wait_seconds)
+        for future in done:
+            scanned, elapsed_ms = future.result()
+            total += scanned
+            timings[futures[future]] = elapsed_ms
+        for future in not_done:
+            logger.warning("Service scanner did not finish before its deadline (%s)", futures[future])
+            timings[futures[future]] = "timed_out"
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return total, {service: timings[service] for service, _ in scanners}
+
+
+def _next_scan_run(table, customer_id: str) -> int:
+    response = table.update_item(
+        Key={"customer_id": customer_id},
+        UpdateExpression="ADD scan_run_count :one",
+        ExpressionAttributeValues={":one": 1},
+        ReturnValues="UPDATED_NEW",
+    )
+    return int(response.get("Attributes", {}).get("scan_run_count", 1))
+
+
+def _is_full_rescan(scan_run: int) -> bool:
+    return FULL_RESCAN_EVERY_N_RUNS <= 1 or scan_run % FULL_RESCAN_EVERY_N_RUNS == 1
+
+
 def _run_customer_scan(customer_id: str, role_arn: str, external_id: str) -> dict[str, Any]:
-    total_resources_scanned = 0
     table = ddb.Table(CONNECTIONS_TABLE)
     started = datetime.now(timezone.utc).isoformat()
     logger.info("Starting customer scan for %s", customer_id)
@@ -661,23 +975,24 @@ def _run_customer_scan(customer_id: str, role_arn: str, external_id: str) -> dic
     try:
         session = _assume_customer_session(customer_id, role_arn, external_id)
         _seed_baa_if_needed(customer_id)
+        full_rescan = _is_full_rescan(_next_scan_run(table, customer_id))
+        fingerprints = _FingerprintCache() if full_rescan else _load_fingerprints(customer_id)
+        _fingerprint_caches[customer_id] = fingerprints
 
         scanners = [
-            _scan_s3,
-            _scan_rds,
-            _scan_kms,
-            _scan_cloudtrail,
-            _scan_iam,
-            _scan_config,
-            _scan_securityhub,
+            ("s3", _scan_s3),
+            ("rds", _scan_rds),
+            ("kms", _scan_kms),
+            ("cloudtrail", _scan_cloudtrail),
+            ("iam", _scan_iam),
+            ("config", _scan_config),
+            ("securityhub", _scan_securityhub),
         ]
-
-        for scanner in scanners:
-            try:
-                total_resources_scanned += scanner(session, customer_id)
-            except Exception as e:
-                scanner_name = getattr(scanner, "__name__", scanner.__class__.__name__)
-                logger.warning("Service scanner failed (%s): %s", scanner_name, e, exc_info=True)
+        try:
+            total_resources_scanned, service_timings_ms = _run_service_scanners(session, customer_id, scanners)
+            fingerprints.touch_skipped(customer_id)
+        finally:
+            _fingerprint_caches.pop(customer_id, None)
 
         table.update_item(
             Key={"customer_id": customer_id},
@@ -708,6 +1023,10 @@ def _run_customer_scan(customer_id: str, role_arn: str, external_id: str) -> dic
                     "customer_id": customer_id,
                     "started_at": started,
                     "resources_scanned": total_resources_scanned,
+                    "resources_unchanged": fingerprints.unchanged,
+                    "full_rescan": full_rescan,
+                    "scan_max_workers": SCAN_MAX_WORKERS,
+                    "service_timings_ms": service_timings_ms,
                 },
                 default=str,
             )
@@ -716,6 +1035,7 @@ def _run_customer_scan(customer_id: str, role_arn: str, external_id: str) -> dic
             "customer_id": customer_id,
             "scan_status": "completed",
             "resources_scanned": total_resources_scanned,
+            "resources_unchanged": fingerprints.unchanged,
         }
     except Exception as e:
         logger.error("Customer scan failed for %s: %s", customer_id, e, exc_info=True)
@@ -735,12 +1055,15 @@ def _get_connection(customer_id: str) -> dict[str, Any] | None:
     return item
 
 
-def _get_connected_customers() -> list[dict[str, Any]]:
+def _get_connected_customers(segment: int | None = None, total_segments: int | None = None) -> list[dict[str, Any]]:
     table = ddb.Table(CONNECTIONS_TABLE)
     items: list[dict[str, Any]] = []
     last_evaluated_key = None
     while True:
         kwargs = {}
+        if total_segments:
+            kwargs["Segment"] = segment
+            kwargs["TotalSegments"] = total_segments
         if last_evaluated_key:
             kwargs["ExclusiveStartKey"] = last_evaluated_key
         response = table.scan(**kwargs)
@@ -788,7 +1111,10 @@ def _handle_on_demand(event: dict[str, Any]) -> dict[str, Any]:
         return _response(500, {"error": "Failed to trigger compliance score calculation"})
 
 
-def _handle_scheduled() -> dict[str, Any]:
+def _handle_scheduled(context=None) -> dict[str, Any]:
+    if SCAN_SHARD_COUNT > 1:
+        return _dispatch_scan_shards(context)
+
     results = []
     for item in _get_connected_customers():
         customer_id = item.get("customer_id")
@@ -801,6 +1127,122 @@ def _handle_scheduled() -> dict[str, Any]:
     return {"trigger": "scheduled", "customers_scanned": len(results), "results": results}
 
 
+def _scanner_function_name(context) -> str:
+    return getattr(context, "invoked_function_arn", None) or SCANNER_FUNCTION_NAME
+
+
+def _invoke_scan_shard(context, payload: dict[str, Any]) -> None:
+    boto3.client("lambda").invoke(
+        FunctionName=_scanner_function_name(context),
+        InvocationType="Event",
+        Payload=json.dumps(payload),
+    )
+
+
+def _update_shard_progress(run_id: str, shard: int, status: str, **fields: Any) -> None:
+    now = datetime.now(timezone.utc)
+    values = {
+        ":s": status,
+        ":ts": now.isoformat(),
+        ":ttl": int(now.timestamp()) + SCAN_PROGRESS_TTL_DAYS * 86400,
+    }
+    updates = ["#status = :s", "updated_at = :ts", "#ttl = :ttl"]
+    for i, (name, value) in enumerate(sorted(fields.items())):
+        updates.append(f"{name} = :f{i}")
+        values[f":f{i}"] = value
+    ddb.Table(SCAN_PROGRESS_TABLE).update_item(
+        Key={"run_id": run_id, "shard": shard},
+        UpdateExpression="SET " + ", ".join(updates),
+        ExpressionAttributeNames={"#status": "status", "#ttl": "ttl"},
+        ExpressionAttributeValues=values,
+    )
+
+
+def _mark_customer_scanned(run_id: str, shard: int, customer_id: str) -> None:
+    ddb.Table(SCAN_PROGRESS_TABLE).update_item(
+        Key={"run_id": run_id, "shard": shard},
+        UpdateExpression="ADD completed_customers :c SET updated_at = :ts",
+        ExpressionAttributeValues={
+            ":c": {customer_id},
+            ":ts": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+
+
+def _completed_customers(run_id: str, shard: int) -> set[str]:
+    item = ddb.Table(SCAN_PROGRESS_TABLE).get_item(
+        Key={"run_id": run_id, "shard": shard},
+        ConsistentRead=True,
+    ).get("Item") or {}
+    return set(item.get("completed_customers") or ())
+
+
+def _dispatch_scan_shards(context) -> dict[str, Any]:
+    run_id = f"scan-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}"
+    for shard in range(SCAN_SHARD_COUNT):
+        _update_shard_progress(run_id, shard, "dispatched", total_shards=SCAN_SHARD_COUNT)
+        _invoke_scan_shard(
+            context,
+            {"trigger": "scan_shard", "run_id": run_id, "shard": shard, "total_shards": SCAN_SHARD_COUNT},
+        )
+    logger.info(json.dumps({"event": "scan_shards_dispatched", "run_id": run_id, "shards": SCAN_SHARD_COUNT}))
+    return {"trigger": "scheduled", "mode": "sharded", "run_id": run_id, "shards_dispatched": SCAN_SHARD_COUNT}
+
+
+def _handle_scan_shard(event: dict[str, Any], context) -> dict[str, Any]:
+    """Scan one parallel-scan segment of connected customers.
+
+    Customers already recorded for this run/shard are skipped, so re-sending the
+    same event resumes a shard that timed out. When the invocation runs low on
+    time the shard re-invokes itself with the same run_id and stops.
+    """
+    run_id = event.get("run_id")
+    shard = event.get("shard")
+    total_shards = event.get("total_shards")
+    resume_count = int(event.get("resume_count", 0))
+    if not run_id or shard is None or not total_shards:
+        return {"error": "scan_shard requires run_id, shard, total_shards"}
+    shard = int(shard)
+    total_shards = int(total_shards)
+
+    completed = _completed_customers(run_id, shard)
+    _update_shard_progress(run_id, shard, "running", resume_count=resume_count)
+    results = []
+    for item in _get_connected_customers(segment=shard, total_segments=total_shards):
+        customer_id = item.get("customer_id")
+        role_arn = item.get("role_arn")
+        external_id = item.get("external_id")
+        if customer_id in completed:
+            continue
+        if not all([customer_id, role_arn, external_id]):
+            logger.warning("Skipping incomplete connection item for customer %s", customer_id)
+            continue
+        if context is not None and context.get_remaining_time_in_millis() < SHARD_MIN_REMAINING_MS:
+            if resume_count >= MAX_SHARD_RESUMES:
+                _update_shard_progress(run_id, shard, "incomplete")
+                logger.warning("Shard %s of %s exhausted %d resumes", shard, run_id, resume_count)
+                return {"run_id": run_id, "shard": shard, "status": "incomplete", "customers_scanned": len(results)}
+            _update_shard_progress(run_id, shard, "resuming")
+            _invoke_scan_shard(context, {**event, "resume_count": resume_count + 1})
+            return {"run_id": run_id, "shard": shard, "status": "resuming", "customers_scanned": len(results)}
+        results.append(_run_customer_scan(customer_id, role_arn, external_id))
+        _mark_customer_scanned(run_id, shard, customer_id)
+
+    _update_shard_progress(run_id, shard, "completed")
+    logger.info(
+        json.dumps(
+            {
+                "event": "scan_shard_complete",
+                "run_id": run_id,
+                "shard": shard,
+                "customers_scanned": len(results),
+                "customers_skipped": len(completed),
+            }
+        )
+    )
+    return {"run_id": run_id, "shard": shard, "status": "completed", "customers_scanned": len(results), "results": results}
+
+
 def lambda_handler(event, context):
     logger.info("AWS scanner invoked")
     logger.debug("Event: %s", json.dumps(event, default=str))
@@ -808,8 +1250,11 @@ def lambda_handler(event, context):
     if event.get("trigger") == "post_verify":
         return _handle_post_verify(event)
 
+    if event.get("trigger") == "scan_shard":
+        return _handle_scan_shard(event, context)
+
     if event.get("source") == "aws.events":
-        return _handle_scheduled()
+        return _handle_scheduled(context)
 
     if event.get("httpMethod") == "POST" and event.get("path") == "/scan/trigger":
         return _handle_on_demand(event)
@@ -7,8 +7,8 @@ Triggered by EventBridge on 1st of each month at 00:00 UTC
 
 import json
 import boto3
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from db_utils import get_connection, release_connection
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 import os
@@ -32,25 +32,12 @@ metrics_table = dynamodb.Table(os.environ.get('METRICS_TABLE', 'securebase-metri
 
 
 def get_db_connection():
-    """Get PostgreSQL connection via RDS Proxy"""
-    try:
-        secret_response = secrets_client.get_secret_value(
-            SecretId=os.environ.get('RDS_SECRET_ARN')
-        )
-        secret_dict = json.loads(secret_response['SecretString'])
-        
-        conn = psycopg2.connect(
-            host=RDS_ENDPOINT,
-            port=int(RDS_PORT),
-            database=DB_NAME,
-            user=secret_dict['username'],
-            password=secret_dict['password'],
-            sslmode='require'
-        )
-        return conn
-    except Exception as e:
-        logger.error(f"Database connection failed: {str(e)}")
-        raise
+    """
+    Borrow a pooled PostgreSQL connection (via RDS Proxy).
+    The pool persists across warm invocations; hand the connection back
+    with release_connection() rather than closing it.
+    """
+    return get_connection()
 
 
 def lambda_handler(event, context):
@@ -60,6 +47,7 @@ def lambda_handler(event, context):
     Triggered by EventBridge rule:
     - cron(0 0 1 * ? *)  = 1st of each month at 00:00 UTC
     """
+    conn = None
     try:
         logger.info("Starting monthly billing calculation")
         
@@ -145,7 +133,6 @@ def lambda_handler(event, context):
         
         conn.commit()
         cur.close()
-        conn.close()
         
         # Publish CloudWatch metric
         cloudwatch.put_metric_data(
@@ -182,6 +169,8 @@ def lambda_handler(event, context):
     except Exception as e:
         logger.exception(f"Billing worker error: {str(e)}")
         return error_response('Billing calculation failed', 500)
+    finally:
+        release_connection(conn)
 
 
 def get_usage_metrics(cur, customer_id):
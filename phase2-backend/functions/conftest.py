@@ -3,9 +3,12 @@ Test configuration and fixtures for Phase 2 Backend tests.
 Sets up Python path to include lambda_layer modules.
 """
 
+import importlib
 import sys
 import os
 
+import pytest
+
 # Add lambda_layer/python to path so tests can import db_utils and other layer modules
 lambda_layer_path = os.path.join(
     os.path.dirname(os.path.dirname(__file__)),
@@ -15,3 +18,30 @@ lambda_layer_path = os.path.join(
 
 if lambda_layer_path not in sys.path:
     sys.path.insert(0, lambda_layer_path)
+
+# Several test modules replace third-party packages in sys.modules with
+# MagicMocks at import time and never put them back. Restore whatever was
+# really importable before each test module is collected, so one module's
+# stubs do not leak into the next.
+_STUBBED_PACKAGES = (
+    'bcrypt', 'jwt', 'psycopg2', 'pyotp',
+)
+_real_modules = {}
+for _name in _STUBBED_PACKAGES:
+    try:
+        importlib.import_module(_name)
+    except ImportError:
+        continue
+    _real_modules.update(
+        (key, module) for key, module in sys.modules.items()
+        if key == _name or key.startswith(_name + '.')
+    )
+
+
+def pytest_collectstart(collector):
+    if not isinstance(collector, pytest.Module):
+        return
+    for key in [k for k in sys.modules if k.split('.')[0] in _STUBBED_PACKAGES]:
+        if key not in _real_modules:
+            del sys.modules[key]
+    sys.modules.update(_real_modules)
@@ -1,18 +1,28 @@
 """
 Database utility functions for SecureBase Lambda functions.
 This module provides connection pooling, RLS context management, and common queries.
+
+It is the single connection layer for Lambda handlers: the pool persists
+across warm invocations and connections are health-checked when borrowed.
+The RLS context of every pooled connection is tracked, so a connection that
+still carries one tenant's context is reset before it serves anyone else,
+while a same-tenant borrow reuses it without another round trip.
 """
 
 import os
 import json
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 import psycopg2
 import psycopg2.pool
-from psycopg2.extras import RealDictCursor, Json
+from psycopg2.extras import RealDictCursor, Json, execute_values
 import boto3
 from botocore.exceptions import ClientError
 
@@ -20,6 +30,30 @@ logger = logging.getLogger(__name__)
 
 # Connection pool (reused across Lambda invocations)
 _connection_pool = None
+_pool_lock = threading.Lock()
+
+# Idle connections older than this are probed with SELECT 1 before reuse.
+POOL_HEALTH_CHECK_IDLE_SECONDS = float(os.environ.get('DB_POOL_HEALTH_CHECK_IDLE_SECONDS', '30'))
+
+# Per-connection bookkeeping, keyed weakly by the connection object itself
+# (never id(conn): a connection the pool closes can free its id for a new one):
+# when the connection was last returned, and the (customer_id, role) RLS
+# context committed on it.
+# _RLS_UNKNOWN marks a context set inside a transaction that may be rolled back.
+_RLS_UNKNOWN = object()
+_last_returned: 'weakref.WeakKeyDictionary[Any, float]' = weakref.WeakKeyDictionary()
+_rls_context: 'weakref.WeakKeyDictionary[Any, Any]' = weakref.WeakKeyDictionary()
+_pool_stats: Dict[str, int] = {
+    'connections_opened': 0,
+    'borrows': 0,
+    'reuses': 0,
+    'in_use': 0,
+    'health_check_failures': 0,
+    'discarded': 0,
+    'rls_context_sets': 0,
+    'rls_context_reuses': 0,
+    'rls_resets': 0,
+}
 
 
 class DatabaseError(Exception):
@@ -27,9 +61,45 @@ class DatabaseError(Exception):
     pass
 
 
+def _connection_params(
+    host: str = None,
+    port: int = None,
+    database: str = None,
+    user: str = None,
+    password: str = None,
+) -> Dict[str, Any]:
+    """Resolve connection parameters from arguments, environment and secrets.
+
+    RDS_SECRET_ARN (a JSON secret with username/password) is honoured for the
+    handlers that used to open their own connections from it; otherwise the
+    password comes from the ``rds_password`` secret.
+    """
+    host = host or os.environ.get('RDS_HOST') or os.environ.get('RDS_ENDPOINT')
+    port = port or int(os.environ.get('RDS_PORT', '5432'))
+    database = database or os.environ.get('RDS_DATABASE') or os.environ.get('DB_NAME', 'securebase')
+    secret_arn = os.environ.get('RDS_SECRET_ARN')
+    if not password and secret_arn:
+        raw = _get_secret(secret_arn)
+        try:
+            secret = json.loads(raw)
+        except (TypeError, ValueError):
+            secret = {'password': raw}
+        user = user or secret.get('username')
+        password = secret.get('password')
+    user = user or os.environ.get('RDS_USER', 'securebase_app')
+    password = password or _get_secret('rds_password')
+    return {
+        'host': host,
+        'port': port,
+        'database': database,
+        'user': user,
+        'password': password,
+    }
+
+
 def get_connection_pool(
     host: str = None,
-    port: int = 5432,
+    port: int = None,
     database: str = None,
     user: str = None,
     password: str = None,
@@ -50,57 +120,209 @@ def get_connection_pool(
         max_connections: Maximum pool size (limited by RDS Proxy)
     
     Returns:
-        psycopg2.pool.SimpleConnectionPool
+        psycopg2.pool.ThreadedConnectionPool
     """
     global _connection_pool
     
     if _connection_pool is not None:
         return _connection_pool
-    
-    # Get credentials from environment or Secrets Manager
-    host = host or os.environ.get('RDS_HOST')
-    database = database or os.environ.get('RDS_DATABASE', 'securebase')
-    user = user or os.environ.get('RDS_USER', 'securebase_app')
-    password = password or _get_secret('rds_password')
-    
-    if not all([host, database, user, password]):
-        raise DatabaseError("Missing database connection parameters")
-    
+
+    with _pool_lock:
+        if _connection_pool is not None:
+            return _connection_pool
+
+        params = _connection_params(host, port, database, user, password)
+        if not all(params.values()):
+            raise DatabaseError("Missing database connection parameters")
+
+        try:
+            # Threaded: handlers that fan work out to a thread pool share it.
+            _connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                min_connections,
+                max_connections,
+                sslmode='require',  # Enforce TLS
+                connect_timeout=5,
+                # options removed: RDS Proxy does not support command-line options
+                **params,
+            )
+            _pool_stats['max_connections'] = max_connections
+            logger.info(f"Connection pool created: {min_connections}-{max_connections} connections")
+            return _connection_pool
+        except psycopg2.Error as e:
+            logger.error(f"Failed to create connection pool: {str(e)}")
+            raise DatabaseError(f"Connection pool initialization failed: {str(e)}")
+
+
+def _is_healthy(conn) -> bool:
+    """Return True if a pooled connection can be handed out."""
+    if conn.closed:
+        return False
+    last_returned = _last_returned.get(conn)
+    if last_returned is None or time.monotonic() - last_returned < POOL_HEALTH_CHECK_IDLE_SECONDS:
+        return True
     try:
-        _connection_pool = psycopg2.pool.SimpleConnectionPool(
-            min_connections,
-            max_connections,
-            host=host,
-            port=port,
-            database=database,
-            user=user,
-            password=password,
-            sslmode='require',  # Enforce TLS
-            connect_timeout=5,
-            # options removed: RDS Proxy does not support command-line options
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+def _count(stat: str) -> None:
+    with _pool_lock:
+        _pool_stats[stat] += 1
+
+
+def _forget_connection(conn) -> None:
+    _last_returned.pop(conn, None)
+    _rls_context.pop(conn, None)
+
+
+def _discard_connection(pool, conn) -> None:
+    _forget_connection(conn)
+    pool.putconn(conn, close=True)
+    _count('discarded')
+
+
+def _reconcile_rls_context(conn, customer_id: Optional[str], role: str) -> None:
+    """Bring a freshly borrowed connection to the requested RLS context."""
+    current = _rls_context.get(conn)
+    wanted = (str(customer_id), role) if customer_id else None
+    if current == wanted:
+        if wanted:
+            _count('rls_context_reuses')
+        return
+    if wanted:
+        set_rls_context_on_conn(conn, customer_id, role)
+        return
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT set_config('app.current_customer_id', '', false), "
+            "set_config('app.current_user_id', '', false), "
+            "set_config('app.role', '', false)"
         )
-        logger.info(f"Connection pool created: {min_connections}-{max_connections} connections")
-        return _connection_pool
-    except psycopg2.Error as e:
-        logger.error(f"Failed to create connection pool: {str(e)}")
-        raise DatabaseError(f"Connection pool initialization failed: {str(e)}")
+    conn.commit()
+    _rls_context.pop(conn, None)
+    _count('rls_resets')
 
 
-def get_connection():
-    """Get a connection from the pool."""
+def get_connection(customer_id: str = None, role: str = 'customer'):
+    """
+    Get a health-checked connection from the pool.
+
+    Without ``customer_id`` the connection never carries an RLS context left
+    behind by an earlier borrower; with it, the context is set (or reused if
+    the connection already holds it).
+    """
     try:
         pool = get_connection_pool()
-        conn = pool.getconn()
-        return conn
+        # Every pooled connection may be stale after a long idle period;
+        # allow one extra attempt for a freshly opened connection.
+        for _ in range(pool.maxconn + 1):
+            conn = pool.getconn()
+            reused = conn in _last_returned
+            if not _is_healthy(conn):
+                logger.warning("Discarding unhealthy pooled connection")
+                _count('health_check_failures')
+                _discard_connection(pool, conn)
+                continue
+            try:
+                _reconcile_rls_context(conn, customer_id, role)
+            except (psycopg2.Error, DatabaseError):
+                _discard_connection(pool, conn)
+                raise
+            with _pool_lock:
+                _pool_stats['borrows'] += 1
+                _pool_stats['in_use'] += 1
+                _pool_stats['reuses' if reused else 'connections_opened'] += 1
+            return conn
+        raise DatabaseError("No healthy connection available")
+    except DatabaseError:
+        raise
     except Exception as e:
         logger.error(f"Failed to get connection: {str(e)}")
         raise DatabaseError(f"Connection acquisition failed: {str(e)}")
 
 
-def release_connection(conn):
-    """Release a connection back to the pool."""
-    if conn and _connection_pool:
-        _connection_pool.putconn(conn)
+def release_connection(conn, close: bool = False):
+    """Release a connection back to the pool.
+
+    Any open transaction is rolled back and the connection's RLS context is
+    kept on record, so the next borrow either reuses it for the same tenant
+    or resets it. Closed or broken connections are dropped from the pool.
+    """
+    if not conn or not _connection_pool:
+        return
+    with _pool_lock:
+        _pool_stats['in_use'] = max(0, _pool_stats['in_use'] - 1)
+    if close or conn.closed:
+        _discard_connection(_connection_pool, conn)
+        return
+    try:
+        conn.rollback()
+        conn.cursor_factory = None
+    except psycopg2.Error as e:
+        logger.warning(f"Discarding connection that failed to roll back: {str(e)}")
+        _discard_connection(_connection_pool, conn)
+        return
+    _last_returned[conn] = time.monotonic()
+    _connection_pool.putconn(conn)
+    if conn.closed:
+        # The pool closed a surplus connection; its context must not outlive it.
+        _forget_connection(conn)
+
+
+@contextmanager
+def borrow_connection(
+    customer_id: str = None,
+    role: str = 'customer',
+    cursor_factory=None,
+) -> Iterator[Any]:
+    """
+    Borrow a pooled connection for the duration of a ``with`` block.
+
+    The connection is returned to the pool on exit and uncommitted work is
+    rolled back, so commit explicitly.
+
+    Usage:
+        with borrow_connection(customer_id) as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT * FROM invoices")
+            conn.commit()
+
+    Args:
+        customer_id: If given, run under this customer's RLS context
+        role: 'customer' or 'admin'
+        cursor_factory: Default cursor factory for the borrowed connection
+    """
+    conn = get_connection(customer_id, role)
+    try:
+        if cursor_factory is not None:
+            conn.cursor_factory = cursor_factory
+        yield conn
+    finally:
+        release_connection(conn)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Return connection pool counters for this Lambda container."""
+    with _pool_lock:
+        stats = dict(_pool_stats)
+    stats['pool_initialized'] = _connection_pool is not None
+    stats['pool_type'] = 'ThreadedConnectionPool'
+    return stats
+
+
+def close_all_connections() -> None:
+    """Close every pooled connection (e.g. after a credential rotation)."""
+    global _connection_pool
+    with _pool_lock:
+        if _connection_pool is not None:
+            _connection_pool.closeall()
+            _connection_pool = None
+        _last_returned.clear()
+        _rls_context.clear()
 
 
 def _get_secret(secret_name: str) -> str:
@@ -123,7 +345,11 @@ def _get_secret(secret_name: str) -> str:
 def set_rls_context(customer_id: str, role: str = 'customer') -> None:
     """
     Set RLS context for the current session.
-    Must be called at the start of each Lambda invocation with customer context.
+
+    The context only lasts until the pooled connection is next borrowed
+    without it; prefer borrow_connection(customer_id) or
+    get_connection(customer_id) so the context and the queries share a
+    connection.
     
     Args:
         customer_id: UUID of the customer
@@ -132,18 +358,9 @@ def set_rls_context(customer_id: str, role: str = 'customer') -> None:
     Raises:
         DatabaseError: If context setting fails
     """
-    conn = get_connection()
-    try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT set_customer_context(%s, %s)", (customer_id, role))
-            conn.commit()
-        logger.debug(f"RLS context set for customer {customer_id} as {role}")
-    except psycopg2.Error as e:
-        conn.rollback()
-        logger.error(f"Failed to set RLS context: {str(e)}")
-        raise DatabaseError(f"RLS context setting failed: {str(e)}")
-    finally:
-        release_connection(conn)
+    conn = get_connection(customer_id, role)
+    release_connection(conn)
+    logger.debug(f"RLS context set for customer {customer_id} as {role}")
 
 
 def set_rls_context_on_conn(conn, customer_id: str, role: str = 'customer') -> None:
@@ -168,8 +385,18 @@ def set_rls_context_on_conn(conn, customer_id: str, role: str = 'customer') -> N
         DatabaseError: If context setting fails
     """
     try:
+        # set_customer_context() is session-scoped. Outside a transaction it
+        # is committed at once so the pool can track and reuse it; inside
+        # one, a rollback would undo it, so the next borrow re-applies it.
+        idle = conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE
         with conn.cursor() as cur:
             cur.execute("SELECT set_customer_context(%s, %s)", (customer_id, role))
+        if idle:
+            conn.commit()
+            _rls_context[conn] = (str(customer_id), role)
+        else:
+            _rls_context[conn] = _RLS_UNKNOWN
+        _count('rls_context_sets')
         logger.debug(f"RLS context set (shared conn) for customer {customer_id} as {role}")
     except psycopg2.Error as e:
         logger.error(f"Failed to set RLS context on shared conn: {str(e)}")
@@ -278,6 +505,43 @@ def execute_many(query: str, param_list: List[tuple]) -> int:
         release_connection(conn)
 
 
+def execute_values_batch(
+    query: str,
+    param_list: List[tuple],
+    template: str = None,
+    page_size: int = 100
+) -> int:
+    """
+    Execute a multi-row INSERT/UPSERT on a single connection.
+
+    Unlike execute_many, rows are sent as multi-row VALUES lists of up to
+    page_size rows per statement and committed once.
+
+    Args:
+        query: SQL query string containing a single ``VALUES %s`` placeholder
+        param_list: List of parameter tuples
+        template: Optional per-row template, e.g. ``"(%s, %s, NOW())"``
+        page_size: Maximum rows per statement
+
+    Returns:
+        Number of rows submitted
+    """
+    if not param_list:
+        return 0
+    conn = get_connection()
+    try:
+        with conn.cursor() as cur:
+            execute_values(cur, query, param_list, template=template, page_size=page_size)
+            conn.commit()
+        return len(param_list)
+    except psycopg2.Error as e:
+        conn.rollback()
+        logger.error(f"Batch execution failed: {str(e)}")
+        raise DatabaseError(f"Batch execution failed: {str(e)}")
+    finally:
+        release_connection(conn)
+
+
 def get_customer_by_id(customer_id: str) -> Optional[Dict]:
     """Get customer details by ID."""
     return query_one(
@@ -546,9 +810,8 @@ def create_api_key(
     scopes: List[str] = None
 ) -> Dict:
     """Create an API key."""
-    conn = get_connection()
+    conn = get_connection(customer_id)
     try:
-        set_rls_context(customer_id)
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute("""
                 INSERT INTO api_keys
@@ -572,13 +835,19 @@ def create_api_key(
 
 def get_invoices(customer_id: str, limit: int = 12) -> List[Dict]:
     """Get recent invoices for a customer (RLS protected)."""
-    set_rls_context(customer_id)
-    return query_many(
-        """
-        SELECT * FROM invoices 
-        WHERE customer_id = %s 
-        ORDER BY month DESC 
-        LIMIT %s
-        """,
-        (customer_id, limit)
-    )
+    try:
+        with borrow_connection(customer_id) as conn:
+            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+                cur.execute(
+                    """
+                    SELECT * FROM invoices 
+                    WHERE customer_id = %s 
+                    ORDER BY month DESC 
+                    LIMIT %s
+                    """,
+                    (customer_id, limit)
+                )
+                return cur.fetchall() or []
+    except psycopg2.Error as e:
+        logger.error(f"Query failed: {str(e)}")
+        raise DatabaseError(f"Query execution failed: {str(e)}")
@@ -23,6 +23,21 @@ Evidence pipeline
                                  ↓
                Aurora (hipaa_* tables, hipaa_evidence_signatures)
 
+  Collectors only run SQL and hash; KMS signing and the S3 upload are queued
+  on a bounded worker pool (EvidenceVault, shared with the Texas collector in
+  the evidence_vault layer module) so a customer's controls vault
+  concurrently.  Signature rows are bulk-inserted once per customer, after
+  every job for that customer has finished.
+
+  By default every evidence item gets its own KMS signature over its content
+  hash.  In merkle signing mode (opt-in, EVIDENCE_SIGNING_MODE=merkle)
+  evidence is signed in batches instead: the content hashes of all evidence
+  vaulted by an on-demand request, or by one customer chunk of a scheduled
+  run, become the leaves of a Merkle tree, KMS signs the root, and each
+  signature row stores the root signature plus the item's inclusion proof
+  (see evidence_merkle.py for the offline verifier).  A batch's evidence
+  rows are committed in the same transaction as its signature rows.
+
   NOTE: S3 bucket MUST be configured with Object Lock in Compliance mode.
   HIPAA requires minimum 6-year retention; healthcare tier is configured for
   7 years (HIPAA_RETENTION_DAYS = 2555) matching dataRetentionDays in
@@ -30,7 +45,11 @@ Evidence pipeline
 
 Invocation modes
 ----------------
-  Scheduled (EventBridge cron):   collects all active healthcare customers
+  Scheduled (EventBridge cron):   collects all active healthcare customers,
+                                  in chunks on a worker pool (one pooled DB
+                                  connection per worker), checkpointing each
+                                  completed (customer, control) pair so a
+                                  timed-out or continued run resumes
   API Gateway (on-demand):        POST /hipaa/collect — collects a single
                                   customer, specific controls optional
   API Gateway (audit export):     POST /hipaa/audit-export — generates a
@@ -41,9 +60,19 @@ Environment variables
   RDS_HOST            Aurora Proxy endpoint
   RDS_DATABASE        securebase
   RDS_USER            securebase_app
-  RDS_SECRET_ARN      Secrets Manager ARN for DB password
+  RDS_SECRET_ARN      Secrets Manager ARN for DB credentials (read by db_utils)
   KMS_KEY_ID          KMS key for evidence signing
   S3_EVIDENCE_BUCKET  S3 bucket (Object Lock / Compliance mode, HIPAA-compliant)
+  EVIDENCE_VAULT_MAX_WORKERS  Concurrent KMS/S3 vaulting jobs (default 10)
+  EVIDENCE_SIGNING_MODE       item (default, one signature per evidence item)
+                              | merkle (one signature per batch over a Merkle root)
+  COLLECTION_WORKERS          Concurrent customer chunks in scheduled runs
+                              (default 4; each holds one pooled DB connection)
+  COLLECTION_CHUNK_SIZE       Customers per chunk (default 25)
+  EXPORT_FORMAT               json (default, single document) | ndjson (streamed)
+                              | parquet (one object per section)
+  EXPORT_PART_SIZE_BYTES      S3 multipart part size for streamed exports (default 8 MiB)
+  EXPORT_CURSOR_ITERSIZE      Rows fetched per server-side cursor round trip (default 5000)
   ENVIRONMENT         dev | staging | prod
   LOG_LEVEL           DEBUG | INFO | WARNING | ERROR
 
@@ -60,7 +89,7 @@ Event format (API Gateway on-demand)
     "path": "/hipaa/audit-export",
     "body": "{\"customer_id\": \"uuid\", \"period_start\": \"2025-01-01\",
               \"period_end\": \"2025-12-31\", \"auditor_name\": \"Jane Smith\",
-              \"auditor_email\": \"jsmith@hhs.gov\"}"
+              \"auditor_email\": \"jsmith@hhs.gov\", \"format\": \"ndjson\"}"
   }
   OR (scheduled)
   {
@@ -75,14 +104,38 @@ import json
 import logging
 import os
 import re
+import time
 import uuid
 from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
 import psycopg2
 import psycopg2.extras
+from botocore.config import Config
+
+from db_utils import get_connection, release_connection, set_rls_context_on_conn
+from evidence_export import (
+    DEFAULT_ITERSIZE,
+    DEFAULT_PART_SIZE,
+    NDJSON_CONTENT_TYPE,
+    MultipartWriter,
+    StreamingPackage,
+    columnar_manifest,
+    stream_query,
+    write_columnar_section,
+)
+from columnar_export import PARQUET_CONTENT_TYPE
+from evidence_vault import (
+    EvidenceVault,
+    MerkleSigningBatch,
+    VaultTarget,
+    new_signing_batch,
+    sign_and_vault,
+    write_signature_rows,
+)
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 
@@ -92,12 +145,22 @@ logger.setLevel(LOG_LEVEL)
 
 # ── AWS clients (module-level for Lambda container reuse) ─────────────────────
 
-_secrets = boto3.client("secretsmanager")
-_kms = boto3.client("kms")
-_s3 = boto3.client("s3")
+# Evidence signing and uploads run on a bounded worker pool; the client
+# connection pools are sized to match so workers never queue for a socket.
+VAULT_MAX_WORKERS = int(os.environ.get("EVIDENCE_VAULT_MAX_WORKERS", "10"))
+_client_config = Config(max_pool_connections=2 * VAULT_MAX_WORKERS)
+
+_kms = boto3.client("kms", config=_client_config)
+_s3 = boto3.client("s3", config=_client_config)
+_lambda = boto3.client("lambda")
+_vault_executor = ThreadPoolExecutor(
+    max_workers=VAULT_MAX_WORKERS, thread_name_prefix="hipaa-vault"
+)
 
 # ── Constants ─────────────────────────────────────────────────────────────────
 
+SIGNATURE_TABLE = "hipaa_evidence_signatures"
+
 CONTROL_CATALOGUE = {
     "HIPAA-AS.1": {
         "name": "Workforce Training Records",
@@ -159,50 +222,50 @@ RDS_SECRET_ARN = os.environ.get("RDS_SECRET_ARN", "")
 KMS_KEY_ID = os.environ.get("KMS_KEY_ID", "")
 S3_EVIDENCE_BUCKET = os.environ.get("S3_EVIDENCE_BUCKET", "securebase-evidence")
 ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
+# "item" (the default): one KMS signature per evidence item, over its own hash
+# "merkle": opt-in; one KMS signature per batch over a Merkle root of its
+#           evidence hashes, with each item carrying its inclusion proof
+EVIDENCE_SIGNING_MODE = os.environ.get("EVIDENCE_SIGNING_MODE", "item")
+
+# Scheduled runs: workers and the handler each hold one pooled connection, so
+# COLLECTION_WORKERS + 1 must fit the db_utils pool.
+COLLECTION_WORKERS = int(os.environ.get("COLLECTION_WORKERS", "4"))
+COLLECTION_CHUNK_SIZE = int(os.environ.get("COLLECTION_CHUNK_SIZE", "25"))
+# No new customer is started this close to the Lambda timeout; the run
+# re-invokes itself to resume from its checkpoints instead.
+COLLECTION_DEADLINE_MARGIN_SECONDS = float(
+    os.environ.get("COLLECTION_DEADLINE_MARGIN_SECONDS", "60")
+)
+COLLECTION_MAX_CONTINUATIONS = int(os.environ.get("COLLECTION_MAX_CONTINUATIONS", "10"))
+CHECKPOINT_RETENTION_DAYS = 14
+
+# Audit exports: "json" (the default) builds the single-document package
+# existing consumers read; "ndjson" streams each section from a server-side
+# cursor into an S3 multipart upload.
+EXPORT_FORMATS = ("ndjson", "parquet", "json")
+EXPORT_FORMAT = os.environ.get("EXPORT_FORMAT", "json")
+EXPORT_PART_SIZE_BYTES = int(os.environ.get("EXPORT_PART_SIZE_BYTES", str(DEFAULT_PART_SIZE)))
+EXPORT_CURSOR_ITERSIZE = int(os.environ.get("EXPORT_CURSOR_ITERSIZE", str(DEFAULT_ITERSIZE)))
 
 # ══════════════════════════════════════════════════════════════════════════════
 # DATABASE HELPERS
 # ══════════════════════════════════════════════════════════════════════════════
 
 
-def _get_db_password() -> str:
-    """Retrieve DB password from Secrets Manager (cached after first call)."""
-    secret = _secrets.get_secret_value(SecretId=RDS_SECRET_ARN)
-    value = secret.get("SecretString", "{}")
-    return json.loads(value).get("password", value)
-
-
-_db_conn: Optional[psycopg2.extensions.connection] = None
-
-
 def get_db_connection() -> psycopg2.extensions.connection:
-    """Return (or reuse) a psycopg2 connection to Aurora."""
-    global _db_conn
-    try:
-        if _db_conn is None or _db_conn.closed:
-            password = _get_db_password()
-            _db_conn = psycopg2.connect(
-                host=RDS_HOST,
-                dbname=RDS_DATABASE,
-                user=RDS_USER,
-                password=password,
-                connect_timeout=5,
-                cursor_factory=psycopg2.extras.RealDictCursor,
-            )
-            _db_conn.autocommit = False
-        return _db_conn
-    except Exception as exc:
-        logger.error("DB connection failed: %s", exc)
-        raise
+    """Borrow a connection from the shared db_utils pool (dict rows).
+
+    The pool persists across warm invocations; the handler hands the
+    connection back with release_connection().
+    """
+    conn = get_connection()
+    conn.cursor_factory = psycopg2.extras.RealDictCursor
+    return conn
 
 
 def set_rls_context(conn: psycopg2.extensions.connection, customer_id: str) -> None:
     """Set the PostgreSQL session variable for Row-Level Security."""
-    with conn.cursor() as cur:
-        cur.execute(
-            "SELECT set_config('app.current_customer_id', %s, TRUE)",
-            (str(customer_id),),
-        )
+    set_rls_context_on_conn(conn, str(customer_id))
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -218,12 +281,16 @@ def sha256_hex(data: Any) -> str:
 
 def kms_sign(content_hash: str) -> str:
     """Sign a content hash with KMS and return base64-encoded signature."""
+    return _kms_sign_message(content_hash.encode())
+
+
+def _kms_sign_message(message: bytes) -> str:
     if not KMS_KEY_ID:
         logger.warning("KMS_KEY_ID not set; skipping signing")
         return ""
     resp = _kms.sign(
         KeyId=KMS_KEY_ID,
-        Message=content_hash.encode(),
+        Message=message,
         MessageType="RAW",
         SigningAlgorithm="RSASSA_PKCS1_V1_5_SHA_256",
     )
@@ -258,19 +325,36 @@ def vault_to_s3(
     If KMS_KEY_ID is not set the function raises ValueError rather than silently
     falling back to SSE-S3, which provides weaker protection.
     """
+    _require_vault_key(customer_id)
+    key = _evidence_key(customer_id, evidence_type, evidence_id)
+    _put_evidence(key, json.dumps(payload, default=str, indent=2).encode())
+    return key
+
+
+def _require_vault_key(customer_id: str) -> None:
+    """Enforce the KMS and customer_id preconditions of vault_to_s3."""
     if not KMS_KEY_ID:
         raise ValueError(
             "KMS_KEY_ID must be set for HIPAA-compliant evidence storage. "
             "S3 SSE-S3 fallback is not acceptable under 45 CFR §164.312(a)(2)(iv)."
         )
     _validate_customer_id(customer_id)
+
+
+def _evidence_key(
+    customer_id: str, evidence_type: str, evidence_id: str, extension: str = "json"
+) -> str:
+    """Return the S3 key for an evidence object."""
     date_prefix = datetime.now(timezone.utc).strftime("%Y/%m/%d")
     # Use 'hipaa' sub-prefix to distinguish from fintech evidence in the same bucket
-    key = (
+    return (
         f"evidence/{ENVIRONMENT}/{customer_id}/hipaa/{evidence_type}/"
-        f"{date_prefix}/{evidence_id}.json"
+        f"{date_prefix}/{evidence_id}.{extension}"
     )
-    body = json.dumps(payload, default=str, indent=2).encode()
+
+
+def _put_evidence(key: str, body: bytes) -> None:
+    """Write one serialised evidence object to the vault bucket."""
     _s3.put_object(
         Bucket=S3_EVIDENCE_BUCKET,
         Key=key,
@@ -280,7 +364,6 @@ def vault_to_s3(
         SSEKMSKeyId=KMS_KEY_ID,
     )
     logger.debug("Vaulted HIPAA evidence: s3://%s/%s", S3_EVIDENCE_BUCKET, key)
-    return key
 
 
 def record_signature(
@@ -314,6 +397,25 @@ def record_signature(
         )
 
 
+def _vault_target() -> VaultTarget:
+    """Where this collector's evidence is signed, vaulted and recorded.
+
+    Built per call, so the vault sees the current KMS key and helpers.
+    """
+    return VaultTarget(
+        signature_table=SIGNATURE_TABLE,
+        kms_key_id=KMS_KEY_ID,
+        executor=_vault_executor,
+        sign=kms_sign,
+        sign_message=_kms_sign_message,
+        evidence_key=_evidence_key,
+        put_evidence=_put_evidence,
+        vault_to_s3=vault_to_s3,
+        record_signature=record_signature,
+        pre_submit=_require_vault_key,
+    )
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # CONTROL COLLECTORS
 # ══════════════════════════════════════════════════════════════════════════════
@@ -323,6 +425,7 @@ def collect_hipaa_as1(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-AS.1 — Workforce Training Records (164.308(a)(5))
@@ -383,9 +486,10 @@ def collect_hipaa_as1(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-AS.1", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-AS.1", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-AS.1", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -397,6 +501,7 @@ def collect_hipaa_as2(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-AS.2 — Risk Analysis Documentation (164.308(a)(1)(ii)(A))
@@ -462,9 +567,10 @@ def collect_hipaa_as2(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-AS.2", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-AS.2", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-AS.2", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -476,6 +582,7 @@ def collect_hipaa_ts1(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-TS.1 — PHI Directory Access Controls (164.312(a)(1))
@@ -542,9 +649,10 @@ def collect_hipaa_ts1(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-TS.1", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-TS.1", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-TS.1", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -556,6 +664,7 @@ def collect_hipaa_ts2(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-TS.2 — Encryption at Rest (PHI Volumes) (164.312(a)(2)(iv))
@@ -624,9 +733,10 @@ def collect_hipaa_ts2(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-TS.2", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-TS.2", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-TS.2", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -638,6 +748,7 @@ def collect_hipaa_ts3(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-TS.3 — Database PHI Access Controls (164.312(a)(1))
@@ -699,9 +810,10 @@ def collect_hipaa_ts3(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-TS.3", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-TS.3", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-TS.3", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -713,6 +825,7 @@ def collect_hipaa_au1(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-AU.1 — PHI Access Audit Logging (164.312(b))
@@ -780,9 +893,10 @@ def collect_hipaa_au1(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-AU.1", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-AU.1", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-AU.1", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -794,6 +908,7 @@ def collect_hipaa_au2(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-AU.2 — Audit Log Retention (7-year) (164.312(b))
@@ -854,9 +969,10 @@ def collect_hipaa_au2(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-AU.2", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-AU.2", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-AU.2", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -868,6 +984,7 @@ def collect_hipaa_tx1(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-TX.1 — Encryption in Transit (TLS 1.2+) (164.312(e)(1))
@@ -926,9 +1043,10 @@ def collect_hipaa_tx1(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-TX.1", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-TX.1", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-TX.1", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -940,6 +1058,7 @@ def collect_hipaa_tx2(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-TX.2 — Secure PHI Transmission (164.312(e)(2)(ii))
@@ -1010,9 +1129,10 @@ def collect_hipaa_tx2(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-TX.2", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-TX.2", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-TX.2", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -1024,6 +1144,7 @@ def collect_hipaa_baa1(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
 ) -> Dict[str, Any]:
     """
     HIPAA-BAA.1 — BAA Agreement on File (164.308(b)(1))
@@ -1101,9 +1222,10 @@ def collect_hipaa_baa1(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "HIPAA-BAA.1", evidence_id, evidence)
-    record_signature(conn, customer_id, "HIPAA-BAA.1", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "HIPAA-BAA.1", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -1177,6 +1299,132 @@ def _get_healthcare_customers(conn: psycopg2.extensions.connection) -> List[str]
 # ══════════════════════════════════════════════════════════════════════════════
 
 
+def _audit_export_sections(
+    customer_id: str, period_start: str, period_end: str
+) -> List[Tuple[str, str, Tuple[Any, ...]]]:
+    """Return the (name, sql, params) sections of an audit export package, in order."""
+    return [
+        # PHI access logs for the period
+        ("phi_access_logs", """
+            SELECT id, accessed_at, user_id, action, resource_id,
+                   resource_type, record_type, patient_id,
+                   transmission_type, encrypted, integrity_verified
+            FROM hipaa_phi_access_logs
+            WHERE customer_id = %s
+              AND accessed_at BETWEEN %s::DATE AND %s::DATE + INTERVAL '1 day'
+            ORDER BY accessed_at
+            """, (str(customer_id), period_start, period_end)),
+        # Encryption status snapshots
+        ("encryption_snapshots", """
+            SELECT id, resource_type, resource_id, resource_name,
+                   contains_phi, encryption_enabled, kms_key_status,
+                   tls_version, access_control_configured,
+                   overly_permissive, snapshot_at
+            FROM hipaa_encryption_status
+            WHERE customer_id = %s
+            ORDER BY resource_type, resource_id
+            """, (str(customer_id),)),
+        # BAA agreements active during the period
+        ("baa_agreements", """
+            SELECT id, counterparty, signed_at, expiry, status
+            FROM hipaa_baa_agreements
+            WHERE customer_id = %s
+              AND signed_at <= %s::DATE + INTERVAL '1 day'
+              AND (expiry IS NULL OR expiry >= %s::DATE)
+            ORDER BY signed_at
+            """, (str(customer_id), period_end, period_start)),
+        # Current control statuses
+        ("control_statuses",
+         "SELECT * FROM hipaa_compliance_controls WHERE customer_id = %s",
+         (str(customer_id),)),
+    ]
+
+
+def _stream_export_to_vault(
+    conn: psycopg2.extensions.connection,
+    customer_id: str,
+    evidence_type: str,
+    export_ref: str,
+    header: Dict[str, Any],
+    sections: List[Tuple[str, str, Tuple[Any, ...]]],
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Stream export sections into the vault as one NDJSON object.
+
+    Each section is read through a server-side cursor and written to an S3
+    multipart upload as it arrives, so memory stays bounded by the part size
+    and cursor itersize rather than the export's row count.  Returns the
+    package key and its (unsigned) manifest.
+    """
+    _require_vault_key(customer_id)
+    key = _evidence_key(customer_id, evidence_type, export_ref, "ndjson")
+
+    with MultipartWriter(
+        _s3,
+        S3_EVIDENCE_BUCKET,
+        key,
+        part_size=EXPORT_PART_SIZE_BYTES,
+        ContentType=NDJSON_CONTENT_TYPE,
+        ServerSideEncryption="aws:kms",
+        SSEKMSKeyId=KMS_KEY_ID,
+    ) as writer:
+        package = StreamingPackage(writer, header)
+        for name, sql, params in sections:
+            rows = stream_query(
+                conn, f"{evidence_type}_{name}", sql, params, EXPORT_CURSOR_ITERSIZE
+            )
+            package.write_section(name, rows)
+
+    logger.info(
+        "Streamed %s: s3://%s/%s (%d bytes)",
+        evidence_type, S3_EVIDENCE_BUCKET, key, package.bytes_written,
+    )
+    return key, package.manifest(package_key=key, **header)
+
+
+def _stream_columnar_export_to_vault(
+    conn: psycopg2.extensions.connection,
+    customer_id: str,
+    evidence_type: str,
+    export_ref: str,
+    header: Dict[str, Any],
+    sections: List[Tuple[str, str, Tuple[Any, ...]]],
+) -> Dict[str, Any]:
+    """
+    Stream each export section into the vault as its own Parquet object.
+
+    Rows arrive through a server-side cursor and are written one row group
+    per EXPORT_CURSOR_ITERSIZE rows, so memory stays bounded as for NDJSON.
+    Returns the (unsigned) manifest listing every section object.
+    """
+    _require_vault_key(customer_id)
+    entries = []
+    for name, sql, params in sections:
+        key = _evidence_key(customer_id, evidence_type, f"{export_ref}.{name}", "parquet")
+        with MultipartWriter(
+            _s3,
+            S3_EVIDENCE_BUCKET,
+            key,
+            part_size=EXPORT_PART_SIZE_BYTES,
+            ContentType=PARQUET_CONTENT_TYPE,
+            ServerSideEncryption="aws:kms",
+            SSEKMSKeyId=KMS_KEY_ID,
+        ) as writer:
+            rows = stream_query(
+                conn, f"{evidence_type}_{name}", sql, params, EXPORT_CURSOR_ITERSIZE
+            )
+            entries.append(
+                write_columnar_section(writer, name, rows, EXPORT_CURSOR_ITERSIZE)
+            )
+
+    manifest = columnar_manifest(entries, **header)
+    logger.info(
+        "Streamed %s as %d Parquet objects (%d bytes)",
+        evidence_type, len(entries), manifest["package_bytes"],
+    )
+    return manifest
+
+
 def generate_audit_export(
     conn: psycopg2.extensions.connection,
     customer_id: str,
@@ -1185,6 +1433,7 @@ def generate_audit_export(
     auditor_name: str,
     auditor_email: str,
     request_id: str,
+    export_format: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Build a signed HIPAA audit evidence package covering all controls
@@ -1196,10 +1445,22 @@ def generate_audit_export(
       - BAA agreements active during the period
       - Current control statuses
       - Package SHA-256 hash + KMS signature
+
+    "json" (the default) builds the whole package in memory as one
+    document.  In "ndjson" format sections are streamed as NDJSON and a
+    manifest with per-section record counts and SHA-256 digests is vaulted
+    next to the package; the package hash is the SHA-256 of the NDJSON
+    object.  "parquet" streams each section to its own Parquet object and
+    the signed manifest is the package (s3_key points at it).  The streamed
+    formats are opt-in per request or through EXPORT_FORMAT.
     """
+    export_format = export_format or EXPORT_FORMAT
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
     logger.info(
-        "Generating HIPAA audit export for customer=%s period=%s to %s",
-        customer_id, period_start, period_end,
+        "Generating HIPAA audit export for customer=%s period=%s to %s format=%s",
+        customer_id, period_start, period_end, export_format,
     )
 
     export_ref = (
@@ -1207,60 +1468,7 @@ def generate_audit_export(
         f"{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}-"
         f"{uuid.uuid4().hex[:8].upper()}"
     )
-
-    with conn.cursor() as cur:
-        # PHI access logs for the period
-        cur.execute(
-            """
-            SELECT id, accessed_at, user_id, action, resource_id,
-                   resource_type, record_type, patient_id,
-                   transmission_type, encrypted, integrity_verified
-            FROM hipaa_phi_access_logs
-            WHERE customer_id = %s
-              AND accessed_at BETWEEN %s::DATE AND %s::DATE + INTERVAL '1 day'
-            ORDER BY accessed_at
-            """,
-            (str(customer_id), period_start, period_end),
-        )
-        phi_access_logs = [dict(r) for r in cur.fetchall()]
-
-        # Encryption status snapshots
-        cur.execute(
-            """
-            SELECT id, resource_type, resource_id, resource_name,
-                   contains_phi, encryption_enabled, kms_key_status,
-                   tls_version, access_control_configured,
-                   overly_permissive, snapshot_at
-            FROM hipaa_encryption_status
-            WHERE customer_id = %s
-            ORDER BY resource_type, resource_id
-            """,
-            (str(customer_id),),
-        )
-        encryption_snapshots = [dict(r) for r in cur.fetchall()]
-
-        # BAA agreements active during the period
-        cur.execute(
-            """
-            SELECT id, counterparty, signed_at, expiry, status
-            FROM hipaa_baa_agreements
-            WHERE customer_id = %s
-              AND signed_at <= %s::DATE + INTERVAL '1 day'
-              AND (expiry IS NULL OR expiry >= %s::DATE)
-            ORDER BY signed_at
-            """,
-            (str(customer_id), period_end, period_start),
-        )
-        baa_agreements = [dict(r) for r in cur.fetchall()]
-
-        # Current control statuses
-        cur.execute(
-            "SELECT * FROM hipaa_compliance_controls WHERE customer_id = %s",
-            (str(customer_id),),
-        )
-        controls = [dict(r) for r in cur.fetchall()]
-
-    package = {
+    header = {
         "export_reference": export_ref,
         "customer_id": str(customer_id),
         "generated_at": datetime.now(timezone.utc).isoformat(),
@@ -1271,21 +1479,49 @@ def generate_audit_export(
         "environment": ENVIRONMENT,
         "controls_included": ALL_CONTROLS,
         "retention_policy_days": HIPAA_RETENTION_DAYS,
-        "record_counts": {
-            "phi_access_logs": len(phi_access_logs),
-            "encryption_snapshots": len(encryption_snapshots),
-            "baa_agreements": len(baa_agreements),
-        },
-        "phi_access_logs": phi_access_logs,
-        "encryption_snapshots": encryption_snapshots,
-        "baa_agreements": baa_agreements,
-        "control_statuses": controls,
     }
+    sections = _audit_export_sections(customer_id, period_start, period_end)
+    manifest_key = None
 
-    package_hash = sha256_hex(package)
-    kms_sig = kms_sign(package_hash)
+    if export_format in ("ndjson", "parquet"):
+        if export_format == "parquet":
+            manifest = _stream_columnar_export_to_vault(
+                conn, customer_id, "audit_export", export_ref, header, sections
+            )
+        else:
+            s3_key, manifest = _stream_export_to_vault(
+                conn, customer_id, "audit_export", export_ref, header, sections
+            )
+        package_hash = manifest["package_sha256"]
+        kms_sig = kms_sign(package_hash)
+        manifest["kms_key_id"] = KMS_KEY_ID
+        manifest["kms_signature"] = kms_sig
+        manifest_key = _evidence_key(customer_id, "audit_export", f"{export_ref}.manifest")
+        _put_evidence(manifest_key, json.dumps(manifest, indent=2, default=str).encode())
+        if export_format == "parquet":
+            s3_key = manifest_key
+        record_counts = {
+            "phi_access_logs": manifest["record_counts"]["phi_access_logs"],
+            "encryption_snapshots": manifest["record_counts"]["encryption_snapshots"],
+            "baa_agreements": manifest["record_counts"]["baa_agreements"],
+        }
+    else:
+        package = dict(header)
+        with conn.cursor() as cur:
+            for name, sql, params in sections:
+                cur.execute(sql, params)
+                package[name] = [dict(r) for r in cur.fetchall()]
+        record_counts = {
+            "phi_access_logs": len(package["phi_access_logs"]),
+            "encryption_snapshots": len(package["encryption_snapshots"]),
+            "baa_agreements": len(package["baa_agreements"]),
+        }
+        package["record_counts"] = record_counts
+
+        package_hash = sha256_hex(package)
+        kms_sig = kms_sign(package_hash)
 
-    s3_key = vault_to_s3(str(customer_id), "audit_export", export_ref, package)
+        s3_key = vault_to_s3(str(customer_id), "audit_export", export_ref, package)
 
     with conn.cursor() as cur:
         cur.execute(
@@ -1307,7 +1543,7 @@ def generate_audit_export(
                 period_start,
                 period_end,
                 ALL_CONTROLS,
-                len(phi_access_logs) + len(baa_agreements),
+                record_counts["phi_access_logs"] + record_counts["baa_agreements"],
                 s3_key,
                 package_hash,
                 kms_sig,
@@ -1315,12 +1551,16 @@ def generate_audit_export(
         )
 
     logger.info("HIPAA audit export complete: ref=%s s3=%s", export_ref, s3_key)
-    return {
+    result = {
         "export_reference": export_ref,
         "s3_key": s3_key,
         "package_hash": package_hash,
-        "record_counts": package["record_counts"],
+        "record_counts": record_counts,
+        "format": export_format,
     }
+    if manifest_key:
+        result["manifest_key"] = manifest_key
+    return result
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -1353,6 +1593,267 @@ def _http_response(status_code: int, body: Any) -> Dict[str, Any]:
     }
 
 
+def _collect_controls(
+    conn: psycopg2.extensions.connection,
+    customer_id: str,
+    controls: List[str],
+    request_id: str,
+    batch: Optional[MerkleSigningBatch] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run the given controls for one customer through a shared evidence vault.
+
+    Collectors run their SQL in sequence on ``conn`` while signing and uploads
+    proceed in the background; the vault is flushed (signature rows written,
+    or handed to ``batch``) before returning, so the caller's commit covers
+    the whole customer.
+    """
+    vault = EvidenceVault(_vault_target(), request_id, batch=batch)
+    results: List[Dict[str, Any]] = []
+    for ctrl in controls:
+        collector = CONTROL_COLLECTOR_MAP.get(ctrl)
+        if not collector:
+            continue
+        # Each control runs under a savepoint so a failed statement only
+        # undoes that control's writes and the transaction stays usable.
+        with conn.cursor() as cur:
+            cur.execute("SAVEPOINT collect_control")
+        try:
+            results.append(collector(conn, customer_id, request_id, vault=vault))
+        except Exception as exc:
+            logger.error("Control %s failed for %s: %s", ctrl, customer_id, exc)
+            with conn.cursor() as cur:
+                cur.execute("ROLLBACK TO SAVEPOINT collect_control")
+            results.append({"control_id": ctrl, "error": str(exc)})
+        else:
+            with conn.cursor() as cur:
+                cur.execute("RELEASE SAVEPOINT collect_control")
+
+    failed = {f["s3_key"]: f["error"] for f in vault.flush(conn)}
+    for result in results:
+        if result.get("s3_key") in failed:
+            result["vault_error"] = failed[result["s3_key"]]
+    return results
+
+
+def _record_batch_signatures(
+    conn: psycopg2.extensions.connection,
+    batch: Optional[MerkleSigningBatch],
+    run_id: Optional[str] = None,
+    checkpoints: Optional[Dict[str, List[str]]] = None,
+) -> None:
+    """Sign the batch's Merkle root and write each customer's signature rows.
+
+    Nothing is committed here: the caller commits the batch's evidence and
+    its signature rows together, so a KMS failure rolls both back instead of
+    leaving unsigned evidence behind.  With ``checkpoints`` (customer_id →
+    completed control IDs) each customer's pairs join the same transaction,
+    so a pair is never marked done before its evidence is signed.
+    """
+    if batch is None:
+        return
+    for cid, rows in batch.sign().items():
+        set_rls_context(conn, cid)
+        write_signature_rows(conn, SIGNATURE_TABLE, rows)
+        if checkpoints:
+            _record_checkpoints(conn, run_id, cid, checkpoints.get(cid, []))
+
+
+# ── Scheduled runs: chunked, parallel, resumable ──────────────────────────────
+
+
+def _load_checkpoints(conn: psycopg2.extensions.connection, run_id: str) -> set:
+    """Return the (customer_id, control_id) pairs already completed by a run.
+
+    Checkpoints of runs older than CHECKPOINT_RETENTION_DAYS are pruned.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            DELETE FROM hipaa_collection_checkpoints
+            WHERE completed_at < NOW() - (%s * INTERVAL '1 day')
+            """,
+            (CHECKPOINT_RETENTION_DAYS,),
+        )
+        cur.execute(
+            """
+            SELECT customer_id::TEXT AS customer_id, control_id
+            FROM hipaa_collection_checkpoints
+            WHERE run_id = %s
+            """,
+            (run_id,),
+        )
+        completed = {(row["customer_id"], row["control_id"]) for row in cur.fetchall()}
+    conn.commit()
+    return completed
+
+
+def _record_checkpoints(
+    conn: psycopg2.extensions.connection,
+    run_id: str,
+    customer_id: str,
+    control_ids: List[str],
+) -> None:
+    """Mark (customer, control) pairs of a run as completed."""
+    if not control_ids:
+        return
+    with conn.cursor() as cur:
+        psycopg2.extras.execute_values(
+            cur,
+            """
+            INSERT INTO hipaa_collection_checkpoints
+              (run_id, customer_id, control_id, completed_at)
+            VALUES %s
+            ON CONFLICT (run_id, customer_id, control_id) DO NOTHING
+            """,
+            [(run_id, str(customer_id), ctrl) for ctrl in control_ids],
+            template="(%s, %s::UUID, %s, NOW())",
+        )
+
+
+def _run_deadline(context: Any) -> float:
+    """Monotonic time after which no new customer should be started."""
+    get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+    remaining_ms = get_remaining() if callable(get_remaining) else None
+    if not isinstance(remaining_ms, (int, float)):
+        return float("inf")
+    return time.monotonic() + remaining_ms / 1000.0 - COLLECTION_DEADLINE_MARGIN_SECONDS
+
+
+def _collect_chunk(
+    customer_ids: List[str],
+    completed: set,
+    run_id: str,
+    request_id: str,
+    deadline: float,
+) -> Dict[str, int]:
+    """
+    Collect one chunk of customers on a connection of its own.
+
+    Controls already checkpointed for the run are skipped; once ``deadline``
+    passes the remaining customers are counted as deferred instead.
+    """
+    stats = {"processed": 0, "skipped": 0, "deferred": 0, "failed_controls": 0}
+    conn = get_db_connection()
+    try:
+        batch = new_signing_batch(_vault_target(), EVIDENCE_SIGNING_MODE, request_id)
+        awaiting_signature: Dict[str, List[str]] = {}
+        for cid in customer_ids:
+            pending = [c for c in ALL_CONTROLS if (cid, c) not in completed]
+            if not pending:
+                stats["skipped"] += 1
+                continue
+            if time.monotonic() >= deadline:
+                stats["deferred"] += 1
+                continue
+            set_rls_context(conn, cid)
+            results = _collect_controls(conn, cid, pending, request_id, batch)
+            done = [
+                r["control_id"] for r in results
+                if "error" not in r and "vault_error" not in r
+            ]
+            stats["failed_controls"] += len(results) - len(done)
+            if batch is None:
+                _record_checkpoints(conn, run_id, cid, done)
+                conn.commit()
+            else:
+                awaiting_signature[cid] = done
+            stats["processed"] += 1
+        # In merkle mode the chunk's evidence commits with its signatures.
+        _record_batch_signatures(conn, batch, run_id, awaiting_signature)
+        conn.commit()
+        return stats
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        release_connection(conn)
+
+
+def _continue_run(event: Dict[str, Any], context: Any, run_id: str) -> bool:
+    """Re-invoke this function asynchronously to resume ``run_id``."""
+    detail = dict(event.get("detail") or {})
+    continuation = int(detail.get("continuation", 0))
+    if continuation >= COLLECTION_MAX_CONTINUATIONS:
+        logger.error(
+            "Run %s still incomplete after %d continuations; giving up",
+            run_id, continuation,
+        )
+        return False
+    function_arn = getattr(context, "invoked_function_arn", None)
+    if not isinstance(function_arn, str):
+        return False
+    detail.update(run_id=run_id, continuation=continuation + 1)
+    _lambda.invoke(
+        FunctionName=function_arn,
+        InvocationType="Event",
+        Payload=json.dumps(dict(event, detail=detail)).encode(),
+    )
+    logger.info("Run %s continued (continuation %d)", run_id, continuation + 1)
+    return True
+
+
+def _run_scheduled_collection(
+    conn: psycopg2.extensions.connection,
+    event: Dict[str, Any],
+    context: Any,
+    request_id: str,
+) -> Dict[str, Any]:
+    """
+    Collect every healthcare customer, COLLECTION_CHUNK_SIZE at a time, on
+    COLLECTION_WORKERS threads.
+
+    The run is identified by the EventBridge event id, which Lambda's async
+    retries preserve, so a retried or continued invocation only collects the
+    (customer, control) pairs that have no checkpoint yet.
+    """
+    run_id = (event.get("detail") or {}).get("run_id") or event.get("id") or request_id
+    customer_ids = _get_healthcare_customers(conn)
+    completed = _load_checkpoints(conn, run_id)
+    chunks = [
+        customer_ids[i:i + COLLECTION_CHUNK_SIZE]
+        for i in range(0, len(customer_ids), COLLECTION_CHUNK_SIZE)
+    ]
+    logger.info(
+        "Scheduled run %s: %d healthcare customers in %d chunks, %d pairs checkpointed",
+        run_id, len(customer_ids), len(chunks), len(completed),
+    )
+
+    deadline = _run_deadline(context)
+    totals = {"processed": 0, "skipped": 0, "deferred": 0, "failed_controls": 0}
+    chunks_failed = 0
+    workers = max(1, min(COLLECTION_WORKERS, len(chunks)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hipaa-collect") as pool:
+        futures = [
+            pool.submit(_collect_chunk, chunk, completed, run_id, request_id, deadline)
+            for chunk in chunks
+        ]
+        for future in futures:
+            try:
+                stats = future.result()
+            except Exception as exc:
+                chunks_failed += 1
+                logger.error("Run %s: customer chunk failed: %s", run_id, exc)
+                continue
+            for key, value in stats.items():
+                totals[key] += value
+
+    continued = totals["deferred"] > 0 and _continue_run(event, context, run_id)
+    return {
+        "statusCode": 200,
+        "run_id": run_id,
+        "customers_processed": totals["processed"],
+        "customers_already_complete": totals["skipped"],
+        "customers_deferred": totals["deferred"],
+        "controls_failed": totals["failed_controls"],
+        "chunks_failed": chunks_failed,
+        "continued": continued,
+    }
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda entry point.
@@ -1375,23 +1876,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
         # ── Scheduled run: collect all eligible customers ──────────────────
         if source == "aws.events":
-            customer_ids = _get_healthcare_customers(conn)
-            logger.info("Scheduled run: %d healthcare customers", len(customer_ids))
-            results = []
-            for cid in customer_ids:
-                set_rls_context(conn, cid)
-                customer_results = []
-                for ctrl in ALL_CONTROLS:
-                    collector = CONTROL_COLLECTOR_MAP.get(ctrl)
-                    if collector:
-                        try:
-                            result = collector(conn, cid, request_id)
-                            customer_results.append(result)
-                        except Exception as exc:
-                            logger.error("Control %s failed for %s: %s", ctrl, cid, exc)
-                conn.commit()
-                results.append({"customer_id": cid, "controls": customer_results})
-            return {"statusCode": 200, "customers_processed": len(customer_ids)}
+            return _run_scheduled_collection(conn, event, context, request_id)
 
         # ── HTTP: on-demand collection ─────────────────────────────────────
         if http_method not in ("POST", "GET"):
@@ -1420,6 +1905,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             for field in required:
                 if not body.get(field):
                     return _http_response(400, {"error": f"{field} is required"})
+            if body.get("format") not in (None,) + EXPORT_FORMATS:
+                return _http_response(
+                    400, {"error": "format must be 'ndjson', 'parquet' or 'json'"}
+                )
             result = generate_audit_export(
                 conn,
                 customer_id,
@@ -1428,6 +1917,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 body.get("auditor_name", ""),
                 body.get("auditor_email", ""),
                 request_id,
+                body.get("format"),
             )
             conn.commit()
             return _http_response(200, result)
@@ -1443,16 +1933,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not controls_to_run:
             return _http_response(400, {"error": "No valid controls specified"})
 
-        results = []
-        for ctrl in controls_to_run:
-            collector = CONTROL_COLLECTOR_MAP[ctrl]
-            try:
-                result = collector(conn, customer_id, request_id)
-                results.append(result)
-            except Exception as exc:
-                logger.error("Control %s failed: %s", ctrl, exc)
-                results.append({"control_id": ctrl, "error": str(exc)})
-
+        batch = new_signing_batch(_vault_target(), EVIDENCE_SIGNING_MODE, request_id)
+        results = _collect_controls(conn, customer_id, controls_to_run, request_id, batch)
+        _record_batch_signatures(conn, batch)
         conn.commit()
         return _http_response(200, {
             "customer_id": customer_id,
@@ -1468,3 +1951,5 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             except Exception:
                 pass
         return _http_response(500, {"error": "Internal server error", "message": str(exc)})
+    finally:
+        release_connection(conn)
@@ -9,7 +9,11 @@ Architecture:
 - Render notification templates with variables
 - Dispatch to email (SES), SMS (SNS), webhook (HTTP POST)
 - Store in-app notifications in DynamoDB
-- Handle retries with exponential backoff
+- Prefetch templates and preferences for the whole batch (BatchGetItem)
+- Deduplicate with a conditional write on the dedup table
+- Dispatch channels concurrently across the batch
+- Retry critical failures through the SQS visibility timeout and
+  report them as partial batch failures (batchItemFailures)
 - Log delivery status to audit trail
 - Move failed messages to DLQ
 
@@ -19,13 +23,17 @@ Status: Implementation Complete
 """
 
 import json
+import math
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 import time
 import hmac
 import hashlib
 import re
+import string
+from collections import OrderedDict
 from uuid import uuid4
 
 import boto3
@@ -47,6 +55,29 @@ NOTIFICATION_MAX_RETRIES = int(os.environ.get('NOTIFICATION_MAX_RETRIES', str(MA
 NOTIFICATION_RETRY_BACKOFF_BASE_MS = int(os.environ.get('NOTIFICATION_RETRY_BACKOFF_BASE_MS', '500'))
 NOTIFICATION_DELIVERY_LOG_TTL_DAYS = int(os.environ.get('NOTIFICATION_DELIVERY_LOG_TTL_DAYS', '30'))
 DASHBOARD_ALERT_BASE_URL = os.environ.get('DASHBOARD_ALERT_BASE_URL', 'https://app.securebase.io/alerts')
+NOTIFICATION_DISPATCH_CONCURRENCY = int(os.environ.get('NOTIFICATION_DISPATCH_CONCURRENCY', '16'))
+NOTIFICATION_TEMPLATE_CACHE_TTL_SECONDS = int(os.environ.get('NOTIFICATION_TEMPLATE_CACHE_TTL_SECONDS', '60'))
+NOTIFICATION_TEMPLATE_CACHE_MAX_ENTRIES = int(os.environ.get('NOTIFICATION_TEMPLATE_CACHE_MAX_ENTRIES', '1024'))
+
+# DynamoDB BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_UNPROCESSED_RETRIES = 2
+# SQS caps ChangeMessageVisibility at 12 hours
+MAX_VISIBILITY_TIMEOUT_SECONDS = 43200
+
+DEFAULT_TEMPLATE = {
+    'subject': '{{title}}',
+    'body_html': '<p>{{body}}</p>',
+    'body_text': '{{body}}'
+}
+
+DEFAULT_USER_PREFERENCES = {
+    'email': '',
+    'phone_number': '',
+    'webhook_url': '',
+    'webhook_secret': '',
+    'subscriptions': {}
+}
 
 SENSITIVE_KEY_MARKERS = (
     'policy',
@@ -69,6 +100,20 @@ SENSITIVE_VALUE_PATTERNS = [
 dynamodb = boto3.resource('dynamodb')
 ses_client = boto3.client('ses')
 sns_client = boto3.client('sns')
+sqs_client = boto3.client('sqs')
+
+# Shared across invocations of a warm container; boto3 clients are thread-safe
+_dispatch_executor = ThreadPoolExecutor(
+    max_workers=max(1, NOTIFICATION_DISPATCH_CONCURRENCY), thread_name_prefix='notify'
+)
+
+# Compiled templates, per warm container:
+# (template owner, event_type, content fingerprint) -> CompiledTemplate
+_compiled_templates = OrderedDict()
+# (customer_id, event_type) -> (expires monotonic, CompiledTemplate); a customer
+# without its own template maps to the shared default template
+_template_index = OrderedDict()
+_formatter = string.Formatter()
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -80,7 +125,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         context: Lambda context
 
     Returns:
-        dict: Processing results
+        dict: SQS partial batch response ({'batchItemFailures': [...]})
     """
     # Validate environment variables
     validate_environment()
@@ -89,35 +134,204 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     records = event.get('Records', [])
     if not records:
         print("No records to process")
-        return {'statusCode': 200, 'body': json.dumps({'message': 'No records'})}
+        return {'batchItemFailures': []}
 
-    # Process each notification
-    results = {
-        'processed': 0,
-        'failed': 0,
-        'errors': []
-    }
+    return process_batch(records)
+
+
+def process_batch(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Process a batch of SQS records together
+
+    Templates and preferences for every record are fetched up front with
+    BatchGetItem, each record claims its dedup window with one conditional
+    write, and all (record, channel) deliveries run on a shared thread pool.
+    Nothing sleeps: a critical notification whose external channels fail is
+    made visible again after a backoff via ChangeMessageVisibility and
+    reported in batchItemFailures, so only that record is redelivered and
+    only its failed channels are sent again.
+
+    Args:
+        records: SQS records
+
+    Returns:
+        dict: Partial batch response for the SQS event source mapping
+    """
+    results = {'processed': 0, 'suppressed': 0, 'retrying': 0, 'failed': 0}
+    failures: List[Dict[str, str]] = []
 
+    parsed = []
     for record in records:
         try:
-            notification = parse_sqs_message(record)
-            process_notification(notification)
-            results['processed'] += 1
-            print(f"Successfully processed notification: {notification.get('id')}")
+            parsed.append((record, parse_sqs_message(record)))
         except Exception as e:
             results['failed'] += 1
-            error_msg = str(e)
-            results['errors'].append(error_msg)
-            print(f"Error processing notification: {e}")
-            
-            # Log to CloudWatch for monitoring
-            log_error(record, error_msg)
+            log_error(record, str(e))
+            failures.append({'itemIdentifier': record.get('messageId')})
+
+    lookups = prefetch_lookups([notification for _, notification in parsed])
+    claims = list(_dispatch_executor.map(lambda item: claim_dedup_key(item[1]), parsed))
+
+    deliveries = []
+    for (record, notification), (suppress, duplicate_count, pending_channels) in zip(parsed, claims):
+        if suppress:
+            results['suppressed'] += 1
+            print(
+                f"Suppressed duplicate notification {notification.get('id')} "
+                f"(dedup_count={duplicate_count})"
+            )
+            continue
+        try:
+            futures = submit_deliveries(notification, lookups, receive_count(record), pending_channels)
+        except Exception as e:
+            results['failed'] += 1
+            log_error(record, str(e))
+            release_dedup_key(notification)
+            failures.append({'itemIdentifier': record['messageId']})
+            continue
+        deliveries.append((record, notification, pending_channels, futures))
+
+    for record, notification, pending_channels, futures in deliveries:
+        delivery_results = {channel: future.result() for channel, future in futures.items()}
+        print(f"Notification {notification['id']} delivery results: {delivery_results}")
+
+        failed_channels = sorted(
+            channel for channel, (status, _, _) in delivery_results.items()
+            if status == 'failed' and channel != 'in_app'
+        )
+        is_critical = (notification.get('priority') or '').lower() == 'critical'
+        attempt = receive_count(record)
+
+        if failed_channels and is_critical and attempt < NOTIFICATION_MAX_RETRIES:
+            set_pending_channels(notification, failed_channels)
+            schedule_retry(record, attempt)
+            results['retrying'] += 1
+            failures.append({'itemIdentifier': record['messageId']})
+            continue
+
+        if failed_channels and is_critical:
+            for channel in failed_channels:
+                print(json.dumps({
+                    'event': 'notification_delivery_retries_exhausted',
+                    'notification_id': notification.get('id'),
+                    'client_id': notification.get('customer_id'),
+                    'alert_type': notification.get('type'),
+                    'channel': channel,
+                    'max_retries': max(1, NOTIFICATION_MAX_RETRIES),
+                    'error': delivery_results[channel][2],
+                    'timestamp': datetime.utcnow().isoformat()
+                }))
+        if pending_channels:
+            set_pending_channels(notification, [])
+        results['processed'] += 1
 
     print(f"Batch processing complete: {results}")
-    return {
-        'statusCode': 200,
-        'body': json.dumps(results)
-    }
+    return {'batchItemFailures': failures}
+
+
+def submit_deliveries(
+    notification: Dict[str, Any],
+    lookups: Dict[str, Dict],
+    attempt: int = 1,
+    pending_channels: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Resolve channels and content for a notification and submit one delivery
+    per channel to the dispatch pool
+
+    Args:
+        notification: Notification message
+        lookups: Prefetched templates and preferences (see prefetch_lookups)
+        attempt: SQS receive count of the record
+        pending_channels: Channels still owed by an earlier attempt, if any
+
+    Returns:
+        dict: Channel -> future resolving to (status, http_status_code, error)
+    """
+    user_prefs = resolve_user_preferences(lookups, notification['user_id'], notification['customer_id'])
+    event_type = notification['type']
+    enabled_channels = get_enabled_channels(user_prefs, event_type, notification['channels'])
+    if pending_channels is not None:
+        enabled_channels = [channel for channel in enabled_channels if channel in pending_channels]
+
+    if not enabled_channels:
+        print(f"No enabled channels for user {notification['user_id']}, event {event_type}")
+        return {}
+
+    rendered = render_template(notification, lookups)
+    sanitized_rendered = sanitize_notification_payload(
+        {
+            'subject': rendered.get('subject', ''),
+            'body_html': rendered.get('body_html', ''),
+            'body_text': rendered.get('body_text', ''),
+            'metadata': notification.get('metadata', {}),
+        },
+        notification.get('id')
+    )
+
+    futures = {}
+    for channel in enabled_channels:
+        if channel == 'in_app':
+            futures[channel] = _dispatch_executor.submit(deliver_in_app, notification, rendered)
+        else:
+            futures[channel] = _dispatch_executor.submit(
+                dispatch_channel, channel, notification, sanitized_rendered, user_prefs, attempt
+            )
+    return futures
+
+
+def deliver_in_app(notification: Dict[str, Any], rendered: Dict[str, str]) -> tuple[str, None, Optional[str]]:
+    """
+    Store an in-app notification and log the outcome
+    """
+    try:
+        store_in_app(notification, rendered)
+        log_delivery(notification, 'in_app', 'success')
+        return 'success', None, None
+    except Exception as e:
+        error_msg = str(e)
+        log_delivery(notification, 'in_app', 'failed', error_message=error_msg)
+        return 'failed', None, error_msg
+
+
+def receive_count(record: Dict[str, Any]) -> int:
+    """SQS ApproximateReceiveCount of a record (1 on first delivery)."""
+    try:
+        return max(1, int(record.get('attributes', {}).get('ApproximateReceiveCount', 1)))
+    except (TypeError, ValueError):
+        return 1
+
+
+def retry_delay_seconds(attempt: int) -> int:
+    """Exponential backoff for the next attempt, rounded up to whole seconds for SQS."""
+    backoff_ms = NOTIFICATION_RETRY_BACKOFF_BASE_MS * (2 ** (attempt - 1))
+    return min(MAX_VISIBILITY_TIMEOUT_SECONDS, max(1, math.ceil(backoff_ms / 1000)))
+
+
+def queue_url_from_arn(queue_arn: str) -> str:
+    """arn:aws:sqs:<region>:<account>:<name> -> queue URL"""
+    _, partition, _, region, account_id, name = queue_arn.split(':', 5)
+    domain = 'amazonaws.com.cn' if partition == 'aws-cn' else 'amazonaws.com'
+    return f"https://sqs.{region}.{domain}/{account_id}/{name}"
+
+
+def schedule_retry(record: Dict[str, Any], attempt: int) -> None:
+    """
+    Make a failed record visible again after the backoff for ``attempt``
+
+    If this fails the record still returns after the queue's own visibility
+    timeout, so errors are only logged.
+    """
+    delay = retry_delay_seconds(attempt)
+    try:
+        sqs_client.change_message_visibility(
+            QueueUrl=queue_url_from_arn(record['eventSourceARN']),
+            ReceiptHandle=record['receiptHandle'],
+            VisibilityTimeout=delay
+        )
+        print(f"Retrying message {record.get('messageId')} in {delay}s (attempt {attempt + 1})")
+    except Exception as e:
+        print(f"Failed to set retry backoff for message {record.get('messageId')}: {e}")
 
 
 def validate_environment() -> None:
@@ -240,31 +454,23 @@ def process_notification(notification: Dict[str, Any]) -> None:
     print(f"Notification {notification['id']} delivery results: {delivery_results}")
 
 
-def render_template(notification: Dict[str, Any]) -> Dict[str, str]:
+def render_template(notification: Dict[str, Any], lookups: Optional[Dict[str, Dict]] = None) -> Dict[str, str]:
     """
     Render notification template with variables
 
     Args:
         notification: Notification message
+        lookups: Prefetched templates (see prefetch_lookups), used on a
+                 template cache miss instead of reading DynamoDB
 
     Returns:
         dict: Rendered subject and body
     """
-    # Try to fetch template from DynamoDB
     try:
-        template = get_template(notification['type'], notification['customer_id'])
-        
+        compiled = get_compiled_template(notification['type'], notification['customer_id'], lookups)
+
         # Replace variables in template
-        metadata = notification.get('metadata', {})
-        subject = template.get('subject', notification.get('title', '')).format(**metadata)
-        body_html = template.get('body_html', notification.get('body', '')).format(**metadata)
-        body_text = template.get('body_text', notification.get('body', '')).format(**metadata)
-        
-        return {
-            'subject': subject,
-            'body_html': body_html,
-            'body_text': body_text
-        }
+        return compiled.render(notification)
     except Exception as e:
         # Fallback to notification content if template fails
         print(f"Template rendering failed, using fallback: {e}")
@@ -275,6 +481,152 @@ def render_template(notification: Dict[str, Any]) -> Dict[str, str]:
         }
 
 
+class CompiledTemplate:
+    """
+    A template with subject, HTML and text bodies tokenized once
+
+    Rendering gives the same result as ``text.format(**metadata)`` without
+    re-parsing the format strings.  Parts missing from the template fall back
+    to the notification's title/body, as before.
+    """
+
+    __slots__ = ('subject', 'body_html', 'body_text')
+
+    def __init__(self, template: Dict[str, Any]):
+        self.subject = _tokenize(template, 'subject')
+        self.body_html = _tokenize(template, 'body_html')
+        self.body_text = _tokenize(template, 'body_text')
+
+    def render(self, notification: Dict[str, Any]) -> Dict[str, str]:
+        metadata = notification.get('metadata', {})
+        body = notification.get('body', '')
+        return {
+            'subject': _render_tokens(self.subject, notification.get('title', ''), metadata),
+            'body_html': _render_tokens(self.body_html, body, metadata),
+            'body_text': _render_tokens(self.body_text, body, metadata)
+        }
+
+
+def _tokenize(template: Dict[str, Any], part: str) -> Optional[tuple]:
+    """
+    (literal, field_name, is_name, conversion, format_spec) tuples for one template
+    part, or None if the template does not define it.  Malformed format
+    strings raise ValueError here, at compile time.
+    """
+    if part not in template:
+        return None
+    return tuple(
+        (literal, field_name, field_name is not None and field_name.isidentifier(), conversion, format_spec)
+        for literal, field_name, format_spec, conversion in _formatter.parse(template[part])
+    )
+
+
+def _render_tokens(tokens: Optional[tuple], fallback_text: str, metadata: Dict[str, Any]) -> str:
+    if tokens is None:
+        return fallback_text.format(**metadata)
+
+    parts = []
+    for literal, field_name, is_name, conversion, format_spec in tokens:
+        parts.append(literal)
+        if field_name is None:
+            continue
+        if is_name:
+            value = metadata[field_name]
+        else:
+            # Attribute/index/positional fields ({a.b}, {a[0]}, {0}), resolved like str.format
+            value = _formatter.get_field(field_name, (), metadata)[0]
+        if conversion:
+            value = _formatter.convert_field(value, conversion)
+        if format_spec and '{' in format_spec:
+            format_spec = format_spec.format(**metadata)
+        parts.append(format(value, format_spec or ''))
+    return ''.join(parts)
+
+
+def _template_fingerprint(template: Dict[str, Any]) -> str:
+    """SHA-256 over the template parts CompiledTemplate tokenizes."""
+    parts = [template.get(part) for part in ('subject', 'body_html', 'body_text')]
+    return hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+
+
+def compile_template(template: Dict[str, Any]) -> CompiledTemplate:
+    """
+    CompiledTemplate for a template item, reused for as long as its
+    customer_id, event_type and subject/body text stay the same, so an
+    edited item is recompiled as soon as it is re-read.
+    """
+    owner = template.get('customer_id')
+    event_type = template.get('event_type')
+    if owner is None or event_type is None:
+        # Ad-hoc template that is not a table item
+        return CompiledTemplate(template)
+
+    key = (owner, event_type, _template_fingerprint(template))
+    compiled = _compiled_templates.get(key)
+    if compiled is None:
+        compiled = CompiledTemplate(template)
+        _compiled_templates[key] = compiled
+    _compiled_templates.move_to_end(key)
+    while len(_compiled_templates) > NOTIFICATION_TEMPLATE_CACHE_MAX_ENTRIES:
+        _compiled_templates.popitem(last=False)
+    return compiled
+
+
+def cached_template(customer_id: str, event_type: str) -> Optional[CompiledTemplate]:
+    """
+    CompiledTemplate resolved for a customer and event type within the last
+    NOTIFICATION_TEMPLATE_CACHE_TTL_SECONDS, or None.
+    """
+    key = (customer_id, event_type)
+    entry = _template_index.get(key)
+    if entry is None:
+        return None
+    expires_at, compiled = entry
+    if time.monotonic() >= expires_at:
+        del _template_index[key]
+        return None
+    _template_index.move_to_end(key)
+    return compiled
+
+
+def cache_template(customer_id: str, event_type: str, template: Dict[str, Any]) -> CompiledTemplate:
+    """
+    Compile ``template`` (the customer's own, the default one or
+    DEFAULT_TEMPLATE) and remember it as the resolution for this customer
+    and event type.  When the customer has no template of its own this one
+    entry is the negative cache: it points at the shared default.
+    """
+    compiled = compile_template(template)
+    key = (customer_id, event_type)
+    _template_index[key] = (time.monotonic() + NOTIFICATION_TEMPLATE_CACHE_TTL_SECONDS, compiled)
+    _template_index.move_to_end(key)
+    while len(_template_index) > NOTIFICATION_TEMPLATE_CACHE_MAX_ENTRIES:
+        _template_index.popitem(last=False)
+    return compiled
+
+
+def get_compiled_template(
+    event_type: str,
+    customer_id: str,
+    lookups: Optional[Dict[str, Dict]] = None
+) -> CompiledTemplate:
+    """
+    Compiled template for a customer and event type.  Templates are only
+    read (from ``lookups`` or DynamoDB) when the cached resolution is
+    missing or older than the cache TTL.
+    """
+    compiled = cached_template(customer_id, event_type)
+    if compiled is None:
+        template = resolve_template(lookups or {}, event_type, customer_id)
+        compiled = cache_template(customer_id, event_type, template)
+    return compiled
+
+
+def clear_template_cache() -> None:
+    _compiled_templates.clear()
+    _template_index.clear()
+
+
 def dispatch_with_retry(
     channel: str,
     notification: Dict[str, Any],
@@ -293,39 +645,15 @@ def dispatch_with_retry(
     http_status_code: Optional[int] = None
 
     for attempt in range(1, max_attempts + 1):
-        try:
-            if channel == 'email':
-                send_email(notification, rendered, user_prefs)
-            elif channel == 'sms':
-                send_sms(notification, rendered, user_prefs)
-            elif channel == 'webhook':
-                http_status_code = send_webhook(notification, rendered, user_prefs)
-            else:
-                raise ValueError(f"Unsupported notification channel: {channel}")
-
-            status = 'retried' if attempt > 1 else 'success'
-            log_delivery(
-                notification,
-                channel,
-                status,
-                http_status_code=http_status_code,
-                retry_attempt=attempt
-            )
+        status, http_status_code, last_error = dispatch_channel(
+            channel, notification, rendered, user_prefs, attempt
+        )
+        if status != 'failed':
             return status, http_status_code, None
-        except Exception as e:
-            last_error = str(e)
-            log_delivery(
-                notification,
-                channel,
-                'failed',
-                http_status_code=http_status_code,
-                error_message=last_error,
-                retry_attempt=attempt
-            )
 
-            if attempt < max_attempts:
-                backoff_ms = NOTIFICATION_RETRY_BACKOFF_BASE_MS * (2 ** (attempt - 1))
-                time.sleep(backoff_ms / 1000)
+        if attempt < max_attempts:
+            backoff_ms = NOTIFICATION_RETRY_BACKOFF_BASE_MS * (2 ** (attempt - 1))
+            time.sleep(backoff_ms / 1000)
 
     print(json.dumps({
         'event': 'notification_delivery_retries_exhausted',
@@ -340,6 +668,49 @@ def dispatch_with_retry(
     return 'failed', http_status_code, last_error
 
 
+def dispatch_channel(
+    channel: str,
+    notification: Dict[str, Any],
+    rendered: Dict[str, Any],
+    user_prefs: Dict[str, Any],
+    attempt: int = 1
+) -> tuple[str, Optional[int], Optional[str]]:
+    """
+    Single delivery attempt to an external channel, logged to the audit trail.
+    """
+    http_status_code: Optional[int] = None
+    try:
+        if channel == 'email':
+            send_email(notification, rendered, user_prefs)
+        elif channel == 'sms':
+            send_sms(notification, rendered, user_prefs)
+        elif channel == 'webhook':
+            http_status_code = send_webhook(notification, rendered, user_prefs)
+        else:
+            raise ValueError(f"Unsupported notification channel: {channel}")
+
+        status = 'retried' if attempt > 1 else 'success'
+        log_delivery(
+            notification,
+            channel,
+            status,
+            http_status_code=http_status_code,
+            retry_attempt=attempt
+        )
+        return status, http_status_code, None
+    except Exception as e:
+        error_message = str(e)
+        log_delivery(
+            notification,
+            channel,
+            'failed',
+            http_status_code=http_status_code,
+            error_message=error_message,
+            retry_attempt=attempt
+        )
+        return 'failed', http_status_code, error_message
+
+
 def send_email(notification: Dict[str, Any], rendered: Dict[str, str], user_prefs: Dict[str, Any]) -> None:
     """
     Send notification via email (SES)
@@ -564,43 +935,123 @@ def should_suppress_notification(notification: Dict[str, Any]) -> tuple[bool, in
     """
     Deduplicate repeated notification events in a short TTL window.
     """
+    should_suppress, duplicate_count, _ = claim_dedup_key(notification)
+    return should_suppress, duplicate_count
+
+
+def claim_dedup_key(notification: Dict[str, Any]) -> tuple[bool, Any, Optional[List[str]]]:
+    """
+    Claim the notification's dedup window with a conditional write
+
+    The first notification for a key (or the first after the window expired)
+    wins the put; later ones bump duplicate_count and are suppressed.  An SQS
+    redelivery of the winning notification is let through only for the
+    channels recorded in pending_channels by set_pending_channels.
+
+    Returns:
+        tuple: (should_suppress, duplicate_count, pending_channels or None)
+    """
     dedup_table = dynamodb.Table(NOTIFICATION_DEDUP_TABLE)
     dedup_key = build_dedup_key(notification)
     now = int(time.time())
     expires_at = now + max(1, NOTIFICATION_DEDUP_WINDOW_SECONDS)
+    updated_at = datetime.utcnow().isoformat()
 
     try:
-        response = dedup_table.get_item(Key={'dedup_key': dedup_key})
-        item = response.get('Item')
-
-        if item and int(item.get('expires_at', 0)) > now:
-            duplicate_count = int(item.get('duplicate_count', 1)) + 1
-            dedup_table.put_item(
-                Item={
-                    'dedup_key': dedup_key,
-                    'notification_id': item.get('notification_id', 'unknown-notification'),
-                    'duplicate_count': duplicate_count,
-                    'expires_at': item.get('expires_at'),
-                    'updated_at': datetime.utcnow().isoformat(),
-                    'ttl': expires_at
-                }
-            )
-            return True, duplicate_count
-
         dedup_table.put_item(
             Item={
                 'dedup_key': dedup_key,
                 'notification_id': notification.get('id'),
                 'duplicate_count': 1,
                 'expires_at': expires_at,
-                'updated_at': datetime.utcnow().isoformat(),
+                'updated_at': updated_at,
                 'ttl': expires_at
-            }
+            },
+            ConditionExpression='attribute_not_exists(dedup_key) OR expires_at <= :now',
+            ExpressionAttributeValues={':now': now}
+        )
+        return False, 1, None
+    except Exception as e:
+        if _error_code(e) != 'ConditionalCheckFailedException':
+            print(f"Dedup check failed, continuing without suppression: {e}")
+            return False, 1, None
+
+    try:
+        response = dedup_table.update_item(
+            Key={'dedup_key': dedup_key},
+            UpdateExpression='ADD duplicate_count :one SET updated_at = :updated_at',
+            ConditionExpression='notification_id <> :notification_id',
+            ExpressionAttributeValues={
+                ':one': 1,
+                ':updated_at': updated_at,
+                ':notification_id': notification.get('id')
+            },
+            ReturnValues='UPDATED_NEW'
         )
-        return False, 1
+        return True, int(response.get('Attributes', {}).get('duplicate_count', 2)), None
+    except Exception as e:
+        if _error_code(e) != 'ConditionalCheckFailedException':
+            print(f"Dedup count update failed, suppressing duplicate: {e}")
+            return True, 2, None
+
+    # Redelivery of the notification that holds the window
+    try:
+        item = dedup_table.get_item(Key={'dedup_key': dedup_key}, ConsistentRead=True).get('Item') or {}
     except Exception as e:
         print(f"Dedup check failed, continuing without suppression: {e}")
-        return False, 1
+        return False, 1, None
+    duplicate_count = int(item.get('duplicate_count', 1))
+    pending_channels = item.get('pending_channels')
+    if pending_channels:
+        return False, duplicate_count, sorted(pending_channels)
+    return True, duplicate_count, None
+
+
+def set_pending_channels(notification: Dict[str, Any], channels: List[str]) -> None:
+    """
+    Record the channels a notification still owes before its SQS retry,
+    or clear them once the retry has delivered.
+    """
+    dedup_table = dynamodb.Table(NOTIFICATION_DEDUP_TABLE)
+    key = {'dedup_key': build_dedup_key(notification)}
+    try:
+        if channels:
+            dedup_table.update_item(
+                Key=key,
+                UpdateExpression='SET pending_channels = :channels',
+                ConditionExpression='notification_id = :notification_id',
+                ExpressionAttributeValues={
+                    ':channels': set(channels),
+                    ':notification_id': notification.get('id')
+                }
+            )
+        else:
+            dedup_table.update_item(
+                Key=key,
+                UpdateExpression='REMOVE pending_channels',
+                ConditionExpression='notification_id = :notification_id',
+                ExpressionAttributeValues={':notification_id': notification.get('id')}
+            )
+    except Exception as e:
+        print(f"Failed to update pending channels for {notification.get('id')}: {e}")
+
+
+def release_dedup_key(notification: Dict[str, Any]) -> None:
+    """
+    Give up a claimed dedup window so a redelivery is processed afresh.
+    """
+    try:
+        dynamodb.Table(NOTIFICATION_DEDUP_TABLE).delete_item(
+            Key={'dedup_key': build_dedup_key(notification)},
+            ConditionExpression='notification_id = :notification_id',
+            ExpressionAttributeValues={':notification_id': notification.get('id')}
+        )
+    except Exception as e:
+        print(f"Failed to release dedup key for {notification.get('id')}: {e}")
+
+
+def _error_code(error: Exception) -> Optional[str]:
+    return getattr(error, 'response', {}).get('Error', {}).get('Code')
 
 
 def sanitize_notification_payload(
@@ -707,11 +1158,7 @@ def get_template(event_type: str, customer_id: str) -> Dict[str, str]:
         print(f"Error fetching default template: {e}")
     
     # Return basic template if none found
-    return {
-        'subject': '{{title}}',
-        'body_html': '<p>{{body}}</p>',
-        'body_text': '{{body}}'
-    }
+    return dict(DEFAULT_TEMPLATE)
 
 
 def get_user_preferences(user_id: str, customer_id: str) -> Dict[str, Any]:
@@ -741,13 +1188,129 @@ def get_user_preferences(user_id: str, customer_id: str) -> Dict[str, Any]:
         print(f"Error fetching user preferences: {e}")
     
     # Return defaults if not found
-    return {
-        'email': '',
-        'phone_number': '',
-        'webhook_url': '',
-        'webhook_secret': '',
-        'subscriptions': {}
-    }
+    return dict(DEFAULT_USER_PREFERENCES)
+
+
+def prefetch_lookups(notifications: List[Dict[str, Any]]) -> Dict[str, Dict]:
+    """
+    Read the templates (customer and default) and user preferences for a
+    batch of notifications with BatchGetItem.  Templates already in the
+    template cache are not read again.
+
+    Args:
+        notifications: Parsed notifications of one SQS batch
+
+    Returns:
+        dict: {'templates': {(customer_id, event_type): item or None},
+               'preferences': {(customer_id, user_id): item or None}}.
+              None marks a key that was read and does not exist; keys that
+              could not be read are left out, so callers fall back to
+              get_template / get_user_preferences for them.
+    """
+    template_keys = {}
+    preference_keys = {}
+    for notification in notifications:
+        customer_id = notification.get('customer_id')
+        event_type = notification.get('type')
+        if not customer_id:
+            continue
+        if cached_template(customer_id, event_type) is None:
+            for template_owner in (customer_id, 'default'):
+                template_keys[(template_owner, event_type)] = {
+                    'customer_id': template_owner, 'event_type': event_type
+                }
+        if notification.get('user_id'):
+            preference_keys[(customer_id, notification['user_id'])] = {
+                'customer_id': customer_id, 'user_id': notification['user_id']
+            }
+
+    keys_by_table = {SUBSCRIPTIONS_TABLE: list(preference_keys.values())}
+    if template_keys:
+        keys_by_table[TEMPLATES_TABLE] = list(template_keys.values())
+    found, unread = batch_get_items(keys_by_table)
+
+    templates = {key: None for key in template_keys}
+    for item in found.get(TEMPLATES_TABLE, []):
+        templates[(item['customer_id'], item['event_type'])] = item
+    preferences = {key: None for key in preference_keys}
+    for item in found[SUBSCRIPTIONS_TABLE]:
+        preferences[(item['customer_id'], item['user_id'])] = item
+
+    for table, key in unread:
+        if table == TEMPLATES_TABLE:
+            templates.pop((key['customer_id'], key['event_type']), None)
+        else:
+            preferences.pop((key['customer_id'], key['user_id']), None)
+
+    return {'templates': templates, 'preferences': preferences}
+
+
+def batch_get_items(keys_by_table: Dict[str, List[Dict[str, Any]]]) -> tuple[Dict[str, List], List[tuple]]:
+    """
+    BatchGetItem over any number of keys in chunks of BATCH_GET_MAX_KEYS
+
+    UnprocessedKeys are re-requested a bounded number of times without
+    sleeping; whatever is still unread after that (or after an error) is
+    returned as (table, key) pairs for the caller to read individually.
+    """
+    found: Dict[str, List] = {table: [] for table in keys_by_table}
+    pending = [(table, key) for table, keys in keys_by_table.items() for key in keys]
+    unread: List[tuple] = []
+    retries = 0
+
+    while pending:
+        chunk, pending = pending[:BATCH_GET_MAX_KEYS], pending[BATCH_GET_MAX_KEYS:]
+        request_items: Dict[str, Dict[str, List]] = {}
+        for table, key in chunk:
+            request_items.setdefault(table, {'Keys': []})['Keys'].append(key)
+
+        try:
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+        except Exception as e:
+            print(f"BatchGetItem failed, falling back to single reads: {e}")
+            unread.extend(chunk)
+            continue
+
+        for table, items in response.get('Responses', {}).items():
+            found.setdefault(table, []).extend(items)
+        leftover = [
+            (table, key)
+            for table, request in (response.get('UnprocessedKeys') or {}).items()
+            for key in request.get('Keys', [])
+        ]
+        if leftover and retries < BATCH_GET_MAX_UNPROCESSED_RETRIES:
+            retries += 1
+            pending.extend(leftover)
+        else:
+            unread.extend(leftover)
+
+    return found, unread
+
+
+def resolve_template(lookups: Dict[str, Dict], event_type: str, customer_id: str) -> Dict[str, Any]:
+    """
+    Template from prefetched lookups: customer template, then the default
+    one, then DEFAULT_TEMPLATE; reads DynamoDB only for keys not prefetched.
+    """
+    templates = lookups.get('templates', {})
+    for key in ((customer_id, event_type), ('default', event_type)):
+        if key not in templates:
+            return get_template(event_type, customer_id)
+        if templates[key]:
+            return templates[key]
+    return dict(DEFAULT_TEMPLATE)
+
+
+def resolve_user_preferences(lookups: Dict[str, Dict], user_id: str, customer_id: str) -> Dict[str, Any]:
+    """
+    User preferences from prefetched lookups, reading DynamoDB only if the
+    key was not prefetched.
+    """
+    preferences = lookups.get('preferences', {})
+    key = (customer_id, user_id)
+    if key not in preferences:
+        return get_user_preferences(user_id, customer_id)
+    return preferences[key] or dict(DEFAULT_USER_PREFERENCES)
 
 
 def get_enabled_channels(user_prefs: Dict[str, Any], event_type: str, requested_channels: List[str]) -> List[str]:
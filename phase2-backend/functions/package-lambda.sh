@@ -137,8 +137,19 @@ requirements_for() {
   esac
 }
 
+# Layer modules bundled into functions that are deployed without the layer
+# (auth_v2, session_management: landing-zone/modules/rbac).  session_management
+# imports session_tokens at module load, so it fails to start without it.
 extra_files_for() {
   case "$1" in
+    auth_v2)
+      printf '%s\n' "${SCRIPT_DIR}/../lambda_layer/python/password_hashing.py"
+      ;;
+    session_management)
+      printf '%s\n' \
+        "${SCRIPT_DIR}/../lambda_layer/python/password_hashing.py" \
+        "${SCRIPT_DIR}/../lambda_layer/python/session_tokens.py"
+      ;;
     marketplace_resolve_customer|marketplace_subscription_handler|marketplace_metering_worker)
       printf '%s\n' "${SCRIPT_DIR}/../lambda_layer/python/db_utils.py"
       ;;
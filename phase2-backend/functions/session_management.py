@@ -16,6 +16,9 @@ Environment variables:
   - RDS_PASSWORD: (from Secrets Manager)
   - JWT_SECRET: (from Secrets Manager)
   - SESSION_DURATION: Session duration in seconds (default: 86400 = 24 hours)
+  - STATELESS_SESSIONS: Issue and locally validate signed session tokens (default: true)
+  - SESSION_REVOCATION_REFRESH_SECONDS: How often each container reloads
+    revoked sessions (default: 15)
 """
 
 import os
@@ -25,18 +28,21 @@ import logging
 import hashlib
 import secrets
 import base64
+import uuid
 from typing import Dict, Optional, Tuple
 from datetime import datetime, timedelta
 
-import bcrypt
 import jwt
 import pyotp
 import boto3
 from botocore.exceptions import ClientError
+from psycopg2.extras import execute_values
 
 # Import database utilities
 sys.path.insert(0, '/opt/python')
 from db_utils import get_connection, release_connection, DatabaseError
+from password_hashing import PasswordHashBusy, rehash_if_needed, verify_password
+from session_tokens import RevocationFilter, looks_signed, sign_session_token, verify_session_token
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
@@ -48,6 +54,8 @@ secrets_client = boto3.client('secretsmanager')
 MAX_FAILED_ATTEMPTS = 5
 LOCKOUT_DURATION_MINUTES = 30
 SESSION_DURATION = int(os.environ.get('SESSION_DURATION', 86400))  # 24 hours
+STATELESS_SESSIONS = os.environ.get('STATELESS_SESSIONS', 'true').lower() == 'true'
+SESSION_REVOCATION_REFRESH_SECONDS = int(os.environ.get('SESSION_REVOCATION_REFRESH_SECONDS', 15))
 
 # Cookie configuration for unified cross-domain session management
 COOKIE_DOMAIN = os.environ.get('COOKIE_DOMAIN', '.tximhotep.com')
@@ -57,6 +65,13 @@ CSRF_COOKIE_NAME = 'securebase_csrf'
 CSRF_HEADER_NAME = 'X-CSRF-Token'
 
 
+# Per-container session state: revoked token hashes, buffered last_activity_at
+# (session token hash -> last request time, UTC) and the cached JWT secret
+revocations = RevocationFilter(refresh_seconds=SESSION_REVOCATION_REFRESH_SECONDS)
+_activity_pending = {}
+_jwt_secret = None
+
+
 class AuthenticationError(Exception):
     """Custom exception for authentication failures."""
     pass
@@ -128,6 +143,9 @@ def login(data: Dict, source_ip: str, user_agent: str, event: Dict) -> Dict:
     User login with email and password.
     Returns session token if successful, or requires MFA if enabled.
     Also sets httpOnly cookies for unified cross-domain session management.
+
+    The password is verified with no database connection held: the user is
+    read on one connection, released, and the writes happen on a second one.
     """
     email = data.get('email', '').lower().strip()
     password = data.get('password', '')
@@ -151,6 +169,8 @@ def login(data: Dict, source_ip: str, user_agent: str, event: Dict) -> Dict:
         """, (email,))
 
         user = cursor.fetchone()
+        release_connection(conn)
+        conn = None
 
         if not user:
             # Don't reveal if user exists or not
@@ -161,11 +181,9 @@ def login(data: Dict, source_ip: str, user_agent: str, event: Dict) -> Dict:
         password_hash = user[2]
         status = user[3]
         mfa_enabled = user[4]
-        mfa_secret = user[5]
         role = user[6]
         user_email = user[7]
         full_name = user[8]
-        failed_attempts = user[9] or 0
         locked_until = user[10]
 
         # Check if account is locked
@@ -176,29 +194,36 @@ def login(data: Dict, source_ip: str, user_agent: str, event: Dict) -> Dict:
         if status != 'active':
             return error_response(403, f'Account is {status}', event)
 
-        # Verify password
-        if not bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8')):
-            # Increment failed attempts
-            failed_attempts += 1
+        # Verify password (bcrypt, off the connection)
+        if not verify_password(password, password_hash):
+            conn = get_connection()
+            cursor = conn.cursor()
+
+            # Increment failed attempts in the database; concurrent attempts
+            # were verified without a row lock, so a read-modify-write would lose counts
+            lockout_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
+            cursor.execute("""
+                UPDATE users
+                SET failed_login_attempts = COALESCE(failed_login_attempts, 0) + 1,
+                    locked_until = CASE
+                        WHEN COALESCE(failed_login_attempts, 0) + 1 >= %s THEN %s
+                        ELSE locked_until
+                    END
+                WHERE id = %s
+                RETURNING failed_login_attempts
+            """, (MAX_FAILED_ATTEMPTS, lockout_until, user_id))
+            failed_attempts = cursor.fetchone()[0]
+            conn.commit()
 
             if failed_attempts >= MAX_FAILED_ATTEMPTS:
-                lockout_until = datetime.utcnow() + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
-                cursor.execute("""
-                    UPDATE users
-                    SET failed_login_attempts = %s,
-                        locked_until = %s
-                    WHERE id = %s
-                """, (failed_attempts, lockout_until, user_id))
-                conn.commit()
                 return error_response(423, f'Account locked due to too many failed attempts. Try again after {LOCKOUT_DURATION_MINUTES} minutes.', event)
-            else:
-                cursor.execute("""
-                    UPDATE users
-                    SET failed_login_attempts = %s
-                    WHERE id = %s
-                """, (failed_attempts, user_id))
-                conn.commit()
-                return error_response(401, f'Invalid email or password. {MAX_FAILED_ATTEMPTS - failed_attempts} attempts remaining.', event)
+            return error_response(401, f'Invalid email or password. {MAX_FAILED_ATTEMPTS - failed_attempts} attempts remaining.', event)
+
+        # Transparently upgrade hashes made at a different cost factor
+        new_password_hash = rehash_if_needed(password, password_hash)
+
+        conn = get_connection()
+        cursor = conn.cursor()
 
         # Password is correct - reset failed attempts
         cursor.execute("""
@@ -210,6 +235,14 @@ def login(data: Dict, source_ip: str, user_agent: str, event: Dict) -> Dict:
             WHERE id = %s
         """, (source_ip, user_id))
 
+        if new_password_hash:
+            # Skip if the password changed while we were hashing
+            cursor.execute("""
+                UPDATE users
+                SET password_hash = %s
+                WHERE id = %s AND password_hash = %s
+            """, (new_password_hash, user_id, password_hash))
+
         # If MFA is enabled, don't create session yet - require MFA verification
         if mfa_enabled:
             # Create temporary pre-auth token
@@ -225,7 +258,8 @@ def login(data: Dict, source_ip: str, user_agent: str, event: Dict) -> Dict:
 
         # No MFA - create session directly
         session_token, refresh_token, expires_at = create_session(
-            cursor, user_id, customer_id, role, email, source_ip, user_agent
+            cursor, user_id, customer_id, role, email, source_ip, user_agent,
+            full_name=full_name
         )
 
         # Log login activity
@@ -261,6 +295,10 @@ def login(data: Dict, source_ip: str, user_agent: str, event: Dict) -> Dict:
             }
         }, event, additional_headers=cookie_headers)
 
+    except PasswordHashBusy:
+        logger.warning('Login rejected: password hashing capacity exhausted')
+        return error_response(503, 'Too many concurrent logins, please retry', event)
+
     except Exception as e:
         if conn:
             conn.rollback()
@@ -323,7 +361,8 @@ def verify_mfa(data: Dict, source_ip: str, user_agent: str, event: Dict) -> Dict
 
         # MFA verified - create session
         session_token, refresh_token, expires_at = create_session(
-            cursor, user_id, customer_id, role, email, source_ip, user_agent, mfa_verified=True
+            cursor, user_id, customer_id, role, email, source_ip, user_agent,
+            mfa_verified=True, full_name=full_name
         )
 
         # Log login activity
@@ -477,7 +516,7 @@ def refresh_session(data: Dict, source_ip: str, user_agent: str, event: Dict) ->
         # Find session by refresh token
         cursor.execute("""
             SELECT s.id, s.user_id, s.customer_id, s.is_active, s.expires_at,
-                   u.role, u.email, u.full_name, u.status
+                   u.role, u.email, u.full_name, u.status, s.session_token_hash
             FROM user_sessions s
             JOIN users u ON s.user_id = u.id
             WHERE s.refresh_token_hash = %s
@@ -509,7 +548,8 @@ def refresh_session(data: Dict, source_ip: str, user_agent: str, event: Dict) ->
 
         # Create new session
         new_session_token, new_refresh_token, new_expires_at = create_session(
-            cursor, user_id, customer_id, role, email, source_ip, user_agent
+            cursor, user_id, customer_id, role, email, source_ip, user_agent,
+            full_name=full_name
         )
 
         # Invalidate old session
@@ -522,6 +562,7 @@ def refresh_session(data: Dict, source_ip: str, user_agent: str, event: Dict) ->
         """, (session_id,))
 
         conn.commit()
+        revocations.add(session[9])
 
         # Build Set-Cookie headers for refreshed session
         csrf_token = generate_csrf_token(new_session_token)
@@ -607,6 +648,7 @@ def logout(data: Dict, event: Dict) -> Dict:
             """, (customer_id, user_id, user_id))
 
         conn.commit()
+        revocations.add(session_token_hash)
 
         # Clear cookies on logout
         clear_cookies = build_clear_cookies()
@@ -641,6 +683,20 @@ def get_session_info(auth_header: str, event: Dict, cookie_header: str = '') ->
 
     session_token_hash = hashlib.sha256(session_token.encode()).hexdigest()
 
+    # Signed tokens are validated locally; legacy opaque tokens, a cold
+    # revocation filter and suspected revocations go to the database
+    if STATELESS_SESSIONS and looks_signed(session_token):
+        try:
+            claims = verify_session_token(get_jwt_secret(), session_token)
+        except jwt.ExpiredSignatureError:
+            return error_response(401, 'Session expired', event)
+        except jwt.InvalidTokenError:
+            return error_response(401, 'Invalid session token', event)
+
+        if refresh_revocations() and not revocations.might_be_revoked(session_token_hash):
+            record_session_activity(session_token_hash)
+            return success_response(session_info_from_claims(claims), event)
+
     conn = None
     try:
         conn = get_connection()
@@ -710,38 +766,128 @@ def get_session_info(auth_header: str, event: Dict, cookie_header: str = '') ->
 
 
 def create_session(cursor, user_id: str, customer_id: str, role: str, email: str,
-                   source_ip: str, user_agent: str, mfa_verified: bool = False) -> Tuple[str, str, datetime]:
+                   source_ip: str, user_agent: str, mfa_verified: bool = False,
+                   full_name: Optional[str] = None) -> Tuple[str, str, datetime]:
     """Create a new session and return tokens."""
-    # Generate session token
-    session_token = secrets.token_urlsafe(32)
+    session_id = str(uuid.uuid4())
+    created_at = datetime.utcnow()
+
+    # Calculate expiration
+    expires_at = created_at + timedelta(seconds=SESSION_DURATION)
+
+    # Generate session token: signed claims, or an opaque token checked against the database
+    if STATELESS_SESSIONS:
+        session_token = sign_session_token(get_jwt_secret(), {
+            'sid': session_id,
+            'sub': user_id,
+            'cid': customer_id,
+            'role': role,
+            'email': email,
+            'name': full_name,
+            'mfa': mfa_verified,
+        }, expires_at, issued_at=created_at)
+    else:
+        session_token = secrets.token_urlsafe(32)
     session_token_hash = hashlib.sha256(session_token.encode()).hexdigest()
 
     # Generate refresh token
     refresh_token = secrets.token_urlsafe(32)
     refresh_token_hash = hashlib.sha256(refresh_token.encode()).hexdigest()
 
-    # Calculate expiration
-    expires_at = datetime.utcnow() + timedelta(seconds=SESSION_DURATION)
-
     # Create session in database
     cursor.execute("""
         INSERT INTO user_sessions (
-            user_id, customer_id, session_token_hash, refresh_token_hash,
+            id, user_id, customer_id, session_token_hash, refresh_token_hash,
             user_agent, ip_address, mfa_verified, mfa_verified_at,
             expires_at, is_active
         )
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
         RETURNING id
     """, (
-        user_id, customer_id, session_token_hash, refresh_token_hash,
+        session_id, user_id, customer_id, session_token_hash, refresh_token_hash,
         user_agent, source_ip, mfa_verified,
-        datetime.utcnow() if mfa_verified else None,
+        created_at if mfa_verified else None,
         expires_at, True
     ))
 
     return session_token, refresh_token, expires_at
 
 
+def session_info_from_claims(claims: Dict) -> Dict:
+    """get_session_info response body built from verified session token claims."""
+    return {
+        'session_id': claims['sid'],
+        'user_id': claims['sub'],
+        'customer_id': claims['cid'],
+        'is_active': True,
+        'expires_at': datetime.utcfromtimestamp(claims['exp']).isoformat(),
+        'mfa_verified': bool(claims.get('mfa')),
+        'last_activity_at': datetime.utcnow().isoformat(),
+        'created_at': datetime.utcfromtimestamp(claims['iat']).isoformat(),
+        'user': {
+            'email': claims.get('email'),
+            'full_name': claims.get('name'),
+            'role': claims.get('role'),
+            'status': 'active'
+        }
+    }
+
+
+def record_session_activity(session_token_hash: str):
+    """Buffer a last_activity_at update; written by the next revocation refresh."""
+    _activity_pending[session_token_hash] = datetime.utcnow()
+
+
+def flush_session_activity(cursor) -> int:
+    """Write all buffered last_activity_at values in one statement."""
+    if not _activity_pending:
+        return 0
+    rows = list(_activity_pending.items())
+    execute_values(cursor, """
+        UPDATE user_sessions AS s
+        SET last_activity_at = v.seen_at
+        FROM (VALUES %s) AS v(token_hash, seen_at)
+        WHERE s.session_token_hash = v.token_hash
+          AND s.is_active = true
+          AND (s.last_activity_at IS NULL OR s.last_activity_at < v.seen_at)
+    """, rows)
+    for token_hash, seen_at in rows:
+        if _activity_pending.get(token_hash) == seen_at:
+            del _activity_pending[token_hash]
+    return len(rows)
+
+
+def refresh_revocations() -> bool:
+    """
+    Reload revoked sessions and flush buffered activity when the refresh
+    interval has passed.  Returns whether the revocation filter can be
+    trusted; until the first refresh succeeds, callers use the database.
+    """
+    if not revocations.is_due():
+        return True
+
+    conn = None
+    try:
+        conn = get_connection()
+        cursor = conn.cursor()
+        revocations.refresh(cursor)
+        try:
+            flush_session_activity(cursor)
+            conn.commit()
+        except Exception as e:
+            # last_activity_at is advisory; keep the buffer and retry next refresh
+            conn.rollback()
+            logger.warning(f'last_activity_at flush failed: {str(e)}')
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        logger.warning(f'Session revocation refresh failed: {str(e)}')
+    finally:
+        if conn:
+            release_connection(conn)
+    return revocations.loaded
+
+
 def generate_pre_auth_token(user_id: str, customer_id: str, email: str) -> str:
     """Generate temporary pre-authentication token for MFA flow."""
     jwt_secret = get_jwt_secret()
@@ -764,12 +910,17 @@ def get_jwt_secret() -> str:
     if secret:
         return secret
 
-    # Fall back to Secrets Manager
+    # Fall back to Secrets Manager (cached per container; every session check needs it)
+    global _jwt_secret
+    if _jwt_secret:
+        return _jwt_secret
     try:
         response = secrets_client.get_secret_value(SecretId='securebase/jwt_secret')
         if 'SecretString' in response:
-            return response['SecretString']
-        return base64.b64decode(response['SecretBinary']).decode('utf-8')
+            _jwt_secret = response['SecretString']
+        else:
+            _jwt_secret = base64.b64decode(response['SecretBinary']).decode('utf-8')
+        return _jwt_secret
     except ClientError as e:
         logger.error(f'Failed to retrieve JWT secret: {str(e)}')
         raise AuthenticationError('Failed to retrieve JWT secret')
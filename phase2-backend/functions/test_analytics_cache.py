@@ -0,0 +1,195 @@
+"""
+Unit tests for the two-tier analytics result cache (lambda_layer analytics_cache)
+"""
+
+import copy
+import json
+import time
+from decimal import Decimal
+
+import pytest
+from botocore.exceptions import ClientError
+
+import analytics_cache
+from analytics_cache import LocalLRU, TieredCache, canonical_cache_key, emit_cache_metrics
+
+
+class FakeCacheTable:
+    """In-memory stand-in for the report cache table."""
+
+    def __init__(self):
+        self.items = {}
+        self.gets = 0
+
+    def get_item(self, Key):
+        self.gets += 1
+        item = self.items.get(Key["cache_key"])
+        return {"Item": copy.deepcopy(item)} if item else {}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeValues=None):
+        existing = self.items.get(Item["cache_key"])
+        if ConditionExpression and existing and existing["lease_until"] >= ExpressionAttributeValues[":now"]:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+        self.items[Item["cache_key"]] = copy.deepcopy(Item)
+
+    def delete_item(self, Key):
+        self.items.pop(Key["cache_key"], None)
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    analytics_cache.counters.clear()
+    yield
+    analytics_cache.counters.clear()
+
+
+class TestCanonicalKey:
+
+    def test_param_order_whitespace_and_empty_values_do_not_matter(self):
+        a = canonical_cache_key("cust-1", "costs", {"period": "30d", "breakdown": "service"})
+        b = canonical_cache_key("cust-1", "costs", {"breakdown": "service ", "period": "30d", "x": None, "y": ""})
+        assert a == b
+        assert a.startswith("v2:costs:cust-1:")
+
+    def test_tenant_and_query_type_are_part_of_the_key(self):
+        params = {"period": "30d"}
+        assert canonical_cache_key("cust-1", "usage", params) != canonical_cache_key("cust-2", "usage", params)
+        assert canonical_cache_key("cust-1", "usage", params) != canonical_cache_key("cust-1", "costs", params)
+
+
+class TestLocalLRU:
+
+    def test_evicts_least_recently_used_by_count(self):
+        lru = LocalLRU(max_entries=2)
+        lru.put("a", 1, ttl=60)
+        lru.put("b", 2, ttl=60)
+        lru.get("a")
+        lru.put("c", 3, ttl=60)
+
+        assert lru.get("b") is None
+        assert lru.get("a") == (1, False)
+        assert analytics_cache.counters["local_evictions"] == 1
+
+    def test_evicts_by_size_and_skips_oversized_values(self):
+        lru = LocalLRU(max_entries=10, max_bytes=20)
+        lru.put("a", "x" * 9, ttl=60)
+        lru.put("b", "y" * 9, ttl=60)
+        assert lru.get("a") is None
+        assert lru.bytes == 11
+
+        lru.put("huge", "z" * 50, ttl=60)
+        assert lru.get("huge") is None
+
+    def test_expired_entries_are_dropped(self):
+        lru = LocalLRU()
+        lru.put("a", 1, ttl=0)
+        assert lru.get("a") is None
+        assert len(lru) == 0
+
+
+class TestTieredCache:
+
+    def test_second_read_is_served_locally(self):
+        table = FakeCacheTable()
+        cache = TieredCache(table)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"total": 1.5}
+
+        assert cache.get_or_compute("k", compute) == {"total": 1.5}
+        assert cache.get_or_compute("k", compute) == {"total": 1.5}
+
+        assert len(calls) == 1
+        assert table.gets == 1
+        assert table.items["k"]["data"] == {"total": Decimal("1.5")}
+        assert analytics_cache.counters["local_hits"] == 1
+
+    def test_other_containers_fill_local_tier_from_dynamodb(self):
+        table = FakeCacheTable()
+        TieredCache(table).put("k", {"total": 2})
+        cache = TieredCache(table)
+
+        assert cache.get("k") == {"total": 2}
+        assert cache.get("k") == {"total": 2}
+        assert table.gets == 1
+        assert analytics_cache.counters["remote_hits"] == 1
+
+    def test_expired_and_legacy_items(self):
+        table = FakeCacheTable()
+        table.items["old"] = {"cache_key": "old", "data": {"v": 1}, "ttl": int(time.time()) - 1}
+        table.items["legacy"] = {"cache_key": "legacy", "data": {"v": 2}, "expires_at": "2999-01-01T00:00:00"}
+        cache = TieredCache(table)
+
+        assert cache.get("old") is None
+        assert cache.get("legacy") == {"v": 2}
+
+    def test_negative_results_get_short_ttl(self):
+        table = FakeCacheTable()
+        cache = TieredCache(table, ttl=3600, negative_ttl=30)
+
+        cache.get_or_compute("k", lambda: {"total": 0}, is_negative=lambda d: not d["total"])
+        assert cache.get("k") == {"total": 0}
+
+        item = table.items["k"]
+        assert item["negative"] is True
+        assert item["ttl"] <= int(time.time()) + 30
+        assert analytics_cache.counters["negative_hits"] == 1
+
+    def test_held_lease_makes_followers_wait_for_result(self, monkeypatch):
+        table = FakeCacheTable()
+        cache = TieredCache(table)
+        # Another container holds the lease and publishes while we poll
+        table.put_item(Item={"cache_key": "lease#k", "lease_until": Decimal(str(time.time() + 10)), "ttl": 0})
+
+        def publish(_seconds):
+            TieredCache(table).put("k", {"total": 7})
+
+        monkeypatch.setattr(analytics_cache.time, "sleep", publish)
+        result = cache.get_or_compute("k", lambda: pytest.fail("follower must not compute"))
+
+        assert result == {"total": 7}
+        assert analytics_cache.counters["lease_waits"] == 1
+
+    def test_follower_computes_after_lease_wait_times_out(self, monkeypatch):
+        table = FakeCacheTable()
+        cache = TieredCache(table)
+        table.put_item(Item={"cache_key": "lease#k", "lease_until": Decimal(str(time.time() + 10)), "ttl": 0})
+        monkeypatch.setattr(analytics_cache, "LEASE_WAIT_SECONDS", 0)
+
+        assert cache.get_or_compute("k", lambda: {"total": 3}) == {"total": 3}
+        assert analytics_cache.counters["lease_timeouts"] == 1
+        # The holder's lease is left alone
+        assert "lease#k" in table.items
+
+    def test_lease_is_released_after_compute(self):
+        table = FakeCacheTable()
+        cache = TieredCache(table)
+
+        with pytest.raises(RuntimeError):
+            cache.get_or_compute("k", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+
+        assert "lease#k" not in table.items
+        assert "k" not in table.items
+
+
+def test_emit_cache_metrics_logs_emf_and_resets(capsys):
+    lru = LocalLRU()
+    lru.put("a", 1, ttl=60)
+    analytics_cache.counters["local_hits"] += 3
+    analytics_cache.counters["misses"] += 1
+
+    emitted = emit_cache_metrics("analytics_query", lru)
+
+    record = json.loads(capsys.readouterr().out)
+    assert record["FunctionName"] == "analytics_query"
+    assert record["local_hits"] == 3
+    assert record["local_entries"] == 1
+    assert {m["Name"] for m in record["_aws"]["CloudWatchMetrics"][0]["Metrics"]} >= {"local_hits", "misses"}
+    assert emitted["misses"] == 1
+    assert not analytics_cache.counters
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
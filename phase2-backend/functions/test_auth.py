@@ -0,0 +1,195 @@
+"""
+Unit tests for the auth Lambda API key authorizer fast path
+"""
+
+import hashlib
+import json
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import auth
+from api_key_revocation import REVOCATION_VERSION_KEY, bump_revocation_version
+
+API_KEY = "sk_live_test_0123456789"
+KEY_HASH = hashlib.sha256(API_KEY.encode()).hexdigest()
+KEY_ROW = {
+    "id": "6f1d2c1e-0000-4000-8000-000000000001",
+    "customer_id": "cust-1",
+    "scopes": ["read:invoices"],
+    "name": "Acme",
+    "tier": "fintech",
+    "status": "active",
+}
+
+
+class FakeSessionTable:
+    """In-memory session cache table (hash key SessionId)."""
+
+    def __init__(self):
+        self.items = {}
+        self.gets = 0
+
+    def get_item(self, Key, ConsistentRead=False):
+        self.gets += 1
+        item = self.items.get(Key["SessionId"])
+        return {"Item": dict(item)} if item else {}
+
+    def put_item(self, Item):
+        self.items[Item["SessionId"]] = dict(Item)
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues, ReturnValues):
+        item = self.items.setdefault(Key["SessionId"], {"SessionId": Key["SessionId"], "Version": 0})
+        item["Version"] += ExpressionAttributeValues[":one"]
+        return {"Attributes": {"Version": item["Version"]}}
+
+
+class FakeDatabase:
+    """Pooled connection stand-in that answers the api_keys lookup."""
+
+    def __init__(self, row):
+        self.row = row
+        self.borrows = 0
+        self.lookups = 0
+        self.flushed = []
+
+    @contextmanager
+    def borrow(self, *args, **kwargs):
+        self.borrows += 1
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+
+        def execute(sql, params=None):
+            self.lookups += 1
+            cursor.fetchone.return_value = self.row if params == (KEY_HASH,) else None
+
+        cursor.execute.side_effect = execute
+        yield conn
+
+
+@pytest.fixture
+def env(monkeypatch):
+    table = FakeSessionTable()
+    db = FakeDatabase(KEY_ROW)
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(auth, "cache_table", table)
+    monkeypatch.setattr(auth, "borrow_connection", db.borrow)
+    monkeypatch.setattr(auth.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(
+        auth, "execute_values", lambda cur, sql, rows: db.flushed.append([key_id for key_id, _ in rows])
+    )
+    monkeypatch.setattr(auth, "_last_used_flushed_at", clock["now"])
+    auth._verified_keys.clear()
+    auth._last_used_pending.clear()
+    auth._last_used_written.clear()
+    auth._revocation.update(version=0, checked_at=None)
+    return table, db, clock
+
+
+def _call(key=API_KEY):
+    return auth.authenticate_api_key({"headers": {"Authorization": f"Bearer {key}"}}, None)
+
+
+class TestAuthorizerFastPath:
+
+    def test_miss_uses_one_connection_for_lookup_and_last_used(self, env):
+        table, db, _ = env
+
+        response = _call()
+
+        assert response["statusCode"] == 200
+        assert json.loads(response["body"])["customer_id"] == "cust-1"
+        assert db.borrows == 1
+        assert db.flushed == [[KEY_ROW["id"]]]
+        cached = table.items[f"apikey#{KEY_HASH}"]
+        assert cached["RevocationVersion"] == 0
+        assert cached["KeyId"] == KEY_ROW["id"]
+
+    def test_warm_hits_make_no_network_calls(self, env):
+        table, db, clock = env
+        _call()
+        gets = table.gets
+
+        for _ in range(50):
+            clock["now"] += 0.01
+            assert _call()["statusCode"] == 200
+
+        assert db.borrows == 1
+        assert table.gets == gets  # revocation version still fresh
+
+    def test_last_used_written_at_most_once_per_minute(self, env):
+        _, db, clock = env
+        _call()
+
+        clock["now"] += 30
+        _call()
+        assert db.flushed == [[KEY_ROW["id"]]]
+
+        clock["now"] += 31
+        _call()
+        assert db.flushed == [[KEY_ROW["id"]], [KEY_ROW["id"]]]
+        assert db.borrows == 2
+
+    def test_revocation_bump_invalidates_cached_keys(self, env):
+        table, db, clock = env
+        _call()
+
+        bump_revocation_version(table)
+        db.row = None  # key deactivated
+        clock["now"] += auth.REVOCATION_CHECK_SECONDS
+
+        response = _call()
+
+        assert response["statusCode"] == 401
+        assert db.lookups == 2
+        assert KEY_HASH not in auth._verified_keys
+
+    def test_dynamodb_entry_from_older_version_is_ignored(self, env):
+        table, db, _ = env
+        table.items[REVOCATION_VERSION_KEY] = {"SessionId": REVOCATION_VERSION_KEY, "Version": 3}
+        table.items[f"apikey#{KEY_HASH}"] = {
+            "SessionId": f"apikey#{KEY_HASH}", "CustomerId": "cust-1", "CustomerName": "Acme",
+            "CustomerTier": "fintech", "Scopes": [], "KeyId": KEY_ROW["id"], "RevocationVersion": 2,
+        }
+
+        assert _call()["statusCode"] == 200
+        assert db.lookups == 1
+        assert table.items[f"apikey#{KEY_HASH}"]["RevocationVersion"] == 3
+
+    def test_current_dynamodb_entry_serves_cold_container(self, env):
+        table, db, _ = env
+        _call()
+        auth._verified_keys.clear()
+
+        assert _call()["statusCode"] == 200
+        assert db.lookups == 1
+        assert KEY_HASH in auth._verified_keys
+
+    def test_entries_expire_and_lru_is_bounded(self, env, monkeypatch):
+        _, db, clock = env
+        monkeypatch.setattr(auth, "API_KEY_CACHE_MAX_ENTRIES", 1)
+        _call()
+        _call("sk_live_other")  # invalid key is not cached
+        assert list(auth._verified_keys) == [KEY_HASH]
+
+        auth._remember_key("other-hash", 0, None, {})
+        assert list(auth._verified_keys) == ["other-hash"]
+
+        auth._remember_key(KEY_HASH, 0, KEY_ROW["id"], {"customer_id": "cust-1"})
+        clock["now"] += auth.API_KEY_CACHE_TTL_SECONDS + 1
+        auth.cache_table.items.clear()
+        _call()
+        assert db.lookups == 3
+
+    def test_flush_failure_keeps_buffer(self, env, monkeypatch):
+        _, db, clock = env
+        _call()
+        clock["now"] += 61
+        with patch.object(auth, "flush_last_used", side_effect=Exception("db down")):
+            assert _call()["statusCode"] == 200
+        assert KEY_ROW["id"] in auth._last_used_pending
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
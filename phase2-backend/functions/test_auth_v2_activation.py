@@ -216,16 +216,15 @@ class TestAcceptInviteActivationEvent(unittest.TestCase):
         auth_v2._tokens_table = self._orig_tokens
         auth_v2._users_table = self._orig_users
 
-    @patch("auth_v2.bcrypt")
+    @patch("auth_v2.hash_password")
     @patch("auth_v2._mint_jwt")
-    def test_fires_invite_accepted_event(self, mock_mint, mock_bcrypt):
+    def test_fires_invite_accepted_event(self, mock_mint, mock_hash_password):
         """Successful accept_invite should publish invite_accepted to SNS."""
         token_rec = _make_token_record(email="User.MixedCase@Example.com")
         auth_v2._tokens_table.get_item.return_value = {"Item": token_rec}
         auth_v2._users_table.get_item.return_value = {}  # new user
         mock_mint.return_value = "session-jwt"
-        mock_bcrypt.hashpw.return_value = b"hashed"
-        mock_bcrypt.gensalt.return_value = b"salt"
+        mock_hash_password.return_value = "hashed"
 
         event = {
             "httpMethod": "POST",
@@ -247,9 +246,9 @@ class TestAcceptInviteActivationEvent(unittest.TestCase):
         self.assertNotIn("email", msg, "raw email must not appear in SNS payload (PII)")
         self.assertIn("correlation_id", msg)
 
-    @patch("auth_v2.bcrypt")
+    @patch("auth_v2.hash_password")
     @patch("auth_v2._mint_jwt")
-    def test_no_event_on_invalid_token(self, mock_mint, mock_bcrypt):
+    def test_no_event_on_invalid_token(self, mock_mint, mock_hash_password):
         """Failed accept_invite (bad token) must not publish SNS."""
         auth_v2._tokens_table.get_item.return_value = {}  # token not found
 
@@ -377,13 +376,13 @@ class TestLoginFirstLoginTracking(unittest.TestCase):
         auth_v2._sns_client = self._orig_sns
         auth_v2._users_table = self._orig_users
 
-    @patch("auth_v2.bcrypt")
+    @patch("auth_v2.verify_password")
     @patch("auth_v2._mint_jwt")
-    def test_fires_first_login_event_when_first_login_at_absent(self, mock_mint, mock_bcrypt):
+    def test_fires_first_login_event_when_first_login_at_absent(self, mock_mint, mock_verify_password):
         """First successful login (no first_login_at in user record) fires SNS."""
         user = _make_user_record()  # no first_login_at
         auth_v2._users_table.get_item.return_value = {"Item": user}
-        mock_bcrypt.checkpw.return_value = True
+        mock_verify_password.return_value = True
         mock_mint.return_value = "session-jwt"
 
         event = {
@@ -404,13 +403,13 @@ class TestLoginFirstLoginTracking(unittest.TestCase):
         self.assertNotIn("email", msg, "raw email must not appear in SNS payload (PII)")
         self.assertIn("correlation_id", msg)
 
-    @patch("auth_v2.bcrypt")
+    @patch("auth_v2.verify_password")
     @patch("auth_v2._mint_jwt")
-    def test_skips_first_login_event_on_repeat_login(self, mock_mint, mock_bcrypt):
+    def test_skips_first_login_event_on_repeat_login(self, mock_mint, mock_verify_password):
         """Subsequent logins (first_login_at already set) must not publish SNS."""
         user = _make_user_record(first_login_at="2026-05-01T10:00:00+00:00")
         auth_v2._users_table.get_item.return_value = {"Item": user}
-        mock_bcrypt.checkpw.return_value = True
+        mock_verify_password.return_value = True
         mock_mint.return_value = "session-jwt"
 
         event = {
@@ -425,13 +424,13 @@ class TestLoginFirstLoginTracking(unittest.TestCase):
         auth_v2._users_table.update_item.assert_not_called()
         auth_v2._sns_client.publish.assert_not_called()
 
-    @patch("auth_v2.bcrypt")
+    @patch("auth_v2.verify_password")
     @patch("auth_v2._mint_jwt")
-    def test_no_event_on_bad_password(self, mock_mint, mock_bcrypt):
+    def test_no_event_on_bad_password(self, mock_mint, mock_verify_password):
         """Failed login must not publish SNS."""
         user = _make_user_record()
         auth_v2._users_table.get_item.return_value = {"Item": user}
-        mock_bcrypt.checkpw.return_value = False  # wrong password
+        mock_verify_password.return_value = False  # wrong password
 
         event = {
             "httpMethod": "POST",
@@ -445,13 +444,13 @@ class TestLoginFirstLoginTracking(unittest.TestCase):
         auth_v2._users_table.update_item.assert_not_called()
         auth_v2._sns_client.publish.assert_not_called()
 
-    @patch("auth_v2.bcrypt")
+    @patch("auth_v2.verify_password")
     @patch("auth_v2._mint_jwt")
-    def test_uppercase_email_login_succeeds(self, mock_mint, mock_bcrypt):
+    def test_uppercase_email_login_succeeds(self, mock_mint, mock_verify_password):
         """Login with uppercase email should resolve to lowercase user record."""
         user = _make_user_record(email="user@example.com")
         auth_v2._users_table.get_item.return_value = {"Item": user}
-        mock_bcrypt.checkpw.return_value = True
+        mock_verify_password.return_value = True
         mock_mint.return_value = "session-jwt"
 
         event = {
@@ -1,6 +1,7 @@
 import json
 import os
 import sys
+import time
 import types
 import unittest
 from unittest.mock import MagicMock, patch
@@ -10,10 +11,21 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 mock_db_utils = types.ModuleType("db_utils")
 mock_db_utils.execute_one = MagicMock()
+mock_db_utils.execute_values_batch = MagicMock()
+mock_db_utils.query_many = MagicMock(return_value=[])
 mock_db_utils.query_one = MagicMock(return_value={"count": 0})
-sys.modules["db_utils"] = mock_db_utils
 
-import aws_scanner
+# Stub db_utils only while aws_scanner binds its names: other test modules in
+# the same run import the real db_utils.
+_real_db_utils = sys.modules.get("db_utils")
+sys.modules["db_utils"] = mock_db_utils
+try:
+    import aws_scanner
+finally:
+    if _real_db_utils is None:
+        del sys.modules["db_utils"]
+    else:
+        sys.modules["db_utils"] = _real_db_utils
 
 
 class FakeSession:
@@ -150,6 +162,254 @@ class TestAwsScanner(unittest.TestCase):
             self.assertTrue(table_mock.update_item.called)
             self.assertTrue(mock_lambda_client.invoke.called)
 
+    def _run_scan_with(self, **scanner_overrides):
+        scanners = {
+            name: MagicMock(return_value=1)
+            for name in ("_scan_s3", "_scan_rds", "_scan_kms", "_scan_cloudtrail", "_scan_iam", "_scan_config", "_scan_securityhub")
+        }
+        scanners.update(scanner_overrides)
+        with (
+            patch.object(aws_scanner, "ddb"),
+            patch.object(aws_scanner, "_assume_customer_session", return_value=MagicMock()),
+            patch.object(aws_scanner, "_seed_baa_if_needed"),
+            patch("aws_scanner.boto3.client"),
+            patch.multiple(aws_scanner, **scanners),
+            self.assertLogs(aws_scanner.logger, level="INFO") as logs,
+        ):
+            result = aws_scanner._run_customer_scan("cust-1", "arn:role", "ext-1")
+        complete = [
+            json.loads(message.split(":", 2)[2])
+            for message in logs.output
+            if '"scan_complete"' in message
+        ]
+        return result, complete[0]
+
+    def test_scan_complete_reports_service_timings(self):
+        result, record = self._run_scan_with()
+        self.assertEqual(result["resources_scanned"], 7)
+        self.assertEqual(
+            list(record["service_timings_ms"]),
+            ["s3", "rds", "kms", "cloudtrail", "iam", "config", "securityhub"],
+        )
+        self.assertTrue(all(isinstance(ms, float) for ms in record["service_timings_ms"].values()))
+
+    def test_sequential_mode_when_single_worker(self):
+        with patch.object(aws_scanner, "SCAN_MAX_WORKERS", 1):
+            result, record = self._run_scan_with(_scan_rds=MagicMock(side_effect=Exception("rds failed")))
+        self.assertEqual(result["resources_scanned"], 6)
+        self.assertEqual(record["scan_max_workers"], 1)
+        self.assertIn("rds", record["service_timings_ms"])
+
+    def test_slow_scanner_is_abandoned_after_deadline(self):
+        def slow_scanner(session, customer_id):
+            time.sleep(0.5)
+            return 99
+
+        with (
+            patch.object(aws_scanner, "SERVICE_TIMEOUT_SECONDS", 0),
+            patch.object(aws_scanner, "SCAN_GRACE_SECONDS", 0.1),
+        ):
+            result, record = self._run_scan_with(_scan_iam=slow_scanner)
+        self.assertEqual(result["scan_status"], "completed")
+        self.assertEqual(result["resources_scanned"], 6)
+        self.assertEqual(record["service_timings_ms"]["iam"], "timed_out")
+
+    @patch("aws_scanner._upsert_encryption_status")
+    def test_scan_s3_scans_buckets_concurrently(self, mock_upsert):
+        s3_client = MagicMock()
+        s3_client.list_buckets.return_value = {"Buckets": [{"Name": f"bucket-{i}"} for i in range(20)]}
+        s3_client.get_bucket_encryption.return_value = {"ServerSideEncryptionConfiguration": {"Rules": []}}
+        s3_client.get_public_access_block.return_value = {"PublicAccessBlockConfiguration": {}}
+        s3_client.get_bucket_policy.side_effect = [Exception("boom")] + [
+            {"Policy": json.dumps({"Statement": []})}
+        ] * 19
+
+        with patch.object(aws_scanner, "S3_BUCKET_WORKERS", 4):
+            scanned = aws_scanner._scan_s3(FakeSession({"s3": s3_client}), "cust-1")
+
+        self.assertEqual(scanned, 19)
+        self.assertEqual(mock_upsert.call_count, 19)
+
+
+    @patch("aws_scanner.execute_values_batch")
+    def test_scan_rds_flushes_rows_in_batches(self, mock_batch):
+        rds_client = MagicMock()
+        rds_client.describe_db_instances.return_value = {
+            "DBInstances": [
+                {"DBInstanceIdentifier": f"db-{i}", "StorageEncrypted": True, "BackupRetentionPeriod": 7}
+                for i in range(5)
+            ]
+        }
+        with patch.object(aws_scanner, "ENCRYPTION_STATUS_BATCH_SIZE", 2):
+            scanned = aws_scanner._scan_rds(FakeSession({"rds": rds_client}), "cust-1")
+
+        self.assertEqual(scanned, 5)
+        self.assertEqual([len(c.args[1]) for c in mock_batch.call_args_list], [2, 2, 1])
+        query = mock_batch.call_args_list[0].args[0]
+        self.assertIn("VALUES %s", query)
+        self.assertIn("ON CONFLICT (customer_id, resource_type, resource_id)", query)
+
+    @patch("aws_scanner.execute_one")
+    @patch("aws_scanner.execute_values_batch")
+    def test_encryption_status_buffer_dedups_and_retries_rows(self, mock_batch, mock_execute_one):
+        mock_batch.side_effect = Exception("value too long for type character varying")
+        mock_execute_one.side_effect = [None, Exception("value too long for type character varying")]
+        buffer = aws_scanner._EncryptionStatusBuffer(batch_size=10)
+        aws_scanner._upsert_encryption_status("cust-1", "s3", "bucket-a", encryption_enabled=False, buffer=buffer)
+        aws_scanner._upsert_encryption_status("cust-1", "s3", "bucket-a", encryption_enabled=True, buffer=buffer)
+        aws_scanner._upsert_encryption_status("cust-1", "s3", "bucket-b", buffer=buffer)
+        mock_batch.assert_not_called()
+
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(mock_batch.call_count, 1)
+        retried = mock_execute_one.call_args_list
+        self.assertEqual([c.args[1][2] for c in retried], ["bucket-a", "bucket-b"])
+        self.assertTrue(retried[0].args[1][5])
+        self.assertTrue(all("ON CONFLICT (customer_id, resource_type, resource_id)" in c.args[0] for c in retried))
+
+    @patch("aws_scanner.execute_one", side_effect=Exception("connection reset"))
+    @patch("aws_scanner.execute_values_batch", side_effect=Exception("connection reset"))
+    def test_failed_batch_does_not_abort_the_service_scan(self, mock_batch, mock_execute_one):
+        rds_client = MagicMock()
+        rds_client.describe_db_instances.return_value = {
+            "DBInstances": [
+                {"DBInstanceIdentifier": f"db-{i}", "StorageEncrypted": True, "BackupRetentionPeriod": 7}
+                for i in range(3)
+            ]
+        }
+        with patch.object(aws_scanner, "ENCRYPTION_STATUS_BATCH_SIZE", 2):
+            scanned = aws_scanner._scan_rds(FakeSession({"rds": rds_client}), "cust-1")
+
+        self.assertEqual(scanned, 3)
+        self.assertEqual(mock_batch.call_count, 2)
+        self.assertEqual(mock_execute_one.call_count, 3)
+
+
+    @patch("aws_scanner.boto3.client")
+    @patch("aws_scanner.ddb")
+    def test_scheduled_trigger_dispatches_shards(self, mock_ddb, mock_boto_client):
+        context = MagicMock(invoked_function_arn="arn:aws:lambda:us-east-1:1:function:scanner")
+        with patch.object(aws_scanner, "SCAN_SHARD_COUNT", 3):
+            result = aws_scanner.lambda_handler({"source": "aws.events"}, context)
+
+        self.assertEqual(result["mode"], "sharded")
+        self.assertEqual(result["shards_dispatched"], 3)
+        invokes = mock_boto_client.return_value.invoke.call_args_list
+        self.assertEqual(len(invokes), 3)
+        payloads = [json.loads(c.kwargs["Payload"]) for c in invokes]
+        self.assertEqual([p["shard"] for p in payloads], [0, 1, 2])
+        self.assertTrue(all(p["run_id"] == result["run_id"] and p["total_shards"] == 3 for p in payloads))
+        self.assertEqual(invokes[0].kwargs["FunctionName"], context.invoked_function_arn)
+        self.assertEqual(mock_ddb.Table.return_value.update_item.call_count, 3)
+
+    @patch("aws_scanner._run_customer_scan", return_value={"scan_status": "completed"})
+    @patch("aws_scanner.ddb")
+    def test_scan_shard_scans_segment_and_skips_completed(self, mock_ddb, mock_run):
+        table = mock_ddb.Table.return_value
+        table.get_item.return_value = {"Item": {"completed_customers": {"c1"}}}
+        table.scan.return_value = {
+            "Items": [
+                {"customer_id": "c1", "role_arn": "arn:1", "external_id": "e1", "status": "connected"},
+                {"customer_id": "c2", "role_arn": "arn:2", "external_id": "e2", "status": "connected"},
+                {"customer_id": "c3", "role_arn": "arn:3", "external_id": "e3", "status": "disconnected"},
+            ]
+        }
+        context = MagicMock()
+        context.get_remaining_time_in_millis.return_value = 600000
+        event = {"trigger": "scan_shard", "run_id": "scan-1", "shard": 1, "total_shards": 4}
+
+        result = aws_scanner.lambda_handler(event, context)
+
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(result["customers_scanned"], 1)
+        mock_run.assert_called_once_with("c2", "arn:2", "e2")
+        table.scan.assert_called_once_with(Segment=1, TotalSegments=4)
+        marks = [c for c in table.update_item.call_args_list if "ADD completed_customers" in c.kwargs["UpdateExpression"]]
+        self.assertEqual(marks[0].kwargs["ExpressionAttributeValues"][":c"], {"c2"})
+
+    @patch("aws_scanner.boto3.client")
+    @patch("aws_scanner._run_customer_scan")
+    @patch("aws_scanner.ddb")
+    def test_scan_shard_resumes_when_low_on_time(self, mock_ddb, mock_run, mock_boto_client):
+        table = mock_ddb.Table.return_value
+        table.get_item.return_value = {}
+        table.scan.return_value = {
+            "Items": [{"customer_id": "c1", "role_arn": "arn:1", "external_id": "e1", "status": "connected"}]
+        }
+        context = MagicMock(invoked_function_arn="arn:scanner")
+        context.get_remaining_time_in_millis.return_value = 1000
+        event = {"trigger": "scan_shard", "run_id": "scan-1", "shard": 0, "total_shards": 2}
+
+        result = aws_scanner.lambda_handler(event, context)
+
+        self.assertEqual(result["status"], "resuming")
+        mock_run.assert_not_called()
+        payload = json.loads(mock_boto_client.return_value.invoke.call_args.kwargs["Payload"])
+        self.assertEqual(payload, {**event, "resume_count": 1})
+
+
+    def _bucket_client(self):
+        s3_client = MagicMock()
+        s3_client.list_buckets.return_value = {"Buckets": [{"Name": "phi-bucket"}, {"Name": "logs-bucket"}]}
+        s3_client.get_bucket_encryption.return_value = {"ServerSideEncryptionConfiguration": {"Rules": []}}
+        s3_client.get_public_access_block.return_value = {"PublicAccessBlockConfiguration": {}}
+        s3_client.get_bucket_policy.return_value = {"Policy": json.dumps({"Statement": []})}
+        return s3_client
+
+    @patch("aws_scanner._upsert_encryption_status")
+    def test_scan_s3_skips_unchanged_buckets(self, mock_upsert):
+        s3_client = self._bucket_client()
+        unchanged = aws_scanner._fingerprint({"Rules": []}, {}, json.dumps({"Statement": []}))
+        cache = aws_scanner._FingerprintCache({("s3", "phi-bucket"): unchanged, ("s3", "logs-bucket"): "stale"})
+
+        with (
+            patch.dict(aws_scanner._fingerprint_caches, {"cust-1": cache}),
+            patch.object(aws_scanner, "_contains_phi", wraps=aws_scanner._contains_phi) as mock_classify,
+        ):
+            scanned = aws_scanner._scan_s3(FakeSession({"s3": s3_client}), "cust-1")
+
+        self.assertEqual(scanned, 2)
+        self.assertEqual(cache.unchanged, 1)
+        mock_upsert.assert_called_once()
+        self.assertEqual(mock_upsert.call_args.kwargs["resource_id"], "logs-bucket")
+        self.assertEqual(mock_upsert.call_args.kwargs["config_fingerprint"], unchanged)
+        mock_classify.assert_called_once_with("logs-bucket")
+
+    def test_skipped_resources_get_snapshot_at_refreshed(self):
+        cache = aws_scanner._FingerprintCache({("s3", "phi-bucket"): "abc", ("kms", "key-1"): "def"})
+        cache.unchanged_since_last_scan("s3", "phi-bucket", "abc")
+        cache.unchanged_since_last_scan("kms", "key-1", "def")
+
+        with patch.object(aws_scanner, "execute_values_batch") as mock_batch:
+            cache.touch_skipped("cust-1")
+            cache.touch_skipped("cust-1")
+
+        mock_batch.assert_called_once()
+        query, rows = mock_batch.call_args.args
+        self.assertIn("SET snapshot_at = NOW()", query)
+        self.assertEqual(rows, [("cust-1", "s3", "phi-bucket"), ("cust-1", "kms", "key-1")])
+
+    def test_full_rescan_every_n_runs(self):
+        with patch.object(aws_scanner, "FULL_RESCAN_EVERY_N_RUNS", 3):
+            self.assertEqual(
+                [aws_scanner._is_full_rescan(run) for run in range(1, 8)],
+                [True, False, False, True, False, False, True],
+            )
+        with patch.object(aws_scanner, "FULL_RESCAN_EVERY_N_RUNS", 1):
+            self.assertTrue(aws_scanner._is_full_rescan(5))
+
+    def test_delta_run_loads_fingerprints(self):
+        rows = [{"resource_type": "s3", "resource_id": "phi-bucket", "config_fingerprint": "abc"}]
+        with (
+            patch.object(aws_scanner, "_next_scan_run", return_value=2),
+            patch.object(aws_scanner, "query_many", return_value=rows) as mock_query,
+        ):
+            result, record = self._run_scan_with()
+        mock_query.assert_called_once()
+        self.assertFalse(record["full_rescan"])
+        self.assertEqual(result["resources_unchanged"], 0)
+        self.assertNotIn("cust-1", aws_scanner._fingerprint_caches)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,147 @@
+"""
+Unit tests for Parquet output (lambda_layer columnar_export)
+"""
+
+import io
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from columnar_export import (
+    PARQUET_MAGIC,
+    ColumnarWriter,
+    infer_schema,
+    to_parquet,
+)
+
+
+def _rows(n):
+    return [
+        {
+            "id": i,
+            "accessed_at": datetime(2026, 1, 1, i % 24, tzinfo=timezone.utc),
+            "action": ("read", "write", "delete")[i % 3],
+            "encrypted": i % 2 == 0,
+            "amount": Decimal("10.25") * i,
+            "resource_id": f"arn:aws:s3:::bucket/object-{i}",
+            "patient_id": None if i % 5 else f"P{i}",
+        }
+        for i in range(n)
+    ]
+
+
+class TestSchema:
+
+    def test_kinds_inferred_from_values(self):
+        schema = dict(infer_schema(_rows(10) + [{"day": date(2026, 1, 1), "doc": {"a": 1}}]))
+        assert schema == {
+            "id": "int",
+            "accessed_at": "timestamp",
+            "action": "string",
+            "encrypted": "bool",
+            "amount": "float",
+            "resource_id": "string",
+            "patient_id": "string",
+            "day": "date",
+            "doc": "string",
+        }
+
+
+    def test_decimals_are_float_even_when_whole(self):
+        assert dict(infer_schema([{"amount": Decimal("10000.00")}, {"amount": Decimal("5")}])) == {
+            "amount": "float"
+        }
+
+
+class TestStreamedSchema:
+
+    @staticmethod
+    def _batches():
+        first = [{"amount": Decimal("10000.00"), "flagged": None, "note": None} for _ in range(5)]
+        second = [{"amount": Decimal("1234.56"), "flagged": True, "note": None} for _ in range(5)]
+        third = [{"amount": Decimal("20.10"), "flagged": False, "note": "ctr"} for _ in range(5)]
+        return first, second, third
+
+    @pytest.mark.parametrize("backend", ["python", "pyarrow"])
+    def test_later_batches_keep_their_types(self, backend):
+        if backend == "pyarrow":
+            pytest.importorskip("pyarrow")
+        buf = io.BytesIO()
+        with ColumnarWriter(buf, backend=backend) as writer:
+            for batch in self._batches():
+                writer.write_rows(batch)
+
+        assert dict(writer.schema) == {"amount": "float", "flagged": "bool", "note": "string"}
+        assert writer.rows_written == 15
+
+    def test_round_trip_keeps_one_row_group_per_batch(self):
+        pq = pytest.importorskip("pyarrow.parquet")
+        buf = io.BytesIO()
+        with ColumnarWriter(buf, backend="python") as writer:
+            for batch in self._batches():
+                writer.write_rows(batch)
+
+        parquet_file = pq.ParquetFile(io.BytesIO(buf.getvalue()))
+        assert parquet_file.metadata.num_row_groups == 3
+        table = parquet_file.read().to_pydict()
+        assert table["amount"][:6] == [10000.0] * 5 + [1234.56]
+        assert table["flagged"] == [None] * 5 + [True] * 5 + [False] * 5
+
+    def test_column_null_past_the_deferral_limit_becomes_string(self):
+        buf = io.BytesIO()
+        with ColumnarWriter(buf, backend="python", max_deferred_rows=10) as writer:
+            writer.write_rows([{"id": i, "note": None} for i in range(6)])
+            assert writer.schema is None
+            writer.write_rows([{"id": i, "note": None} for i in range(6)])
+            assert dict(writer.schema) == {"id": "int", "note": "string"}
+            writer.write_rows([{"id": 99, "note": "late"}])
+        assert writer.rows_written == 13
+
+
+class TestPurePythonWriter:
+
+    def test_file_framing(self):
+        data = to_parquet(_rows(100), backend="python")
+        assert data[:4] == PARQUET_MAGIC and data[-4:] == PARQUET_MAGIC
+        footer_len = int.from_bytes(data[-8:-4], "little")
+        assert 0 < footer_len < len(data)
+
+    def test_smaller_than_json(self):
+        rows = _rows(5000)
+        as_json = "\n".join(json.dumps(r, default=str) for r in rows).encode()
+        assert len(to_parquet(rows, backend="python")) * 3 < len(as_json)
+
+    def test_one_row_group_per_batch_and_empty_file(self):
+        buf = io.BytesIO()
+        with ColumnarWriter(buf, backend="python") as writer:
+            writer.write_rows(_rows(10))
+            writer.write_rows(_rows(5))
+        assert writer.rows_written == 15
+        assert to_parquet([], backend="python").startswith(PARQUET_MAGIC)
+
+
+class TestArrowInterop:
+
+    @pytest.mark.parametrize("backend", ["python", "pyarrow"])
+    def test_round_trip_through_pyarrow(self, backend):
+        pq = pytest.importorskip("pyarrow.parquet")
+        rows = _rows(50)
+        buf = io.BytesIO()
+        with ColumnarWriter(buf, backend=backend) as writer:
+            writer.write_rows(rows[:30])
+            writer.write_rows(rows[30:])
+
+        parquet_file = pq.ParquetFile(io.BytesIO(buf.getvalue()))
+        assert parquet_file.metadata.num_row_groups == 2
+        table = parquet_file.read().to_pydict()
+        assert table["id"] == [r["id"] for r in rows]
+        assert table["action"] == [r["action"] for r in rows]
+        assert table["patient_id"] == [r["patient_id"] for r in rows]
+        assert table["amount"] == [float(r["amount"]) for r in rows]
+        assert table["accessed_at"] == [r["accessed_at"] for r in rows]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
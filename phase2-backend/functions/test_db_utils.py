@@ -0,0 +1,223 @@
+"""
+Unit tests for the db_utils connection pool layer.
+"""
+
+import importlib.util
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+
+_REAL_PSYCOPG2 = {
+    name: sys.modules[name]
+    for name in ("psycopg2", "psycopg2.extensions", "psycopg2.extras", "psycopg2.pool")
+}
+
+
+def _load_db_utils():
+    # Loaded under a private name, against the real psycopg2: other test
+    # modules replace sys.modules['db_utils'] and sys.modules['psycopg2'].
+    path = os.path.join(os.path.dirname(__file__), "db_utils.py")
+    spec = importlib.util.spec_from_file_location("db_utils_pool_under_test", path)
+    module = importlib.util.module_from_spec(spec)
+    with patch.dict(sys.modules, _REAL_PSYCOPG2):
+        spec.loader.exec_module(module)
+    return module
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError("server closed the connection")
+        self.conn.statements.append(sql)
+        self.conn.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.broken = False
+        self.statements = []
+        self.commits = 0
+        self.cursor_factory = None
+        self.info = SimpleNamespace(transaction_status=psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+        self.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        if self.broken:
+            raise psycopg2.InterfaceError("connection already closed")
+        self.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakePool:
+    maxconn = 2
+
+    def __init__(self):
+        self.idle = []
+        self.opened = []
+        self.closed = []
+
+    def getconn(self):
+        if self.idle:
+            return self.idle.pop()
+        conn = FakeConnection()
+        self.opened.append(conn)
+        return conn
+
+    def putconn(self, conn, close=False):
+        if close:
+            self.closed.append(conn)
+        else:
+            self.idle.append(conn)
+
+
+class SurplusClosingPool(FakePool):
+    """Closes returned connections beyond minconn and forgets them, like psycopg2."""
+    minconn = 1
+
+    def getconn(self):
+        return self.idle.pop() if self.idle else FakeConnection()
+
+    def putconn(self, conn, close=False):
+        if close or len(self.idle) >= self.minconn:
+            conn.closed = 1
+        else:
+            self.idle.append(conn)
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.db = _load_db_utils()
+        self.pool = FakePool()
+        self.db._connection_pool = self.pool
+
+    def test_warm_borrow_reuses_connection(self):
+        with self.db.borrow_connection() as first:
+            pass
+        with self.db.borrow_connection() as second:
+            pass
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.pool.opened), 1)
+        stats = self.db.get_pool_stats()
+        self.assertEqual(stats["borrows"], 2)
+        self.assertEqual(stats["reuses"], 1)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["in_use"], 0)
+
+    def test_same_tenant_reuses_rls_context(self):
+        with self.db.borrow_connection("cust-1") as conn:
+            pass
+        with self.db.borrow_connection("cust-1"):
+            pass
+
+        rls_calls = [s for s in conn.statements if "set_customer_context" in s]
+        self.assertEqual(len(rls_calls), 1)
+        self.assertEqual(self.db.get_pool_stats()["rls_context_reuses"], 1)
+
+    def test_context_is_reset_before_serving_another_borrower(self):
+        with self.db.borrow_connection("cust-1") as conn:
+            pass
+        with self.db.borrow_connection():
+            pass
+        with self.db.borrow_connection("cust-2"):
+            pass
+
+        self.assertIn("set_config('app.current_customer_id', ''", conn.statements[1])
+        self.assertIn("set_customer_context", conn.statements[2])
+        self.assertEqual(self.db.get_pool_stats()["rls_resets"], 1)
+
+    def test_context_set_inside_transaction_is_not_trusted(self):
+        conn = self.db.get_connection()
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        self.db.set_rls_context_on_conn(conn, "cust-1")
+        conn.rollback()
+        self.db.release_connection(conn)
+
+        with self.db.borrow_connection("cust-1"):
+            pass
+
+        rls_calls = [s for s in conn.statements if "set_customer_context" in s]
+        self.assertEqual(len(rls_calls), 2)
+
+    def test_stale_connection_discarded_by_health_check(self):
+        with self.db.borrow_connection() as stale:
+            pass
+        stale.broken = True
+        self.db._last_returned[stale] -= self.db.POOL_HEALTH_CHECK_IDLE_SECONDS + 1
+
+        with self.db.borrow_connection() as fresh:
+            pass
+
+        self.assertIsNot(fresh, stale)
+        self.assertIn(stale, self.pool.closed)
+        self.assertEqual(self.db.get_pool_stats()["health_check_failures"], 1)
+
+    def test_context_set_again_after_pool_closes_surplus_connection(self):
+        # A closed connection frees its id(); a new one must not inherit its context.
+        self.db._connection_pool = SurplusClosingPool()
+        for _ in range(200):
+            first = self.db.get_connection("cust-1")
+            second = self.db.get_connection("cust-1")
+            for conn in (first, second):
+                rls_calls = [s for s in conn.statements if "set_customer_context" in s]
+                self.assertTrue(rls_calls)
+            self.db.release_connection(first)
+            self.db.release_connection(second)
+            self.assertEqual(second.closed, 1)
+            self.assertNotIn(second, self.db._rls_context)
+            del first, second, conn
+
+    def test_closed_connection_dropped_on_release(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.borrow_connection() as conn:
+                conn.closed = 1
+                raise RuntimeError("boom")
+
+        self.assertEqual(self.pool.closed, [conn])
+        self.assertEqual(self.pool.idle, [])
+
+    def test_release_rolls_back_and_clears_cursor_factory(self):
+        with self.db.borrow_connection(cursor_factory=object) as conn:
+            with conn.cursor() as cur:
+                cur.execute("UPDATE customers SET name = 'x'")
+
+        self.assertIsNone(conn.cursor_factory)
+        self.assertEqual(conn.info.transaction_status,
+                         psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def test_connection_params_read_rds_secret_arn(self):
+        env = {"RDS_ENDPOINT": "proxy.example", "RDS_SECRET_ARN": "arn:secret"}
+        with patch.dict(os.environ, env, clear=True), \
+             patch.object(self.db, "_get_secret",
+                          return_value='{"username": "app", "password": "pw"}'):
+            params = self.db._connection_params()
+
+        self.assertEqual(params["host"], "proxy.example")
+        self.assertEqual(params["user"], "app")
+        self.assertEqual(params["password"], "pw")
+
+
+if __name__ == "__main__":
+    unittest.main()
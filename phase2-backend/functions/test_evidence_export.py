@@ -0,0 +1,168 @@
+"""
+Unit tests for streaming evidence export packages (lambda_layer evidence_export)
+"""
+
+import io
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from evidence_export import (
+    MIN_PART_SIZE,
+    MultipartWriter,
+    StreamingPackage,
+    columnar_manifest,
+    stream_query,
+    verify_columnar_package,
+    verify_package,
+    write_columnar_section,
+)
+
+
+class FakeS3:
+    """In-memory stand-in for the multipart subset of the S3 client."""
+
+    def __init__(self):
+        self.parts = {}
+        self.objects = {}
+        self.aborted = []
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.create_kwargs = kwargs
+        return {"UploadId": "upload-1"}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.parts[PartNumber] = Body
+        return {"ETag": f'"etag-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        numbers = [p["PartNumber"] for p in MultipartUpload["Parts"]]
+        assert numbers == sorted(self.parts)
+        self.objects[Key] = b"".join(self.parts[n] for n in numbers)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.aborted.append(Key)
+
+
+class TestMultipartWriter:
+
+    def test_parts_cut_at_part_size_and_reassembled(self):
+        s3 = FakeS3()
+        chunk = b"x" * (MIN_PART_SIZE // 2 + 1)
+        with MultipartWriter(s3, "bucket", "k", part_size=MIN_PART_SIZE,
+                             ContentType="application/x-ndjson") as writer:
+            for _ in range(5):
+                writer.write(chunk)
+
+        assert len(s3.parts) == 3
+        assert all(len(s3.parts[n]) >= MIN_PART_SIZE for n in (1, 2))
+        assert s3.objects["k"] == chunk * 5
+        assert s3.create_kwargs == {"ContentType": "application/x-ndjson"}
+
+    def test_empty_upload_still_completes(self):
+        s3 = FakeS3()
+        with MultipartWriter(s3, "bucket", "k", part_size=MIN_PART_SIZE):
+            pass
+        assert s3.objects["k"] == b""
+
+    def test_error_aborts_upload(self):
+        s3 = FakeS3()
+        with pytest.raises(RuntimeError):
+            with MultipartWriter(s3, "bucket", "k", part_size=MIN_PART_SIZE) as writer:
+                writer.write(b"partial")
+                raise RuntimeError("cursor died")
+        assert s3.aborted == ["k"]
+        assert "k" not in s3.objects
+
+    def test_part_size_below_s3_minimum_rejected(self):
+        with pytest.raises(ValueError):
+            MultipartWriter(FakeS3(), "bucket", "k", part_size=1024)
+
+
+class TestStreamingPackage:
+
+    def _package(self):
+        buf = io.BytesIO()
+        package = StreamingPackage(buf, {"export_reference": "REF-1"})
+        package.write_section("logs", ({"id": i, "at": "2026-01-01"} for i in range(3)))
+        package.write_section("empty", iter([]))
+        return buf, package
+
+    def test_manifest_counts_and_byte_ranges(self):
+        buf, package = self._package()
+        manifest = package.manifest(package_key="k")
+        data = buf.getvalue()
+
+        assert manifest["record_counts"] == {"logs": 3, "empty": 0}
+        assert manifest["package_bytes"] == len(data)
+        logs = manifest["sections"][0]
+        lines = data[logs["byte_offset"]:logs["byte_offset"] + logs["byte_length"]].splitlines()
+        assert [json.loads(l)["data"]["id"] for l in lines] == [0, 1, 2]
+        assert json.loads(data.splitlines()[0])["type"] == "header"
+
+    def test_verify_package_round_trip(self):
+        buf, package = self._package()
+        buf.seek(0)
+        assert verify_package(buf, package.manifest()) == []
+
+    def test_verify_package_detects_tampering(self):
+        buf, package = self._package()
+        tampered = buf.getvalue().replace(b'"id":1', b'"id":9')
+        problems = verify_package(io.BytesIO(tampered), package.manifest())
+        assert "logs: digest mismatch" in problems
+        assert "package digest mismatch" in problems
+
+    def test_duplicate_section_rejected(self):
+        _, package = self._package()
+        with pytest.raises(ValueError):
+            package.write_section("logs", [])
+
+
+class TestColumnarPackage:
+
+    def _package(self):
+        objects, entries = {}, []
+        for name, n in (("logs", 25), ("empty", 0)):
+            buf = io.BytesIO()
+            buf.key = f"REF-1.{name}.parquet"
+            rows = ({"id": i, "action": "read"} for i in range(n))
+            entries.append(write_columnar_section(buf, name, rows, batch_rows=10))
+            objects[buf.key] = buf.getvalue()
+        return objects, columnar_manifest(entries, export_reference="REF-1")
+
+    def test_one_parquet_object_per_section(self):
+        objects, manifest = self._package()
+        assert manifest["format"] == "parquet-v1"
+        assert manifest["record_counts"] == {"logs": 25, "empty": 0}
+        assert manifest["package_bytes"] == sum(len(b) for b in objects.values())
+        assert all(b.startswith(b"PAR1") and b.endswith(b"PAR1") for b in objects.values())
+
+    def test_verify_columnar_package_round_trip_and_tampering(self):
+        objects, manifest = self._package()
+        assert verify_columnar_package(objects, manifest) == []
+
+        objects["REF-1.logs.parquet"] += b"\0"
+        manifest["sections"][1]["record_count"] = 3
+        problems = verify_columnar_package(objects, manifest)
+        assert "logs: digest mismatch" in problems
+        assert "package digest mismatch" in problems
+
+
+class TestStreamQuery:
+
+    def test_uses_named_cursor_with_itersize(self):
+        conn = MagicMock()
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.__iter__.return_value = iter([{"id": 1}, {"id": 2}])
+
+        rows = list(stream_query(conn, "audit_logs", "SELECT 1", ("a",), itersize=100))
+
+        assert rows == [{"id": 1}, {"id": 2}]
+        assert conn.cursor.call_args.kwargs["name"] == "audit_logs"
+        assert cursor.itersize == 100
+        cursor.execute.assert_called_once_with("SELECT 1", ("a",))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
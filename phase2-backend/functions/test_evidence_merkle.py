@@ -0,0 +1,143 @@
+"""
+Unit tests for Merkle-batched evidence signing (lambda_layer evidence_merkle)
+"""
+
+import base64
+import hashlib
+import json
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+from evidence_merkle import (
+    MerkleTree,
+    compute_root,
+    evidence_content_hash,
+    main,
+    root_message,
+    verify_inclusion,
+    verify_signed_evidence,
+)
+
+
+def _hashes(n):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n)]
+
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+def _kms_style_sign(private_key, root):
+    """Sign like KMS RSASSA_PKCS1_V1_5_SHA_256 with MessageType RAW."""
+    sig = private_key.sign(root_message(root), padding.PKCS1v15(), hashes.SHA256())
+    return base64.b64encode(sig).decode()
+
+
+def _public_der(private_key):
+    return private_key.public_key().public_bytes(
+        serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+
+
+class TestMerkleTree:
+
+    @pytest.mark.parametrize("n", [1, 2, 3, 5, 8, 13, 100])
+    def test_every_leaf_proves_against_root(self, n):
+        leaves = _hashes(n)
+        tree = MerkleTree(leaves)
+        assert len(tree) == n
+        for i, h in enumerate(leaves):
+            assert verify_inclusion(h, tree.proof(i), tree.root)
+
+    def test_single_leaf_root_is_leaf_hash(self):
+        (h,) = _hashes(1)
+        tree = MerkleTree([h])
+        assert tree.proof(0) == []
+        assert tree.root == compute_root(h, [])
+
+    def test_proof_length_is_logarithmic(self):
+        tree = MerkleTree(_hashes(1000))
+        assert max(len(tree.proof(i)) for i in range(1000)) == 10
+
+    def test_wrong_item_or_root_rejected(self):
+        leaves = _hashes(5)
+        tree = MerkleTree(leaves)
+        assert not verify_inclusion(leaves[1], tree.proof(0), tree.root)
+        assert not verify_inclusion(leaves[0], tree.proof(0), "00" * 32)
+
+    def test_unpaired_node_not_duplicated(self):
+        # Duplicating the last leaf must not reproduce the same root
+        leaves = _hashes(3)
+        assert MerkleTree(leaves).root != MerkleTree(leaves + leaves[-1:]).root
+
+    def test_empty_tree_rejected(self):
+        with pytest.raises(ValueError):
+            MerkleTree([])
+
+    def test_malformed_proof_rejected(self):
+        leaves = _hashes(2)
+        tree = MerkleTree(leaves)
+        bad = [{"position": "up", "hash": tree.proof(0)[0]["hash"]}]
+        assert not verify_inclusion(leaves[0], bad, tree.root)
+
+
+class TestSignedEvidence:
+
+    def _row(self, rsa_key, index=2, n=6):
+        leaves = _hashes(n)
+        tree = MerkleTree(leaves)
+        return {
+            "content_hash": leaves[index],
+            "merkle_root": tree.root,
+            "merkle_proof": json.dumps(tree.proof(index)),
+            "kms_signature_b64": _kms_style_sign(rsa_key, tree.root),
+        }
+
+    def test_valid_row_verifies(self, rsa_key):
+        assert verify_signed_evidence(self._row(rsa_key), _public_der(rsa_key))
+
+    def test_pem_public_key_accepted(self, rsa_key):
+        pem = rsa_key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        assert verify_signed_evidence(self._row(rsa_key), pem)
+
+    def test_tampered_content_hash_fails(self, rsa_key):
+        row = self._row(rsa_key)
+        row["content_hash"] = _hashes(7)[6]
+        assert not verify_signed_evidence(row, _public_der(rsa_key))
+
+    def test_signature_from_other_key_fails(self, rsa_key):
+        other = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        row = self._row(rsa_key)
+        row["kms_signature_b64"] = _kms_style_sign(other, row["merkle_root"])
+        assert not verify_signed_evidence(row, _public_der(rsa_key))
+
+    def test_cli_verifies_row_and_evidence(self, rsa_key, tmp_path, capsys):
+        evidence = {"control_id": "HIPAA-AS.1", "status": "compliant"}
+        content_hash = evidence_content_hash(evidence)
+        tree = MerkleTree([content_hash] + _hashes(3))
+        row = {
+            "content_hash": content_hash,
+            "merkle_root": tree.root,
+            "merkle_proof": tree.proof(0),
+            "kms_signature_b64": _kms_style_sign(rsa_key, tree.root),
+        }
+        (tmp_path / "row.json").write_text(json.dumps(row))
+        (tmp_path / "key.der").write_bytes(_public_der(rsa_key))
+        # Vaulted objects are stored indented; re-hashing must not depend on layout
+        (tmp_path / "evidence.json").write_text(json.dumps(evidence, indent=2))
+
+        args = [str(tmp_path / "row.json"), "--public-key", str(tmp_path / "key.der")]
+        assert main(args + ["--evidence", str(tmp_path / "evidence.json")]) == 0
+        assert "OK" in capsys.readouterr().out
+
+        (tmp_path / "evidence.json").write_text(json.dumps({"status": "non_compliant"}))
+        assert main(args + ["--evidence", str(tmp_path / "evidence.json")]) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,109 @@
+"""
+Unit tests for shared evidence signing and vaulting (lambda_layer evidence_vault)
+"""
+
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from evidence_merkle import root_message, verify_inclusion
+from evidence_vault import (
+    EvidenceVault,
+    MerkleSigningBatch,
+    VaultTarget,
+    new_signing_batch,
+    sign_and_vault,
+)
+
+CUSTOMER_ID = "550e8400-e29b-41d4-a716-446655440000"
+REQUEST_ID = "test-request-id-001"
+KMS_ARN = "arn:aws:kms:us-east-1:123:key/test"
+
+
+def _hash(i):
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def _target(table="tx_evidence_signatures", pre_submit=None, **overrides):
+    kwargs = dict(
+        signature_table=table,
+        kms_key_id=KMS_ARN,
+        executor=ThreadPoolExecutor(max_workers=4),
+        sign=MagicMock(return_value="sig=="),
+        sign_message=MagicMock(return_value="rootsig=="),
+        evidence_key=lambda cid, etype, eid: f"evidence/test/{cid}/{etype}/{eid}.json",
+        put_evidence=MagicMock(),
+        vault_to_s3=MagicMock(return_value="inline-key"),
+        record_signature=MagicMock(),
+        pre_submit=pre_submit,
+    )
+    kwargs.update(overrides)
+    return VaultTarget(**kwargs)
+
+
+def _make_conn():
+    conn = MagicMock()
+    cursor = MagicMock()
+    conn.cursor.return_value.__enter__.return_value = cursor
+    return conn, cursor
+
+
+@patch("evidence_vault.psycopg2.extras.execute_values")
+def test_flush_writes_to_the_targets_signature_table(mock_exec):
+    target = _target("tx_evidence_signatures")
+    conn, cursor = _make_conn()
+    vault = EvidenceVault(target, REQUEST_ID)
+    key = vault.submit(CUSTOMER_ID, "TX-MT-R1", "1", _hash(1), {"status": "compliant"})
+
+    assert vault.flush(conn) == []
+    assert key == f"evidence/test/{CUSTOMER_ID}/TX-MT-R1/1.json"
+    target.put_evidence.assert_called_once()
+    sql, rows = mock_exec.call_args[0][1], mock_exec.call_args[0][2]
+    assert "INSERT INTO tx_evidence_signatures" in sql
+    assert rows[0][4:] == (KMS_ARN, "sig==", REQUEST_ID, None, None, None, None)
+
+
+def test_pre_submit_check_refuses_evidence_before_queueing():
+    def require_key(customer_id):
+        raise ValueError("KMS_KEY_ID must be set")
+
+    target = _target(pre_submit=require_key)
+    with pytest.raises(ValueError, match="KMS_KEY_ID"):
+        EvidenceVault(target, REQUEST_ID).submit(CUSTOMER_ID, "HIPAA-AS.1", "1", _hash(1), {})
+    target.put_evidence.assert_not_called()
+    target.sign.assert_not_called()
+
+
+@patch("evidence_vault.psycopg2.extras.execute_values")
+def test_merkle_batch_signs_root_through_target(mock_exec):
+    target = _target("hipaa_evidence_signatures")
+    conn, cursor = _make_conn()
+    batch = new_signing_batch(target, "merkle", REQUEST_ID)
+    assert isinstance(batch, MerkleSigningBatch)
+
+    vault = EvidenceVault(target, REQUEST_ID, batch=batch)
+    for i in range(3):
+        vault.submit(CUSTOMER_ID, "HIPAA-AS.1", str(i), _hash(i), {})
+    assert vault.flush(conn) == []
+    mock_exec.assert_not_called()
+
+    rows = batch.sign()[CUSTOMER_ID]
+    target.sign.assert_not_called()
+    root = rows[0][7]
+    target.sign_message.assert_called_once_with(root_message(root))
+    assert all(verify_inclusion(row[3], row[8].adapted, root) for row in rows)
+    assert new_signing_batch(target, "item", REQUEST_ID) is None
+
+
+def test_sign_and_vault_without_vault_runs_inline():
+    target = _target()
+    conn = MagicMock()
+    key = sign_and_vault(target, conn, CUSTOMER_ID, "TX-MT-R1", "1", _hash(1), {}, REQUEST_ID)
+
+    assert key == "inline-key"
+    target.sign.assert_called_once_with(_hash(1))
+    target.record_signature.assert_called_once_with(
+        conn, CUSTOMER_ID, "TX-MT-R1", "1", _hash(1), "sig==", REQUEST_ID
+    )
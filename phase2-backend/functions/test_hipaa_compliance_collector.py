@@ -2,8 +2,12 @@
 Unit tests for HIPAA Compliance Collector Lambda function
 """
 
+import io
 import json
+import time
+import psycopg2.errors
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from unittest.mock import MagicMock, patch
 
@@ -13,6 +17,9 @@ from hipaa_compliance_collector import (
     _validate_customer_id,
     _update_control_status,
     _get_healthcare_customers,
+    _collect_controls,
+    _record_batch_signatures,
+    _vault_target,
     collect_hipaa_as1,
     collect_hipaa_as2,
     collect_hipaa_ts1,
@@ -30,6 +37,9 @@ from hipaa_compliance_collector import (
     CONTROL_COLLECTOR_MAP,
     HIPAA_RETENTION_DAYS,
 )
+from evidence_export import verify_columnar_package, verify_package
+from evidence_merkle import verify_inclusion
+from evidence_vault import EvidenceVault, MerkleSigningBatch, new_signing_batch
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -165,6 +175,211 @@ class TestVaultToS3KmsEnforcement:
         assert call_kwargs["SSEKMSKeyId"] == "arn:aws:kms:us-east-1:123:key/abc"
 
 
+# ══════════════════════════════════════════════════════════════════════════════
+# EVIDENCE VAULT PIPELINE
+# ══════════════════════════════════════════════════════════════════════════════
+
+KMS_ARN = "arn:aws:kms:us-east-1:123:key/test"
+
+
+class TestEvidenceVault:
+    """Test the queued KMS/S3 vaulting stage and its bulk signature insert."""
+
+    @patch("hipaa_compliance_collector.psycopg2.extras.execute_values")
+    @patch("hipaa_compliance_collector._put_evidence")
+    @patch("hipaa_compliance_collector.kms_sign", return_value="sig==")
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", KMS_ARN)
+    def test_flush_bulk_inserts_one_row_per_job(self, mock_sign, mock_put, mock_exec):
+        conn, cursor = _make_conn()
+        vault = EvidenceVault(_vault_target(), REQUEST_ID)
+        keys = [
+            vault.submit(CUSTOMER_ID, ctrl, "00000000-0000-0000-0000-00000000000%d" % i,
+                         "hash%d" % i, {"control_id": ctrl})
+            for i, ctrl in enumerate(["HIPAA-AS.1", "HIPAA-AS.2"])
+        ]
+
+        failures = vault.flush(conn)
+
+        assert failures == []
+        assert all(f"/{CUSTOMER_ID}/hipaa/" in k for k in keys)
+        assert mock_put.call_count == 2
+        mock_exec.assert_called_once()
+        sql, rows = mock_exec.call_args[0][1], mock_exec.call_args[0][2]
+        assert "hipaa_evidence_signatures" in sql
+        assert [r[1] for r in rows] == ["HIPAA-AS.1", "HIPAA-AS.2"]
+        assert rows[0][4:] == (KMS_ARN, "sig==", REQUEST_ID, None, None, None, None)
+        # A second flush has nothing left to write
+        assert vault.flush(conn) == []
+        mock_exec.assert_called_once()
+
+    @patch("hipaa_compliance_collector.psycopg2.extras.execute_values")
+    @patch("hipaa_compliance_collector.kms_sign", return_value="sig==")
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", KMS_ARN)
+    def test_jobs_run_concurrently(self, mock_sign, mock_exec):
+        def slow_put(key, body):
+            time.sleep(0.2)
+
+        conn, cursor = _make_conn()
+        with patch("hipaa_compliance_collector._put_evidence", side_effect=slow_put):
+            vault = EvidenceVault(
+                _vault_target(), REQUEST_ID, executor=ThreadPoolExecutor(max_workers=20)
+            )
+            started = time.monotonic()
+            for i, ctrl in enumerate(ALL_CONTROLS):
+                vault.submit(CUSTOMER_ID, ctrl, str(i), "h", {})
+            vault.flush(conn)
+            elapsed = time.monotonic() - started
+
+        # Ten 200 ms uploads in sequence would take 2 s
+        assert elapsed < 1.0
+        assert len(mock_exec.call_args[0][2]) == len(ALL_CONTROLS)
+
+    @patch("hipaa_compliance_collector.psycopg2.extras.execute_values")
+    @patch("hipaa_compliance_collector.kms_sign", return_value="sig==")
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", KMS_ARN)
+    def test_failed_upload_gets_no_signature_row(self, mock_sign, mock_exec):
+        def put(key, body):
+            if "HIPAA-AS.2" in key:
+                raise RuntimeError("S3 unavailable")
+
+        conn, cursor = _make_conn()
+        with patch("hipaa_compliance_collector._put_evidence", side_effect=put):
+            vault = EvidenceVault(_vault_target(), REQUEST_ID)
+            vault.submit(CUSTOMER_ID, "HIPAA-AS.1", "1", "h1", {})
+            failed_key = vault.submit(CUSTOMER_ID, "HIPAA-AS.2", "2", "h2", {})
+            failures = vault.flush(conn)
+
+        assert [f["s3_key"] for f in failures] == [failed_key]
+        assert "S3 unavailable" in failures[0]["error"]
+        assert [r[1] for r in mock_exec.call_args[0][2]] == ["HIPAA-AS.1"]
+
+    @patch("hipaa_compliance_collector.psycopg2.extras.execute_values")
+    @patch("hipaa_compliance_collector.kms_sign", return_value="sig==")
+    @patch("hipaa_compliance_collector._put_evidence")
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", KMS_ARN)
+    def test_payload_serialised_at_submit(self, mock_put, mock_sign, mock_exec):
+        conn, cursor = _make_conn()
+        vault = EvidenceVault(_vault_target(), REQUEST_ID)
+        evidence = {"status": "compliant"}
+        vault.submit(CUSTOMER_ID, "HIPAA-AS.1", "1", "h", evidence)
+        evidence["s3_key"] = "added-after-submit"
+        vault.flush(conn)
+
+        body = json.loads(mock_put.call_args[0][1])
+        assert body == {"status": "compliant"}
+
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", "")
+    def test_submit_enforces_kms_key(self):
+        with pytest.raises(ValueError, match="KMS_KEY_ID"):
+            EvidenceVault(_vault_target(), REQUEST_ID).submit(CUSTOMER_ID, "HIPAA-AS.1", "1", "h", {})
+
+    @patch("hipaa_compliance_collector.psycopg2.extras.execute_values")
+    @patch("hipaa_compliance_collector._put_evidence")
+    @patch("hipaa_compliance_collector.kms_sign", return_value="sig==")
+    @patch("hipaa_compliance_collector.record_signature")
+    @patch("hipaa_compliance_collector._update_control_status")
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", KMS_ARN)
+    def test_collect_controls_defers_signatures_to_flush(
+        self, mock_update, mock_rec, mock_sign, mock_put, mock_exec
+    ):
+        conn, cursor = _make_conn(fetchone_return={
+            "total_staff": 5, "trained_current": 5,
+            "training_overdue": 0, "oldest_training": None, "newest_training": None,
+        })
+        results = _collect_controls(conn, CUSTOMER_ID, ["HIPAA-AS.1"], REQUEST_ID)
+
+        mock_rec.assert_not_called()
+        mock_exec.assert_called_once()
+        assert results[0]["s3_key"].endswith(".json")
+        assert "vault_error" not in results[0]
+
+    @patch("hipaa_compliance_collector.psycopg2.extras.execute_values")
+    @patch("hipaa_compliance_collector._put_evidence")
+    @patch("hipaa_compliance_collector.kms_sign", return_value="sig==")
+    @patch("hipaa_compliance_collector._update_control_status")
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", KMS_ARN)
+    def test_failed_control_is_rolled_back_to_its_savepoint(
+        self, mock_update, mock_sign, mock_put, mock_exec
+    ):
+        conn, cursor = _make_conn(fetchone_return={"total_staff": 5, "training_overdue": 0})
+        broken = MagicMock(side_effect=psycopg2.errors.UndefinedTable("relation does not exist"))
+        with patch.dict(CONTROL_COLLECTOR_MAP, {"HIPAA-AS.2": broken}):
+            results = _collect_controls(
+                conn, CUSTOMER_ID, ["HIPAA-AS.2", "HIPAA-AS.1"], REQUEST_ID
+            )
+
+        statements = [c[0][0] for c in cursor.execute.call_args_list]
+        assert statements.index("ROLLBACK TO SAVEPOINT collect_control") < \
+            statements.index("RELEASE SAVEPOINT collect_control")
+        assert statements.count("SAVEPOINT collect_control") == 2
+        assert "relation does not exist" in results[0]["error"]
+        # The healthy control's signature row is still written after the failure
+        assert [r[1] for r in mock_exec.call_args[0][2]] == ["HIPAA-AS.1"]
+
+
+class TestMerkleSigningBatch:
+    """Test run-wide Merkle-root signing of vaulted evidence."""
+
+    @patch("hipaa_compliance_collector.psycopg2.extras.execute_values")
+    @patch("hipaa_compliance_collector._put_evidence")
+    @patch("evidence_vault.kms_sign_merkle_root", return_value="rootsig==")
+    @patch("hipaa_compliance_collector.kms_sign")
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", KMS_ARN)
+    def test_one_signature_for_all_customers(
+        self, mock_item_sign, mock_root_sign, mock_put, mock_exec
+    ):
+        other_customer = "660e8400-e29b-41d4-a716-446655440000"
+        conn, cursor = _make_conn()
+        batch = MerkleSigningBatch(_vault_target(), REQUEST_ID)
+        for cid in (CUSTOMER_ID, other_customer):
+            vault = EvidenceVault(_vault_target(), REQUEST_ID, batch=batch)
+            for i, ctrl in enumerate(ALL_CONTROLS):
+                vault.submit(cid, ctrl, str(i), sha256_hex([cid, ctrl]), {})
+            assert vault.flush(conn) == []
+
+        mock_exec.assert_not_called()
+        rows = batch.sign()
+
+        mock_item_sign.assert_not_called()
+        mock_root_sign.assert_called_once()
+        root = mock_root_sign.call_args[0][1]
+        assert set(rows) == {CUSTOMER_ID, other_customer}
+        for customer_rows in rows.values():
+            assert len(customer_rows) == len(ALL_CONTROLS)
+            for row in customer_rows:
+                content_hash, sig, merkle_root, proof = row[3], row[5], row[7], row[8]
+                assert sig == "rootsig=="
+                assert merkle_root == root
+                assert verify_inclusion(content_hash, proof.adapted, root)
+                assert row[10] == 2 * len(ALL_CONTROLS)
+        assert batch.sign() == {}
+
+    @patch("hipaa_compliance_collector.write_signature_rows")
+    @patch("hipaa_compliance_collector.set_rls_context")
+    @patch("evidence_vault.kms_sign_merkle_root", return_value="rootsig==")
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", KMS_ARN)
+    def test_rows_written_under_each_customers_rls_context(
+        self, mock_root_sign, mock_rls, mock_write
+    ):
+        conn = MagicMock()
+        batch = MerkleSigningBatch(_vault_target(), REQUEST_ID)
+        batch.add([
+            {"customer_id": "a", "evidence_type": "HIPAA-AS.1", "evidence_id": "1",
+             "content_hash": sha256_hex(1), "s3_key": "k1"},
+            {"customer_id": "b", "evidence_type": "HIPAA-AS.1", "evidence_id": "2",
+             "content_hash": sha256_hex(2), "s3_key": "k2"},
+        ])
+        _record_batch_signatures(conn, batch)
+
+        assert [c[0][1] for c in mock_rls.call_args_list] == ["a", "b"]
+        assert mock_write.call_count == 2
+        # The caller commits the evidence and its signatures together
+        conn.commit.assert_not_called()
+
+    def test_item_mode_has_no_batch(self):
+        assert new_signing_batch(_vault_target(), "item", REQUEST_ID) is None
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # _get_healthcare_customers
 # ══════════════════════════════════════════════════════════════════════════════
@@ -578,6 +793,38 @@ class TestLambdaHandler:
         assert body["customer_id"] == CUSTOMER_ID
         assert body["controls_collected"] == 1
 
+    @patch("evidence_vault.kms_sign_merkle_root", side_effect=Exception("KMS throttled"))
+    @patch("hipaa_compliance_collector._put_evidence")
+    @patch("hipaa_compliance_collector.KMS_KEY_ID", KMS_ARN)
+    @patch("hipaa_compliance_collector.get_db_connection")
+    @patch("hipaa_compliance_collector.set_rls_context")
+    @patch("hipaa_compliance_collector.collect_hipaa_as1")
+    def test_signing_failure_commits_nothing(
+        self, mock_collector, mock_rls, mock_conn, mock_put, mock_root_sign
+    ):
+        conn = MagicMock()
+        mock_conn.return_value = conn
+
+        def collector(conn, customer_id, request_id, vault=None, summary=None):
+            s3_key = vault.submit(customer_id, "HIPAA-AS.1", "1", sha256_hex(1), {})
+            return {"control_id": "HIPAA-AS.1", "s3_key": s3_key}
+
+        mock_collector.side_effect = collector
+        event = {
+            "httpMethod": "POST",
+            "path": "/hipaa/collect",
+            "body": json.dumps({
+                "customer_id": CUSTOMER_ID,
+                "controls": ["HIPAA-AS.1"],
+            }),
+        }
+        with patch("hipaa_compliance_collector.EVIDENCE_SIGNING_MODE", "merkle"):
+            response = lambda_handler(event, MagicMock(aws_request_id=REQUEST_ID))
+
+        assert response["statusCode"] == 500
+        conn.commit.assert_not_called()
+        conn.rollback.assert_called_once()
+
     @patch("hipaa_compliance_collector.get_db_connection")
     @patch("hipaa_compliance_collector.set_rls_context")
     @patch("hipaa_compliance_collector.generate_audit_export")
@@ -634,6 +881,290 @@ class TestLambdaHandler:
         assert response["statusCode"] == 500
 
 
+# ══════════════════════════════════════════════════════════════════════════════
+# AUDIT EXPORT
+# ══════════════════════════════════════════════════════════════════════════════
+
+EXPORT_ROWS = {
+    "audit_export_phi_access_logs": [{"id": i, "action": "read"} for i in range(3)],
+    "audit_export_encryption_snapshots": [{"id": "s1"}],
+    "audit_export_baa_agreements": [{"id": "b1"}, {"id": "b2"}],
+    "audit_export_control_statuses": [{"control_id": "HIPAA-AS.1"}],
+}
+
+
+def _export_conn():
+    """Mock connection whose named cursors yield EXPORT_ROWS by cursor name."""
+    conn = MagicMock()
+    plain = MagicMock()
+
+    def cursor(name=None, cursor_factory=None):
+        cm = MagicMock()
+        if name is None:
+            cm.__enter__.return_value = plain
+        else:
+            cm.__enter__.return_value.__iter__.return_value = iter(EXPORT_ROWS[name])
+        return cm
+
+    conn.cursor.side_effect = cursor
+    return conn, plain
+
+
+@patch("hipaa_compliance_collector.KMS_KEY_ID", "arn:aws:kms:us-east-1:123:key/abc")
+@patch("hipaa_compliance_collector.kms_sign", return_value="sig==")
+class TestAuditExport:
+
+    def test_ndjson_export_streams_package_and_manifest(self, mock_sign):
+        conn, plain = _export_conn()
+        s3 = MagicMock()
+        s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        s3.upload_part.return_value = {"ETag": "e1"}
+
+        with patch("hipaa_compliance_collector._s3", s3):
+            result = generate_audit_export(
+                conn, CUSTOMER_ID, "2025-01-01", "2025-12-31", "Jane", "j@hhs.gov",
+                REQUEST_ID, "ndjson",
+            )
+
+        assert result["s3_key"].endswith(".ndjson")
+        assert result["record_counts"] == {
+            "phi_access_logs": 3, "encryption_snapshots": 1, "baa_agreements": 2,
+        }
+        package = s3.upload_part.call_args.kwargs["Body"]
+        manifest = json.loads(s3.put_object.call_args.kwargs["Body"])
+        assert s3.put_object.call_args.kwargs["Key"].endswith(".manifest.json")
+        assert manifest["kms_signature"] == "sig=="
+        assert manifest["package_key"] == result["s3_key"]
+        assert verify_package(io.BytesIO(package), manifest) == []
+        mock_sign.assert_called_once_with(result["package_hash"])
+
+        insert_params = plain.execute.call_args[0][1]
+        assert insert_params[7] == 5  # PHI access logs + BAAs
+        assert insert_params[9] == result["package_hash"]
+
+    def test_parquet_export_writes_one_object_per_section(self, mock_sign):
+        conn, plain = _export_conn()
+        s3 = MagicMock()
+        s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        s3.upload_part.return_value = {"ETag": "e1"}
+
+        with patch("hipaa_compliance_collector._s3", s3):
+            result = generate_audit_export(
+                conn, CUSTOMER_ID, "2025-01-01", "2025-12-31", "Jane", "j@hhs.gov",
+                REQUEST_ID, "parquet",
+            )
+
+        # Signed manifest is the package entry point
+        assert result["s3_key"] == result["manifest_key"]
+        assert result["record_counts"] == {
+            "phi_access_logs": 3, "encryption_snapshots": 1, "baa_agreements": 2,
+        }
+        objects = {
+            c.kwargs["Key"]: c.kwargs["Body"] for c in s3.upload_part.call_args_list
+        }
+        assert len(objects) == 4
+        assert all(k.endswith(".parquet") for k in objects)
+        assert all(body.startswith(b"PAR1") for body in objects.values())
+        manifest = json.loads(s3.put_object.call_args.kwargs["Body"])
+        assert manifest["format"] == "parquet-v1"
+        assert manifest["kms_signature"] == "sig=="
+        assert verify_columnar_package(objects, manifest) == []
+        mock_sign.assert_called_once_with(result["package_hash"])
+
+    def test_failed_section_aborts_upload(self, mock_sign):
+        conn, _ = _export_conn()
+        s3 = MagicMock()
+        s3.create_multipart_upload.return_value = {"UploadId": "u1"}
+        rows = dict(EXPORT_ROWS, audit_export_baa_agreements=None)
+
+        with patch("hipaa_compliance_collector._s3", s3), \
+             patch.dict(EXPORT_ROWS, rows), \
+             pytest.raises(TypeError):
+            generate_audit_export(
+                conn, CUSTOMER_ID, "2025-01-01", "2025-12-31", "", "", REQUEST_ID, "ndjson",
+            )
+
+        s3.abort_multipart_upload.assert_called_once()
+        s3.complete_multipart_upload.assert_not_called()
+        mock_sign.assert_not_called()
+
+    def test_default_format_builds_single_json_document(self, mock_sign):
+        conn, cursor = _make_conn(fetchall_return=[{"id": 1}])
+        with patch("hipaa_compliance_collector.vault_to_s3", return_value="k.json") as vault:
+            result = generate_audit_export(
+                conn, CUSTOMER_ID, "2025-01-01", "2025-12-31", "", "", REQUEST_ID,
+            )
+
+        package = vault.call_args[0][3]
+        assert package["phi_access_logs"] == [{"id": 1}]
+        assert package["record_counts"]["baa_agreements"] == 1
+        assert result["s3_key"] == "k.json"
+        assert "manifest_key" not in result
+
+    def test_handler_rejects_unknown_format(self, mock_sign):
+        event = {
+            "httpMethod": "POST",
+            "path": "/hipaa/audit-export",
+            "body": json.dumps({
+                "customer_id": CUSTOMER_ID,
+                "period_start": "2025-01-01",
+                "period_end": "2025-12-31",
+                "format": "csv",
+            }),
+        }
+        with patch("hipaa_compliance_collector.get_db_connection"), \
+             patch("hipaa_compliance_collector.set_rls_context"):
+            response = lambda_handler(event, MagicMock(aws_request_id=REQUEST_ID))
+        assert response["statusCode"] == 400
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SCHEDULED RUN SCHEDULER
+# ══════════════════════════════════════════════════════════════════════════════
+
+CUSTOMERS = ["%08d-e29b-41d4-a716-446655440000" % i for i in range(5)]
+
+
+def _fake_collect(conn, cid, controls, request_id, batch=None):
+    return [{"control_id": c, "status": "compliant"} for c in controls]
+
+
+@patch("hipaa_compliance_collector.EVIDENCE_SIGNING_MODE", "item")
+@patch("hipaa_compliance_collector.COLLECTION_CHUNK_SIZE", 2)
+@patch("hipaa_compliance_collector.release_connection")
+@patch("hipaa_compliance_collector._record_checkpoints")
+@patch("hipaa_compliance_collector.set_rls_context")
+@patch("hipaa_compliance_collector._get_healthcare_customers", return_value=CUSTOMERS)
+class TestScheduledCollection:
+    """Test chunked, parallel and resumable scheduled collection."""
+
+    @patch("hipaa_compliance_collector._load_checkpoints", return_value=set())
+    @patch("hipaa_compliance_collector._collect_controls", side_effect=_fake_collect)
+    @patch("hipaa_compliance_collector.get_db_connection")
+    def test_each_chunk_gets_its_own_connection(
+        self, mock_conn, mock_collect, mock_load, mock_customers, mock_rls, mock_ckpt, mock_release
+    ):
+        conns = [MagicMock(name="conn%d" % i) for i in range(4)]
+        mock_conn.side_effect = conns
+        context = MagicMock(aws_request_id=REQUEST_ID, invoked_function_arn=None)
+        response = lambda_handler({"source": "aws.events", "id": "evt-1"}, context)
+
+        assert response["customers_processed"] == 5
+        assert response["run_id"] == "evt-1"
+        # Handler connection plus one per chunk of two customers
+        assert mock_conn.call_count == 4
+        chunk_conns = {c[0][0] for c in mock_collect.call_args_list}
+        assert chunk_conns == set(conns[1:])
+        for call in mock_collect.call_args_list:
+            assert call[0][2] == ALL_CONTROLS
+        for conn in conns[1:]:
+            mock_release.assert_any_call(conn)
+        assert mock_ckpt.call_count == 5
+
+    @patch("hipaa_compliance_collector._collect_controls", side_effect=_fake_collect)
+    @patch("hipaa_compliance_collector.get_db_connection")
+    def test_resumed_run_skips_checkpointed_pairs(
+        self, mock_conn, mock_collect, mock_customers, mock_rls, mock_ckpt, mock_release
+    ):
+        completed = {(cid, c) for cid in CUSTOMERS[:4] for c in ALL_CONTROLS}
+        completed.add((CUSTOMERS[4], ALL_CONTROLS[0]))
+        mock_conn.return_value = MagicMock()
+        with patch("hipaa_compliance_collector._load_checkpoints",
+                   return_value=completed) as mock_load:
+            response = lambda_handler(
+                {"source": "aws.events", "id": "evt-2", "detail": {"run_id": "run-1"}},
+                MagicMock(aws_request_id=REQUEST_ID),
+            )
+
+        mock_load.assert_called_once_with(mock_conn.return_value, "run-1")
+        assert response["customers_already_complete"] == 4
+        assert response["customers_processed"] == 1
+        mock_collect.assert_called_once()
+        assert mock_collect.call_args[0][1] == CUSTOMERS[4]
+        assert mock_collect.call_args[0][2] == ALL_CONTROLS[1:]
+
+    @patch("hipaa_compliance_collector._load_checkpoints", return_value=set())
+    @patch("hipaa_compliance_collector._collect_controls")
+    @patch("hipaa_compliance_collector.get_db_connection")
+    def test_failed_controls_are_not_checkpointed(
+        self, mock_conn, mock_collect, mock_load, mock_customers, mock_rls, mock_ckpt, mock_release
+    ):
+        mock_conn.return_value = MagicMock()
+        mock_collect.side_effect = lambda conn, cid, controls, rid, batch=None: [
+            {"control_id": "HIPAA-AS.1", "status": "compliant"},
+            {"control_id": "HIPAA-AS.2", "error": "boom"},
+            {"control_id": "HIPAA-TS.1", "status": "compliant", "vault_error": "S3"},
+        ]
+        response = lambda_handler({"source": "aws.events"}, MagicMock(aws_request_id=REQUEST_ID))
+
+        assert response["controls_failed"] == 10
+        for call in mock_ckpt.call_args_list:
+            assert call[0][3] == ["HIPAA-AS.1"]
+
+    @patch("hipaa_compliance_collector._lambda")
+    @patch("hipaa_compliance_collector._load_checkpoints", return_value=set())
+    @patch("hipaa_compliance_collector._collect_controls", side_effect=_fake_collect)
+    @patch("hipaa_compliance_collector.get_db_connection")
+    def test_run_past_deadline_defers_and_continues(
+        self, mock_conn, mock_collect, mock_load, mock_lambda,
+        mock_customers, mock_rls, mock_ckpt, mock_release
+    ):
+        mock_conn.return_value = MagicMock()
+        context = MagicMock(
+            aws_request_id=REQUEST_ID,
+            invoked_function_arn="arn:aws:lambda:us-east-1:123:function:hipaa",
+        )
+        context.get_remaining_time_in_millis.return_value = 30_000
+        event = {"source": "aws.events", "id": "evt-3", "detail": {}}
+        response = lambda_handler(event, context)
+
+        mock_collect.assert_not_called()
+        assert response["customers_deferred"] == 5
+        assert response["continued"] is True
+        payload = json.loads(mock_lambda.invoke.call_args[1]["Payload"])
+        assert payload["source"] == "aws.events"
+        assert payload["detail"] == {"run_id": "evt-3", "continuation": 1}
+
+    @patch("hipaa_compliance_collector._lambda")
+    @patch("hipaa_compliance_collector._load_checkpoints", return_value=set())
+    @patch("hipaa_compliance_collector.get_db_connection")
+    def test_continuations_are_bounded(
+        self, mock_conn, mock_load, mock_lambda, mock_customers, mock_rls, mock_ckpt, mock_release
+    ):
+        mock_conn.return_value = MagicMock()
+        context = MagicMock(aws_request_id=REQUEST_ID, invoked_function_arn="arn:fn")
+        context.get_remaining_time_in_millis.return_value = 0
+        event = {"source": "aws.events", "detail": {"run_id": "r", "continuation": 10}}
+        response = lambda_handler(event, context)
+
+        assert response["continued"] is False
+        mock_lambda.invoke.assert_not_called()
+
+    @patch("hipaa_compliance_collector._record_batch_signatures")
+    @patch("hipaa_compliance_collector._load_checkpoints", return_value=set())
+    @patch("hipaa_compliance_collector._collect_controls", side_effect=_fake_collect)
+    @patch("hipaa_compliance_collector.get_db_connection")
+    def test_merkle_mode_checkpoints_with_signatures(
+        self, mock_conn, mock_collect, mock_load, mock_record,
+        mock_customers, mock_rls, mock_ckpt, mock_release
+    ):
+        mock_conn.return_value = MagicMock()
+        with patch("hipaa_compliance_collector.EVIDENCE_SIGNING_MODE", "merkle"):
+            lambda_handler({"source": "aws.events", "id": "evt-4"},
+                           MagicMock(aws_request_id=REQUEST_ID))
+
+        mock_ckpt.assert_not_called()
+        # Each chunk commits once, after its signatures are written
+        assert mock_conn.return_value.commit.call_count == 3
+        # One signing batch per chunk, carrying that chunk's completed pairs
+        assert mock_record.call_count == 3
+        checkpointed = {}
+        for call in mock_record.call_args_list:
+            assert call[0][2] == "evt-4"
+            checkpointed.update(call[0][3])
+        assert checkpointed == {cid: ALL_CONTROLS for cid in CUSTOMERS}
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # EVIDENCE STRUCTURE
 # ══════════════════════════════════════════════════════════════════════════════
@@ -78,6 +78,9 @@ class TestAnalyticsIntegration(unittest.TestCase):
             return table_map.get(name, MagicMock())
         
         self.mock_dynamodb.Table.side_effect = get_table
+
+        # A single page of metrics; tests override Items as needed
+        self.mock_tables['metrics'].query.return_value = {'Items': []}
     
     def tearDown(self):
         """Clean up after each test"""
@@ -0,0 +1,103 @@
+"""
+Unit tests for the analytics aggregation kernel (lambda_layer metrics_kernel)
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from metrics_kernel import MetricColumns, aggregate, aggregate_rows, to_decimal
+
+ROWS = [
+    {"timestamp": "2026-03-01T00:00:00", "metric_name": "api_calls", "service": "lambda",
+     "region": "us-east-1", "value": Decimal("10"), "cost": Decimal("1.25"), "usage": Decimal("100")},
+    {"timestamp": "2026-03-01T01:00:00", "metric_name": "storage_gb", "service": "s3",
+     "region": "us-east-1", "value": Decimal("2.5"), "cost": Decimal("0.10"), "usage": Decimal("3")},
+    {"timestamp": "2026-03-01T02:00:00", "metric_name": "api_calls", "service": "lambda",
+     "region": "eu-west-1", "value": Decimal("30"), "cost": Decimal("2.75"), "usage": Decimal("300")},
+    {"timestamp": "2026-03-01T03:00:00", "metric_name": "api_calls", "service": None,
+     "value": Decimal("20")},
+    {"timestamp": "2026-03-01T04:00:00", "metric_name": "api_calls", "service": "s3",
+     "region": "us-east-1", "value": Decimal("40"), "cost": Decimal("0.40"), "usage": Decimal("7")},
+]
+
+
+class TestMetricColumns:
+
+    def test_missing_values_and_keys_get_defaults(self):
+        columns = MetricColumns.from_rows(ROWS, ("cost",), ("service", "region"), time_field="timestamp")
+
+        assert len(columns) == 5
+        assert list(columns.values["cost"]) == [1.25, 0.10, 2.75, 0.0, 0.40]
+        assert columns.keys["service"][3] == "unknown"
+        assert columns.keys["region"][3] == "unknown"
+        assert columns.timestamps[0] == "2026-03-01T00:00:00"
+
+    def test_accepts_generators(self):
+        columns = MetricColumns.from_rows((row for row in ROWS), ("usage",))
+        assert len(columns) == 5
+
+
+class TestAggregate:
+
+    def test_groups_and_totals_match_per_row_loops(self):
+        result = aggregate_rows(ROWS, ("cost", "usage"), group_by=("service", "region"))
+
+        assert result["count"] == 5
+        assert result["totals"]["cost"] == pytest.approx(4.5)
+        assert result["totals"]["usage"] == pytest.approx(410)
+        services = result["groups"]["service"]
+        # Groups keep first-seen order
+        assert list(services) == ["lambda", "s3", "unknown"]
+        assert services["lambda"] == pytest.approx({"count": 2, "cost": 4.0, "usage": 400})
+        assert services["s3"]["count"] == 2
+        assert result["groups"]["region"]["us-east-1"]["usage"] == pytest.approx(110)
+
+    def test_count_field_weights_rollup_rows(self):
+        rows = [
+            {"service": "lambda", "cost": 5, "count": 12},
+            {"service": "lambda", "cost": 1, "count": 3},
+            {"service": "s3", "cost": 2},
+        ]
+        result = aggregate_rows(rows, ("cost",), group_by=("service",), count_field="count")
+
+        assert result["count"] == 16
+        assert result["groups"]["service"]["lambda"]["count"] == 15
+
+    def test_trends_split_each_key_in_row_order(self):
+        result = aggregate_rows(ROWS, ("value",), group_by=("metric_name",), trend_by="metric_name")
+
+        calls = result["trends"]["api_calls"]
+        # api_calls samples: 10, 30 | 20, 40
+        assert calls["count"] == 4
+        assert calls["first_half_avg"] == pytest.approx(20)
+        assert calls["second_half_avg"] == pytest.approx(30)
+        assert calls["change_pct"] == pytest.approx(50)
+        assert result["trends"]["storage_gb"]["change_pct"] is None
+
+    def test_trend_key_need_not_be_grouped(self):
+        result = aggregate_rows(ROWS, ("value",), group_by=("service",), trend_by="metric_name")
+
+        assert set(result["groups"]) == {"service"}
+        assert result["trends"]["api_calls"]["count"] == 4
+
+    def test_time_range_and_empty_input(self):
+        columns = MetricColumns.from_rows(ROWS, ("value",), time_field="timestamp")
+        result = aggregate(columns)
+        assert result["first_ts"] == "2026-03-01T00:00:00"
+        assert result["last_ts"] == "2026-03-01T04:00:00"
+
+        empty = aggregate_rows([], ("value",), group_by=("service",), trend_by="service")
+        assert empty["count"] == 0
+        assert empty["totals"] == {"value": 0.0}
+        assert empty["groups"] == {"service": {}}
+        assert empty["trends"] == {}
+
+
+def test_to_decimal_drops_float_noise():
+    assert to_decimal(0.1 + 0.2) == Decimal("0.3")
+    assert to_decimal(1234.5) == Decimal("1234.5")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,275 @@
+"""
+Unit tests for the shared metrics access layer (lambda_layer metrics_store)
+"""
+
+import copy
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+import metrics_store
+from metrics_store import (
+    DAY,
+    HOUR,
+    RAW,
+    iter_query,
+    plan_range,
+    raw_sort_key,
+    raw_timestamp,
+    read_metric_summaries,
+    rebuild_rollups,
+    rollup_partition,
+    update_rollups,
+)
+
+CUSTOMER_ID = "cust-1"
+
+
+class ClientError(Exception):
+    """botocore's ClientError shape; other test modules stub botocore itself."""
+
+    def __init__(self, error_response, operation_name):
+        super().__init__(f"{error_response['Error']['Code']} on {operation_name}")
+        self.response = error_response
+
+
+@pytest.fixture(autouse=True)
+def client_error(monkeypatch):
+    # update_rollups catches metrics_store.ClientError: make it the class FakeTable raises.
+    monkeypatch.setattr(metrics_store, "ClientError", ClientError)
+
+
+class FakeTable:
+    """In-memory stand-in for the DynamoDB Table subset metrics_store uses."""
+
+    def __init__(self, page_size=25):
+        self.items = {}
+        self.page_size = page_size
+        self.queries = []
+        self.items_returned = 0
+        self.conflicts = 0
+
+    def _key(self, item):
+        return item["customer_id"], item["timestamp"]
+
+    def query(self, **kwargs):
+        self.queries.append(kwargs)
+        values = kwargs["ExpressionAttributeValues"]
+        matches = sorted(
+            (item for (pk, ts), item in self.items.items()
+             if pk == values[":pk"] and values[":start"] <= ts <= values[":end"]),
+            key=lambda item: item["timestamp"],
+        )
+        after = kwargs.get("ExclusiveStartKey")
+        if after:
+            matches = [m for m in matches if m["timestamp"] > after["timestamp"]]
+        page = matches[:self.page_size]
+        if "ProjectionExpression" in kwargs:
+            names = kwargs["ExpressionAttributeNames"]
+            wanted = [names[alias.strip()] for alias in kwargs["ProjectionExpression"].split(",")]
+            page = [{k: v for k, v in m.items() if k in wanted} for m in page]
+        self.items_returned += len(page)
+        response = {"Items": copy.deepcopy(page)}
+        if len(matches) > self.page_size:
+            response["LastEvaluatedKey"] = {
+                "customer_id": values[":pk"], "timestamp": page[-1]["timestamp"],
+            }
+        return response
+
+    def get_item(self, Key, ConsistentRead=False):
+        item = self.items.get((Key["customer_id"], Key["timestamp"]))
+        return {"Item": copy.deepcopy(item)} if item else {}
+
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeValues=None):
+        existing = self.items.get(self._key(Item))
+        if self.conflicts:
+            self.conflicts -= 1
+            ok = False
+        elif ConditionExpression == "attribute_not_exists(customer_id)":
+            ok = existing is None
+        elif ConditionExpression == "updated_through = :prev":
+            ok = existing is not None and existing["updated_through"] == ExpressionAttributeValues[":prev"]
+        else:
+            ok = True
+        if not ok:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException"}}, "PutItem")
+        self.items[self._key(Item)] = copy.deepcopy(Item)
+
+    @contextmanager
+    def batch_writer(self):
+        yield self
+
+
+def _run(table, at, api_calls, score, cost, write_raw=True, rollups=True):
+    """Write one aggregation run the way analytics_aggregator does."""
+    ts = at.isoformat()
+    metrics = [
+        {"customer_id": CUSTOMER_ID, "timestamp": ts, "metric_name": "api_calls",
+         "value": Decimal(str(api_calls)), "unit": "Count", "service": "API Gateway",
+         "metadata": {"success_rate": 99.5}},
+        {"customer_id": CUSTOMER_ID, "timestamp": ts, "metric_name": "compliance_score",
+         "value": Decimal(str(score)), "unit": "Percentage", "service": "SecurityHub",
+         "metadata": {"passed_checks": 10}},
+        {"customer_id": CUSTOMER_ID, "timestamp": ts, "metric_name": "daily_cost",
+         "value": Decimal(str(cost)), "unit": "USD", "service": "CostExplorer",
+         "metadata": {"breakdown": {"compute": 1.5, "storage": 0.25}}},
+    ]
+    if write_raw:
+        for metric in metrics:
+            row = dict(metric, timestamp=raw_sort_key(ts, metric["metric_name"]))
+            table.items[(CUSTOMER_ID, row["timestamp"])] = row
+    if rollups:
+        update_rollups(table, CUSTOMER_ID, metrics, ts)
+
+
+def _three_days(table, **kwargs):
+    start = datetime(2026, 3, 1, 0, 5)
+    for i in range(72):
+        _run(table, start + timedelta(hours=i), api_calls=i, score=50 + i % 7, cost=2, **kwargs)
+
+
+class TestPlanRange:
+
+    def test_multi_day_range_uses_days_hours_and_raw_edges(self):
+        plan = plan_range(datetime(2026, 3, 1, 22, 30), datetime(2026, 3, 4, 2, 15))
+        assert plan == [
+            (RAW, datetime(2026, 3, 1, 22, 30), datetime(2026, 3, 1, 23)),
+            (HOUR, datetime(2026, 3, 1, 23), datetime(2026, 3, 2)),
+            (DAY, datetime(2026, 3, 2), datetime(2026, 3, 4)),
+            (HOUR, datetime(2026, 3, 4), datetime(2026, 3, 4, 2)),
+            (RAW, datetime(2026, 3, 4, 2), datetime(2026, 3, 4, 2, 15, 0, 1)),
+        ]
+
+    def test_sub_hour_range_is_raw_only(self):
+        start, end = datetime(2026, 3, 1, 10, 5), datetime(2026, 3, 1, 10, 55)
+        assert plan_range(start, end) == [(RAW, start, end + timedelta(microseconds=1))]
+
+    def test_segments_are_contiguous(self):
+        start, end = datetime(2025, 3, 1, 7, 12, 3), datetime(2026, 3, 1, 7, 12, 3)
+        plan = plan_range(start, end)
+        assert plan[0][1] == start
+        assert all(a[2] == b[1] for a, b in zip(plan, plan[1:]))
+        assert sum(1 for source, _, _ in plan if source == DAY) == 1
+
+
+class TestIterQuery:
+
+    def test_stops_when_a_page_repeats_its_start_key(self):
+        class RepeatingTable:
+            calls = 0
+
+            def query(self, **kwargs):
+                self.calls += 1
+                return {"Items": [{"n": self.calls}], "LastEvaluatedKey": {"pk": "same"}}
+
+        table = RepeatingTable()
+
+        assert [item["n"] for item in iter_query(table, KeyConditionExpression="x")] == [1, 2]
+        assert table.calls == 2
+
+
+class TestRollups:
+
+    def test_runs_fold_into_hour_and_day_buckets(self):
+        table = FakeTable()
+        _run(table, datetime(2026, 3, 1, 10, 5), api_calls=10, score=80, cost=2)
+        _run(table, datetime(2026, 3, 1, 10, 35), api_calls=5, score=90, cost=3)
+
+        hour = table.items[(rollup_partition(CUSTOMER_ID, HOUR), "2026-03-01T10:00:00")]
+        day = table.items[(rollup_partition(CUSTOMER_ID, DAY), "2026-03-01T00:00:00")]
+        for item in (hour, day):
+            assert item["metrics"]["api_calls"]["sum"] == 15
+            assert item["metrics"]["api_calls"]["count"] == 2
+            assert item["metrics"]["compliance_score"]["first"] == 80
+            assert item["metrics"]["compliance_score"]["last"] == 90
+            assert item["metrics"]["daily_cost"]["breakdown"] == {
+                "compute": Decimal("3.0"), "storage": Decimal("0.50"),
+            }
+        # Rollups stay out of the service/region GSIs
+        assert "service" not in hour and "region" not in hour
+
+    def test_replayed_run_is_not_double_counted(self):
+        table = FakeTable()
+        at = datetime(2026, 3, 1, 10, 5)
+        _run(table, at, api_calls=10, score=80, cost=2)
+        _run(table, at, api_calls=10, score=80, cost=2, write_raw=False)
+
+        day = table.items[(rollup_partition(CUSTOMER_ID, DAY), "2026-03-01T00:00:00")]
+        assert day["metrics"]["api_calls"]["count"] == 1
+
+    def test_concurrent_update_is_retried(self):
+        table = FakeTable()
+        _run(table, datetime(2026, 3, 1, 10, 5), api_calls=10, score=80, cost=2)
+        table.conflicts = 1
+        _run(table, datetime(2026, 3, 1, 10, 35), api_calls=5, score=90, cost=3)
+
+        hour = table.items[(rollup_partition(CUSTOMER_ID, HOUR), "2026-03-01T10:00:00")]
+        assert hour["metrics"]["api_calls"]["sum"] == 15
+
+    def test_rebuild_matches_incremental_rollups(self):
+        incremental, rebuilt = FakeTable(), FakeTable()
+        _three_days(incremental)
+        _three_days(rebuilt, rollups=False)
+
+        written = rebuild_rollups(
+            rebuilt, CUSTOMER_ID, datetime(2026, 3, 1), datetime(2026, 3, 3, 23)
+        )
+
+        assert written == 72 + 3
+        fields = ("sum", "count", "first", "last", "breakdown", "last_metadata")
+        for key, item in incremental.items.items():
+            if "#rollup#" in key[0]:
+                for name, summary in item["metrics"].items():
+                    rebuilt_summary = rebuilt.items[key]["metrics"][name]
+                    assert {f: rebuilt_summary[f] for f in fields} == {f: summary[f] for f in fields}
+
+
+class TestReadMetricSummaries:
+
+    def test_matches_raw_rows_while_reading_fewer_items(self):
+        table = FakeTable(page_size=10)
+        _three_days(table)
+        start, end = datetime(2026, 3, 1, 6, 30), datetime(2026, 3, 3, 20, 45)
+
+        summaries = read_metric_summaries(table, CUSTOMER_ID, start, end)
+
+        raw = [
+            item for (pk, ts), item in table.items.items()
+            if pk == CUSTOMER_ID and start.isoformat() <= raw_timestamp(ts) <= end.isoformat()
+        ]
+        calls = [r for r in raw if r["metric_name"] == "api_calls"]
+        scores = sorted(
+            (r for r in raw if r["metric_name"] == "compliance_score"), key=lambda r: r["timestamp"]
+        )
+        assert summaries["api_calls"]["sum"] == sum(r["value"] for r in calls)
+        assert summaries["api_calls"]["count"] == len(calls)
+        assert summaries["compliance_score"]["first"] == scores[0]["value"]
+        assert summaries["compliance_score"]["last"] == scores[-1]["value"]
+        assert summaries["daily_cost"]["breakdown"]["compute"] == Decimal("1.5") * len(calls)
+        assert sum(p["count"] for p in summaries["api_calls"]["series"]) == len(calls)
+        assert all("#" not in p["timestamp"] for p in summaries["api_calls"]["series"])
+
+        assert table.items_returned < len(raw) / 3
+        # Projection keeps raw reads to the attributes a summary needs
+        raw_queries = [q for q in table.queries if q["ExpressionAttributeValues"][":pk"] == CUSTOMER_ID]
+        assert all("ProjectionExpression" in q for q in raw_queries)
+
+    def test_paginates_past_first_page(self):
+        table = FakeTable(page_size=2)
+        start = datetime(2026, 3, 1, 10, 1)
+        for i in range(7):
+            _run(table, start + timedelta(minutes=i), api_calls=1, score=1, cost=1, rollups=False)
+
+        summaries = read_metric_summaries(
+            table, CUSTOMER_ID, start, start + timedelta(minutes=10), ["api_calls"]
+        )
+
+        assert set(summaries) == {"api_calls"}
+        assert summaries["api_calls"]["count"] == 7
+        assert len(table.queries) == 11  # 21 rows in pages of two
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
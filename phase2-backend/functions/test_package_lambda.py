@@ -9,7 +9,16 @@ from pathlib import Path
 
 
 SCRIPT_PATH = Path(__file__).with_name("package-lambda.sh")
-FUNCTION_NAMES = ("auth_v2", "report_engine", "demo_auth", "session_management")
+FUNCTION_NAMES = (
+    "auth_v2",
+    "report_engine",
+    "demo_auth",
+    "session_management",
+    "marketplace_resolve_customer",
+    "marketplace_subscription_handler",
+    "marketplace_metering_worker",
+)
+LAYER_MODULES = ("password_hashing", "session_tokens", "db_utils")
 
 
 def _read_zip_entries(zip_path: Path) -> set[str]:
@@ -34,6 +43,12 @@ class PackageLambdaScriptTests(unittest.TestCase):
         for name in FUNCTION_NAMES:
             (self.functions_dir / f"{name}.py").write_text(f'print("{name}")\n', encoding="utf-8")
 
+        # Layer modules bundled into functions deployed without the layer
+        layer_dir = self.root / "phase2-backend" / "lambda_layer" / "python"
+        layer_dir.mkdir(parents=True)
+        for name in LAYER_MODULES:
+            (layer_dir / f"{name}.py").write_text(f"# {name}\n", encoding="utf-8")
+
     def _write_fake_docker(self):
         docker_script = self.bin_dir / "docker"
         docker_script.write_text(
@@ -202,9 +217,12 @@ class PackageLambdaScriptTests(unittest.TestCase):
         self.assertIn("jwt.py", auth_entries)
         self.assertIn("bcrypt/__init__.py", auth_entries)
         self.assertIn("boto3/__init__.py", auth_entries)
+        self.assertIn("password_hashing.py", auth_entries)
 
         session_entries = _read_zip_entries(self.deploy_dir / "session_management.zip")
         self.assertIn("session_management.py", session_entries)
+        self.assertIn("password_hashing.py", session_entries)
+        self.assertIn("session_tokens.py", session_entries)
         self.assertIn("jwt.py", session_entries)
         self.assertIn("boto3/__init__.py", session_entries)
         self.assertNotIn("bcrypt/__init__.py", session_entries)
@@ -213,6 +231,10 @@ class PackageLambdaScriptTests(unittest.TestCase):
         self.assertIn("report_engine.py", report_entries)
         self.assertIn("boto3/__init__.py", report_entries)
         self.assertNotIn("jwt.py", report_entries)
+        self.assertNotIn("password_hashing.py", report_entries)
+
+        marketplace_entries = _read_zip_entries(self.deploy_dir / "marketplace_metering_worker.zip")
+        self.assertIn("db_utils.py", marketplace_entries)
 
         self.assertIn("--entrypoint /bin/bash", install_log)
         self.assertIn("public.ecr.aws/lambda/python:3.11", install_log)
@@ -271,6 +293,7 @@ class PackageLambdaScriptTests(unittest.TestCase):
         )
 
         self.assertTrue((self.deploy_dir / "session_management.zip").exists())
+        self.assertIn("session_tokens.py", _read_zip_entries(self.deploy_dir / "session_management.zip"))
         self.assertIn("lambda list-functions", aws_log)
         self.assertIn(
             "s3 cp ",
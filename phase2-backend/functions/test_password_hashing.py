@@ -0,0 +1,165 @@
+"""
+Unit tests for off-connection password hashing (lambda_layer password_hashing)
+and the session_management login flow built on it
+"""
+
+import json
+import threading
+from unittest.mock import MagicMock
+
+import bcrypt
+import pytest
+
+import password_hashing
+import session_management
+from password_hashing import (
+    PasswordHashBusy, hash_password, hash_rounds, needs_rehash, rehash_if_needed, verify_password,
+)
+
+
+@pytest.fixture(autouse=True)
+def low_cost(monkeypatch):
+    monkeypatch.setattr(password_hashing, "BCRYPT_ROUNDS", 4)
+    # password_hashing may first have been imported under another test module's bcrypt stub.
+    monkeypatch.setattr(password_hashing, "bcrypt", bcrypt)
+
+
+class TestPasswordHashing:
+
+    def test_hash_and_verify(self):
+        hashed = hash_password("s3cret!")
+        assert hash_rounds(hashed) == 4
+        assert verify_password("s3cret!", hashed)
+        assert not verify_password("wrong", hashed)
+
+    def test_malformed_or_missing_hash_never_matches(self):
+        assert not verify_password("x", "")
+        assert not verify_password("x", "not-a-bcrypt-hash")
+
+    def test_rehash_only_when_cost_differs(self):
+        current = hash_password("pw")
+        older = bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=5)).decode()
+
+        assert not needs_rehash(current)
+        assert rehash_if_needed("pw", current) is None
+        upgraded = rehash_if_needed("pw", older)
+        assert hash_rounds(upgraded) == 4
+        assert verify_password("pw", upgraded)
+
+    def test_busy_when_no_slot_frees_up(self, monkeypatch):
+        monkeypatch.setattr(password_hashing, "_slots", threading.BoundedSemaphore(1))
+        monkeypatch.setattr(password_hashing, "PASSWORD_HASH_QUEUE_SECONDS", 0.01)
+        password_hashing._slots.acquire()
+        try:
+            with pytest.raises(PasswordHashBusy):
+                hash_password("pw")
+        finally:
+            password_hashing._slots.release()
+
+
+class FakePool:
+    """get_connection/release_connection pair that records connection use."""
+
+    def __init__(self, user_row):
+        self.user_row = user_row
+        self.in_use = 0
+        self.checked_out = 0
+        self.statements = []
+        self.failed_attempts = user_row[9] or 0
+
+    def get_connection(self):
+        self.in_use += 1
+        self.checked_out += 1
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+
+        def execute(sql, params=None):
+            self.statements.append(" ".join(sql.split()))
+            if "FROM users u" in sql:
+                cursor.fetchone.return_value = self.user_row
+            elif "failed_login_attempts = COALESCE" in sql:
+                self.failed_attempts += 1
+                cursor.fetchone.return_value = (self.failed_attempts,)
+
+        cursor.execute.side_effect = execute
+        return conn
+
+    def release_connection(self, conn):
+        self.in_use -= 1
+
+
+def _user_row(password_hash, failed=0):
+    return ("user-1", "cust-1", password_hash, "active", False, None, "admin",
+            "a@example.com", "Ana", failed, None)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    def install(row):
+        fake = FakePool(row)
+        monkeypatch.setattr(session_management, "get_connection", fake.get_connection)
+        monkeypatch.setattr(session_management, "release_connection", fake.release_connection)
+        monkeypatch.setattr(session_management, "generate_csrf_token", lambda token: "csrf")
+        monkeypatch.setenv("JWT_SECRET", "test-jwt-secret-with-at-least-32-bytes")
+        return fake
+    return install
+
+
+def _login(password):
+    return session_management.login({"email": "a@example.com", "password": password}, "10.0.0.1", "ua", {})
+
+
+class TestLoginFlow:
+
+    def test_no_connection_is_held_while_hashing(self, pool, monkeypatch):
+        fake = pool(_user_row(hash_password("pw")))
+        seen = []
+
+        def spy(password, password_hash):
+            seen.append(fake.in_use)
+            return True
+
+        monkeypatch.setattr(session_management, "verify_password", spy)
+
+        response = _login("pw")
+
+        assert response["statusCode"] == 200
+        assert seen == [0]
+        assert fake.checked_out == 2
+        assert fake.in_use == 0
+
+    def test_outdated_cost_is_rehashed_on_login(self, pool):
+        old_hash = bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=5)).decode()
+        fake = pool(_user_row(old_hash))
+
+        assert _login("pw")["statusCode"] == 200
+
+        rehash = [s for s in fake.statements if s.startswith("UPDATE users SET password_hash")]
+        assert rehash == ["UPDATE users SET password_hash = %s WHERE id = %s AND password_hash = %s"]
+
+    def test_failed_attempts_are_incremented_in_the_database(self, pool):
+        fake = pool(_user_row(hash_password("pw"), failed=3))
+
+        first = _login("wrong")
+        second = _login("wrong")
+
+        assert first["statusCode"] == 401
+        assert "1 attempts remaining" in json.loads(first["body"])["error"]
+        assert second["statusCode"] == 423
+        assert fake.in_use == 0
+
+    def test_busy_hashing_sheds_load(self, pool, monkeypatch):
+        fake = pool(_user_row(hash_password("pw")))
+
+        def busy(*args):
+            raise PasswordHashBusy()
+
+        monkeypatch.setattr(session_management, "verify_password", busy)
+
+        assert _login("pw")["statusCode"] == 503
+        assert fake.checked_out == 1
+        assert fake.in_use == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
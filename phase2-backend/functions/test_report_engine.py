@@ -4,9 +4,10 @@ Phase 4: Advanced Analytics & Reporting
 
 Tests cover:
 - Analytics query execution
-- Export format generation (CSV, JSON, PDF, Excel)
+- Export format generation (CSV, JSON, PDF, Excel, Parquet)
 - Report CRUD operations
 - Caching behavior
+- Asynchronous exports (S3 delivery, request-hash dedup)
 - Error handling
 - Performance validation
 
@@ -82,11 +83,31 @@ class TestReportEngineLambda(unittest.TestCase):
             'test-metrics': self.mock_metrics_table,
             'test-cache': self.mock_cache_table,
         }.get(name, MagicMock())
+        
+        # Metrics and cache tables are bound at import time
+        self.mock_metrics_table.query.return_value = {'Items': []}
+        self.mock_cache_table.get_item.return_value = {}
+        self.patcher_metrics_table = patch('report_engine.metrics_table', self.mock_metrics_table)
+        self.patcher_cache_table = patch.object(report_engine.analytics_cache, 'table', self.mock_cache_table)
+        self.patcher_metrics_table.start()
+        self.patcher_cache_table.start()
+        # Warm-container cache tier must not leak between tests
+        report_engine.analytics_cache.local.clear()
     
     def tearDown(self):
         """Clean up after tests"""
         self.patcher_dynamodb.stop()
         self.patcher_s3.stop()
+        self.patcher_metrics_table.stop()
+        self.patcher_cache_table.stop()
+    
+    def mock_raw_metrics(self, rows):
+        """Serve ``rows`` as the current partial hour's raw metrics; rollups are empty"""
+        def query(**kwargs):
+            values = kwargs['ExpressionAttributeValues']
+            current_hour = values[':start'].endswith(':00:00')
+            return {'Items': rows if current_hour and '#rollup#' not in values[':pk'] else []}
+        self.mock_metrics_table.query.side_effect = query
     
     def create_test_event(self, method='GET', path='/analytics', body=None, query_params=None):
         """Helper to create Lambda test events"""
@@ -123,12 +144,12 @@ class TestReportEngineLambda(unittest.TestCase):
     def test_get_analytics_success(self):
         """Test successful analytics query"""
         # Mock DynamoDB response
-        self.mock_metrics_table.query.return_value = {
-            'Items': [
-                {'timestamp': '2024-01-15', 'service': 'EC2', 'cost': Decimal('100.50')},
-                {'timestamp': '2024-01-16', 'service': 'S3', 'cost': Decimal('25.75')},
-            ]
-        }
+        self.mock_raw_metrics([
+            {'timestamp': '2024-01-15', 'metric_name': 'daily_cost', 'service': 'EC2',
+             'unit': 'USD', 'value': Decimal('100.50')},
+            {'timestamp': '2024-01-16', 'metric_name': 'storage_gb', 'service': 'S3',
+             'unit': 'Gigabytes', 'value': Decimal('25.75')},
+        ])
         
         event = self.create_test_event(
             path='/analytics',
@@ -172,12 +193,12 @@ class TestReportEngineLambda(unittest.TestCase):
     
     def test_get_cost_breakdown(self):
         """Test cost breakdown by dimension"""
-        self.mock_metrics_table.query.return_value = {
-            'Items': [
-                {'service': 'EC2', 'cost': Decimal('500')},
-                {'service': 'S3', 'cost': Decimal('100')},
-            ]
-        }
+        self.mock_raw_metrics([
+            {'timestamp': '2024-01-15', 'metric_name': 'daily_cost', 'service': 'EC2',
+             'unit': 'USD', 'value': Decimal('500')},
+            {'timestamp': '2024-01-16', 'metric_name': 'daily_cost', 'service': 'EC2',
+             'unit': 'USD', 'value': Decimal('100')},
+        ])
         
         event = self.create_test_event(
             path='/analytics/cost-breakdown',
@@ -186,6 +207,57 @@ class TestReportEngineLambda(unittest.TestCase):
         
         response = report_engine.lambda_handler(event, None)
         self.assertEqual(response['statusCode'], 200)
+        body = json.loads(response['body'])
+        self.assertEqual(body['breakdown'], [{'dimension': 'EC2', 'cost': 600.0, 'count': 2}])
+    
+    def test_query_metrics_reads_rollups_and_partial_hours(self):
+        """Test 30d ranges are served from rollups, raw rows only at the edges"""
+        def query(**kwargs):
+            partition = kwargs['ExpressionAttributeValues'][':pk']
+            if partition.endswith('#rollup#day'):
+                # Two pages of daily rollups
+                if 'ExclusiveStartKey' not in kwargs:
+                    return {
+                        'Items': [{'timestamp': '2024-01-01T00:00:00', 'metrics': {
+                            'api_calls': {'sum': Decimal('100'), 'count': 24, 'unit': 'Count',
+                                          'service': 'API Gateway', 'last_ts': '2024-01-01T23:00:00'},
+                        }}],
+                        'LastEvaluatedKey': {'customer_id': partition, 'timestamp': '2024-01-01T00:00:00'},
+                    }
+                return {'Items': [{'timestamp': '2024-01-02T00:00:00', 'metrics': {
+                    'api_calls': {'sum': Decimal('50'), 'count': 24, 'unit': 'Count',
+                                  'service': 'API Gateway', 'last_ts': '2024-01-02T23:00:00'},
+                }}]}
+            if partition.endswith('#rollup#hour'):
+                return {'Items': []}
+            row = {'timestamp': '2024-01-03T00:00:01', 'metric_name': 'api_calls',
+                   'value': Decimal('5'), 'unit': 'Count', 'service': 'API Gateway'}
+            values = kwargs['ExpressionAttributeValues']
+            in_range = values[':start'] <= row['timestamp'] <= values[':end']
+            return {'Items': [row] if in_range else []}
+        self.mock_metrics_table.query.side_effect = query
+        
+        start = datetime(2023, 12, 31, 22, 30)
+        end = datetime(2024, 1, 3, 0, 30)
+        rows = report_engine.query_metrics(self.customer_id, start, end)
+        
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['usage'], Decimal('155'))
+        self.assertEqual(rows[0]['count'], 49)
+        partitions = [
+            c.kwargs['ExpressionAttributeValues'][':pk']
+            for c in self.mock_metrics_table.query.call_args_list
+        ]
+        # raw start edge, hourly to midnight, two daily pages, raw end edge
+        self.assertEqual(partitions, [
+            self.customer_id,
+            f'{self.customer_id}#rollup#hour',
+            f'{self.customer_id}#rollup#day',
+            f'{self.customer_id}#rollup#day',
+            self.customer_id,
+        ])
+        projection = self.mock_metrics_table.query.call_args_list[0].kwargs['ProjectionExpression']
+        self.assertNotIn('cost', projection)
     
     # ===== Export Format Tests =====
     
@@ -282,6 +354,30 @@ class TestReportEngineLambda(unittest.TestCase):
         self.assertIn('excel', response['headers']['Content-Type'].lower())
         self.assertTrue(response.get('isBase64Encoded', False))
     
+    def test_export_parquet_format(self):
+        """Test Parquet export generation"""
+        test_data = [
+            {'service': 'EC2', 'cost': 100.50, 'region': 'us-east-1'},
+            {'service': 'S3', 'cost': 25.75, 'region': 'us-east-1'},
+        ]
+        
+        event = self.create_test_event(
+            method='POST',
+            path='/analytics/export',
+            body={'format': 'parquet', 'data': test_data, 'reportName': 'Test Report'}
+        )
+        
+        response = report_engine.lambda_handler(event, None)
+        
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(response['headers']['Content-Type'], 'application/vnd.apache.parquet')
+        self.assertTrue(response.get('isBase64Encoded', False))
+        
+        # Parquet files start and end with the PAR1 magic
+        parquet_bytes = base64.b64decode(response['body'])
+        self.assertTrue(parquet_bytes.startswith(b'PAR1'))
+        self.assertTrue(parquet_bytes.endswith(b'PAR1'))
+    
     def test_export_unsupported_format(self):
         """Test export with unsupported format returns error"""
         event = self.create_test_event(
@@ -408,8 +504,9 @@ class TestReportEngineLambda(unittest.TestCase):
         self.mock_cache_table.get_item.return_value = {
             'Item': {
                 'cache_key': 'analytics:test-customer-123:30d:service',
-                'data': json.dumps(cached_data),
+                'data': cached_data,
                 'created_at': datetime.utcnow().isoformat(),
+                'ttl': int(datetime.utcnow().timestamp()) + 3600,
             }
         }
         
@@ -485,10 +582,11 @@ class TestReportEngineLambda(unittest.TestCase):
         """Test that query execution meets performance requirements (<5s)"""
         import time
         
-        self.mock_metrics_table.query.return_value = {
-            'Items': [{'service': f'Service-{i}', 'cost': Decimal(str(i * 10))} 
-                     for i in range(100)]
-        }
+        self.mock_raw_metrics([
+            {'timestamp': f'2024-01-01T00:{i // 60:02d}:{i % 60:02d}', 'metric_name': f'metric_{i}',
+             'service': f'Service-{i}', 'unit': 'USD', 'value': Decimal(str(i * 10))}
+            for i in range(100)
+        ])
         
         event = self.create_test_event(path='/analytics')
         
@@ -545,6 +643,225 @@ class TestHelperFunctions(unittest.TestCase):
         self.assertEqual(body['key'], 'value')
 
 
+class FakeExportS3:
+    """In-memory S3 subset used by asynchronous exports."""
+    
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.put_calls = 0
+    
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.put_calls += 1
+        self.objects[Key] = Body if isinstance(Body, bytes) else Body.encode('utf-8')
+    
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.objects[Key])}
+    
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise Exception('404 Not Found')
+        return {'ContentLength': len(self.objects[Key])}
+    
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.uploads[Key] = []
+        return {'UploadId': Key}
+    
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.uploads[Key].append(Body)
+        return {'ETag': str(PartNumber)}
+    
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.objects[Key] = b''.join(self.uploads.pop(Key))
+    
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.uploads.pop(Key, None)
+    
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}.s3.amazonaws.com/{Params['Key']}?X-Amz-Expires={ExpiresIn}"
+
+
+class FakeJobsTable:
+    """In-memory export jobs table."""
+    
+    def __init__(self):
+        self.items = {}
+    
+    def get_item(self, Key):
+        item = self.items.get((Key['customer_id'], Key['job_id']))
+        return {'Item': dict(item)} if item else {}
+    
+    def put_item(self, Item, ConditionExpression=None, ExpressionAttributeNames=None,
+                 ExpressionAttributeValues=None):
+        existing = self.items.get((Item['customer_id'], Item['job_id']))
+        if ConditionExpression and existing and not (
+            existing['updated_at'] < ExpressionAttributeValues[':stale']
+            or existing['status'] in ('complete', 'failed')
+        ):
+            error = Exception('ConditionalCheckFailedException')
+            error.response = {'Error': {'Code': 'ConditionalCheckFailedException'}}
+            raise error
+        self.items[(Item['customer_id'], Item['job_id'])] = dict(Item)
+    
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        item = self.items[(Key['customer_id'], Key['job_id'])]
+        for assignment in UpdateExpression[len('SET '):].split(', '):
+            name, value = assignment.split(' = ')
+            item[ExpressionAttributeNames[name]] = ExpressionAttributeValues[value]
+
+
+class TestAsyncExport(unittest.TestCase):
+    """POST /analytics/export with async=true, the worker, and GET /analytics/export/{jobId}"""
+    
+    ROWS = [
+        {'service': 'EC2', 'cost': 100.5, 'region': 'us-east-1'},
+        {'service': 'S3', 'cost': 25.75, 'region': 'us-west-2'},
+    ]
+    
+    def setUp(self):
+        self.customer_id = 'test-customer-123'
+        self.s3 = FakeExportS3()
+        self.jobs = FakeJobsTable()
+        self.lambda_client = MagicMock()
+        self.patchers = [
+            patch('report_engine.s3', self.s3),
+            patch('report_engine.export_jobs_table', self.jobs),
+            patch('report_engine.lambda_client', self.lambda_client),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+    
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+    
+    def request(self, method, path, body=None, job_id=None):
+        return report_engine.lambda_handler({
+            'httpMethod': method,
+            'path': path,
+            'body': json.dumps(body) if body else None,
+            'queryStringParameters': {},
+            'pathParameters': {'jobId': job_id} if job_id else {},
+            'requestContext': {'authorizer': {'customerId': self.customer_id}},
+        }, None)
+    
+    def start(self, fmt='csv', rows=None):
+        response = self.request('POST', '/analytics/export', {
+            'format': fmt, 'data': rows or self.ROWS, 'name': 'costs', 'async': True,
+        })
+        return response, json.loads(response['body'])
+    
+    def run_worker(self):
+        """Deliver the queued asynchronous invocations to the worker"""
+        for call in self.lambda_client.invoke.call_args_list:
+            self.assertEqual(call.kwargs['InvocationType'], 'Event')
+            report_engine.lambda_handler(json.loads(call.kwargs['Payload']), None)
+        self.lambda_client.invoke.reset_mock()
+    
+    def test_post_returns_job_and_worker_delivers_presigned_url(self):
+        response, job = self.start()
+        
+        self.assertEqual(response['statusCode'], 202)
+        self.assertEqual(job['status'], 'pending')
+        self.assertNotIn('url', job)
+        
+        self.run_worker()
+        status = self.request('GET', f"/analytics/export/{job['jobId']}", job_id=job['jobId'])
+        body = json.loads(status['body'])
+        
+        self.assertEqual(status['statusCode'], 200)
+        self.assertEqual(body['status'], 'complete')
+        self.assertIn('X-Amz-Expires', body['url'])
+        self.assertEqual(body['filename'], 'costs.csv')
+        key = self.jobs.items[(self.customer_id, job['jobId'])]['s3_key']
+        lines = self.s3.objects[key].decode().splitlines()
+        self.assertEqual(lines[0], 'service,cost,region')
+        self.assertEqual(len(lines), 3)
+    
+    def test_presigned_filename_is_quoted(self):
+        response = self.request('POST', '/analytics/export', {
+            'format': 'csv', 'data': self.ROWS, 'name': 'q4"; x="y\r\nrépo', 'async': True,
+        })
+        job = json.loads(response['body'])
+        self.run_worker()
+
+        with patch.object(self.s3, 'generate_presigned_url',
+                          wraps=self.s3.generate_presigned_url) as presign:
+            self.request('GET', f"/analytics/export/{job['jobId']}", job_id=job['jobId'])
+
+        disposition = presign.call_args.kwargs['Params']['ResponseContentDisposition']
+        self.assertEqual(
+            disposition,
+            "attachment; filename=\"q4_; x=_y__r_po.csv\"; "
+            "filename*=UTF-8''q4%22%3B%20x%3D%22y%0D%0Ar%C3%A9po.csv",
+        )
+
+    def test_identical_request_is_served_from_existing_object(self):
+        _, first = self.start()
+        self.run_worker()
+        
+        response, second = self.start()
+        
+        self.assertEqual(response['statusCode'], 200)
+        self.assertEqual(second['jobId'], first['jobId'])
+        self.assertEqual(second['status'], 'complete')
+        self.lambda_client.invoke.assert_not_called()
+    
+    def test_pending_job_is_not_enqueued_twice(self):
+        _, first = self.start()
+        response, second = self.start()
+        
+        self.assertEqual(response['statusCode'], 202)
+        self.assertEqual(second['jobId'], first['jobId'])
+        self.assertEqual(self.lambda_client.invoke.call_count, 1)
+    
+    def test_expired_object_is_rendered_again(self):
+        _, job = self.start()
+        self.run_worker()
+        del self.s3.objects[self.jobs.items[(self.customer_id, job['jobId'])]['s3_key']]
+        
+        response, again = self.start()
+        
+        self.assertEqual(response['statusCode'], 202)
+        self.assertEqual(again['status'], 'pending')
+        self.assertEqual(self.lambda_client.invoke.call_count, 1)
+    
+    def test_different_request_gets_a_new_job(self):
+        _, first = self.start()
+        _, second = self.start(fmt='json')
+        self.assertNotEqual(first['jobId'], second['jobId'])
+    
+    def test_json_and_parquet_stream_to_s3(self):
+        _, json_job = self.start(fmt='json')
+        _, parquet_job = self.start(fmt='parquet')
+        self.run_worker()
+        
+        json_item = self.jobs.items[(self.customer_id, json_job['jobId'])]
+        self.assertEqual(json.loads(self.s3.objects[json_item['s3_key']]), self.ROWS)
+        parquet_item = self.jobs.items[(self.customer_id, parquet_job['jobId'])]
+        self.assertTrue(self.s3.objects[parquet_item['s3_key']].startswith(b'PAR1'))
+        self.assertEqual(parquet_item['content_type'], 'application/vnd.apache.parquet')
+    
+    def test_worker_failure_is_recorded(self):
+        _, job = self.start()
+        self.s3.objects.clear()  # request payload lost
+        self.run_worker()
+        
+        body = json.loads(self.request('GET', f"/analytics/export/{job['jobId']}", job_id=job['jobId'])['body'])
+        self.assertEqual(body['status'], 'failed')
+        self.assertTrue(body['error'])
+    
+    def test_validation_and_unknown_job(self):
+        response, _ = self.start(fmt='xml')
+        self.assertEqual(response['statusCode'], 400)
+        
+        response = self.request('POST', '/analytics/export', {'format': 'csv', 'data': [], 'async': True})
+        self.assertEqual(response['statusCode'], 400)
+        
+        response = self.request('GET', '/analytics/export/exp_missing', job_id='exp_missing')
+        self.assertEqual(response['statusCode'], 404)
+
+
 if __name__ == '__main__':
     # Run tests with verbose output
     unittest.main(verbosity=2)
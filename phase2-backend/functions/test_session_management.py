@@ -66,7 +66,7 @@ class TestSessionManagement(unittest.TestCase):
 
     @patch('session_management.get_connection')
     @patch('session_management.query_one')
-    @patch('session_management.bcrypt.checkpw')
+    @patch('session_management.verify_password')
     @patch('session_management.jwt.encode')
     @patch('session_management.execute_query')
     def test_login_success_without_mfa(self, mock_execute, mock_jwt, mock_checkpw, 
@@ -105,7 +105,7 @@ class TestSessionManagement(unittest.TestCase):
 
     @patch('session_management.get_connection')
     @patch('session_management.query_one')
-    @patch('session_management.bcrypt.checkpw')
+    @patch('session_management.verify_password')
     def test_login_success_with_mfa_required(self, mock_checkpw, mock_query_one, mock_get_conn):
         """Test login requires MFA when enabled"""
         mock_conn = MagicMock()
@@ -149,7 +149,7 @@ class TestSessionManagement(unittest.TestCase):
         }
         
         # Mock bcrypt to return False
-        with patch('session_management.bcrypt.checkpw', return_value=False):
+        with patch('session_management.verify_password', return_value=False):
             from session_management import lambda_handler
             
             response = lambda_handler(self.login_event, None)
@@ -195,7 +195,7 @@ class TestSessionManagement(unittest.TestCase):
 
     @patch('session_management.get_connection')
     @patch('session_management.query_one')
-    @patch('session_management.bcrypt.checkpw')
+    @patch('session_management.verify_password')
     @patch('session_management.execute_query')
     def test_login_increments_failed_attempts(self, mock_execute, mock_checkpw, 
                                               mock_query_one, mock_get_conn):
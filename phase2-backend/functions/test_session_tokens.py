@@ -0,0 +1,279 @@
+"""
+Unit tests for signed session tokens, the revocation filter (lambda_layer
+session_tokens) and stateless validation in session_management
+"""
+
+import hashlib
+import json
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import jwt
+import pytest
+
+import session_management
+import session_tokens
+from session_tokens import (
+    WATERMARK_OVERLAP, BloomFilter, RevocationFilter, looks_signed, sign_session_token, verify_session_token,
+)
+
+SECRET = "test-jwt-secret-with-at-least-32-bytes"
+CLAIMS = {"sid": "sess-1", "sub": "user-1", "cid": "cust-1", "role": "analyst",
+          "email": "a@example.com", "name": "Ana", "mfa": True}
+
+
+@pytest.fixture(autouse=True)
+def real_jwt(monkeypatch):
+    # Both modules may first have been imported under another test module's jwt stub.
+    monkeypatch.setattr(session_tokens, "jwt", jwt)
+    monkeypatch.setattr(session_management, "jwt", jwt)
+
+
+def _token(expires_in=3600, **claims):
+    return sign_session_token(SECRET, {**CLAIMS, **claims}, datetime.utcnow() + timedelta(seconds=expires_in))
+
+
+def _hash(token):
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TestSessionTokens:
+
+    def test_round_trip(self):
+        token = _token()
+        assert looks_signed(token)
+        claims = verify_session_token(SECRET, token)
+        assert claims["sub"] == "user-1"
+        assert claims["typ"] == "session"
+
+    def test_expired_tampered_and_pre_auth_tokens_are_rejected(self):
+        with pytest.raises(jwt.ExpiredSignatureError):
+            verify_session_token(SECRET, _token(expires_in=-10))
+        with pytest.raises(jwt.InvalidTokenError):
+            verify_session_token("other-secret", _token())
+        # MFA pre-auth tokens are signed with the raw secret
+        pre_auth = jwt.encode({**CLAIMS, "typ": "session", "iat": datetime.utcnow(),
+                               "exp": datetime.utcnow() + timedelta(minutes=5)}, SECRET, algorithm="HS256")
+        with pytest.raises(jwt.InvalidTokenError):
+            verify_session_token(SECRET, pre_auth)
+
+    def test_legacy_opaque_tokens_are_not_signed(self):
+        assert not looks_signed("Zm9vYmFyYmF6cXV4LV9mb29iYXJiYXpxdXhfZm9vYmFy")
+
+
+class TestBloomFilter:
+
+    def test_no_false_negatives_and_low_false_positive_rate(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.001)
+        members = [_hash(f"revoked-{i}") for i in range(5000)]
+        for member in members:
+            bloom.add(member)
+
+        assert all(member in bloom for member in members)
+        false_positives = sum(_hash(f"live-{i}") in bloom for i in range(20000))
+        assert false_positives / 20000 < 0.005
+        assert len(bloom.bits) < 10 * 1024
+
+    def test_re_adding_does_not_inflate_count(self):
+        bloom = BloomFilter(capacity=100)
+        assert bloom.add("a") is True
+        assert bloom.add("a") is False
+        assert bloom.count == 1
+
+
+class TestRevocationFilter:
+
+    def test_first_refresh_loads_all_then_reads_incrementally(self):
+        clock = {"now": 0.0}
+        revocations = RevocationFilter(refresh_seconds=15, clock=lambda: clock["now"])
+        cursor = MagicMock()
+        logged_out = datetime(2026, 10, 17, 12, 0, 0)
+        cursor.fetchall.return_value = [("h1", logged_out), ("h2", logged_out - timedelta(seconds=5))]
+
+        assert revocations.is_due() and not revocations.loaded
+        assert revocations.refresh(cursor) == 2
+        assert "%s" not in cursor.execute.call_args[0][0]
+        assert revocations.might_be_revoked("h1") and not revocations.might_be_revoked("h3")
+        assert revocations.watermark == logged_out
+
+        clock["now"] = 10
+        assert not revocations.is_due()
+        clock["now"] = 15
+        cursor.fetchall.return_value = [("h3", logged_out + timedelta(seconds=20))]
+        revocations.refresh(cursor)
+
+        assert cursor.execute.call_args[0][1] == (logged_out - WATERMARK_OVERLAP,)
+        assert revocations.might_be_revoked("h3")
+        assert revocations.watermark == logged_out + timedelta(seconds=20)
+
+    def test_empty_table_starts_watermark_at_database_time(self):
+        revocations = RevocationFilter()
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+        now = datetime(2026, 10, 17, 12, 0, 0)
+        cursor.fetchone.return_value = (now,)
+
+        revocations.refresh(cursor)
+
+        assert revocations.watermark == now
+        assert revocations.loaded
+
+    def test_rebuilds_when_full(self):
+        revocations = RevocationFilter(capacity=2)
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [("h1", datetime(2026, 1, 1)), ("h2", datetime(2026, 1, 1))]
+        revocations.refresh(cursor)
+        assert revocations.filter.count == 2
+
+        cursor.fetchall.return_value = [("h2", datetime(2026, 1, 1))]
+        revocations.refresh(cursor)
+
+        # Full reload: the watermark-free query ran again and h1 (expired meanwhile) is gone
+        assert "%s" not in cursor.execute.call_args_list[-1][0][0]
+        assert not revocations.might_be_revoked("h1")
+
+
+class FakeDatabase:
+    """get_connection stand-in recording statements and answering session reads."""
+
+    def __init__(self):
+        self.connections = 0
+        self.revoked_rows = []
+        self.session_row = None
+        self.flushed = []
+
+    def get_connection(self):
+        self.connections += 1
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+
+        def execute(sql, params=None):
+            if "LOCALTIMESTAMP" in sql:
+                cursor.fetchone.return_value = (datetime.utcnow(),)
+            elif "session_token_hash = %s" in sql:
+                cursor.fetchone.return_value = self.session_row
+            cursor.fetchall.return_value = self.revoked_rows
+
+        cursor.execute.side_effect = execute
+        return conn
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    db = FakeDatabase()
+    clock = {"now": 0.0}
+    monkeypatch.setenv("JWT_SECRET", SECRET)
+    monkeypatch.setattr(session_management, "STATELESS_SESSIONS", True)
+    monkeypatch.setattr(session_management, "get_connection", db.get_connection)
+    monkeypatch.setattr(session_management, "release_connection", lambda conn: None)
+    monkeypatch.setattr(session_management, "revocations", RevocationFilter(clock=lambda: clock["now"]))
+    monkeypatch.setattr(
+        session_management, "execute_values", lambda cur, sql, rows: db.flushed.append([h for h, _ in rows])
+    )
+    session_management._activity_pending.clear()
+    return db, clock
+
+
+def _get(token):
+    return session_management.get_session_info(f"Bearer {token}", {"headers": {}})
+
+
+class TestStatelessValidation:
+
+    def test_valid_token_is_served_from_claims(self, sessions):
+        db, clock = sessions
+        token = _token()
+
+        first = _get(token)
+        for _ in range(20):
+            clock["now"] += 0.5
+            assert _get(token)["statusCode"] == 200
+
+        body = json.loads(first["body"])
+        assert first["statusCode"] == 200
+        assert body["session_id"] == "sess-1"
+        assert body["user"]["role"] == "analyst"
+        assert body["mfa_verified"] is True
+        # One connection for the initial revocation load, none per request
+        assert db.connections == 1
+        assert db.flushed == []
+
+    def test_activity_is_flushed_in_one_batch_on_refresh(self, sessions):
+        db, clock = sessions
+        tokens = [_token(sid=f"sess-{i}") for i in range(3)]
+        for token in tokens:
+            _get(token)
+            _get(token)
+
+        clock["now"] += session_management.SESSION_REVOCATION_REFRESH_SECONDS
+        _get(tokens[0])
+
+        assert db.connections == 2
+        assert sorted(db.flushed[0]) == sorted(_hash(t) for t in tokens)
+        assert list(session_management._activity_pending) == [_hash(tokens[0])]
+
+    def test_revoked_token_falls_back_to_database(self, sessions):
+        db, clock = sessions
+        token = _token()
+        db.revoked_rows = [(_hash(token), datetime.utcnow())]
+        db.session_row = ("sess-1", "user-1", "cust-1", False, datetime.utcnow() + timedelta(hours=1),
+                          True, None, datetime.utcnow(), "a@example.com", "Ana", "analyst", "active")
+
+        response = _get(token)
+
+        assert response["statusCode"] == 401
+        assert json.loads(response["body"])["error"] == "Session is no longer active"
+
+    def test_logout_in_this_container_is_seen_immediately(self, sessions):
+        db, _ = sessions
+        token = _token()
+        assert _get(token)["statusCode"] == 200
+
+        session_management.logout({"session_token": token}, {"headers": {}})
+        db.session_row = None
+
+        assert _get(token)["statusCode"] == 401
+
+    def test_cold_filter_refresh_failure_uses_database(self, sessions, monkeypatch):
+        db, _ = sessions
+        calls = []
+
+        def failing_connection():
+            calls.append(1)
+            if len(calls) == 1:
+                raise Exception("db unavailable")
+            return db.get_connection()
+
+        monkeypatch.setattr(session_management, "get_connection", failing_connection)
+        db.session_row = None
+
+        assert _get(_token())["statusCode"] == 401
+        assert len(calls) == 2
+
+    def test_expired_and_pre_auth_tokens_are_rejected_locally(self, sessions):
+        db, _ = sessions
+        pre_auth = jwt.encode({"user_id": "user-1", "customer_id": "cust-1", "email": "a@example.com",
+                               "exp": datetime.utcnow() + timedelta(minutes=5)}, SECRET, algorithm="HS256")
+
+        assert json.loads(_get(_token(expires_in=-1))["body"])["error"] == "Session expired"
+        assert _get(pre_auth)["statusCode"] == 401
+        assert db.connections == 0
+
+    def test_create_session_issues_signed_token_for_the_inserted_row(self, sessions):
+        cursor = MagicMock()
+
+        token, _, expires_at = session_management.create_session(
+            cursor, "user-1", "cust-1", "admin", "a@example.com", "10.0.0.1", "ua",
+            mfa_verified=False, full_name="Ana"
+        )
+
+        claims = verify_session_token(SECRET, token)
+        params = cursor.execute.call_args[0][1]
+        assert params[0] == claims["sid"]
+        assert params[3] == _hash(token)
+        assert claims["role"] == "admin"
+        assert claims["name"] == "Ana"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
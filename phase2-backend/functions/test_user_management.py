@@ -71,7 +71,7 @@ class TestUserManagement(unittest.TestCase):
     @patch('user_management.execute_query')
     @patch('user_management.query_one')
     @patch('user_management.ses')
-    @patch('user_management.bcrypt.hashpw')
+    @patch('user_management.hash_password')
     @patch('user_management.secrets.token_urlsafe')
     def test_create_user_success_as_admin(self, mock_token, mock_hashpw, mock_ses, 
                                           mock_query_one, mock_execute, mock_get_conn):
@@ -80,7 +80,7 @@ class TestUserManagement(unittest.TestCase):
         mock_conn = MagicMock()
         mock_get_conn.return_value = mock_conn
         mock_query_one.return_value = None  # No existing user
-        mock_hashpw.return_value = b'hashed_password'
+        mock_hashpw.return_value = 'hashed_password'
         mock_token.return_value = 'temp-password-token'
         
         # Import after mocking
@@ -229,7 +229,7 @@ class TestUserManagement(unittest.TestCase):
     @patch('user_management.get_connection')
     @patch('user_management.query_one')
     @patch('user_management.execute_query')
-    @patch('user_management.bcrypt.hashpw')
+    @patch('user_management.hash_password')
     @patch('user_management.secrets.token_urlsafe')
     @patch('user_management.ses')
     def test_reset_password_success(self, mock_ses, mock_token, mock_hashpw,
@@ -243,7 +243,7 @@ class TestUserManagement(unittest.TestCase):
             'status': 'active'
         }
         mock_token.return_value = 'new-temp-password'
-        mock_hashpw.return_value = b'hashed_new_password'
+        mock_hashpw.return_value = 'hashed_new_password'
         
         event = {
             'httpMethod': 'POST',
@@ -270,6 +270,38 @@ class TestUserManagement(unittest.TestCase):
         # Verify email was sent
         mock_ses.send_email.assert_called_once()
 
+    @patch('user_management.get_connection')
+    @patch('user_management.hash_password')
+    def test_create_user_hash_busy_returns_503(self, mock_hashpw, mock_get_conn):
+        """Test saturated password hashing is a retryable 503, not a 500"""
+        from user_management import create_user, PasswordHashBusy
+
+        mock_hashpw.side_effect = PasswordHashBusy('Password hashing capacity exhausted')
+
+        response = create_user(self.customer_id, self.admin_user_id, 'admin', {
+            'email': 'newuser@example.com',
+            'full_name': 'Test User',
+            'role': 'analyst'
+        })
+
+        self.assertEqual(response['statusCode'], 503)
+        self.assertIn('Retry-After', response['headers'])
+        mock_get_conn.assert_not_called()
+
+    @patch('user_management.get_connection')
+    @patch('user_management.hash_password')
+    def test_reset_password_hash_busy_returns_503(self, mock_hashpw, mock_get_conn):
+        """Test saturated password hashing during reset is a retryable 503"""
+        from user_management import reset_user_password, PasswordHashBusy
+
+        mock_hashpw.side_effect = PasswordHashBusy('Password hashing capacity exhausted')
+
+        response = reset_user_password(self.customer_id, self.admin_user_id, 'admin', 'user-target')
+
+        self.assertEqual(response['statusCode'], 503)
+        self.assertIn('Retry-After', response['headers'])
+        mock_get_conn.assert_not_called()
+
     @patch('user_management.get_connection')
     @patch('user_management.query_one')
     @patch('user_management.execute_query')
@@ -19,6 +19,23 @@ Evidence pipeline
                                  ↓
                           Aurora (tx_* tables, tx_evidence_signatures)
 
+  The controls' counters are pre-aggregated by one query per customer
+  (_CustomerSummary), so each tx_* table is read once per run rather than
+  once per control.  Collectors only hash; KMS signing and the S3 upload
+  are queued on a bounded worker pool (EvidenceVault, shared with the HIPAA
+  collector in the evidence_vault layer module) so a customer's controls
+  vault concurrently.  Signature rows are bulk-inserted once per customer,
+  after every job for that customer has finished.
+
+  By default every evidence item gets its own KMS signature over its content
+  hash.  In merkle signing mode (opt-in, EVIDENCE_SIGNING_MODE=merkle)
+  evidence is signed in batches instead: the content hashes of all evidence
+  vaulted by an on-demand request, or by one customer chunk of a scheduled
+  run, become the leaves of a Merkle tree, KMS signs the root, and each
+  signature row stores the root signature plus the item's inclusion proof
+  (see evidence_merkle.py for the offline verifier).  A batch's evidence
+  rows are committed in the same transaction as its signature rows.
+
 Invocation modes
 ----------------
   Scheduled (EventBridge cron):  collects all active fintech_pro customers
@@ -30,9 +47,17 @@ Environment variables
   RDS_HOST            Aurora Proxy endpoint
   RDS_DATABASE        securebase
   RDS_USER            securebase_app
-  RDS_SECRET_ARN      Secrets Manager ARN for DB password
+  RDS_SECRET_ARN      Secrets Manager ARN for DB credentials (read by db_utils)
   KMS_KEY_ID          KMS key for evidence signing
   S3_EVIDENCE_BUCKET  S3 bucket (Object Lock / Compliance mode)
+  EVIDENCE_VAULT_MAX_WORKERS  Concurrent KMS/S3 vaulting jobs (default 10)
+  EVIDENCE_SIGNING_MODE       item (default, one signature per evidence item)
+                              | merkle (one signature per batch over a Merkle root)
+  COLLECTION_CHUNK_SIZE       Customers per signed, committed batch in scheduled runs (default 25)
+  EXPORT_FORMAT               json (default, single document) | ndjson (streamed)
+                              | parquet (one object per section)
+  EXPORT_PART_SIZE_BYTES      S3 multipart part size for streamed exports (default 8 MiB)
+  EXPORT_CURSOR_ITERSIZE      Rows fetched per server-side cursor round trip (default 5000)
   ENVIRONMENT         dev | staging | prod
   LOG_LEVEL           DEBUG | INFO | WARNING | ERROR
 
@@ -49,7 +74,7 @@ Event format (API Gateway on-demand)
     "path": "/fintech/examiner-export",
     "body": "{\"customer_id\": \"uuid\", \"period_start\": \"2025-01-01\",
               \"period_end\": \"2025-03-31\", \"examiner_name\": \"John Smith\",
-              \"examiner_email\": \"jsmith@dob.texas.gov\"}"
+              \"examiner_email\": \"jsmith@dob.texas.gov\", \"format\": \"ndjson\"}"
   }
   OR (scheduled)
   {
@@ -65,12 +90,35 @@ import logging
 import os
 import uuid
 from base64 import b64encode
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
 import boto3
 import psycopg2
 import psycopg2.extras
+from botocore.config import Config
+
+from db_utils import get_connection, release_connection, set_rls_context_on_conn
+from evidence_export import (
+    DEFAULT_ITERSIZE,
+    DEFAULT_PART_SIZE,
+    NDJSON_CONTENT_TYPE,
+    MultipartWriter,
+    StreamingPackage,
+    columnar_manifest,
+    stream_query,
+    write_columnar_section,
+)
+from columnar_export import PARQUET_CONTENT_TYPE
+from evidence_vault import (
+    EvidenceVault,
+    MerkleSigningBatch,
+    VaultTarget,
+    new_signing_batch,
+    sign_and_vault,
+    write_signature_rows,
+)
 
 # ── Logging ───────────────────────────────────────────────────────────────────
 
@@ -80,12 +128,21 @@ logger.setLevel(LOG_LEVEL)
 
 # ── AWS clients (module-level for Lambda container reuse) ─────────────────────
 
-_secrets = boto3.client("secretsmanager")
-_kms = boto3.client("kms")
-_s3 = boto3.client("s3")
+# Evidence signing and uploads run on a bounded worker pool; the client
+# connection pools are sized to match so workers never queue for a socket.
+VAULT_MAX_WORKERS = int(os.environ.get("EVIDENCE_VAULT_MAX_WORKERS", "10"))
+_client_config = Config(max_pool_connections=2 * VAULT_MAX_WORKERS)
+
+_kms = boto3.client("kms", config=_client_config)
+_s3 = boto3.client("s3", config=_client_config)
+_vault_executor = ThreadPoolExecutor(
+    max_workers=VAULT_MAX_WORKERS, thread_name_prefix="tx-vault"
+)
 
 # ── Constants ─────────────────────────────────────────────────────────────────
 
+SIGNATURE_TABLE = "tx_evidence_signatures"
+
 CONTROL_CATALOGUE = {
     "TX-MT-R1": {
         "name": "Transaction Recordkeeping",
@@ -127,50 +184,38 @@ RDS_SECRET_ARN = os.environ.get("RDS_SECRET_ARN", "")
 KMS_KEY_ID = os.environ.get("KMS_KEY_ID", "")
 S3_EVIDENCE_BUCKET = os.environ.get("S3_EVIDENCE_BUCKET", "securebase-evidence")
 ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
+# "item" (the default): one KMS signature per evidence item, over its own hash
+# "merkle": opt-in; one KMS signature per batch over a Merkle root of its
+#           evidence hashes, with each item carrying its inclusion proof
+EVIDENCE_SIGNING_MODE = os.environ.get("EVIDENCE_SIGNING_MODE", "item")
+COLLECTION_CHUNK_SIZE = int(os.environ.get("COLLECTION_CHUNK_SIZE", "25"))
+# Examiner exports: "json" (the default) builds the single-document package
+# existing consumers read; "ndjson" streams each section from a server-side
+# cursor into an S3 multipart upload.
+EXPORT_FORMATS = ("ndjson", "parquet", "json")
+EXPORT_FORMAT = os.environ.get("EXPORT_FORMAT", "json")
+EXPORT_PART_SIZE_BYTES = int(os.environ.get("EXPORT_PART_SIZE_BYTES", str(DEFAULT_PART_SIZE)))
+EXPORT_CURSOR_ITERSIZE = int(os.environ.get("EXPORT_CURSOR_ITERSIZE", str(DEFAULT_ITERSIZE)))
 
 # ══════════════════════════════════════════════════════════════════════════════
 # DATABASE HELPERS
 # ══════════════════════════════════════════════════════════════════════════════
 
 
-def _get_db_password() -> str:
-    """Retrieve DB password from Secrets Manager (cached after first call)."""
-    secret = _secrets.get_secret_value(SecretId=RDS_SECRET_ARN)
-    value = secret.get("SecretString", "{}")
-    return json.loads(value).get("password", value)
-
-
-_db_conn: Optional[psycopg2.extensions.connection] = None
-
-
 def get_db_connection() -> psycopg2.extensions.connection:
-    """Return (or reuse) a psycopg2 connection to Aurora."""
-    global _db_conn
-    try:
-        if _db_conn is None or _db_conn.closed:
-            password = _get_db_password()
-            _db_conn = psycopg2.connect(
-                host=RDS_HOST,
-                dbname=RDS_DATABASE,
-                user=RDS_USER,
-                password=password,
-                connect_timeout=5,
-                cursor_factory=psycopg2.extras.RealDictCursor,
-            )
-            _db_conn.autocommit = False
-        return _db_conn
-    except Exception as exc:
-        logger.error("DB connection failed: %s", exc)
-        raise
+    """Borrow a connection from the shared db_utils pool (dict rows).
+
+    The pool persists across warm invocations; the handler hands the
+    connection back with release_connection().
+    """
+    conn = get_connection()
+    conn.cursor_factory = psycopg2.extras.RealDictCursor
+    return conn
 
 
 def set_rls_context(conn: psycopg2.extensions.connection, customer_id: str) -> None:
     """Set the PostgreSQL session variable for Row-Level Security."""
-    with conn.cursor() as cur:
-        cur.execute(
-            "SELECT set_config('app.current_customer_id', %s, TRUE)",
-            (str(customer_id),),
-        )
+    set_rls_context_on_conn(conn, str(customer_id))
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -186,12 +231,16 @@ def sha256_hex(data: Any) -> str:
 
 def kms_sign(content_hash: str) -> str:
     """Sign a content hash with KMS and return base64-encoded signature."""
+    return _kms_sign_message(content_hash.encode())
+
+
+def _kms_sign_message(message: bytes) -> str:
     if not KMS_KEY_ID:
         logger.warning("KMS_KEY_ID not set; skipping signing")
         return ""
     resp = _kms.sign(
         KeyId=KMS_KEY_ID,
-        Message=content_hash.encode(),
+        Message=message,
         MessageType="RAW",
         SigningAlgorithm="RSASSA_PKCS1_V1_5_SHA_256",
     )
@@ -202,12 +251,24 @@ def vault_to_s3(
     customer_id: str, evidence_type: str, evidence_id: str, payload: Any
 ) -> str:
     """Upload evidence JSON to S3 and return the object key."""
+    key = _evidence_key(customer_id, evidence_type, evidence_id)
+    _put_evidence(key, json.dumps(payload, default=str, indent=2).encode())
+    return key
+
+
+def _evidence_key(
+    customer_id: str, evidence_type: str, evidence_id: str, extension: str = "json"
+) -> str:
+    """Return the S3 key for an evidence object."""
     date_prefix = datetime.now(timezone.utc).strftime("%Y/%m/%d")
-    key = (
+    return (
         f"evidence/{ENVIRONMENT}/{customer_id}/{evidence_type}/"
-        f"{date_prefix}/{evidence_id}.json"
+        f"{date_prefix}/{evidence_id}.{extension}"
     )
-    body = json.dumps(payload, default=str, indent=2).encode()
+
+
+def _put_evidence(key: str, body: bytes) -> None:
+    """Write one serialised evidence object to the vault bucket."""
     _s3.put_object(
         Bucket=S3_EVIDENCE_BUCKET,
         Key=key,
@@ -217,7 +278,6 @@ def vault_to_s3(
         SSEKMSKeyId=KMS_KEY_ID or None,
     )
     logger.debug("Vaulted evidence: s3://%s/%s", S3_EVIDENCE_BUCKET, key)
-    return key
 
 
 def record_signature(
@@ -251,6 +311,222 @@ def record_signature(
         )
 
 
+def _vault_target() -> VaultTarget:
+    """Where this collector's evidence is signed, vaulted and recorded.
+
+    Built per call, so the vault sees the current KMS key and helpers.
+    """
+    return VaultTarget(
+        signature_table=SIGNATURE_TABLE,
+        kms_key_id=KMS_KEY_ID,
+        executor=_vault_executor,
+        sign=kms_sign,
+        sign_message=_kms_sign_message,
+        evidence_key=_evidence_key,
+        put_evidence=_put_evidence,
+        vault_to_s3=vault_to_s3,
+        record_signature=record_signature,
+    )
+
+
+# ══════════════════════════════════════════════════════════════════════════════
+# PER-CUSTOMER SUMMARY
+# ══════════════════════════════════════════════════════════════════════════════
+
+# Each section is one aggregate over one tx_* table.  Output columns are
+# prefixed "<section>__" so the combined row splits back into per-section
+# dicts; unprefixed columns are internal and never reach the evidence.
+_SUMMARY_SECTIONS: Dict[str, str] = {
+    "txn": """
+        SELECT
+          COUNT(*) FILTER (WHERE transaction_date >= NOW() - INTERVAL '30 days')  AS txn__last_30d,
+          COUNT(*) FILTER (WHERE transaction_date >= NOW() - INTERVAL '365 days') AS txn__last_year,
+          COUNT(*)                                                                  AS txn__total,
+          MIN(transaction_date)                                                     AS txn__oldest,
+          MAX(transaction_date)                                                     AS txn__newest,
+          COUNT(*) FILTER (WHERE sender_name IS NULL OR sender_account IS NULL)    AS txn__missing_sender_fields,
+          COUNT(*) FILTER (WHERE amount >= 10000 AND transaction_type IN
+                           ('cash','money_order'))                                  AS txn__ctr_eligible,
+          ARRAY_AGG(id) FILTER (WHERE amount >= 10000 AND transaction_type IN
+                           ('cash','money_order') AND status = 'completed')         AS ctr_transaction_ids
+        FROM tx_transaction_records
+        WHERE customer_id = %(customer_id)s
+    """,
+    # Same join as check_ctr_filing_compliance(), counted in place
+    "ctr": """
+        SELECT
+          COUNT(*)                                       AS ctr__eligible_transactions,
+          COUNT(*) FILTER (WHERE ctr_status = 'filed')   AS ctr__filed,
+          COUNT(*) FILTER (WHERE ctr_status = 'pending') AS ctr__pending,
+          COUNT(*) FILTER (WHERE ctr_status = 'MISSING') AS ctr__missing,
+          COUNT(*) FILTER (WHERE ctr_status = 'exempt')  AS ctr__exempt
+        FROM (
+          SELECT COALESCE(c.filing_status::TEXT, 'MISSING') AS ctr_status
+          FROM ({ctr_eligible}) e
+          LEFT JOIN tx_ctr_filings c
+            ON c.customer_id = %(customer_id)s
+            AND e.id = ANY(c.related_transaction_ids)
+        ) ctr_rows
+    """,
+    "aml": """
+        SELECT
+          COUNT(*) AS aml__total_alerts,
+          COUNT(*) FILTER (WHERE status = 'open')            AS aml__open_alerts,
+          COUNT(*) FILTER (WHERE status = 'escalated')       AS aml__escalated,
+          COUNT(*) FILTER (WHERE sar_filed = TRUE)           AS aml__sar_filed,
+          AVG(EXTRACT(EPOCH FROM
+            (COALESCE(dispositioned_at, NOW()) - alert_date)) / 86400
+          )::NUMERIC(6,1)                                     AS aml__avg_days_to_disposition
+        FROM tx_aml_alerts
+        WHERE customer_id = %(customer_id)s
+    """,
+    "sar": """
+        SELECT COALESCE(JSONB_OBJECT_AGG(filing_status, n), '{}'::JSONB) AS sar__by_status
+        FROM (
+          SELECT filing_status::TEXT AS filing_status, COUNT(*) AS n
+          FROM tx_sar_filings
+          WHERE customer_id = %(customer_id)s
+          GROUP BY filing_status
+        ) sar_rows
+    """,
+    "cip": """
+        SELECT
+          COUNT(*) AS cip__total_customers,
+          COUNT(*) FILTER (WHERE identity_verified_at IS NULL)         AS cip__unverified,
+          COUNT(*) FILTER (WHERE risk_rating = 'high'
+            AND enhanced_due_diligence = FALSE)                        AS cip__high_risk_no_edd,
+          COUNT(*) FILTER (WHERE risk_rating = 'pep')                  AS cip__pep_count,
+          COUNT(*) FILTER (WHERE last_reviewed_at < NOW() - INTERVAL '365 days'
+            OR last_reviewed_at IS NULL)                               AS cip__overdue_review,
+          ROUND(AVG(CASE WHEN identity_verified_at IS NOT NULL THEN 1.0 ELSE 0.0 END) * 100, 1)
+                                                                        AS cip__verification_rate_pct
+        FROM tx_cip_records
+        WHERE customer_id = %(customer_id)s
+    """,
+    "wallets": """
+        SELECT
+          COUNT(*) AS wallets__total_wallets,
+          COUNT(*) FILTER (WHERE is_customer_funds = TRUE)              AS wallets__customer_wallets,
+          COUNT(*) FILTER (WHERE is_customer_funds = TRUE
+            AND is_segregated = FALSE)                                   AS wallets__non_segregated,
+          COUNT(*) FILTER (WHERE is_customer_funds = TRUE
+            AND cold_storage = TRUE)                                     AS wallets__cold_storage,
+          COUNT(*) FILTER (WHERE is_customer_funds = TRUE
+            AND multi_sig_required = TRUE)                               AS wallets__multi_sig,
+          COUNT(DISTINCT asset_type)                                     AS wallets__asset_types,
+          SUM(CASE WHEN is_customer_funds AND balance_snapshot IS NOT NULL
+                   THEN balance_snapshot ELSE 0 END)                     AS wallets__total_balance_approx
+        FROM tx_digital_asset_wallets
+        WHERE customer_id = %(customer_id)s
+    """,
+}
+
+# CTR-eligible transaction ids: reused from the txn scan when that section is
+# in the same query, otherwise read through idx_tx_txn_amount.
+_CTR_ELIGIBLE_FROM_SCAN = "SELECT UNNEST(ctr_transaction_ids) AS id FROM txn"
+_CTR_ELIGIBLE_BY_INDEX = """
+    SELECT id FROM tx_transaction_records
+    WHERE customer_id = %(customer_id)s
+      AND amount >= 10000
+      AND transaction_type IN ('cash','money_order')
+      AND status = 'completed'
+"""
+
+_CONTROL_SUMMARY_SECTIONS: Dict[str, Tuple[str, ...]] = {
+    "TX-MT-R1":   ("txn",),
+    "TX-MT-R2a":  ("ctr",),
+    "TX-MT-R2b":  ("aml", "sar"),
+    "TX-MT-R3":   ("cip",),
+    "TX-MT-R4":   ("wallets",),
+    "TX-DASP-R1": ("wallets",),
+}
+
+
+def _summary_query(sections: Set[str]) -> str:
+    """Build one statement that evaluates every requested section."""
+    names = [name for name in _SUMMARY_SECTIONS if name in sections]
+    ctes = []
+    for name in names:
+        sql = _SUMMARY_SECTIONS[name]
+        if name == "ctr":
+            eligible = _CTR_ELIGIBLE_FROM_SCAN if "txn" in sections else _CTR_ELIGIBLE_BY_INDEX
+            sql = sql.replace("{ctr_eligible}", eligible)
+        ctes.append(f"{name} AS ({sql})")
+    return f"WITH {', '.join(ctes)}\nSELECT * FROM {', '.join(names)}"
+
+
+def _query_customer_summary(
+    conn: psycopg2.extensions.connection,
+    customer_id: str,
+    sections: Set[str],
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compute the requested summary sections for one customer in a single query.
+
+    Each aggregate CTE yields exactly one row, so the cross join returns one
+    row and every table is read once regardless of how many controls use it.
+    """
+    unknown = set(sections) - set(_SUMMARY_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown summary sections: {sorted(unknown)}")
+
+    with conn.cursor() as cur:
+        cur.execute(_summary_query(sections), {"customer_id": str(customer_id)})
+        row = cur.fetchone()
+
+    summary: Dict[str, Dict[str, Any]] = {name: {} for name in sections}
+    for column, value in dict(row or {}).items():
+        section, sep, field = column.partition("__")
+        if sep and section in summary:
+            summary[section][field] = value
+    return summary
+
+
+class _CustomerSummary:
+    """
+    Lazily computed, cached summary for one customer within a run.
+
+    The first collector to ask for a section triggers one query covering every
+    section the run's controls need; later collectors (including the second
+    pass for TX-MT-R4 / TX-DASP-R1) read the cached values.
+    """
+
+    def __init__(
+        self,
+        conn: psycopg2.extensions.connection,
+        customer_id: str,
+        controls: Sequence[str] = (),
+    ):
+        self._conn = conn
+        self.customer_id = str(customer_id)
+        self._wanted: Set[str] = {
+            section
+            for ctrl in controls
+            for section in _CONTROL_SUMMARY_SECTIONS.get(ctrl, ())
+        }
+        self._sections: Dict[str, Dict[str, Any]] = {}
+
+    def section(self, name: str) -> Dict[str, Any]:
+        if name not in self._sections:
+            missing = (self._wanted | {name}) - set(self._sections)
+            self._sections.update(
+                _query_customer_summary(self._conn, self.customer_id, missing)
+            )
+        return self._sections[name]
+
+
+def _summary_for(
+    conn: psycopg2.extensions.connection,
+    customer_id: str,
+    control_id: str,
+    summary: Optional[_CustomerSummary],
+) -> _CustomerSummary:
+    """Use the run's summary, or one scoped to a single directly-called collector."""
+    if summary is not None and summary.customer_id == str(customer_id):
+        return summary
+    return _CustomerSummary(conn, customer_id, (control_id,))
+
+
 # ══════════════════════════════════════════════════════════════════════════════
 # CONTROL COLLECTORS
 # ══════════════════════════════════════════════════════════════════════════════
@@ -260,6 +536,8 @@ def collect_tx_mt_r1(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
+    summary: Optional[_CustomerSummary] = None,
 ) -> Dict[str, Any]:
     """
     TX-MT-R1 — Transaction Recordkeeping (7 TAC §33.35)
@@ -268,32 +546,14 @@ def collect_tx_mt_r1(
     """
     logger.info("[TX-MT-R1] Collecting transaction records for %s", customer_id)
 
-    with conn.cursor() as cur:
-        # Count records by age bucket
-        cur.execute(
-            """
-            SELECT
-              COUNT(*) FILTER (WHERE transaction_date >= NOW() - INTERVAL '30 days')  AS last_30d,
-              COUNT(*) FILTER (WHERE transaction_date >= NOW() - INTERVAL '365 days') AS last_year,
-              COUNT(*)                                                                  AS total,
-              MIN(transaction_date)                                                     AS oldest,
-              MAX(transaction_date)                                                     AS newest,
-              COUNT(*) FILTER (WHERE sender_name IS NULL OR sender_account IS NULL)    AS missing_sender_fields,
-              COUNT(*) FILTER (WHERE amount >= 10000 AND transaction_type IN
-                               ('cash','money_order'))                                  AS ctr_eligible
-            FROM tx_transaction_records
-            WHERE customer_id = %s
-            """,
-            (str(customer_id),),
-        )
-        row = cur.fetchone()
+    row = _summary_for(conn, customer_id, "TX-MT-R1", summary).section("txn")
 
     evidence = {
         "control_id": "TX-MT-R1",
         "customer_id": str(customer_id),
         "collected_at": datetime.now(timezone.utc).isoformat(),
         "regulation_ref": "7 TAC §33.35; Fin. Code §151.307",
-        "metrics": dict(row) if row else {},
+        "metrics": dict(row),
     }
 
     # Determine compliance status
@@ -319,9 +579,10 @@ def collect_tx_mt_r1(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "TX-MT-R1", evidence_id, evidence)
-    record_signature(conn, customer_id, "TX-MT-R1", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "TX-MT-R1", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -333,6 +594,8 @@ def collect_tx_mt_r2a(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
+    summary: Optional[_CustomerSummary] = None,
 ) -> Dict[str, Any]:
     """
     TX-MT-R2a — Currency Transaction Reports (31 CFR §1022.310)
@@ -340,21 +603,9 @@ def collect_tx_mt_r2a(
     """
     logger.info("[TX-MT-R2a] Collecting CTR evidence for %s", customer_id)
 
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT
-              COUNT(*) AS eligible_transactions,
-              COUNT(*) FILTER (WHERE ctr_status = 'filed')    AS filed,
-              COUNT(*) FILTER (WHERE ctr_status = 'pending')  AS pending,
-              COUNT(*) FILTER (WHERE ctr_status = 'MISSING')  AS missing,
-              COUNT(*) FILTER (WHERE ctr_status = 'exempt')   AS exempt
-            FROM check_ctr_filing_compliance(%s)
-            """,
-            (str(customer_id),),
-        )
-        row = cur.fetchone()
+    row = _summary_for(conn, customer_id, "TX-MT-R2a", summary).section("ctr")
 
+    with conn.cursor() as cur:
         # Pull structuring alerts
         cur.execute(
             "SELECT * FROM detect_structuring(%s, 24, 10000)",
@@ -367,7 +618,7 @@ def collect_tx_mt_r2a(
         "customer_id": str(customer_id),
         "collected_at": datetime.now(timezone.utc).isoformat(),
         "regulation_ref": "31 CFR §1022.310",
-        "ctr_summary": dict(row) if row else {},
+        "ctr_summary": dict(row),
         "structuring_alerts": structuring,
     }
 
@@ -390,9 +641,10 @@ def collect_tx_mt_r2a(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "TX-MT-R2a", evidence_id, evidence)
-    record_signature(conn, customer_id, "TX-MT-R2a", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "TX-MT-R2a", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -404,6 +656,8 @@ def collect_tx_mt_r2b(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
+    summary: Optional[_CustomerSummary] = None,
 ) -> Dict[str, Any]:
     """
     TX-MT-R2b — Suspicious Activity Reports (31 CFR §1022.320)
@@ -411,41 +665,16 @@ def collect_tx_mt_r2b(
     """
     logger.info("[TX-MT-R2b] Collecting SAR evidence for %s", customer_id)
 
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT
-              COUNT(*) AS total_alerts,
-              COUNT(*) FILTER (WHERE status = 'open')            AS open_alerts,
-              COUNT(*) FILTER (WHERE status = 'escalated')       AS escalated,
-              COUNT(*) FILTER (WHERE sar_filed = TRUE)           AS sar_filed,
-              AVG(EXTRACT(EPOCH FROM
-                (COALESCE(dispositioned_at, NOW()) - alert_date)) / 86400
-              )::NUMERIC(6,1)                                     AS avg_days_to_disposition
-            FROM tx_aml_alerts
-            WHERE customer_id = %s
-            """,
-            (str(customer_id),),
-        )
-        row = cur.fetchone()
-
-        cur.execute(
-            """
-            SELECT filing_status, COUNT(*) AS count
-            FROM tx_sar_filings
-            WHERE customer_id = %s
-            GROUP BY filing_status
-            """,
-            (str(customer_id),),
-        )
-        sar_status = {r["filing_status"]: r["count"] for r in cur.fetchall()}
+    summary = _summary_for(conn, customer_id, "TX-MT-R2b", summary)
+    row = summary.section("aml")
+    sar_status = dict(summary.section("sar").get("by_status") or {})
 
     evidence = {
         "control_id": "TX-MT-R2b",
         "customer_id": str(customer_id),
         "collected_at": datetime.now(timezone.utc).isoformat(),
         "regulation_ref": "31 CFR §1022.320",
-        "aml_alert_summary": dict(row) if row else {},
+        "aml_alert_summary": dict(row),
         "sar_by_status": sar_status,
     }
 
@@ -472,9 +701,10 @@ def collect_tx_mt_r2b(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "TX-MT-R2b", evidence_id, evidence)
-    record_signature(conn, customer_id, "TX-MT-R2b", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "TX-MT-R2b", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -486,6 +716,8 @@ def collect_tx_mt_r3(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
+    summary: Optional[_CustomerSummary] = None,
 ) -> Dict[str, Any]:
     """
     TX-MT-R3 — Customer Identification Program (31 CFR §1022.210)
@@ -493,32 +725,14 @@ def collect_tx_mt_r3(
     """
     logger.info("[TX-MT-R3] Collecting CIP evidence for %s", customer_id)
 
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT
-              COUNT(*) AS total_customers,
-              COUNT(*) FILTER (WHERE identity_verified_at IS NULL)         AS unverified,
-              COUNT(*) FILTER (WHERE risk_rating = 'high'
-                AND enhanced_due_diligence = FALSE)                        AS high_risk_no_edd,
-              COUNT(*) FILTER (WHERE risk_rating = 'pep')                  AS pep_count,
-              COUNT(*) FILTER (WHERE last_reviewed_at < NOW() - INTERVAL '365 days'
-                OR last_reviewed_at IS NULL)                               AS overdue_review,
-              ROUND(AVG(CASE WHEN identity_verified_at IS NOT NULL THEN 1.0 ELSE 0.0 END) * 100, 1)
-                                                                            AS verification_rate_pct
-            FROM tx_cip_records
-            WHERE customer_id = %s
-            """,
-            (str(customer_id),),
-        )
-        row = cur.fetchone()
+    row = _summary_for(conn, customer_id, "TX-MT-R3", summary).section("cip")
 
     evidence = {
         "control_id": "TX-MT-R3",
         "customer_id": str(customer_id),
         "collected_at": datetime.now(timezone.utc).isoformat(),
         "regulation_ref": "31 CFR §1022.210; 7 TAC §33.3",
-        "cip_summary": dict(row) if row else {},
+        "cip_summary": dict(row),
     }
 
     unverified = evidence["cip_summary"].get("unverified") or 0
@@ -541,9 +755,10 @@ def collect_tx_mt_r3(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "TX-MT-R3", evidence_id, evidence)
-    record_signature(conn, customer_id, "TX-MT-R3", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "TX-MT-R3", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -555,6 +770,8 @@ def collect_tx_mt_r4_dasp_r1(
     conn: psycopg2.extensions.connection,
     customer_id: str,
     request_id: str,
+    vault: Optional[EvidenceVault] = None,
+    summary: Optional[_CustomerSummary] = None,
 ) -> Dict[str, Any]:
     """
     TX-MT-R4 / TX-DASP-R1 — Digital Asset Segregation (HB 1666; Fin. Code §152)
@@ -562,34 +779,14 @@ def collect_tx_mt_r4_dasp_r1(
     """
     logger.info("[TX-MT-R4/TX-DASP-R1] Collecting digital asset evidence for %s", customer_id)
 
-    with conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT
-              COUNT(*) AS total_wallets,
-              COUNT(*) FILTER (WHERE is_customer_funds = TRUE)              AS customer_wallets,
-              COUNT(*) FILTER (WHERE is_customer_funds = TRUE
-                AND is_segregated = FALSE)                                   AS non_segregated,
-              COUNT(*) FILTER (WHERE is_customer_funds = TRUE
-                AND cold_storage = TRUE)                                     AS cold_storage,
-              COUNT(*) FILTER (WHERE is_customer_funds = TRUE
-                AND multi_sig_required = TRUE)                               AS multi_sig,
-              COUNT(DISTINCT asset_type)                                     AS asset_types,
-              SUM(CASE WHEN is_customer_funds AND balance_snapshot IS NOT NULL
-                       THEN balance_snapshot ELSE 0 END)                     AS total_balance_approx
-            FROM tx_digital_asset_wallets
-            WHERE customer_id = %s
-            """,
-            (str(customer_id),),
-        )
-        row = cur.fetchone()
+    row = _summary_for(conn, customer_id, "TX-MT-R4", summary).section("wallets")
 
     evidence = {
         "control_id": "TX-MT-R4/TX-DASP-R1",
         "customer_id": str(customer_id),
         "collected_at": datetime.now(timezone.utc).isoformat(),
         "regulation_ref": "TX HB 1666; Fin. Code §152; Fin. Code §152.101",
-        "digital_asset_summary": dict(row) if row else {},
+        "digital_asset_summary": dict(row),
     }
 
     non_segregated = evidence["digital_asset_summary"].get("non_segregated") or 0
@@ -618,9 +815,10 @@ def collect_tx_mt_r4_dasp_r1(
 
     content_hash = sha256_hex(evidence)
     evidence_id = str(uuid.uuid4())
-    kms_sig = kms_sign(content_hash)
-    s3_key = vault_to_s3(str(customer_id), "TX-MT-R4", evidence_id, evidence)
-    record_signature(conn, customer_id, "TX-MT-R4", evidence_id, content_hash, kms_sig, request_id)
+    s3_key = sign_and_vault(
+        _vault_target(),
+        conn, customer_id, "TX-MT-R4", evidence_id, content_hash, evidence, request_id, vault
+    )
 
     evidence["s3_key"] = s3_key
     evidence["content_hash"] = content_hash
@@ -694,30 +892,13 @@ def _get_fintech_customers(conn: psycopg2.extensions.connection) -> List[str]:
 # ══════════════════════════════════════════════════════════════════════════════
 
 
-def generate_examiner_export(
-    conn: psycopg2.extensions.connection,
-    customer_id: str,
-    period_start: str,
-    period_end: str,
-    examiner_name: str,
-    examiner_email: str,
-    request_id: str,
-) -> Dict[str, Any]:
-    """
-    Build a signed examiner evidence package covering all controls
-    for the requested date range and upload it to S3.
-    """
-    logger.info(
-        "Generating examiner export for customer=%s period=%s to %s",
-        customer_id, period_start, period_end,
-    )
-
-    export_ref = f"TX-EXAM-{ENVIRONMENT.upper()}-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8].upper()}"
-
-    with conn.cursor() as cur:
+def _examiner_export_sections(
+    customer_id: str, period_start: str, period_end: str
+) -> List[Tuple[str, str, Tuple[Any, ...]]]:
+    """Return the (name, sql, params) sections of an examiner package, in order."""
+    return [
         # Transaction records
-        cur.execute(
-            """
+        ("transactions", """
             SELECT id, transaction_date, transaction_type, amount, currency,
                    sender_name, sender_account, recipient_name, recipient_account,
                    recipient_country, channel, status
@@ -725,47 +906,152 @@ def generate_examiner_export(
             WHERE customer_id = %s
               AND transaction_date BETWEEN %s::DATE AND %s::DATE + INTERVAL '1 day'
             ORDER BY transaction_date
-            """,
-            (str(customer_id), period_start, period_end),
-        )
-        transactions = [dict(r) for r in cur.fetchall()]
-
+            """, (str(customer_id), period_start, period_end)),
         # CTR filings
-        cur.execute(
-            """
+        ("ctr_filings", """
             SELECT id, filing_reference, transaction_date, amount, subject_name,
                    filing_status, filing_date, fincen_tracking_id
             FROM tx_ctr_filings
             WHERE customer_id = %s
               AND transaction_date BETWEEN %s::DATE AND %s::DATE + INTERVAL '1 day'
             ORDER BY transaction_date
-            """,
-            (str(customer_id), period_start, period_end),
-        )
-        ctrs = [dict(r) for r in cur.fetchall()]
-
+            """, (str(customer_id), period_start, period_end)),
         # SAR filings
-        cur.execute(
-            """
+        ("sar_filings", """
             SELECT id, filing_reference, activity_date_start, activity_date_end,
                    amount, activity_type, filing_status, filing_date, fincen_tracking_id
             FROM tx_sar_filings
             WHERE customer_id = %s
               AND activity_date_start BETWEEN %s::DATE AND %s::DATE + INTERVAL '1 day'
             ORDER BY activity_date_start
-            """,
-            (str(customer_id), period_start, period_end),
-        )
-        sars = [dict(r) for r in cur.fetchall()]
-
+            """, (str(customer_id), period_start, period_end)),
         # Control statuses
-        cur.execute(
-            "SELECT * FROM tx_compliance_controls WHERE customer_id = %s",
-            (str(customer_id),),
-        )
-        controls = [dict(r) for r in cur.fetchall()]
+        ("control_statuses",
+         "SELECT * FROM tx_compliance_controls WHERE customer_id = %s",
+         (str(customer_id),)),
+    ]
+
+
+def _stream_export_to_vault(
+    conn: psycopg2.extensions.connection,
+    customer_id: str,
+    evidence_type: str,
+    export_ref: str,
+    header: Dict[str, Any],
+    sections: List[Tuple[str, str, Tuple[Any, ...]]],
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Stream export sections into the vault as one NDJSON object.
+
+    Each section is read through a server-side cursor and written to an S3
+    multipart upload as it arrives, so memory stays bounded by the part size
+    and cursor itersize rather than the export's row count.  Returns the
+    package key and its (unsigned) manifest.
+    """
+    key = _evidence_key(customer_id, evidence_type, export_ref, "ndjson")
+    sse = {"ServerSideEncryption": "aws:kms"}
+    if KMS_KEY_ID:
+        sse["SSEKMSKeyId"] = KMS_KEY_ID
+
+    with MultipartWriter(
+        _s3,
+        S3_EVIDENCE_BUCKET,
+        key,
+        part_size=EXPORT_PART_SIZE_BYTES,
+        ContentType=NDJSON_CONTENT_TYPE,
+        **sse,
+    ) as writer:
+        package = StreamingPackage(writer, header)
+        for name, sql, params in sections:
+            rows = stream_query(
+                conn, f"{evidence_type}_{name}", sql, params, EXPORT_CURSOR_ITERSIZE
+            )
+            package.write_section(name, rows)
+
+    logger.info(
+        "Streamed %s: s3://%s/%s (%d bytes)",
+        evidence_type, S3_EVIDENCE_BUCKET, key, package.bytes_written,
+    )
+    return key, package.manifest(package_key=key, **header)
 
-    package = {
+
+def _stream_columnar_export_to_vault(
+    conn: psycopg2.extensions.connection,
+    customer_id: str,
+    evidence_type: str,
+    export_ref: str,
+    header: Dict[str, Any],
+    sections: List[Tuple[str, str, Tuple[Any, ...]]],
+) -> Dict[str, Any]:
+    """
+    Stream each export section into the vault as its own Parquet object.
+
+    Rows arrive through a server-side cursor and are written one row group
+    per EXPORT_CURSOR_ITERSIZE rows.  Returns the (unsigned) manifest
+    listing every section object.
+    """
+    sse = {"ServerSideEncryption": "aws:kms"}
+    if KMS_KEY_ID:
+        sse["SSEKMSKeyId"] = KMS_KEY_ID
+
+    entries = []
+    for name, sql, params in sections:
+        key = _evidence_key(customer_id, evidence_type, f"{export_ref}.{name}", "parquet")
+        with MultipartWriter(
+            _s3,
+            S3_EVIDENCE_BUCKET,
+            key,
+            part_size=EXPORT_PART_SIZE_BYTES,
+            ContentType=PARQUET_CONTENT_TYPE,
+            **sse,
+        ) as writer:
+            rows = stream_query(
+                conn, f"{evidence_type}_{name}", sql, params, EXPORT_CURSOR_ITERSIZE
+            )
+            entries.append(
+                write_columnar_section(writer, name, rows, EXPORT_CURSOR_ITERSIZE)
+            )
+
+    manifest = columnar_manifest(entries, **header)
+    logger.info(
+        "Streamed %s as %d Parquet objects (%d bytes)",
+        evidence_type, len(entries), manifest["package_bytes"],
+    )
+    return manifest
+
+
+def generate_examiner_export(
+    conn: psycopg2.extensions.connection,
+    customer_id: str,
+    period_start: str,
+    period_end: str,
+    examiner_name: str,
+    examiner_email: str,
+    request_id: str,
+    export_format: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Build a signed examiner evidence package covering all controls
+    for the requested date range and upload it to S3.
+
+    "json" (the default) builds one in-memory document.  In "ndjson" format
+    sections are streamed as NDJSON and a manifest with per-section record
+    counts and SHA-256 digests is vaulted next to the package; "parquet"
+    writes one Parquet object per section and the signed manifest is the
+    package.  The streamed formats are opt-in per request or through
+    EXPORT_FORMAT.
+    """
+    export_format = export_format or EXPORT_FORMAT
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    logger.info(
+        "Generating examiner export for customer=%s period=%s to %s format=%s",
+        customer_id, period_start, period_end, export_format,
+    )
+
+    export_ref = f"TX-EXAM-{ENVIRONMENT.upper()}-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8].upper()}"
+    header = {
         "export_reference": export_ref,
         "customer_id": str(customer_id),
         "generated_at": datetime.now(timezone.utc).isoformat(),
@@ -775,21 +1061,47 @@ def generate_examiner_export(
         "examiner_email": examiner_email,
         "environment": ENVIRONMENT,
         "controls_included": ALL_CONTROLS,
-        "record_counts": {
-            "transactions": len(transactions),
-            "ctr_filings": len(ctrs),
-            "sar_filings": len(sars),
-        },
-        "transactions": transactions,
-        "ctr_filings": ctrs,
-        "sar_filings": sars,
-        "control_statuses": controls,
     }
+    sections = _examiner_export_sections(customer_id, period_start, period_end)
+    manifest_key = None
 
-    package_hash = sha256_hex(package)
-    kms_sig = kms_sign(package_hash)
+    if export_format in ("ndjson", "parquet"):
+        if export_format == "parquet":
+            manifest = _stream_columnar_export_to_vault(
+                conn, customer_id, "examiner_export", export_ref, header, sections
+            )
+        else:
+            s3_key, manifest = _stream_export_to_vault(
+                conn, customer_id, "examiner_export", export_ref, header, sections
+            )
+        package_hash = manifest["package_sha256"]
+        kms_sig = kms_sign(package_hash)
+        manifest["kms_key_id"] = KMS_KEY_ID
+        manifest["kms_signature"] = kms_sig
+        manifest_key = _evidence_key(customer_id, "examiner_export", f"{export_ref}.manifest")
+        _put_evidence(manifest_key, json.dumps(manifest, indent=2, default=str).encode())
+        if export_format == "parquet":
+            s3_key = manifest_key
+        record_counts = {
+            name: manifest["record_counts"][name]
+            for name in ("transactions", "ctr_filings", "sar_filings")
+        }
+    else:
+        package = dict(header)
+        with conn.cursor() as cur:
+            for name, sql, params in sections:
+                cur.execute(sql, params)
+                package[name] = [dict(r) for r in cur.fetchall()]
+        record_counts = {
+            name: len(package[name])
+            for name in ("transactions", "ctr_filings", "sar_filings")
+        }
+        package["record_counts"] = record_counts
+
+        package_hash = sha256_hex(package)
+        kms_sig = kms_sign(package_hash)
 
-    s3_key = vault_to_s3(str(customer_id), "examiner_export", export_ref, package)
+        s3_key = vault_to_s3(str(customer_id), "examiner_export", export_ref, package)
 
     with conn.cursor() as cur:
         cur.execute(
@@ -811,7 +1123,7 @@ def generate_examiner_export(
                 period_start,
                 period_end,
                 ALL_CONTROLS,
-                len(transactions) + len(ctrs) + len(sars),
+                sum(record_counts.values()),
                 s3_key,
                 package_hash,
                 kms_sig,
@@ -819,12 +1131,16 @@ def generate_examiner_export(
         )
 
     logger.info("Examiner export complete: ref=%s s3=%s", export_ref, s3_key)
-    return {
+    result = {
         "export_reference": export_ref,
         "s3_key": s3_key,
         "package_hash": package_hash,
-        "record_counts": package["record_counts"],
+        "record_counts": record_counts,
+        "format": export_format,
     }
+    if manifest_key:
+        result["manifest_key"] = manifest_key
+    return result
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -853,6 +1169,68 @@ def _http_response(status_code: int, body: Any) -> Dict[str, Any]:
     }
 
 
+def _collect_controls(
+    conn: psycopg2.extensions.connection,
+    customer_id: str,
+    controls: List[str],
+    request_id: str,
+    batch: Optional[MerkleSigningBatch] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run the given controls for one customer through a shared evidence vault.
+
+    The controls' counters come from one shared summary query per customer
+    (_CustomerSummary) while signing and uploads proceed in the background;
+    the vault is flushed (signature rows written, or handed to ``batch``)
+    before returning, so the caller's commit covers the whole customer.
+    """
+    vault = EvidenceVault(_vault_target(), request_id, batch=batch)
+    summary = _CustomerSummary(conn, customer_id, controls)
+    results: List[Dict[str, Any]] = []
+    for ctrl in controls:
+        collector = CONTROL_COLLECTOR_MAP.get(ctrl)
+        if not collector:
+            continue
+        # Each control runs under a savepoint so a failed statement only
+        # undoes that control's writes and the transaction stays usable.
+        with conn.cursor() as cur:
+            cur.execute("SAVEPOINT collect_control")
+        try:
+            results.append(
+                collector(conn, customer_id, request_id, vault=vault, summary=summary)
+            )
+        except Exception as exc:
+            logger.error("Control %s failed for %s: %s", ctrl, customer_id, exc)
+            with conn.cursor() as cur:
+                cur.execute("ROLLBACK TO SAVEPOINT collect_control")
+            results.append({"control_id": ctrl, "error": str(exc)})
+        else:
+            with conn.cursor() as cur:
+                cur.execute("RELEASE SAVEPOINT collect_control")
+
+    failed = {f["s3_key"]: f["error"] for f in vault.flush(conn)}
+    for result in results:
+        if result.get("s3_key") in failed:
+            result["vault_error"] = failed[result["s3_key"]]
+    return results
+
+
+def _record_batch_signatures(
+    conn: psycopg2.extensions.connection, batch: Optional[MerkleSigningBatch]
+) -> None:
+    """Sign the batch's Merkle root and write each customer's signature rows.
+
+    Nothing is committed here: the caller commits the batch's evidence and
+    its signature rows together, so a KMS failure rolls both back instead of
+    leaving unsigned evidence behind.
+    """
+    if batch is None:
+        return
+    for cid, rows in batch.sign().items():
+        set_rls_context(conn, cid)
+        write_signature_rows(conn, SIGNATURE_TABLE, rows)
+
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda entry point.
@@ -877,20 +1255,16 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if source == "aws.events":
             customer_ids = _get_fintech_customers(conn)
             logger.info("Scheduled run: %d fintech customers", len(customer_ids))
-            results = []
-            for cid in customer_ids:
-                set_rls_context(conn, cid)
-                customer_results = []
-                for ctrl in ALL_CONTROLS:
-                    collector = CONTROL_COLLECTOR_MAP.get(ctrl)
-                    if collector:
-                        try:
-                            result = collector(conn, cid, request_id)
-                            customer_results.append(result)
-                        except Exception as exc:
-                            logger.error("Control %s failed for %s: %s", ctrl, cid, exc)
+            for start in range(0, len(customer_ids), COLLECTION_CHUNK_SIZE):
+                batch = new_signing_batch(_vault_target(), EVIDENCE_SIGNING_MODE, request_id)
+                for cid in customer_ids[start:start + COLLECTION_CHUNK_SIZE]:
+                    set_rls_context(conn, cid)
+                    _collect_controls(conn, cid, ALL_CONTROLS, request_id, batch)
+                    if batch is None:
+                        conn.commit()
+                # In merkle mode the chunk's evidence commits with its signatures.
+                _record_batch_signatures(conn, batch)
                 conn.commit()
-                results.append({"customer_id": cid, "controls": customer_results})
             return {"statusCode": 200, "customers_processed": len(customer_ids)}
 
         # ── HTTP: on-demand collection ─────────────────────────────────────
@@ -916,6 +1290,10 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             for field in required:
                 if not body.get(field):
                     return _http_response(400, {"error": f"{field} is required"})
+            if body.get("format") not in (None,) + EXPORT_FORMATS:
+                return _http_response(
+                    400, {"error": "format must be 'ndjson', 'parquet' or 'json'"}
+                )
             result = generate_examiner_export(
                 conn,
                 customer_id,
@@ -924,6 +1302,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 body.get("examiner_name", ""),
                 body.get("examiner_email", ""),
                 request_id,
+                body.get("format"),
             )
             conn.commit()
             return _http_response(200, result)
@@ -941,16 +1320,9 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         if not controls_to_run:
             return _http_response(400, {"error": "No valid controls specified"})
 
-        results = []
-        for ctrl in controls_to_run:
-            collector = CONTROL_COLLECTOR_MAP[ctrl]
-            try:
-                result = collector(conn, customer_id, request_id)
-                results.append(result)
-            except Exception as exc:
-                logger.error("Control %s failed: %s", ctrl, exc)
-                results.append({"control_id": ctrl, "error": str(exc)})
-
+        batch = new_signing_batch(_vault_target(), EVIDENCE_SIGNING_MODE, request_id)
+        results = _collect_controls(conn, customer_id, controls_to_run, request_id, batch)
+        _record_batch_signatures(conn, batch)
         conn.commit()
         return _http_response(200, {
             "customer_id": customer_id,
@@ -966,3 +1338,5 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             except Exception:
                 pass
         return _http_response(500, {"error": "Internal server error", "message": str(exc)})
+    finally:
+        release_connection(conn)
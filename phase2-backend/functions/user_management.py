@@ -30,12 +30,12 @@ import os
 import sys
 import json
 import logging
+import math
 import hashlib
 import secrets
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
-import bcrypt
 import boto3
 from botocore.exceptions import ClientError
 
@@ -45,6 +45,7 @@ from db_utils import (
     get_connection, release_connection, execute_query, query_all, query_one,
     DatabaseError
 )
+from password_hashing import PASSWORD_HASH_QUEUE_SECONDS, PasswordHashBusy, hash_password
 
 logger = logging.getLogger(__name__)
 logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
@@ -157,6 +158,14 @@ def create_user(customer_id: str, current_user_id: str, current_user_role: str,
     if current_user_role == 'manager' and role == 'admin':
         return error_response(403, 'Forbidden: Managers cannot create admin users')
     
+    # Generate temporary password (hashed before taking a DB connection)
+    temp_password = secrets.token_urlsafe(16)
+    try:
+        password_hash = hash_password(temp_password)
+    except PasswordHashBusy:
+        logger.warning('Password hashing capacity exhausted, rejecting request')
+        return hash_busy_response()
+    
     conn = None
     try:
         conn = get_connection()
@@ -176,10 +185,6 @@ def create_user(customer_id: str, current_user_id: str, current_user_role: str,
         if cursor.fetchone():
             return error_response(409, 'User with this email already exists')
         
-        # Generate temporary password
-        temp_password = secrets.token_urlsafe(16)
-        password_hash = bcrypt.hashpw(temp_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        
         # Create user
         cursor.execute("""
             INSERT INTO users (
@@ -549,6 +554,14 @@ def update_user_role(customer_id: str, current_user_id: str, current_user_role:
         cursor.execute("DELETE FROM user_permissions WHERE user_id = %s", (user_id,))
         assign_default_permissions(cursor, customer_id, user_id, new_role, current_user_id)
         
+        # Sessions carry the role as a signed claim, so end them
+        cursor.execute("""
+            UPDATE user_sessions
+            SET is_active = false, logged_out_at = CURRENT_TIMESTAMP,
+                logout_reason = 'role_changed'
+            WHERE user_id = %s AND is_active = true
+        """, (user_id,))
+        
         # Log activity
         cursor.execute("""
             INSERT INTO activity_feed (
@@ -619,14 +632,15 @@ def update_user_status(customer_id: str, current_user_id: str, current_user_role
         if not row:
             return error_response(404, 'User not found')
         
-        # If suspending, invalidate all sessions
-        if new_status == 'suspended':
+        # If suspending or deactivating, invalidate all sessions (signed
+        # session tokens are only re-checked against users on revocation)
+        if new_status != 'active':
             cursor.execute("""
                 UPDATE user_sessions
                 SET is_active = false, logged_out_at = CURRENT_TIMESTAMP,
-                    logout_reason = 'account_suspended'
+                    logout_reason = %s
                 WHERE user_id = %s AND is_active = true
-            """, (user_id,))
+            """, (f'account_{new_status}', user_id))
         
         # Log activity
         cursor.execute("""
@@ -747,6 +761,14 @@ def reset_user_password(customer_id: str, current_user_id: str, current_user_rol
     if current_user_id != user_id and current_user_role not in ['admin', 'manager']:
         return error_response(403, 'Forbidden: Cannot reset other users\' passwords')
     
+    # Generate new temporary password (hashed before taking a DB connection)
+    temp_password = secrets.token_urlsafe(16)
+    try:
+        password_hash = hash_password(temp_password)
+    except PasswordHashBusy:
+        logger.warning('Password hashing capacity exhausted, rejecting request')
+        return hash_busy_response()
+    
     conn = None
     try:
         conn = get_connection()
@@ -770,10 +792,6 @@ def reset_user_password(customer_id: str, current_user_id: str, current_user_rol
         user_email = row[0]
         user_name = row[1]
         
-        # Generate new temporary password
-        temp_password = secrets.token_urlsafe(16)
-        password_hash = bcrypt.hashpw(temp_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        
         # Update password
         cursor.execute("""
             UPDATE users
@@ -1039,3 +1057,10 @@ def error_response(status_code: int, message: str) -> Dict:
         },
         'body': json.dumps({'error': message})
     }
+
+
+def hash_busy_response() -> Dict:
+    """503 for requests turned away by the bounded password hashing pool."""
+    response = error_response(503, 'Too many concurrent requests, please retry')
+    response['headers']['Retry-After'] = str(math.ceil(PASSWORD_HASH_QUEUE_SECONDS))
+    return response
@@ -0,0 +1,337 @@
+"""
+Two-tier cache for analytics query results
+
+Warm Lambda containers serve the same dashboard keys over and over, so
+results are held in a bounded in-process LRU in front of the shared
+DynamoDB cache table (securebase-<env>-report-cache, hash key cache_key,
+TTL attribute ttl):
+
+    cache = TieredCache(cache_table)
+    key = canonical_cache_key(customer_id, 'usage', {'period': '30d'})
+    result = cache.get_or_compute(key, lambda: build_usage(...),
+                                  is_negative=lambda r: not r['metrics'])
+
+- Local tier: OrderedDict LRU bounded by entry count and approximate
+  JSON size, with its own short TTL so a container never serves a value
+  longer than LOCAL_TTL_SECONDS after another container refreshed it.
+- Keys: canonical_cache_key() sorts and normalizes params before
+  hashing, so {'period': '30d', 'x': ''} and {'x': None, 'period': ' 30d'}
+  land on the same entry.
+- Negative caching: results the caller marks as negative (no data yet)
+  are cached for NEGATIVE_TTL_SECONDS only, so a new tenant's first
+  metrics show up quickly without every request re-querying.
+- Stampede protection: on a miss in both tiers the first caller takes a
+  short lease item (lease#<key>) with a conditional put; others poll the
+  shared tier for up to LEASE_WAIT_SECONDS before computing themselves.
+- Counters: hit/miss/eviction counts accumulate per invocation and are
+  emitted with emit_cache_metrics() as one CloudWatch Embedded Metric
+  Format log line, which costs no API call on the request path.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger()
+
+CACHE_KEY_VERSION = 'v2'
+LOCAL_MAX_ENTRIES = int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', '256'))
+LOCAL_MAX_BYTES = int(os.environ.get('CACHE_LOCAL_MAX_BYTES', str(16 * 1024 * 1024)))
+LOCAL_TTL_SECONDS = int(os.environ.get('CACHE_LOCAL_TTL_SECONDS', '60'))
+NEGATIVE_TTL_SECONDS = int(os.environ.get('CACHE_NEGATIVE_TTL_SECONDS', '60'))
+LEASE_SECONDS = int(os.environ.get('CACHE_LEASE_SECONDS', '10'))
+LEASE_WAIT_SECONDS = float(os.environ.get('CACHE_LEASE_WAIT_SECONDS', '2'))
+LEASE_POLL_SECONDS = 0.1
+METRICS_NAMESPACE = os.environ.get('CACHE_METRICS_NAMESPACE', 'SecureBase/AnalyticsCache')
+
+# Per-invocation counters, reset by emit_cache_metrics()
+counters: Counter = Counter()
+
+
+def _json_default(obj):
+    if isinstance(obj, Decimal):
+        return float(obj) if obj % 1 else int(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _normalize(value: Any) -> Any:
+    """Normalize a param value so equivalent requests compare equal."""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items() if v not in (None, '')}
+    if isinstance(value, (list, tuple, set)):
+        items = [_normalize(v) for v in value]
+        return sorted(items, key=str) if isinstance(value, set) else items
+    return value
+
+
+def canonical_cache_key(customer_id: str, query_type: str, params: Optional[Dict] = None) -> str:
+    """
+    Stable cache key for a tenant query
+
+    Params are normalized (strings stripped, None/empty values dropped,
+    sets sorted) and serialized with sorted keys before hashing, so the
+    key does not depend on dict or query-string order.  The tenant and
+    query type stay readable in the key for debugging and are part of the
+    hashed material, so tenants can never share an entry.
+    """
+    canonical = json.dumps(
+        {'customer_id': customer_id, 'query': query_type, 'params': _normalize(params or {})},
+        sort_keys=True,
+        separators=(',', ':'),
+        default=_json_default,
+    )
+    digest = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    return f"{CACHE_KEY_VERSION}:{query_type}:{customer_id}:{digest}"
+
+
+class LocalLRU:
+    """In-process LRU bounded by entry count and approximate byte size, with TTL."""
+
+    def __init__(self, max_entries: int = LOCAL_MAX_ENTRIES, max_bytes: int = LOCAL_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: 'OrderedDict[str, Tuple[float, Any, int, bool]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """Return (value, negative) or None when absent or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value, size, negative = entry
+        if expires <= time.monotonic():
+            self._drop(key)
+            counters['local_expired'] += 1
+            return None
+        self._entries.move_to_end(key)
+        return value, negative
+
+    def put(self, key: str, value: Any, ttl: float, negative: bool = False, size: Optional[int] = None):
+        if size is None:
+            size = len(json.dumps(value, default=_json_default))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + ttl, value, size, negative)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            counters['local_evictions'] += 1
+
+    def invalidate(self, key: str):
+        if key in self._entries:
+            self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def _drop(self, key: str):
+        self.bytes -= self._entries.pop(key)[2]
+
+
+class TieredCache:
+    """LocalLRU in front of the DynamoDB cache table."""
+
+    def __init__(
+        self,
+        table,
+        ttl: int = 3600,
+        local_ttl: int = LOCAL_TTL_SECONDS,
+        negative_ttl: int = NEGATIVE_TTL_SECONDS,
+        local: Optional[LocalLRU] = None,
+    ):
+        self.table = table
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.negative_ttl = negative_ttl
+        self.local = local if local is not None else LocalLRU()
+
+    # ── reads ────────────────────────────────────────────────────────────
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value from either tier, or None on a miss."""
+        found = self._lookup(key)
+        return found[0] if found else None
+
+    def _lookup(self, key: str) -> Optional[Tuple[Any, bool]]:
+        local = self.local.get(key)
+        if local is not None:
+            counters['negative_hits' if local[1] else 'local_hits'] += 1
+            return local
+
+        item = self._get_item(key)
+        if item is None:
+            counters['misses'] += 1
+            return None
+        return self._promote(key, item)
+
+    def _promote(self, key: str, item: Dict) -> Tuple[Any, bool]:
+        """Copy a shared-tier item into the local tier, never past its own TTL."""
+        negative = bool(item.get('negative'))
+        remaining = int(item['ttl']) - time.time()
+        self.local.put(key, item.get('data'), min(self.local_ttl, remaining), negative)
+        counters['negative_hits' if negative else 'remote_hits'] += 1
+        return item.get('data'), negative
+
+    def _get_item(self, key: str) -> Optional[Dict]:
+        """Unexpired DynamoDB item for ``key``, tolerating legacy expires_at items."""
+        try:
+            item = self.table.get_item(Key={'cache_key': key}).get('Item')
+        except Exception as e:
+            logger.warning(f"Cache get error: {str(e)}")
+            counters['remote_errors'] += 1
+            return None
+        if not item:
+            return None
+        if 'ttl' not in item and item.get('expires_at'):
+            try:
+                item['ttl'] = datetime.fromisoformat(item['expires_at']).timestamp()
+            except (ValueError, TypeError):
+                return None
+        if int(item.get('ttl', 0)) <= time.time():
+            return None
+        return item
+
+    # ── writes ───────────────────────────────────────────────────────────
+
+    def put(self, key: str, data: Any, ttl: Optional[int] = None, negative: bool = False):
+        """Store ``data`` in both tiers; negative results get negative_ttl."""
+        ttl = self.negative_ttl if negative else (ttl or self.ttl)
+        encoded = json.dumps(data, default=_json_default)
+        self.local.put(key, data, min(self.local_ttl, ttl), negative, size=len(encoded))
+        now = datetime.utcnow()
+        item = {
+            'cache_key': key,
+            # DynamoDB rejects floats; round-trip through JSON as Decimals
+            'data': json.loads(encoded, parse_float=Decimal),
+            'created_at': now.isoformat(),
+            'expires_at': (now + timedelta(seconds=ttl)).isoformat(),
+            'ttl': int(time.time()) + ttl,
+        }
+        if negative:
+            item['negative'] = True
+        try:
+            self.table.put_item(Item=item)
+            counters['stores'] += 1
+        except Exception as e:
+            logger.warning(f"Cache put error: {str(e)}")
+            counters['remote_errors'] += 1
+
+    def invalidate(self, key: str):
+        self.local.invalidate(key)
+        try:
+            self.table.delete_item(Key={'cache_key': key})
+        except Exception as e:
+            logger.warning(f"Cache delete error: {str(e)}")
+
+    # ── read-through with stampede protection ────────────────────────────
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        ttl: Optional[int] = None,
+        is_negative: Callable[[Any], bool] = lambda result: result is None,
+    ) -> Any:
+        """
+        Cached value for ``key``, computing and storing it on a miss
+
+        Only the caller holding the lease computes; concurrent callers
+        wait for its result in the shared tier and fall back to computing
+        themselves if it does not appear within LEASE_WAIT_SECONDS.
+        """
+        found = self._lookup(key)
+        if found:
+            return found[0]
+
+        leased = self._acquire_lease(key)
+        if not leased:
+            counters['lease_waits'] += 1
+            deadline = time.monotonic() + LEASE_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(LEASE_POLL_SECONDS)
+                item = self._get_item(key)
+                if item is not None:
+                    return self._promote(key, item)[0]
+            counters['lease_timeouts'] += 1
+
+        try:
+            result = compute()
+            self.put(key, result, ttl, negative=is_negative(result))
+            return result
+        finally:
+            if leased:
+                self._release_lease(key)
+
+    def _acquire_lease(self, key: str) -> bool:
+        now = time.time()
+        try:
+            self.table.put_item(
+                Item={'cache_key': f"lease#{key}", 'lease_until': Decimal(str(now + LEASE_SECONDS)),
+                      'ttl': int(now) + LEASE_SECONDS * 6},
+                ConditionExpression='attribute_not_exists(cache_key) OR lease_until < :now',
+                ExpressionAttributeValues={':now': Decimal(str(now))},
+            )
+            return True
+        except Exception as e:
+            code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+            if code == 'ConditionalCheckFailedException':
+                return False
+            # Lease table trouble must not block the request
+            logger.warning(f"Cache lease error: {str(e)}")
+            return True
+
+    def _release_lease(self, key: str):
+        try:
+            self.table.delete_item(Key={'cache_key': f"lease#{key}"})
+        except Exception as e:
+            logger.warning(f"Cache lease release error: {str(e)}")
+
+
+def emit_cache_metrics(function_name: str, local: Optional[LocalLRU] = None) -> Dict[str, int]:
+    """
+    Log this invocation's cache counters as a CloudWatch EMF record and reset them
+
+    Returns the counters that were emitted.
+    """
+    emitted = dict(counters)
+    counters.clear()
+    if local is not None:
+        emitted['local_entries'] = len(local)
+        emitted['local_bytes'] = local.bytes
+    if not emitted:
+        return emitted
+    names = sorted(emitted)
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['FunctionName']],
+                'Metrics': [
+                    {'Name': name, 'Unit': 'Bytes' if name == 'local_bytes' else 'Count'}
+                    for name in names
+                ],
+            }],
+        },
+        'FunctionName': function_name,
+        **{name: emitted[name] for name in names},
+    }
+    print(json.dumps(record))
+    return emitted
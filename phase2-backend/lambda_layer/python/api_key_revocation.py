@@ -0,0 +1,44 @@
+"""
+API key revocation version
+
+The auth authorizer keeps verified API keys in memory and in the DynamoDB
+session cache so that most calls never reach PostgreSQL.  Every cached
+entry is stamped with the revocation version current when the key was
+verified; anything that deactivates keys bumps the version, which makes
+every stamped entry stale at once:
+
+    cursor.execute("UPDATE api_keys SET is_active = false WHERE id = %s", ...)
+    conn.commit()
+    bump_revocation_version(cache_table)
+
+The version lives in the session cache table (hash key SessionId) under
+REVOCATION_VERSION_KEY.  Readers poll it at most every few seconds, so a
+revocation reaches every warm authorizer within that window.
+"""
+
+import logging
+
+logger = logging.getLogger()
+
+REVOCATION_VERSION_KEY = 'apikey#revocation-version'
+
+
+def read_revocation_version(table) -> int:
+    """Current revocation version (0 before any key was ever revoked)."""
+    item = table.get_item(
+        Key={'SessionId': REVOCATION_VERSION_KEY}, ConsistentRead=True
+    ).get('Item')
+    return int(item['Version']) if item else 0
+
+
+def bump_revocation_version(table) -> int:
+    """Atomically increment the revocation version and return the new value."""
+    response = table.update_item(
+        Key={'SessionId': REVOCATION_VERSION_KEY},
+        UpdateExpression='ADD Version :one',
+        ExpressionAttributeValues={':one': 1},
+        ReturnValues='UPDATED_NEW',
+    )
+    version = int(response['Attributes']['Version'])
+    logger.info(f"API key revocation version bumped to {version}")
+    return version
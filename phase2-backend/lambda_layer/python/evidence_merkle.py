@@ -0,0 +1,214 @@
+"""
+Merkle-batched evidence signing for the compliance collectors.
+
+Instead of one KMS Sign call per evidence item, a collector run builds a
+Merkle tree over the SHA-256 content hashes of everything it vaulted and
+signs only the root.  Each signature row stores the item's inclusion proof,
+so any single item can be checked against the signed root without KMS:
+
+    content_hash ──leaf──► proof ──► root ──► KMS signature (RSA PKCS#1 v1.5)
+
+Hashing follows RFC 6962: leaves and interior nodes use distinct one-byte
+prefixes, and an unpaired node is promoted to the next level unchanged
+rather than duplicated, so no two different leaf sets share a root.
+
+Offline verification
+--------------------
+    python evidence_merkle.py --public-key kms_public_key.der signature_row.json \\
+        [--evidence evidence.json]
+
+signature_row.json holds the content_hash, merkle_root, merkle_proof and
+kms_signature_b64 columns of a hipaa_evidence_signatures or
+tx_evidence_signatures row.  The public key is the DER (or PEM) output of
+``aws kms get-public-key``.  With --evidence, the vaulted S3 object is
+re-hashed and must match content_hash.
+"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import json
+import sys
+from typing import Any, Dict, List, Sequence
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+# Prepended to the root before signing so a root signature can never be
+# mistaken for a per-item signature over a bare content hash.
+ROOT_MESSAGE_PREFIX = "securebase-evidence-merkle-v1:"
+
+
+def leaf_hash(content_hash: str) -> bytes:
+    """Return the tree leaf for a hex SHA-256 content hash."""
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(content_hash)).digest()
+
+
+def _node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def root_message(root: str) -> bytes:
+    """Return the exact bytes that are KMS-signed for a Merkle root."""
+    return (ROOT_MESSAGE_PREFIX + root).encode()
+
+
+class MerkleTree:
+    """
+    Merkle tree over a sequence of hex content hashes.
+
+    Leaf order is the order of ``content_hashes``; ``proof(i)`` returns the
+    inclusion proof for the i-th hash.
+    """
+
+    def __init__(self, content_hashes: Sequence[str]):
+        if not content_hashes:
+            raise ValueError("Cannot build a Merkle tree with no leaves")
+        level = [leaf_hash(h) for h in content_hashes]
+        self._levels: List[List[bytes]] = [level]
+        while len(level) > 1:
+            level = [
+                _node_hash(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                for i in range(0, len(level), 2)
+            ]
+            self._levels.append(level)
+
+    def __len__(self) -> int:
+        return len(self._levels[0])
+
+    @property
+    def root(self) -> str:
+        """Hex digest of the root node."""
+        return self._levels[-1][0].hex()
+
+    def proof(self, index: int) -> List[Dict[str, str]]:
+        """
+        Return the inclusion proof for leaf ``index``.
+
+        Each step names a sibling hash and the side it sits on; levels where
+        the node is promoted without a sibling contribute no step.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(f"Leaf index {index} out of range for {len(self)} leaves")
+        steps: List[Dict[str, str]] = []
+        for level in self._levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                steps.append({
+                    "position": "left" if sibling < index else "right",
+                    "hash": level[sibling].hex(),
+                })
+            index //= 2
+        return steps
+
+
+def compute_root(content_hash: str, proof: List[Dict[str, str]]) -> str:
+    """Fold an inclusion proof over a content hash and return the hex root."""
+    node = leaf_hash(content_hash)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        if step["position"] == "left":
+            node = _node_hash(sibling, node)
+        elif step["position"] == "right":
+            node = _node_hash(node, sibling)
+        else:
+            raise ValueError(f"Invalid proof step position: {step['position']!r}")
+    return node.hex()
+
+
+def verify_inclusion(content_hash: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """Return True if ``proof`` places ``content_hash`` under ``root``."""
+    try:
+        computed = compute_root(content_hash, proof)
+    except (KeyError, TypeError, ValueError):
+        return False
+    return hmac.compare_digest(computed, root.lower())
+
+
+def verify_root_signature(root: str, signature_b64: str, public_key: bytes) -> bool:
+    """
+    Check a KMS RSASSA_PKCS1_V1_5_SHA_256 signature over a Merkle root.
+
+    Args:
+        root: Hex Merkle root
+        signature_b64: Base64 signature as stored in kms_signature_b64
+        public_key: DER or PEM SubjectPublicKeyInfo of the KMS signing key
+    """
+    # Lazy import — only the offline verifier needs cryptography; the
+    # collectors build trees and let KMS do the signing.
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import padding
+
+    if public_key.lstrip().startswith(b"-----BEGIN"):
+        key = serialization.load_pem_public_key(public_key)
+    else:
+        key = serialization.load_der_public_key(public_key)
+    try:
+        key.verify(
+            base64.b64decode(signature_b64),
+            root_message(root),
+            padding.PKCS1v15(),
+            hashes.SHA256(),
+        )
+    except InvalidSignature:
+        return False
+    return True
+
+
+def verify_signed_evidence(row: Dict[str, Any], public_key: bytes) -> bool:
+    """
+    Verify one signature row end to end: inclusion proof, then root signature.
+
+    Args:
+        row: Mapping with content_hash, merkle_root, merkle_proof and
+            kms_signature_b64 (merkle_proof may be a list or its JSON text)
+        public_key: DER or PEM public key of the KMS signing key
+    """
+    proof = row["merkle_proof"]
+    if isinstance(proof, str):
+        proof = json.loads(proof)
+    return (
+        verify_inclusion(row["content_hash"], proof, row["merkle_root"])
+        and verify_root_signature(row["merkle_root"], row["kms_signature_b64"], public_key)
+    )
+
+
+def evidence_content_hash(evidence: Any) -> str:
+    """Re-hash a vaulted evidence document the way the collectors do."""
+    payload = json.dumps(evidence, sort_keys=True, default=str).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Verify a Merkle-batched evidence signature offline."
+    )
+    parser.add_argument("row", help="JSON file with the signature row")
+    parser.add_argument("--public-key", required=True,
+                        help="KMS public key (DER or PEM) from 'aws kms get-public-key'")
+    parser.add_argument("--evidence", help="Vaulted evidence JSON to re-hash")
+    args = parser.parse_args(argv)
+
+    with open(args.row) as f:
+        row = json.load(f)
+    with open(args.public_key, "rb") as f:
+        public_key = f.read()
+
+    if args.evidence:
+        with open(args.evidence) as f:
+            actual = evidence_content_hash(json.load(f))
+        if not hmac.compare_digest(actual, row["content_hash"]):
+            print(f"FAIL: evidence hash {actual} does not match {row['content_hash']}")
+            return 1
+
+    if not verify_signed_evidence(row, public_key):
+        print("FAIL: inclusion proof or root signature is invalid")
+        return 1
+    print(f"OK: {row['content_hash']} is included in signed root {row['merkle_root']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Concurrent signing and vaulting of collector evidence.
+
+Shared by the HIPAA and Texas fintech collectors.  Collectors only run SQL
+and hash; an EvidenceVault queues the KMS signature and the S3 upload of
+each evidence payload on a bounded worker pool and, once every job for a
+customer has finished, bulk-inserts one signature row per vaulted item.
+
+In merkle signing mode a MerkleSigningBatch collects the vaulted items of a
+whole batch instead and signs only the Merkle root of their content hashes
+(see evidence_merkle.py); each signature row then carries the root
+signature plus the item's inclusion proof.
+
+Each collector describes where its evidence goes with a VaultTarget: its
+signature table, KMS key, signing and S3 helpers, worker pool and an
+optional precondition checked before anything is queued.
+"""
+
+import json
+import logging
+import threading
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2.extras
+
+from evidence_merkle import MerkleTree, root_message
+
+logger = logging.getLogger(__name__)
+
+_SIGNATURE_ROW_TEMPLATE = (
+    "(gen_random_uuid(), %s, %s, %s::UUID, %s, %s, %s, NOW(), %s,"
+    " %s, %s, %s, %s)"
+)
+
+
+class VaultTarget:
+    """
+    One collector's evidence destination.
+
+    Args:
+        signature_table: Table that receives the signature rows
+        kms_key_id: KMS key recorded against each signature
+        executor: Worker pool for KMS signing and S3 uploads
+        sign: Signs a hex content hash; returns the base64 signature
+        sign_message: Signs raw bytes (used for Merkle roots)
+        evidence_key: ``(customer_id, evidence_type, evidence_id) -> S3 key``
+        put_evidence: Writes one serialised evidence object to S3
+        vault_to_s3: Inline (unqueued) upload; returns the S3 key
+        record_signature: Inline single-row signature insert
+        pre_submit: Optional check run on the customer_id before queueing;
+            raises to refuse the evidence
+    """
+
+    def __init__(
+        self,
+        signature_table: str,
+        kms_key_id: str,
+        executor: Executor,
+        sign: Callable[[str], str],
+        sign_message: Callable[[bytes], str],
+        evidence_key: Callable[[str, str, str], str],
+        put_evidence: Callable[[str, bytes], None],
+        vault_to_s3: Callable[[str, str, str, Any], str],
+        record_signature: Callable[..., None],
+        pre_submit: Optional[Callable[[str], None]] = None,
+    ):
+        self.signature_table = signature_table
+        self.kms_key_id = kms_key_id
+        self.executor = executor
+        self.sign = sign
+        self.sign_message = sign_message
+        self.evidence_key = evidence_key
+        self.put_evidence = put_evidence
+        self.vault_to_s3 = vault_to_s3
+        self.record_signature = record_signature
+        self.pre_submit = pre_submit
+
+
+class EvidenceVault:
+    """
+    Pipeline stage that signs and vaults evidence off the collector's thread.
+
+    submit() serialises the payload and queues the KMS signature and the S3
+    upload on the target's worker pool, returning the object key immediately.
+    flush() waits for the queued jobs and writes one multi-row INSERT into
+    the target's signature table for every job that both signed and uploaded.
+
+    With a MerkleSigningBatch no per-item signature is requested: flush()
+    hands the uploaded jobs to the batch, which signs and records them once
+    for the whole batch.
+    """
+
+    def __init__(
+        self,
+        target: VaultTarget,
+        lambda_request_id: str,
+        executor: Optional[Executor] = None,
+        batch: Optional["MerkleSigningBatch"] = None,
+    ):
+        self.target = target
+        self.lambda_request_id = lambda_request_id
+        self._executor = executor or target.executor
+        self._batch = batch
+        self._pending: List[Tuple[Dict[str, str], Optional[Future], Future]] = []
+
+    def submit(
+        self,
+        customer_id: str,
+        evidence_type: str,
+        evidence_id: str,
+        content_hash: str,
+        payload: Any,
+    ) -> str:
+        """Queue signing and upload of one evidence payload; return its S3 key."""
+        if self.target.pre_submit is not None:
+            self.target.pre_submit(str(customer_id))
+        key = self.target.evidence_key(str(customer_id), evidence_type, evidence_id)
+        # Serialise now: collectors keep mutating the evidence dict after submit.
+        body = json.dumps(payload, default=str, indent=2).encode()
+        job = {
+            "customer_id": str(customer_id),
+            "evidence_type": evidence_type,
+            "evidence_id": str(evidence_id),
+            "content_hash": content_hash,
+            "s3_key": key,
+        }
+        sign = None
+        if self._batch is None:
+            sign = self._executor.submit(self.target.sign, content_hash)
+        upload = self._executor.submit(self.target.put_evidence, key, body)
+        self._pending.append((job, sign, upload))
+        return key
+
+    def flush(self, conn) -> List[Dict[str, str]]:
+        """
+        Wait for all queued jobs and bulk-insert their signature rows
+        (or, in merkle mode, add them to the signing batch).
+
+        Returns:
+            One dict per failed job (evidence_type, evidence_id, s3_key, error).
+            Failed jobs get no signature row.
+        """
+        pending, self._pending = self._pending, []
+        rows: List[Tuple[Any, ...]] = []
+        uploaded: List[Dict[str, str]] = []
+        failures: List[Dict[str, str]] = []
+        for job, sign, upload in pending:
+            try:
+                upload.result()
+                kms_sig = sign.result() if sign else ""
+            except Exception as exc:
+                logger.error(
+                    "Vaulting %s/%s failed: %s",
+                    job["evidence_type"], job["evidence_id"], exc,
+                )
+                failures.append({
+                    "evidence_type": job["evidence_type"],
+                    "evidence_id": job["evidence_id"],
+                    "s3_key": job["s3_key"],
+                    "error": str(exc),
+                })
+                continue
+            uploaded.append(job)
+            rows.append((
+                job["customer_id"],
+                job["evidence_type"],
+                job["evidence_id"],
+                job["content_hash"],
+                self.target.kms_key_id,
+                kms_sig,
+                self.lambda_request_id,
+                None,
+                None,
+                None,
+                None,
+            ))
+
+        if self._batch is not None:
+            self._batch.add(uploaded)
+        else:
+            write_signature_rows(conn, self.target.signature_table, rows)
+        return failures
+
+
+class MerkleSigningBatch:
+    """
+    Vaulted evidence awaiting a single Merkle-root signature.
+
+    Vaults add their uploaded jobs as each customer finishes; sign() builds the
+    Merkle tree over every content hash in the batch, makes the one KMS call and
+    returns the signature rows grouped by customer for RLS-scoped inserts.
+    """
+
+    def __init__(self, target: VaultTarget, lambda_request_id: str):
+        self.target = target
+        self.lambda_request_id = lambda_request_id
+        self._lock = threading.Lock()
+        self._jobs: List[Dict[str, str]] = []
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def add(self, jobs: List[Dict[str, str]]) -> None:
+        with self._lock:
+            self._jobs.extend(jobs)
+
+    def sign(self) -> Dict[str, List[Tuple[Any, ...]]]:
+        """Sign the batch's Merkle root; return signature rows per customer."""
+        with self._lock:
+            jobs, self._jobs = self._jobs, []
+        if not jobs:
+            return {}
+        tree = MerkleTree([job["content_hash"] for job in jobs])
+        root_sig = kms_sign_merkle_root(self.target, tree.root)
+        logger.info("Signed Merkle root %s over %d evidence items", tree.root, len(tree))
+
+        rows: Dict[str, List[Tuple[Any, ...]]] = {}
+        for index, job in enumerate(jobs):
+            rows.setdefault(job["customer_id"], []).append((
+                job["customer_id"],
+                job["evidence_type"],
+                job["evidence_id"],
+                job["content_hash"],
+                self.target.kms_key_id,
+                root_sig,
+                self.lambda_request_id,
+                tree.root,
+                psycopg2.extras.Json(tree.proof(index)),
+                index,
+                len(tree),
+            ))
+        return rows
+
+
+def kms_sign_merkle_root(target: VaultTarget, root: str) -> str:
+    """Sign a Merkle root with the target's KMS key; return base64 signature."""
+    return target.sign_message(root_message(root))
+
+
+def new_signing_batch(
+    target: VaultTarget, mode: str, lambda_request_id: str
+) -> Optional[MerkleSigningBatch]:
+    """Return a new signing batch, or None in per-item signing mode."""
+    if mode == "merkle":
+        return MerkleSigningBatch(target, lambda_request_id)
+    return None
+
+
+def write_signature_rows(conn, table: str, rows: List[Tuple[Any, ...]]) -> None:
+    """Bulk-insert signature rows (as built by the vault or batch) into ``table``."""
+    if not rows:
+        return
+    with conn.cursor() as cur:
+        psycopg2.extras.execute_values(
+            cur,
+            f"""
+            INSERT INTO {table}
+              (id, customer_id, evidence_type, evidence_id, content_hash,
+               kms_key_id, kms_signature_b64, signed_at, lambda_request_id,
+               merkle_root, merkle_proof, merkle_leaf_index, merkle_leaf_count)
+            VALUES %s
+            """,
+            rows,
+            template=_SIGNATURE_ROW_TEMPLATE,
+        )
+
+
+def sign_and_vault(
+    target: VaultTarget,
+    conn,
+    customer_id: str,
+    evidence_type: str,
+    evidence_id: str,
+    content_hash: str,
+    evidence: Dict[str, Any],
+    request_id: str,
+    vault: Optional[EvidenceVault] = None,
+) -> str:
+    """Sign, vault and record one evidence payload; return its S3 key.
+
+    With a vault the work is queued and recorded at the vault's next flush();
+    without one it runs inline on the caller's connection.
+    """
+    if vault is not None:
+        return vault.submit(customer_id, evidence_type, evidence_id, content_hash, evidence)
+    kms_sig = target.sign(content_hash)
+    s3_key = target.vault_to_s3(str(customer_id), evidence_type, evidence_id, evidence)
+    target.record_signature(conn, customer_id, evidence_type, evidence_id, content_hash, kms_sig, request_id)
+    return s3_key
@@ -0,0 +1,227 @@
+"""
+Single-pass aggregation kernel for analytics metric rows.
+
+Metric rows arrive from DynamoDB as dicts of Decimals.  MetricColumns
+converts them once into parallel columns (array('d') for values, lists for
+group keys), and aggregate() then computes every requested group-by,
+the overall totals and the half-over-half trend per key from those columns
+in a single grouping pass:
+
+    columns = MetricColumns.from_rows(rows, value_fields=('cost', 'usage'),
+                                      key_fields=('service',))
+    result = aggregate(columns, group_by=('service',))
+    result['totals']['cost'], result['groups']['service']['lambda']['usage']
+
+Rows are assigned once to a bucket on the tuple of all requested keys;
+each value column is then summed into those buckets in one tight loop, and
+the per-dimension groups are rolled up from the few buckets afterwards.
+Trends need per-key sample order, so trend values are appended to one
+array per trend key and split at the midpoint at the end.  Rows are taken
+in the order given (DynamoDB returns them in timestamp order).
+
+There is no numpy in the Lambda layer, so columns are stdlib array('d')
+and the loops are plain Python kept free of per-row dict access.
+
+See tests/performance/benchmark_metrics_kernel.py for a 1M-row comparison
+with the per-function loops this replaces.
+"""
+
+from array import array
+from collections import Counter
+from decimal import Context, Decimal
+from math import fsum
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+DEFAULT_KEY = 'unknown'
+
+
+class MetricColumns:
+    """Metric rows held as parallel columns, converted from dicts exactly once."""
+
+    def __init__(
+        self,
+        size: int,
+        values: Dict[str, array],
+        keys: Dict[str, List[str]],
+        counts: Optional[array] = None,
+        timestamps: Optional[List[str]] = None,
+    ):
+        self.size = size
+        self.values = values
+        self.keys = keys
+        self.counts = counts
+        self.timestamps = timestamps or []
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Mapping[str, Any]],
+        value_fields: Sequence[str],
+        key_fields: Sequence[str] = (),
+        count_field: Optional[str] = None,
+        time_field: Optional[str] = None,
+    ) -> 'MetricColumns':
+        """
+        Build columns from metric rows.
+
+        Missing values count as 0 and missing keys as 'unknown'.  When
+        ``count_field`` is set each row stands for that many samples (e.g.
+        rollup rows); otherwise every row counts once.  ``time_field`` is
+        only collected when given, for first_ts/last_ts.
+        """
+        rows = rows if isinstance(rows, list) else list(rows)
+        values = {
+            field: array('d', [float(row.get(field) or 0) for row in rows])
+            for field in value_fields
+        }
+        keys = {
+            field: [row.get(field) or DEFAULT_KEY for row in rows]
+            for field in key_fields
+        }
+        counts = (
+            array('d', [float(row.get(count_field, 1) or 0) for row in rows])
+            if count_field else None
+        )
+        timestamps = [row.get(time_field) for row in rows] if time_field else None
+        return cls(len(rows), values, keys, counts, timestamps)
+
+
+def _bucket_sums(ids: List[int], column: array, buckets: int) -> List[float]:
+    """Sum ``column`` into ``buckets`` accumulators by per-row bucket id."""
+    acc = [0.0] * buckets
+    for bucket, value in zip(ids, column):
+        acc[bucket] += value
+    return acc
+
+
+def _half_over_half(samples: array) -> Dict[str, Any]:
+    """First-half vs second-half average of a key's samples, in row order."""
+    count = len(samples)
+    if count < 2:
+        return {'count': count, 'first_half_avg': None, 'second_half_avg': None, 'change_pct': None}
+    mid = count // 2
+    first_sum = sum(samples[:mid])
+    first_avg = first_sum / mid
+    second_avg = (sum(samples) - first_sum) / (count - mid)
+    change = ((second_avg - first_avg) / first_avg) * 100 if first_avg else None
+    return {
+        'count': count,
+        'first_half_avg': first_avg,
+        'second_half_avg': second_avg,
+        'change_pct': change,
+    }
+
+
+def aggregate(
+    columns: MetricColumns,
+    group_by: Sequence[str] = (),
+    trend_by: Optional[str] = None,
+    trend_field: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Compute totals, every ``group_by`` breakdown and per-key trends together.
+
+    Returns::
+
+        {
+          'count': samples,                       # sum of counts
+          'totals': {field: sum},
+          'groups': {dimension: {key: {'count': n, field: sum, ...}}},
+          'trends': {trend key: {'count', 'first_half_avg', 'second_half_avg', 'change_pct'}},
+          'first_ts': earliest timestamp, 'last_ts': latest timestamp,
+        }
+
+    ``trend_field`` defaults to the first value field; trends are only
+    computed when ``trend_by`` is given.
+    """
+    fields = list(columns.values)
+    dimensions = list(group_by)
+    if trend_by and trend_by not in dimensions:
+        dimensions.append(trend_by)
+
+    # Assign every row to the bucket of its combined key; all breakdowns
+    # are rolled up from these buckets, so rows are grouped exactly once.
+    bucket_index: Dict[tuple, int] = {}
+    assign = bucket_index.setdefault
+    if dimensions:
+        combined = zip(*(columns.keys[dimension] for dimension in dimensions))
+        ids = [assign(key, len(bucket_index)) for key in combined]
+    else:
+        bucket_index[()] = 0
+        ids = [0] * columns.size
+
+    # Column-wise reductions: one tight loop per column, no per-row dicts
+    if columns.counts is None:
+        tally = Counter(ids)
+        counts = [float(tally[bucket]) for bucket in range(len(bucket_index))]
+    else:
+        counts = _bucket_sums(ids, columns.counts, len(bucket_index))
+    sums = {field: _bucket_sums(ids, columns.values[field], len(bucket_index)) for field in fields}
+
+    totals = {field: fsum(sums[field]) for field in fields}
+    total_count = fsum(counts)
+    groups: Dict[str, Dict[Any, Dict[str, float]]] = {dimension: {} for dimension in group_by}
+    for key, bucket in bucket_index.items():
+        for position, dimension in enumerate(group_by):
+            group = groups[dimension].get(key[position])
+            if group is None:
+                group = groups[dimension][key[position]] = dict.fromkeys(['count'] + fields, 0.0)
+            group['count'] += counts[bucket]
+            for field in fields:
+                group[field] += sums[field][bucket]
+
+    trends: Dict[Any, Dict[str, Any]] = {}
+    if trend_by:
+        # Per-key samples in row order, split at each key's midpoint
+        position = dimensions.index(trend_by)
+        trend_of_bucket = [None] * len(bucket_index)
+        for key, bucket in bucket_index.items():
+            trend_of_bucket[bucket] = key[position]
+        samples: Dict[Any, array] = {key: array('d') for key in set(trend_of_bucket)}
+        appenders = [samples[key].append for key in trend_of_bucket]
+        for bucket, value in zip(ids, columns.values[trend_field or fields[0]]):
+            appenders[bucket](value)
+        trends = {key: _half_over_half(values) for key, values in samples.items()}
+
+    present = [ts for ts in columns.timestamps if ts]
+    return {
+        'count': int(total_count) if total_count.is_integer() else total_count,
+        'totals': totals,
+        'groups': groups,
+        'trends': trends,
+        'first_ts': min(present) if present else None,
+        'last_ts': max(present) if present else None,
+    }
+
+
+def aggregate_rows(
+    rows: Iterable[Mapping[str, Any]],
+    value_fields: Sequence[str],
+    group_by: Sequence[str] = (),
+    trend_by: Optional[str] = None,
+    trend_field: Optional[str] = None,
+    count_field: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Convert ``rows`` to columns and aggregate them; see aggregate()."""
+    key_fields = list(group_by)
+    if trend_by and trend_by not in key_fields:
+        key_fields.append(trend_by)
+    columns = MetricColumns.from_rows(rows, value_fields, key_fields, count_field)
+    return aggregate(columns, group_by, trend_by, trend_field)
+
+
+def to_decimal(value: float, digits: int = 12) -> Decimal:
+    """
+    Decimal for a kernel float, for callers that keep Decimal outputs.
+
+    Rounded to ``digits`` significant digits so float summation noise
+    (74326.4199999999) does not leak into reports built from 2-decimal
+    DynamoDB values.
+    """
+    rounded = Context(prec=digits).create_decimal(repr(value))
+    if rounded == rounded.to_integral_value():
+        return rounded.quantize(Decimal(1))
+    return rounded.normalize()
@@ -0,0 +1,427 @@
+"""
+Shared access layer for the analytics metrics table.
+
+Raw metric rows live under ``customer_id`` / ``timestamp``.  One aggregation
+run writes all its metrics with the same ISO timestamp, so a raw row's sort
+key is ``"<ISO timestamp>#<metric_name>"`` (raw_sort_key); readers get the
+plain ISO timestamp back.  Alongside them, analytics_aggregator maintains
+hourly and daily rollup items in separate partitions of the same table:
+
+    customer_id = "<customer_id>#rollup#hour"   timestamp = "2026-10-17T13:00:00"
+    customer_id = "<customer_id>#rollup#day"    timestamp = "2026-10-17T00:00:00"
+
+Each rollup item holds one summary per metric (sum, count, first/last value
+and timestamp, latest metadata, summed cost breakdown).  Rollup items carry
+no top-level service/region attribute, so they stay out of the table's GSIs.
+
+read_metric_summaries() covers a range with the coarsest buckets that fit
+inside it — daily rollups for whole days, hourly rollups for the whole
+hours at either edge — and reads raw rows only for the partial hours at the
+edges.  A 12-month query reads about 365 day items, at most 46 hour items
+and a handful of raw rows instead of every hourly raw row.
+
+Every query follows LastEvaluatedKey, so results are never truncated at
+DynamoDB's 1 MB page limit.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger()
+
+RAW = 'raw'
+HOUR = 'hour'
+DAY = 'day'
+
+BUCKET_SIZES = {HOUR: timedelta(hours=1), DAY: timedelta(days=1)}
+
+# Rollups outlive the ranges served from them: 90d queries read hourly
+# items at their start edge, 12m queries read daily items.
+ROLLUP_TTL = {HOUR: timedelta(days=100), DAY: timedelta(days=400)}
+
+# Attributes a summary needs from a raw row
+RAW_ATTRIBUTES = ('timestamp', 'metric_name', 'value', 'unit', 'service', 'region', 'metadata')
+
+_ROLLUP_WRITE_ATTEMPTS = 3
+_ONE_MICROSECOND = timedelta(microseconds=1)
+
+# Separates a raw row's timestamp from its metric name in the sort key.  The
+# upper bound of a range query appends _KEY_CEILING, the character after
+# _KEY_SEPARATOR: every "<end>#<metric>" key sorts below it, while any later
+# timestamp ("<end>.5", "<end>1") sorts above it.
+_KEY_SEPARATOR = '#'
+_KEY_CEILING = '$'
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Keys and buckets
+# ──────────────────────────────────────────────────────────────────────────────
+
+def rollup_partition(customer_id: str, granularity: str) -> str:
+    """Partition key of a customer's rollup items at ``granularity``."""
+    return f"{customer_id}#rollup#{granularity}"
+
+
+def raw_sort_key(timestamp: str, metric_name: str) -> str:
+    """Sort key of a raw metric row, unique per metric within a run."""
+    return f"{timestamp}{_KEY_SEPARATOR}{metric_name}"
+
+
+def raw_timestamp(sort_key: str) -> str:
+    """ISO timestamp of a raw row's sort key (plain keys are returned as-is)."""
+    return sort_key.split(_KEY_SEPARATOR, 1)[0]
+
+
+def _with_raw_timestamp(rows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    for row in rows:
+        if 'timestamp' in row:
+            row['timestamp'] = raw_timestamp(row['timestamp'])
+        yield row
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    """Start of the hour or day bucket containing ``ts``."""
+    floor = ts.replace(minute=0, second=0, microsecond=0)
+    if granularity == DAY:
+        floor = floor.replace(hour=0)
+    return floor
+
+
+def _bucket_ceil(ts: datetime, granularity: str) -> datetime:
+    floor = bucket_start(ts, granularity)
+    return floor if floor == ts else floor + BUCKET_SIZES[granularity]
+
+
+def plan_range(start: datetime, end: datetime) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Split the inclusive range [start, end] into (source, from, to) segments.
+
+    ``to`` is exclusive.  Sources are RAW (partial hours at either edge),
+    HOUR (whole hours outside whole days) and DAY (whole days).
+    """
+    stop = end + _ONE_MICROSECOND
+    first_hour = _bucket_ceil(start, HOUR)
+    last_hour = bucket_start(stop, HOUR)
+    if first_hour >= last_hour:
+        return [(RAW, start, stop)]
+
+    segments = []
+    if start < first_hour:
+        segments.append((RAW, start, first_hour))
+
+    first_day = _bucket_ceil(first_hour, DAY)
+    last_day = bucket_start(last_hour, DAY)
+    if first_day < last_day:
+        if first_hour < first_day:
+            segments.append((HOUR, first_hour, first_day))
+        segments.append((DAY, first_day, last_day))
+        if last_day < last_hour:
+            segments.append((HOUR, last_day, last_hour))
+    else:
+        segments.append((HOUR, first_hour, last_hour))
+
+    if last_hour < stop:
+        segments.append((RAW, last_hour, stop))
+    return segments
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Paginated queries
+# ──────────────────────────────────────────────────────────────────────────────
+
+def iter_query(table, **kwargs: Any) -> Iterator[Dict[str, Any]]:
+    """
+    Yield every item of ``table.query(**kwargs)``, following LastEvaluatedKey.
+    Stops if a page hands back the ExclusiveStartKey it was sent, so a
+    malformed response cannot loop until the Lambda times out.
+    """
+    while True:
+        response = table.query(**kwargs)
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            return
+        if last_key == kwargs.get('ExclusiveStartKey'):
+            logger.warning("Query returned the same LastEvaluatedKey twice; stopping pagination")
+            return
+        kwargs['ExclusiveStartKey'] = last_key
+
+
+def _projection(attributes: Sequence[str]) -> Tuple[str, Dict[str, str]]:
+    # Alias every attribute: timestamp and value are DynamoDB reserved words
+    names = {f"#a{i}": name for i, name in enumerate(attributes)}
+    return ', '.join(names), names
+
+
+def query_partition(
+    table,
+    partition: str,
+    start: datetime,
+    stop: datetime,
+    attributes: Optional[Sequence[str]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield items of ``partition`` with start <= timestamp < stop.
+
+    Matches both plain ISO sort keys (rollups) and raw_sort_key()s.
+    """
+    names = {'#pk': 'customer_id', '#ts': 'timestamp'}
+    kwargs: Dict[str, Any] = {
+        'KeyConditionExpression': '#pk = :pk AND #ts BETWEEN :start AND :end',
+        'ExpressionAttributeValues': {
+            ':pk': partition,
+            ':start': start.isoformat(),
+            ':end': (stop - _ONE_MICROSECOND).isoformat() + _KEY_CEILING,
+        },
+    }
+    if attributes:
+        projection, projected = _projection(attributes)
+        kwargs['ProjectionExpression'] = projection
+        names.update(projected)
+    kwargs['ExpressionAttributeNames'] = names
+    return iter_query(table, **kwargs)
+
+
+def query_raw_metrics(
+    table,
+    customer_id: str,
+    start: datetime,
+    end: datetime,
+    attributes: Optional[Sequence[str]] = RAW_ATTRIBUTES,
+) -> Iterator[Dict[str, Any]]:
+    """Yield raw metric rows with start <= timestamp <= end, all pages."""
+    return _with_raw_timestamp(
+        query_partition(table, customer_id, start, end + _ONE_MICROSECOND, attributes)
+    )
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Summaries
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _empty_summary() -> Dict[str, Any]:
+    return {
+        'sum': Decimal('0'),
+        'count': 0,
+        'first': None,
+        'first_ts': None,
+        'last': None,
+        'last_ts': None,
+        'last_metadata': {},
+        'breakdown': {},
+        'unit': '',
+        'service': '',
+        'region': '',
+    }
+
+
+def _to_decimal(value: Any) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value or 0))
+
+
+def _merge(target: Dict[str, Any], part: Mapping[str, Any]) -> None:
+    """Fold one summary (or a raw row converted to one) into ``target``."""
+    target['sum'] += _to_decimal(part['sum'])
+    target['count'] += int(part['count'])
+    if part.get('first_ts') and (target['first_ts'] is None or part['first_ts'] < target['first_ts']):
+        target['first'] = part.get('first')
+        target['first_ts'] = part['first_ts']
+    if part.get('last_ts') and (target['last_ts'] is None or part['last_ts'] >= target['last_ts']):
+        target['last'] = part.get('last')
+        target['last_ts'] = part['last_ts']
+        target['last_metadata'] = part.get('last_metadata') or {}
+    for key, amount in (part.get('breakdown') or {}).items():
+        target['breakdown'][key] = target['breakdown'].get(key, Decimal('0')) + _to_decimal(amount)
+    for key in ('unit', 'service', 'region'):
+        target[key] = part.get(key) or target[key]
+
+
+def row_summary(row: Mapping[str, Any]) -> Dict[str, Any]:
+    """Summary of a single raw metric row."""
+    value = _to_decimal(row.get('value'))
+    metadata = row.get('metadata') or {}
+    return {
+        'sum': value,
+        'count': 1,
+        'first': value,
+        'first_ts': row.get('timestamp'),
+        'last': value,
+        'last_ts': row.get('timestamp'),
+        'last_metadata': metadata,
+        'breakdown': dict(metadata.get('breakdown') or {}),
+        'unit': row.get('unit', ''),
+        'service': row.get('service', ''),
+        'region': row.get('region', ''),
+    }
+
+
+def read_metric_summaries(
+    table,
+    customer_id: str,
+    start: datetime,
+    end: datetime,
+    metric_names: Optional[Iterable[str]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Summarise every metric of ``customer_id`` over [start, end].
+
+    Returns metric_name -> summary.  Besides the fields of a rollup summary
+    each one carries ``series``: per-bucket {timestamp, sum, count} entries
+    in time order (one per raw row for the partial edge hours), for trends.
+    """
+    wanted = set(metric_names) if metric_names else None
+    summaries: Dict[str, Dict[str, Any]] = {}
+    items_read = 0
+
+    def fold(name: str, part: Mapping[str, Any], bucket_ts: str) -> None:
+        if wanted is not None and name not in wanted:
+            return
+        summary = summaries.get(name)
+        if summary is None:
+            summary = summaries[name] = dict(_empty_summary(), series=[])
+        _merge(summary, part)
+        summary['series'].append({
+            'timestamp': bucket_ts, 'sum': _to_decimal(part['sum']), 'count': int(part['count']),
+        })
+
+    for source, seg_start, seg_stop in plan_range(start, end):
+        if source == RAW:
+            rows = query_partition(table, customer_id, seg_start, seg_stop, RAW_ATTRIBUTES)
+            for row in _with_raw_timestamp(rows):
+                items_read += 1
+                if row.get('metric_name'):
+                    fold(row['metric_name'], row_summary(row), row.get('timestamp'))
+        else:
+            partition = rollup_partition(customer_id, source)
+            for item in query_partition(table, partition, seg_start, seg_stop, ('timestamp', 'metrics')):
+                items_read += 1
+                for name, part in (item.get('metrics') or {}).items():
+                    fold(name, part, item['timestamp'])
+
+    for summary in summaries.values():
+        summary['series'].sort(key=lambda point: point['timestamp'])
+    logger.info(
+        "Summarised %d metrics for customer %s from %d items", len(summaries), customer_id, items_read
+    )
+    return summaries
+
+
+# ──────────────────────────────────────────────────────────────────────────────
+# Rollup maintenance
+# ──────────────────────────────────────────────────────────────────────────────
+
+def _to_dynamo(value: Any) -> Any:
+    """Convert floats (e.g. in aggregator metadata) to Decimals for boto3."""
+    if isinstance(value, float):
+        return Decimal(str(value))
+    if isinstance(value, Mapping):
+        return {k: _to_dynamo(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_dynamo(v) for v in value]
+    return value
+
+
+def _rollup_item(
+    customer_id: str, granularity: str, start: datetime, metrics: Mapping[str, Any], through: str
+) -> Dict[str, Any]:
+    expires = start + ROLLUP_TTL[granularity]
+    return {
+        'customer_id': rollup_partition(customer_id, granularity),
+        'timestamp': start.isoformat(),
+        'granularity': granularity,
+        'updated_through': through,
+        'metrics': _to_dynamo(metrics),
+        'ttl': int((expires - datetime(1970, 1, 1)).total_seconds()),
+    }
+
+
+def _summarise_rows(rows: Iterable[Mapping[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        name = row.get('metric_name')
+        if name:
+            _merge(metrics.setdefault(name, _empty_summary()), row_summary(_to_dynamo(row)))
+    return metrics
+
+
+def update_rollups(table, customer_id: str, metrics: Sequence[Mapping[str, Any]], timestamp: str) -> None:
+    """
+    Fold one aggregation run's metric rows into their hour and day rollups.
+
+    All rows of a run share ``timestamp``.  Each bucket is read, merged and
+    written back conditionally on the ``updated_through`` value that was
+    read, so concurrent writers retry instead of losing updates, and a
+    replayed run (timestamp not newer than updated_through) is a no-op.
+    """
+    if not metrics:
+        return
+    run_at = datetime.fromisoformat(timestamp)
+    run_summary = _summarise_rows(metrics)
+
+    for granularity in (HOUR, DAY):
+        start = bucket_start(run_at, granularity)
+        key = {'customer_id': rollup_partition(customer_id, granularity), 'timestamp': start.isoformat()}
+        for attempt in range(_ROLLUP_WRITE_ATTEMPTS):
+            existing = table.get_item(Key=key, ConsistentRead=True).get('Item')
+            if existing and existing.get('updated_through', '') >= timestamp:
+                logger.info("Rollup %s %s already includes run %s", key['customer_id'], key['timestamp'], timestamp)
+                break
+
+            merged = {name: dict(part) for name, part in ((existing or {}).get('metrics') or {}).items()}
+            for name, part in run_summary.items():
+                if name in merged:
+                    merged[name]['breakdown'] = dict(merged[name].get('breakdown') or {})
+                    _merge(merged[name], part)
+                else:
+                    merged[name] = part
+
+            if existing:
+                condition = {
+                    'ConditionExpression': 'updated_through = :prev',
+                    'ExpressionAttributeValues': {':prev': existing['updated_through']},
+                }
+            else:
+                condition = {'ConditionExpression': 'attribute_not_exists(customer_id)'}
+            try:
+                table.put_item(
+                    Item=_rollup_item(customer_id, granularity, start, merged, timestamp), **condition
+                )
+                break
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+                logger.warning("Rollup %s %s changed concurrently, retrying", key['customer_id'], key['timestamp'])
+        else:
+            raise RuntimeError(f"Could not update {granularity} rollup for customer {customer_id}")
+
+
+def rebuild_rollups(table, customer_id: str, start: datetime, end: datetime) -> int:
+    """
+    Recompute the rollups of every whole day in [start, end] from raw rows.
+
+    Used to backfill history written before rollups existed and to repair
+    buckets after a failed aggregation run.  Items are overwritten, so the
+    rebuild is idempotent.  Returns the number of rollup items written.
+    """
+    first_day = bucket_start(start, DAY)
+    last_day = bucket_start(end, DAY) + BUCKET_SIZES[DAY]
+    rows = _with_raw_timestamp(query_partition(table, customer_id, first_day, last_day, RAW_ATTRIBUTES))
+
+    buckets: Dict[Tuple[str, datetime], List[Mapping[str, Any]]] = {}
+    for row in rows:
+        ts = datetime.fromisoformat(row['timestamp'])
+        for granularity in (HOUR, DAY):
+            buckets.setdefault((granularity, bucket_start(ts, granularity)), []).append(row)
+
+    written = 0
+    with table.batch_writer() as batch:
+        for (granularity, bucket), bucket_rows in sorted(buckets.items()):
+            metrics = _summarise_rows(bucket_rows)
+            through = max(row['timestamp'] for row in bucket_rows)
+            batch.put_item(Item=_rollup_item(customer_id, granularity, bucket, metrics, through))
+            written += 1
+    logger.info("Rebuilt %d rollup items for customer %s", written, customer_id)
+    return written
@@ -0,0 +1,100 @@
+"""
+Password hashing off the request's critical resources
+
+bcrypt is deliberately slow (~250ms at cost 12), so login paths must not
+hold a pooled database connection or an open transaction while it runs.
+Callers read what they need, release the connection, verify here, and
+only then take a connection again for the writes:
+
+    with borrow_connection() as conn:
+        user = ...                                   # read-only
+    if not verify_password(password, user['password_hash']):
+        ...
+    new_hash = rehash_if_needed(password, user['password_hash'])
+    with borrow_connection() as conn:
+        ...                                          # writes, incl. new_hash
+
+Hashes run on a small per-container thread pool (bcrypt releases the GIL),
+bounded by PASSWORD_HASH_CONCURRENCY; a request that cannot get a slot
+within PASSWORD_HASH_QUEUE_SECONDS gets PasswordHashBusy, which handlers
+turn into a 503 instead of queueing behind a login burst.
+
+BCRYPT_ROUNDS sets the cost for new hashes.  Hashes with a different cost
+are transparently rehashed on the next successful login.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import bcrypt
+
+logger = logging.getLogger()
+
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+PASSWORD_HASH_CONCURRENCY = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', str(os.cpu_count() or 2)))
+PASSWORD_HASH_QUEUE_SECONDS = float(os.environ.get('PASSWORD_HASH_QUEUE_SECONDS', '5'))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix='bcrypt')
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_CONCURRENCY * 2)
+
+
+class PasswordHashBusy(Exception):
+    """Too many hashes already queued in this container."""
+    pass
+
+
+def _run(fn, *args):
+    if not _slots.acquire(timeout=PASSWORD_HASH_QUEUE_SECONDS):
+        raise PasswordHashBusy('Password hashing capacity exhausted')
+    try:
+        return _executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
+    """bcrypt hash of ``password`` at ``rounds`` (default BCRYPT_ROUNDS)."""
+    salt = bcrypt.gensalt(rounds=rounds or BCRYPT_ROUNDS)
+    return _run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """True if ``password`` matches; malformed hashes never match."""
+    if not password_hash:
+        return False
+    try:
+        return _run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+    except ValueError:
+        logger.warning("Stored password hash is not a valid bcrypt hash")
+        return False
+
+
+def hash_rounds(password_hash: str) -> Optional[int]:
+    """Cost factor of a ``$2b$12$...`` hash, or None if it cannot be parsed."""
+    parts = (password_hash or '').split('$')
+    try:
+        return int(parts[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def needs_rehash(password_hash: str) -> bool:
+    return hash_rounds(password_hash) != BCRYPT_ROUNDS
+
+
+def rehash_if_needed(password: str, password_hash: str) -> Optional[str]:
+    """
+    New hash at the configured cost for a password that just verified, or
+    None when the stored one is already current.  Rehash failures are logged
+    and skipped; the old hash stays valid.
+    """
+    if not needs_rehash(password_hash):
+        return None
+    try:
+        return hash_password(password)
+    except Exception as e:
+        logger.warning(f"Password rehash skipped: {str(e)}")
+        return None
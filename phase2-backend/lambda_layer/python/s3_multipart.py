@@ -0,0 +1,104 @@
+"""
+Buffered S3 multipart upload writer.
+
+Shared by the evidence exports (evidence_export) and the report engine's
+asynchronous exports, which both stream output of unknown size to S3
+without holding it in memory.  Kept free of database imports so
+DynamoDB-only functions can use it.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger()
+
+# S3 rejects non-final parts smaller than 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+DEFAULT_PART_SIZE = 8 * 1024 * 1024
+
+
+class MultipartWriter:
+    """
+    Buffered writer onto an S3 multipart upload.
+
+    Bytes are uploaded as parts of ``part_size`` as soon as enough have been
+    written.  Used as a context manager the upload is completed on success
+    and aborted on error, so no orphaned parts are left billing storage.
+    """
+
+    def __init__(
+        self,
+        s3,
+        bucket: str,
+        key: str,
+        part_size: int = DEFAULT_PART_SIZE,
+        **create_kwargs: Any,
+    ):
+        if part_size < MIN_PART_SIZE:
+            raise ValueError(f"part_size must be at least {MIN_PART_SIZE} bytes")
+        self._s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self._part_size = part_size
+        self._create_kwargs = create_kwargs
+        self._upload_id: Optional[str] = None
+        self._buffer = bytearray()
+        self._parts: List[Dict[str, Any]] = []
+        self.bytes_written = 0
+
+    def __enter__(self) -> "MultipartWriter":
+        resp = self._s3.create_multipart_upload(
+            Bucket=self.bucket, Key=self.key, **self._create_kwargs
+        )
+        self._upload_id = resp["UploadId"]
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None:
+            self.complete()
+        else:
+            self.abort()
+        return False
+
+    def write(self, data: bytes) -> None:
+        self._buffer.extend(data)
+        self.bytes_written += len(data)
+        if len(self._buffer) >= self._part_size:
+            self._upload_part()
+
+    def _upload_part(self) -> None:
+        part_number = len(self._parts) + 1
+        resp = self._s3.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=bytes(self._buffer),
+        )
+        self._parts.append({"ETag": resp["ETag"], "PartNumber": part_number})
+        self._buffer.clear()
+
+    def complete(self) -> None:
+        if self._buffer or not self._parts:
+            self._upload_part()
+        self._s3.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+        logger.debug(
+            "Completed multipart upload s3://%s/%s (%d parts, %d bytes)",
+            self.bucket, self.key, len(self._parts), self.bytes_written,
+        )
+
+    def abort(self) -> None:
+        if self._upload_id is None:
+            return
+        try:
+            self._s3.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+        except Exception as exc:
+            # The bucket's AbortIncompleteMultipartUpload rule is the backstop
+            logger.error("Failed to abort multipart upload %s: %s", self.key, exc)
@@ -0,0 +1,189 @@
+"""
+Signed portal session tokens and the session revocation filter
+
+Session tokens issued by session_management are HS256 JWTs carrying the
+claims a portal request needs (session, user, customer, role, expiry,
+mfa_verified), so a warm container can validate them without touching
+PostgreSQL:
+
+    token = sign_session_token(secret, claims, expires_at)
+    claims = verify_session_token(secret, token)   # raises jwt.InvalidTokenError
+
+The signing key is derived from the JWT secret with a fixed label, so a
+session token never verifies as an MFA pre-auth token or vice versa.
+
+Revocation (logout, refresh, suspension, role change, password reset)
+still happens by deactivating the user_sessions row.  Each container keeps
+a RevocationFilter - a Bloom filter over the sha256 hashes of deactivated,
+not-yet-expired session tokens - and tops it up from the database every
+few seconds using logged_out_at as a watermark:
+
+    if revocations.is_due():
+        revocations.refresh(cursor)
+    if revocations.might_be_revoked(token_hash):
+        ...  # confirm against user_sessions
+
+A hit is only a suspicion (false positive rate ~0.1% at capacity), so the
+caller falls back to the database row.  A miss is definitive for every
+revocation the container has seen, i.e. every revocation older than the
+refresh interval.
+"""
+
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import jwt
+
+logger = logging.getLogger()
+
+SESSION_TOKEN_TYPE = 'session'
+# Revoking transactions stamp logged_out_at when they start, not when they
+# commit, so incremental reads look back this far past the watermark
+WATERMARK_OVERLAP = timedelta(seconds=60)
+_SIGNING_LABEL = b'securebase-session-token:'
+
+
+def _signing_key(secret: str) -> bytes:
+    return hashlib.sha256(_SIGNING_LABEL + secret.encode('utf-8')).digest()
+
+
+def looks_signed(token: str) -> bool:
+    """True for JWT-shaped tokens; legacy opaque tokens are url-safe base64 without dots."""
+    return token.count('.') == 2
+
+
+def sign_session_token(secret: str, claims: Dict, expires_at: datetime,
+                       issued_at: Optional[datetime] = None) -> str:
+    """Sign ``claims`` (sid, sub, cid, role, ...) as a session token expiring at ``expires_at``."""
+    payload = dict(claims)
+    payload.update({
+        'typ': SESSION_TOKEN_TYPE,
+        'iat': issued_at or datetime.utcnow(),
+        'exp': expires_at,
+    })
+    return jwt.encode(payload, _signing_key(secret), algorithm='HS256')
+
+
+def verify_session_token(secret: str, token: str) -> Dict:
+    """Claims of a valid, unexpired session token; raises jwt.InvalidTokenError otherwise."""
+    claims = jwt.decode(
+        token, _signing_key(secret), algorithms=['HS256'],
+        options={'require': ['exp', 'iat', 'sid', 'sub', 'cid']},
+    )
+    if claims.get('typ') != SESSION_TOKEN_TYPE:
+        raise jwt.InvalidTokenError('Not a session token')
+    return claims
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no deletes)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> bool:
+        """Add ``item``; returns False if it was (probably) present already."""
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationFilter:
+    """
+    Per-container view of revoked session token hashes
+
+    The first refresh loads every deactivated session that has not expired
+    yet; later refreshes only read rows with logged_out_at at or after the
+    newest one already seen, less WATERMARK_OVERLAP.  The filter is rebuilt
+    from scratch once it holds ``capacity`` entries or ``rebuild_seconds``
+    have passed, which drops sessions that have expired since.
+    """
+
+    def __init__(self, refresh_seconds: float = 15, rebuild_seconds: float = 3600,
+                 capacity: int = 100_000, error_rate: float = 0.001, clock=None):
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._now = clock or time.monotonic
+        self.reset()
+
+    def reset(self):
+        self.filter = BloomFilter(self.capacity, self.error_rate)
+        self.watermark = None
+        self.refreshed_at = None
+        self.built_at = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.refreshed_at is not None
+
+    def is_due(self) -> bool:
+        return self.refreshed_at is None or self._now() - self.refreshed_at >= self.refresh_seconds
+
+    def refresh(self, cursor) -> int:
+        """Pull revocations since the watermark; returns the number of rows read."""
+        now = self._now()
+        if (self.built_at is not None and now - self.built_at >= self.rebuild_seconds) \
+                or self.filter.count >= self.capacity:
+            self.reset()
+
+        if self.watermark is None:
+            cursor.execute("""
+                SELECT session_token_hash, logged_out_at
+                FROM user_sessions
+                WHERE is_active = false
+                  AND logged_out_at IS NOT NULL
+                  AND expires_at > NOW()
+            """)
+            self.built_at = now
+        else:
+            cursor.execute("""
+                SELECT session_token_hash, logged_out_at
+                FROM user_sessions
+                WHERE is_active = false
+                  AND logged_out_at >= %s
+                  AND expires_at > NOW()
+            """, (self.watermark - WATERMARK_OVERLAP,))
+
+        rows = cursor.fetchall()
+        for token_hash, logged_out_at in rows:
+            self.filter.add(token_hash)
+            if logged_out_at and (self.watermark is None or logged_out_at > self.watermark):
+                self.watermark = logged_out_at
+        if self.watermark is None:
+            # Nothing revoked yet; start incremental reads from now on
+            cursor.execute("SELECT LOCALTIMESTAMP")
+            self.watermark = cursor.fetchone()[0]
+        self.refreshed_at = now
+        return len(rows)
+
+    def add(self, token_hash: str):
+        """Record a revocation made by this container before the next refresh."""
+        self.filter.add(token_hash)
+
+    def might_be_revoked(self, token_hash: str) -> bool:
+        return token_hash in self.filter
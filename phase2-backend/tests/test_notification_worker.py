@@ -161,29 +161,35 @@ def rendered_template():
     }
 
 
+@pytest.fixture(autouse=True)
+def clear_template_cache():
+    """Each test starts with an empty per-container template cache."""
+    notification_worker.clear_template_cache()
+    yield
+    notification_worker.clear_template_cache()
+
+
 # ============================================================================
 # LAMBDA HANDLER TESTS
 # ============================================================================
 
 def test_lambda_handler_success(sample_sqs_event):
-    """lambda_handler processes a valid SQS record and returns processed=1."""
+    """lambda_handler processes a valid SQS record and reports no batch item failures."""
     with patch.dict('os.environ', {
         'NOTIFICATIONS_TABLE': 'notif-table',
         'SUBSCRIPTIONS_TABLE': 'subs-table',
         'TEMPLATES_TABLE': 'templates-table',
     }):
-        with patch('notification_worker.process_notification') as mock_process:
+        with patch('notification_worker.process_batch',
+                   return_value={'batchItemFailures': []}) as mock_batch:
             result = lambda_handler(sample_sqs_event, {})
 
-    assert result['statusCode'] == 200
-    body = json.loads(result['body'])
-    assert body['processed'] == 1
-    assert body['failed'] == 0
-    mock_process.assert_called_once()
+    assert result == {'batchItemFailures': []}
+    mock_batch.assert_called_once_with(sample_sqs_event['Records'])
 
 
 def test_lambda_handler_empty_records():
-    """lambda_handler returns 200 with 'No records' message when Records is empty."""
+    """lambda_handler returns an empty partial batch response when Records is empty."""
     with patch.dict('os.environ', {
         'NOTIFICATIONS_TABLE': 'notif-table',
         'SUBSCRIPTIONS_TABLE': 'subs-table',
@@ -191,26 +197,26 @@ def test_lambda_handler_empty_records():
     }):
         result = lambda_handler({'Records': []}, {})
 
-    assert result['statusCode'] == 200
-    body = json.loads(result['body'])
-    assert body['message'] == 'No records'
+    assert result == {'batchItemFailures': []}
 
 
 def test_lambda_handler_processing_error(sample_sqs_event):
-    """lambda_handler increments failed count when process_notification raises."""
+    """lambda_handler reports a record as a batch item failure when it cannot be processed."""
     with patch.dict('os.environ', {
         'NOTIFICATIONS_TABLE': 'notif-table',
         'SUBSCRIPTIONS_TABLE': 'subs-table',
         'TEMPLATES_TABLE': 'templates-table',
     }):
-        with patch('notification_worker.process_notification',
-                   side_effect=Exception('Test error')):
+        with patch('notification_worker.prefetch_lookups', return_value={}), \
+             patch('notification_worker.claim_dedup_key', return_value=(False, 1, None)), \
+             patch('notification_worker.submit_deliveries', side_effect=Exception('Test error')), \
+             patch('notification_worker.release_dedup_key') as mock_release, \
+             patch('notification_worker.log_error') as mock_log_error:
             result = lambda_handler(sample_sqs_event, {})
 
-    assert result['statusCode'] == 200
-    body = json.loads(result['body'])
-    assert body['failed'] == 1
-    assert len(body['errors']) == 1
+    assert result == {'batchItemFailures': [{'itemIdentifier': 'test-message-id'}]}
+    mock_log_error.assert_called_once()
+    mock_release.assert_called_once()
 
 
 # ============================================================================
@@ -354,6 +360,118 @@ def test_render_template_missing_variables(sample_notification):
     assert result['body_text'] == 'Fallback body text'
 
 
+# ============================================================================
+# TEMPLATE CACHE TESTS
+# ============================================================================
+
+def _template_item(customer_id, subject='Alert: {severity}'):
+    return {
+        'customer_id': customer_id,
+        'event_type': 'security_alert',
+        'subject': subject,
+        'body_html': '<p>{severity!r} on {resource[name]:>8}</p>',
+        'body_text': '{{literal}} {severity}',
+    }
+
+
+def test_compiled_template_matches_str_format(sample_notification):
+    """CompiledTemplate renders exactly what str.format would, without re-parsing."""
+    metadata = {'severity': 'HIGH', 'resource': {'name': 'db'}}
+    sample_notification['metadata'] = metadata
+    item = _template_item('customer-456')
+
+    rendered = notification_worker.CompiledTemplate(item).render(sample_notification)
+
+    assert rendered == {
+        'subject': item['subject'].format(**metadata),
+        'body_html': item['body_html'].format(**metadata),
+        'body_text': item['body_text'].format(**metadata),
+    }
+    assert rendered['body_text'] == '{literal} HIGH'
+
+
+def test_compiled_template_falls_back_to_notification_text(sample_notification):
+    """Parts missing from the template use the notification title/body; unknown fields fail rendering."""
+    compiled = notification_worker.CompiledTemplate({'subject': 'S: {severity}'})
+    rendered = compiled.render(sample_notification)
+    assert rendered['subject'] == 'S: HIGH'
+    assert rendered['body_text'] == sample_notification['body']
+
+    with pytest.raises(KeyError):
+        notification_worker.CompiledTemplate({'subject': '{missing}'}).render(sample_notification)
+
+
+def test_render_template_reads_and_compiles_once_per_event_type(sample_notification):
+    """Repeated renders for the same customer and event type hit the cache."""
+    sample_notification['metadata'] = {'severity': 'HIGH', 'resource': {'name': 'db'}}
+    with patch('notification_worker.get_template',
+               return_value=_template_item('customer-456')) as mock_get, \
+         patch('notification_worker.CompiledTemplate',
+               wraps=notification_worker.CompiledTemplate) as mock_compile:
+        results = [render_template(sample_notification) for _ in range(1000)]
+
+    assert all(r['subject'] == 'Alert: HIGH' for r in results)
+    mock_get.assert_called_once_with('security_alert', 'customer-456')
+    mock_compile.assert_called_once()
+
+
+def test_customers_without_template_share_the_compiled_default(sample_notification):
+    """A missing customer template is cached as one entry pointing at the compiled default."""
+    default = _template_item('default', subject='Default: {severity}')
+
+    with patch('notification_worker.get_template', return_value=default) as mock_get:
+        first = notification_worker.get_compiled_template('security_alert', 'customer-a')
+        second = notification_worker.get_compiled_template('security_alert', 'customer-b')
+        again = notification_worker.get_compiled_template('security_alert', 'customer-a')
+
+    assert first is second is again
+    assert mock_get.call_count == 2
+    assert len(notification_worker._compiled_templates) == 1
+    assert set(notification_worker._template_index) == {
+        ('customer-a', 'security_alert'), ('customer-b', 'security_alert')
+    }
+
+
+def test_edited_template_recompiles_after_ttl(sample_notification):
+    """Once the cache TTL passes the item is re-read; only changed template text recompiles."""
+    sample_notification['metadata'] = {'severity': 'HIGH', 'resource': {'name': 'db'}}
+    clock = {'now': 100.0}
+    items = [
+        _template_item('customer-456', subject='v1 {severity}'),
+        _template_item('customer-456', subject='v1 {severity}'),
+        _template_item('customer-456', subject='v2 {severity}'),
+    ]
+
+    with patch('notification_worker.get_template', side_effect=items), \
+         patch('notification_worker.time.monotonic', side_effect=lambda: clock['now']), \
+         patch('notification_worker.NOTIFICATION_TEMPLATE_CACHE_TTL_SECONDS', 60):
+        v1 = notification_worker.get_compiled_template('security_alert', 'customer-456')
+        clock['now'] += 30
+        assert notification_worker.get_compiled_template('security_alert', 'customer-456') is v1
+
+        clock['now'] += 60
+        assert notification_worker.get_compiled_template('security_alert', 'customer-456') is v1
+
+        clock['now'] += 60
+        v2 = notification_worker.get_compiled_template('security_alert', 'customer-456')
+
+    assert v2 is not v1
+    assert v2.render(sample_notification)['subject'] == 'v2 HIGH'
+
+
+def test_prefetch_lookups_skips_cached_templates(sample_notification):
+    """BatchGetItem only asks for templates the cache cannot answer."""
+    notification_worker.cache_template('customer-456', 'security_alert', _template_item('customer-456'))
+
+    with patch('notification_worker.dynamodb') as mock_dynamodb:
+        mock_dynamodb.batch_get_item.return_value = {'Responses': {}, 'UnprocessedKeys': {}}
+        notification_worker.prefetch_lookups([sample_notification])
+
+    request = mock_dynamodb.batch_get_item.call_args[1]['RequestItems']
+    assert notification_worker.TEMPLATES_TABLE not in request
+    assert notification_worker.SUBSCRIPTIONS_TABLE in request
+
+
 # ============================================================================
 # EMAIL DELIVERY TESTS
 # ============================================================================
@@ -553,8 +671,10 @@ def test_validate_environment_missing_var():
 # ============================================================================
 
 def test_end_to_end_notification_flow(sample_sqs_event):
-    """Full flow: SQS event → parse → render → SES send + DynamoDB store."""
+    """Full flow: SQS event → parse → prefetch → render → SES send + DynamoDB store."""
     mock_prefs = {
+        'customer_id': 'customer-456',
+        'user_id': 'user-789',
         'email': 'user@example.com',
         'phone_number': '+15551234567',
         'subscriptions': {
@@ -565,10 +685,13 @@ def test_end_to_end_notification_flow(sample_sqs_event):
         },
     }
     template = {
+        'customer_id': 'customer-456',
+        'event_type': 'security_alert',
         'subject': 'Security Alert: {severity}',
         'body_html': '<p>Alert: {severity}</p>',
         'body_text': 'Alert: {severity}',
     }
+    tables = {}
 
     with patch.dict('os.environ', {
         'NOTIFICATIONS_TABLE': 'notif-table',
@@ -576,26 +699,33 @@ def test_end_to_end_notification_flow(sample_sqs_event):
         'TEMPLATES_TABLE': 'templates-table',
     }):
         with patch('notification_worker.ses_client') as mock_ses, \
-             patch('notification_worker.dynamodb') as mock_dynamodb, \
-             patch('notification_worker.get_user_preferences',
-                   return_value=mock_prefs), \
-             patch('notification_worker.get_template', return_value=template):
+             patch('notification_worker.dynamodb') as mock_dynamodb:
 
             mock_ses.send_email.return_value = {'MessageId': 'msg-e2e'}
-            mock_table = MagicMock()
-            mock_dynamodb.Table.return_value = mock_table
+            mock_dynamodb.Table.side_effect = lambda name: tables.setdefault(name, MagicMock())
+            mock_dynamodb.batch_get_item.return_value = {
+                'Responses': {
+                    notification_worker.TEMPLATES_TABLE: [template],
+                    notification_worker.SUBSCRIPTIONS_TABLE: [mock_prefs],
+                },
+                'UnprocessedKeys': {},
+            }
 
             result = lambda_handler(sample_sqs_event, {})
 
-    assert result['statusCode'] == 200
-    body = json.loads(result['body'])
-    assert body['processed'] == 1
+    assert result == {'batchItemFailures': []}
+
+    # templates and preferences come from one BatchGetItem, no single reads
+    mock_dynamodb.batch_get_item.assert_called_once()
+    assert notification_worker.TEMPLATES_TABLE not in tables
+    assert notification_worker.SUBSCRIPTIONS_TABLE not in tables
 
-    # email channel — SES must have been called
+    # email channel — SES must have been called with the rendered template
     mock_ses.send_email.assert_called_once()
+    assert mock_ses.send_email.call_args[1]['Message']['Subject']['Data'] == 'Security Alert: HIGH'
 
     # in_app channel — DynamoDB put_item must have been called
-    mock_table.put_item.assert_called_once()
+    tables[notification_worker.NOTIFICATIONS_TABLE].put_item.assert_called_once()
 
 
 # ============================================================================
@@ -664,21 +794,59 @@ def test_build_dedup_key_uses_customer_type_and_resource():
     assert build_dedup_key(notification) == 'customer-1#iam_policy_drift#role/ci-role'
 
 
+def _conditional_check_failed():
+    return ClientError({'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'failed'}}, 'PutItem')
+
+
 def test_should_suppress_notification_when_event_repeats(sample_notification):
-    """should_suppress_notification returns True when key is still inside dedup window."""
+    """should_suppress_notification returns True when another notification holds the dedup window."""
     with patch('notification_worker.dynamodb') as mock_dynamodb, \
          patch('notification_worker.time.time', return_value=1000):
         mock_table = MagicMock()
         mock_dynamodb.Table.return_value = mock_table
-        mock_table.get_item.return_value = {
-            'Item': {'expires_at': 1200, 'ttl': 1200, 'duplicate_count': 2, 'notification_id': 'notif-123'}
-        }
+        mock_table.put_item.side_effect = _conditional_check_failed()
+        mock_table.update_item.return_value = {'Attributes': {'duplicate_count': 3}}
 
         should_suppress, duplicate_count = should_suppress_notification(sample_notification)
 
     assert should_suppress is True
     assert duplicate_count == 3
+    put_kwargs = mock_table.put_item.call_args[1]
+    assert put_kwargs['ConditionExpression'] == 'attribute_not_exists(dedup_key) OR expires_at <= :now'
+    assert put_kwargs['ExpressionAttributeValues'] == {':now': 1000}
+    mock_table.get_item.assert_not_called()
+
+
+def test_should_suppress_notification_claims_free_window(sample_notification):
+    """The first notification for a key wins the conditional put with a single write."""
+    with patch('notification_worker.dynamodb') as mock_dynamodb:
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+
+        assert should_suppress_notification(sample_notification) == (False, 1)
+
     mock_table.put_item.assert_called_once()
+    mock_table.update_item.assert_not_called()
+    mock_table.get_item.assert_not_called()
+
+
+def test_claim_dedup_key_lets_retry_through_for_pending_channels(sample_notification):
+    """An SQS redelivery of the window holder is only let through for its pending channels."""
+    with patch('notification_worker.dynamodb') as mock_dynamodb:
+        mock_table = MagicMock()
+        mock_dynamodb.Table.return_value = mock_table
+        mock_table.put_item.side_effect = _conditional_check_failed()
+        mock_table.update_item.side_effect = _conditional_check_failed()
+        mock_table.get_item.return_value = {
+            'Item': {'notification_id': 'notif-123', 'duplicate_count': 1, 'pending_channels': {'sms', 'email'}}
+        }
+        retry = notification_worker.claim_dedup_key(sample_notification)
+
+        mock_table.get_item.return_value = {'Item': {'notification_id': 'notif-123', 'duplicate_count': 1}}
+        redelivered = notification_worker.claim_dedup_key(sample_notification)
+
+    assert retry == (False, 1, ['email', 'sms'])
+    assert redelivered == (True, 1, None)
 
 
 def test_sanitize_notification_payload_redacts_sensitive_values():
@@ -743,6 +911,150 @@ def test_log_delivery_persists_delivery_record(sample_notification):
     assert item['http_status_code'] == 429
 
 
+# ============================================================================
+# BATCH PROCESSING TESTS
+# ============================================================================
+
+def _sqs_record(message_id, notification, receive_count=1):
+    return {
+        'messageId': message_id,
+        'receiptHandle': f'receipt-{message_id}',
+        'eventSourceARN': 'arn:aws:sqs:us-east-1:111122223333:securebase-dev-notifications-queue',
+        'attributes': {'ApproximateReceiveCount': str(receive_count)},
+        'body': json.dumps({'Message': json.dumps(notification)}),
+    }
+
+
+def _batch_notification(index, priority='critical'):
+    return {
+        'id': f'notif-{index}',
+        'customer_id': f'customer-{index % 2}',
+        'user_id': f'user-{index}',
+        'type': 'security_alert',
+        'priority': priority,
+        'title': 'Alert',
+        'body': 'Body',
+        'channels': ['email', 'in_app'],
+        'metadata': {'resource_id': f'resource-{index}'},
+    }
+
+
+def test_prefetch_lookups_uses_one_batch_get_for_the_batch():
+    """Templates (customer + default) and preferences for all records are read in one BatchGetItem."""
+    notifications = [_batch_notification(i) for i in range(4)]
+    customer_template = {'customer_id': 'customer-0', 'event_type': 'security_alert', 'subject': 'C0'}
+    default_template = {'customer_id': 'default', 'event_type': 'security_alert', 'subject': 'D'}
+
+    with patch('notification_worker.dynamodb') as mock_dynamodb, \
+         patch('notification_worker.get_template') as mock_get_template:
+        mock_dynamodb.batch_get_item.return_value = {
+            'Responses': {
+                notification_worker.TEMPLATES_TABLE: [customer_template, default_template],
+                notification_worker.SUBSCRIPTIONS_TABLE: [
+                    {'customer_id': 'customer-1', 'user_id': 'user-1', 'email': 'u1@example.com'}
+                ],
+            },
+            'UnprocessedKeys': {},
+        }
+        lookups = notification_worker.prefetch_lookups(notifications)
+
+        assert notification_worker.resolve_template(lookups, 'security_alert', 'customer-0')['subject'] == 'C0'
+        assert notification_worker.resolve_template(lookups, 'security_alert', 'customer-1')['subject'] == 'D'
+        assert notification_worker.resolve_user_preferences(lookups, 'user-1', 'customer-1')['email'] == 'u1@example.com'
+        assert notification_worker.resolve_user_preferences(lookups, 'user-2', 'customer-0')['subscriptions'] == {}
+
+    request = mock_dynamodb.batch_get_item.call_args[1]['RequestItems']
+    assert len(request[notification_worker.TEMPLATES_TABLE]['Keys']) == 3
+    assert len(request[notification_worker.SUBSCRIPTIONS_TABLE]['Keys']) == 4
+    mock_get_template.assert_not_called()
+
+
+def test_batch_get_items_retries_unprocessed_keys_then_gives_up():
+    """UnprocessedKeys are re-requested a bounded number of times and then reported as unread."""
+    key = {'customer_id': 'customer-0', 'user_id': 'user-0'}
+    with patch('notification_worker.dynamodb') as mock_dynamodb:
+        mock_dynamodb.batch_get_item.return_value = {
+            'Responses': {},
+            'UnprocessedKeys': {'subs': {'Keys': [key]}},
+        }
+        found, unread = notification_worker.batch_get_items({'subs': [key]})
+
+    assert found == {'subs': []}
+    assert unread == [('subs', key)]
+    assert mock_dynamodb.batch_get_item.call_count == notification_worker.BATCH_GET_MAX_UNPROCESSED_RETRIES + 1
+
+
+def test_process_batch_reports_only_failed_critical_records():
+    """A failed critical delivery is retried via visibility timeout; other records succeed."""
+    records = [
+        _sqs_record('m0', _batch_notification(0)),
+        _sqs_record('m1', _batch_notification(1)),
+        _sqs_record('m2', _batch_notification(2, priority='low')),
+        {'messageId': 'bad', 'body': 'not json'},
+    ]
+    sent = []
+
+    def dispatch(channel, notification, rendered, user_prefs, attempt=1):
+        sent.append((notification['id'], channel))
+        if notification['id'] in ('notif-1', 'notif-2'):
+            return 'failed', None, 'SES error'
+        return 'success', None, None
+
+    prefs = {'subscriptions': {'security_alert': {'email': True, 'in_app': True}}}
+    with patch('notification_worker.prefetch_lookups', return_value={}), \
+         patch('notification_worker.resolve_user_preferences', return_value=prefs), \
+         patch('notification_worker.resolve_template', return_value={'subject': 'A'}), \
+         patch('notification_worker.claim_dedup_key', return_value=(False, 1, None)), \
+         patch('notification_worker.dispatch_channel', side_effect=dispatch), \
+         patch('notification_worker.deliver_in_app', return_value=('success', None, None)), \
+         patch('notification_worker.set_pending_channels') as mock_pending, \
+         patch('notification_worker.sqs_client') as mock_sqs, \
+         patch('notification_worker.time.sleep') as mock_sleep, \
+         patch('notification_worker.log_error'):
+        result = notification_worker.process_batch(records)
+
+    assert result == {'batchItemFailures': [{'itemIdentifier': 'bad'}, {'itemIdentifier': 'm1'}]}
+    assert sorted(sent) == [('notif-0', 'email'), ('notif-1', 'email'), ('notif-2', 'email')]
+    mock_pending.assert_called_once()
+    assert mock_pending.call_args[0][1] == ['email']
+    mock_sqs.change_message_visibility.assert_called_once_with(
+        QueueUrl='https://sqs.us-east-1.amazonaws.com/111122223333/securebase-dev-notifications-queue',
+        ReceiptHandle='receipt-m1',
+        VisibilityTimeout=1
+    )
+    mock_sleep.assert_not_called()
+
+
+def test_process_batch_retry_sends_only_pending_channels():
+    """A redelivered record only dispatches its pending channels and clears them on success."""
+    record = _sqs_record('m0', _batch_notification(0), receive_count=2)
+    prefs = {'subscriptions': {'security_alert': {'email': True, 'sms': True, 'in_app': True}}}
+    notification = _batch_notification(0)
+    notification['channels'] = ['email', 'sms', 'in_app']
+    record['body'] = json.dumps(notification)
+
+    with patch('notification_worker.prefetch_lookups', return_value={}), \
+         patch('notification_worker.resolve_user_preferences', return_value=prefs), \
+         patch('notification_worker.resolve_template', return_value={'subject': 'A'}), \
+         patch('notification_worker.claim_dedup_key', return_value=(False, 1, ['sms'])), \
+         patch('notification_worker.dispatch_channel', return_value=('retried', None, None)) as mock_dispatch, \
+         patch('notification_worker.deliver_in_app') as mock_in_app, \
+         patch('notification_worker.set_pending_channels') as mock_pending:
+        result = notification_worker.process_batch([record])
+
+    assert result == {'batchItemFailures': []}
+    mock_dispatch.assert_called_once()
+    assert mock_dispatch.call_args[0][0] == 'sms'
+    assert mock_dispatch.call_args[0][4] == 2
+    mock_in_app.assert_not_called()
+    mock_pending.assert_called_once_with(mock_pending.call_args[0][0], [])
+
+
+def test_retry_delay_grows_exponentially_in_whole_seconds():
+    with patch('notification_worker.NOTIFICATION_RETRY_BACKOFF_BASE_MS', 500):
+        assert [notification_worker.retry_delay_seconds(a) for a in (1, 2, 3, 4)] == [1, 1, 2, 4]
+
+
 # ============================================================================
 # RUN TESTS
 # ============================================================================
@@ -1,7 +1,7 @@
 """
 Phase 6.1 — Audit Log Packager Lambda.
 
-Collects audit log files for a given tenant and date range from S3, packages
+Collects audit log files for a given tenant and date range from S3, streams
 them into a zip archive with a SHA-256 manifest, uploads the archive to the
 compliance evidence S3 bucket with Object Lock (COMPLIANCE mode, 7-year
 retention), and writes an immutable record to the ``evidence_packages``
@@ -27,6 +27,8 @@ Environment Variables:
     AUDIT_SOURCE_BUCKET       S3 bucket containing raw audit log objects
     EVIDENCE_BUCKET           S3 bucket with Object Lock (compliance evidence)
     EVIDENCE_RETENTION_YEARS  Object Lock retention in years (default: 7)
+    PACKAGER_FETCH_CONCURRENCY  Concurrent source object downloads (default: 8)
+    PACKAGER_LIST_CONCURRENCY   Concurrent day-prefix listings (default: 8)
     RDS_HOST                  Aurora Serverless v2 endpoint (via RDS Proxy)
     RDS_DATABASE              Database name (default: securebase)
     RDS_USER                  Application database user
@@ -39,16 +41,21 @@ Python: 3.11
 
 import hashlib
 import io
+import itertools
 import json
 import logging
 import os
 import sys
+import tempfile
 import uuid
 import zipfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import IO, Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Import shared database utilities and psycopg2 from the Lambda layer.
@@ -85,14 +92,6 @@ def _log(level: str, message: str, **kwargs: Any) -> None:
     getattr(logger, level.lower(), logger.info)(json.dumps(record))
 
 
-# ---------------------------------------------------------------------------
-# AWS SDK clients — initialised outside the handler for connection re-use.
-# ---------------------------------------------------------------------------
-
-s3_client = boto3.client('s3')
-s3_resource = boto3.resource('s3')
-
-
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
@@ -100,17 +99,105 @@ s3_resource = boto3.resource('s3')
 AUDIT_SOURCE_BUCKET = os.environ.get('AUDIT_SOURCE_BUCKET', '')
 EVIDENCE_BUCKET = os.environ.get('EVIDENCE_BUCKET', '')
 EVIDENCE_RETENTION_YEARS = int(os.environ.get('EVIDENCE_RETENTION_YEARS', '7'))
-MAX_OBJECTS_PER_PACKAGE = 10_000   # Hard cap to stay within Lambda memory
-MAX_SIZE_CONVERGENCE_ITERATIONS = 3
+MAX_OBJECTS_PER_PACKAGE = 10_000   # Hard cap on log objects per package
+FETCH_CONCURRENCY = int(os.environ.get('PACKAGER_FETCH_CONCURRENCY', '8'))
+LIST_CONCURRENCY = int(os.environ.get('PACKAGER_LIST_CONCURRENCY', '8'))
+STREAM_CHUNK_SIZE = 1024 * 1024
+SPOOL_MAX_MEMORY_BYTES = 1024 * 1024      # Larger downloads spill to /tmp
+MULTIPART_PART_SIZE = 8 * 1024 * 1024     # S3 minimum part size is 5 MiB
 EVIDENCE_KMS_KEY_ARN = os.environ.get('EVIDENCE_KMS_KEY_ARN', '')
 DEFAULT_KMS_KEY_ALIAS = 'alias/aws/s3'
 
 
+# ---------------------------------------------------------------------------
+# AWS SDK clients — initialised outside the handler for connection re-use.
+# ---------------------------------------------------------------------------
+
+# Listing and downloading run concurrently; size the pool for both.
+s3_client = boto3.client(
+    's3',
+    config=Config(max_pool_connections=max(10, LIST_CONCURRENCY + FETCH_CONCURRENCY)),
+)
+s3_resource = boto3.resource('s3')
+
+
 # ---------------------------------------------------------------------------
 # Core logic
 # ---------------------------------------------------------------------------
 
 
+def _day_prefixes(customer_id: str, start: datetime, end: datetime) -> List[str]:
+    """Return the ``logs/{customer_id}/YYYY/MM/DD/`` prefixes covering the range."""
+    prefixes: List[str] = []
+    current = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    while current <= end:
+        prefixes.append(f"logs/{customer_id}/{current.strftime('%Y/%m/%d')}/")
+        current += timedelta(days=1)
+    return prefixes
+
+
+def _list_day_prefix(
+    bucket: str,
+    prefix: str,
+    start: datetime,
+    end: datetime,
+) -> List[Dict[str, Any]]:
+    """List one day prefix, keeping objects modified within the range."""
+    objects: List[Dict[str, Any]] = []
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get('Contents', []):
+            mod_time = obj['LastModified']
+            if start <= mod_time <= end:
+                objects.append({
+                    'Key': obj['Key'],
+                    'Size': obj['Size'],
+                    'LastModified': mod_time.isoformat(),
+                })
+    return objects
+
+
+def _iter_log_objects(
+    bucket: str,
+    customer_id: str,
+    start: datetime,
+    end: datetime,
+) -> Iterator[Dict[str, Any]]:
+    """Yield audit log object metadata while day prefixes are listed concurrently.
+
+    Up to ``LIST_CONCURRENCY`` day prefixes are listed at once. Each day's
+    objects are yielded as soon as that day and every earlier day are done,
+    so downloads start after the first listing returns while the package
+    contents, including which objects survive the ``MAX_OBJECTS_PER_PACKAGE``
+    cap, stay the same as a sequential listing.
+
+    Raises:
+        ClientError: On S3 API failures.
+    """
+    prefixes = iter(_day_prefixes(customer_id, start, end))
+    yielded = 0
+    with ThreadPoolExecutor(max_workers=max(1, LIST_CONCURRENCY)) as pool:
+        pending: Deque[Future] = deque(
+            pool.submit(_list_day_prefix, bucket, prefix, start, end)
+            for prefix in itertools.islice(prefixes, max(1, LIST_CONCURRENCY))
+        )
+        try:
+            while pending:
+                day_objects = pending.popleft().result()
+                for prefix in itertools.islice(prefixes, 1):
+                    pending.append(pool.submit(_list_day_prefix, bucket, prefix, start, end))
+                for obj in day_objects:
+                    if yielded >= MAX_OBJECTS_PER_PACKAGE:
+                        _log('warning', 'Object cap reached; truncating package',
+                             cap=MAX_OBJECTS_PER_PACKAGE, customer_id=customer_id)
+                        return
+                    yielded += 1
+                    yield obj
+        finally:
+            for future in pending:
+                future.cancel()
+
+
 def _list_log_objects(
     bucket: str,
     customer_id: str,
@@ -129,102 +216,130 @@ def _list_log_objects(
         end:         Inclusive end of date range (UTC).
 
     Returns:
-        List of dicts with ``Key``, ``Size``, and ``LastModified``.
+        List of dicts with ``Key``, ``Size``, and ``LastModified``, capped at
+        ``MAX_OBJECTS_PER_PACKAGE``.
 
     Raises:
         ClientError: On S3 API failures.
     """
-    objects: List[Dict[str, Any]] = []
-    paginator = s3_client.get_paginator('list_objects_v2')
+    return list(_iter_log_objects(bucket, customer_id, start, end))
 
-    current = start.replace(hour=0, minute=0, second=0, microsecond=0)
-    while current <= end:
-        prefix = f"logs/{customer_id}/{current.strftime('%Y/%m/%d')}/"
-        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-            for obj in page.get('Contents', []):
-                mod_time = obj['LastModified']
-                if start <= mod_time <= end:
-                    objects.append({
-                        'Key': obj['Key'],
-                        'Size': obj['Size'],
-                        'LastModified': mod_time.isoformat(),
-                    })
-                    if len(objects) >= MAX_OBJECTS_PER_PACKAGE:
-                        _log('warning', 'Object cap reached; truncating package',
-                             cap=MAX_OBJECTS_PER_PACKAGE, customer_id=customer_id)
-                        return objects
-        current += timedelta(days=1)
 
-    return objects
+def _fetch_object(bucket: str, key: str) -> Tuple[IO[bytes], str, int]:
+    """Download one object into a spooled temp file, hashing as it streams.
+
+    Returns:
+        Tuple of (file rewound to offset 0, sha256_hex_digest, size_bytes).
+    """
+    response = s3_client.get_object(Bucket=bucket, Key=key)
+    body = response['Body']
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY_BYTES)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        for chunk in iter(lambda: body.read(STREAM_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            spool.write(chunk)
+            size += len(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool, digest.hexdigest(), size
+
+
+def _fetch_objects(
+    bucket: str,
+    objects: Iterable[Dict[str, Any]],
+) -> Iterable[Tuple[Dict[str, Any], IO[bytes], str, int]]:
+    """Yield downloaded objects in input order, fetching ahead concurrently.
+
+    At most ``FETCH_CONCURRENCY`` downloads are in flight, so memory and
+    /tmp usage stay bounded regardless of how many objects are packaged.
+    """
+    pending: Deque[Tuple[Dict[str, Any], Future]] = deque()
+    with ThreadPoolExecutor(max_workers=max(1, FETCH_CONCURRENCY)) as pool:
+        try:
+            for obj in objects:
+                pending.append((obj, pool.submit(_fetch_object, bucket, obj['Key'])))
+                if len(pending) >= FETCH_CONCURRENCY:
+                    head, future = pending.popleft()
+                    yield (head, *future.result())
+            while pending:
+                head, future = pending.popleft()
+                yield (head, *future.result())
+        finally:
+            # On failure, discard downloads that will never be consumed.
+            for _, future in pending:
+                if not future.cancel() and not future.exception():
+                    future.result()[0].close()
 
 
 def _build_zip_package(
     bucket: str,
-    objects: List[Dict[str, Any]],
+    objects: Iterable[Dict[str, Any]],
     manifest_meta: Dict[str, Any],
     cover_page_meta: Dict[str, Any],
-) -> Tuple[bytes, str]:
-    """Download objects from S3 and create an in-memory zip archive.
+    output: IO[bytes],
+) -> Tuple[int, str, int]:
+    """Stream S3 objects into a zip archive written to ``output``.
 
-    A ``COVER_PAGE.pdf`` and ``MANIFEST.json`` file are included in the zip.
-    The SHA-256 digest is computed over MANIFEST.json content.
+    Log objects are written as they are downloaded, followed by
+    ``MANIFEST.json`` and ``COVER_PAGE.pdf``. The SHA-256 digest is computed
+    over MANIFEST.json content, so the cover page can only be rendered once
+    every object has been hashed. The final archive size is not known until
+    the central directory is written; the manifest and cover page record the
+    total log bytes instead, and the archive size is returned to the caller.
 
     Args:
-        bucket:        Source S3 bucket name.
-        objects:       List of object metadata dicts from ``_list_log_objects``.
-        manifest_meta: Additional metadata to embed in MANIFEST.json.
+        bucket:          Source S3 bucket name.
+        objects:         Object metadata dicts from ``_iter_log_objects``;
+                         any iterable, consumed once.
+        manifest_meta:   Additional metadata to embed in MANIFEST.json.
+        cover_page_meta: Fields rendered on COVER_PAGE.pdf.
+        output:          Writable binary stream; it need not be seekable.
 
     Returns:
-        Tuple of (zip_bytes, sha256_hex_digest).
+        Tuple of (archive_size_bytes, sha256_hex_digest, object_count).
     """
     file_hashes: Dict[str, str] = {}
+    total_log_bytes = 0
+
+    with zipfile.ZipFile(output, mode='w', compression=zipfile.ZIP_DEFLATED) as zf:
+        for obj, content, file_hash, size in _fetch_objects(bucket, objects):
+            key = obj['Key']
+            arc_name = key.split('/', 2)[-1] if key.count('/') >= 2 else key
+            with content, zf.open(arc_name, mode='w',
+                                  force_zip64=size > zipfile.ZIP64_LIMIT) as entry:
+                for chunk in iter(lambda: content.read(STREAM_CHUNK_SIZE), b''):
+                    entry.write(chunk)
+            file_hashes[key] = file_hash
+            total_log_bytes += size
+
+        manifest: Dict[str, Any] = {
+            **manifest_meta,
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'object_count': len(file_hashes),
+            'total_log_bytes': total_log_bytes,
+            # Entries are written in arrival order; the manifest is keyed in
+            # sorted order so identical inputs give identical hashes.
+            'file_hashes': dict(sorted(file_hashes.items())),
+        }
+        manifest_json = json.dumps(manifest, indent=2).encode('utf-8')
+        sha256 = hashlib.sha256(manifest_json).hexdigest()
+
+        zf.writestr('MANIFEST.json', manifest_json)
+        zf.writestr(
+            'COVER_PAGE.pdf',
+            _generate_cover_page_pdf({
+                **cover_page_meta,
+                'log_count': len(file_hashes),
+                'sha256_manifest': sha256,
+                'total_log_bytes': total_log_bytes,
+            }),
+        )
 
-    object_contents: Dict[str, bytes] = {}
-    for obj in objects:
-        key = obj['Key']
-        response = s3_client.get_object(Bucket=bucket, Key=key)
-        content = response['Body'].read()
-        file_hashes[key] = hashlib.sha256(content).hexdigest()
-        object_contents[key] = content
-
-    manifest: Dict[str, Any] = {
-        **manifest_meta,
-        'generated_at': datetime.now(timezone.utc).isoformat(),
-        'object_count': len(objects),
-        'file_hashes': file_hashes,
-    }
-    manifest_json = json.dumps(manifest, indent=2).encode('utf-8')
-    sha256 = hashlib.sha256(manifest_json).hexdigest()
-
-    def _build_with_size(package_size_bytes: int) -> bytes:
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, mode='w', compression=zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr(
-                'COVER_PAGE.pdf',
-                _generate_cover_page_pdf({
-                    **cover_page_meta,
-                    'sha256_manifest': sha256,
-                    'package_size_bytes': package_size_bytes,
-                }),
-            )
-            for key, content in object_contents.items():
-                arc_name = key.split('/', 2)[-1] if key.count('/') >= 2 else key
-                zf.writestr(arc_name, content)
-            zf.writestr('MANIFEST.json', manifest_json)
-        return zip_buffer.getvalue()
-
-    zip_bytes = _build_with_size(0)
-    # Iterate until the ZIP size converges because package_size_bytes is rendered
-    # on the cover page, which changes the PDF content and therefore ZIP size.
-    # Three passes are sufficient for decimal-length stabilization in practice.
-    for _ in range(MAX_SIZE_CONVERGENCE_ITERATIONS):
-        candidate_size = len(zip_bytes)
-        updated_zip = _build_with_size(candidate_size)
-        if len(updated_zip) == candidate_size:
-            zip_bytes = updated_zip
-            break
-        zip_bytes = updated_zip
-    return zip_bytes, sha256
+    return output.tell(), sha256, len(file_hashes)
 
 
 def _generate_cover_page_pdf(cover_page_meta: Dict[str, Any]) -> bytes:
@@ -264,7 +379,7 @@ def _generate_cover_page_pdf(cover_page_meta: Dict[str, Any]) -> bytes:
         ('SHA256 Manifest Hash', cover_page_meta['sha256_manifest']),
         ('KMS Key ARN', cover_page_meta['kms_key_arn']),
         ('Log Records Included', str(cover_page_meta['log_count'])),
-        ('Package Size', f"{cover_page_meta['package_size_bytes']} bytes"),
+        ('Log Data Size', f"{cover_page_meta['total_log_bytes']} bytes"),
     ]
     for label, value in sections:
         c.setFont('Helvetica-Bold', 10.5)
@@ -311,44 +426,106 @@ def _generate_cover_page_pdf(cover_page_meta: Dict[str, Any]) -> bytes:
     return buffer.getvalue()
 
 
-def _upload_evidence_package(
-    zip_bytes: bytes,
-    s3_key: str,
-    retain_until: datetime,
-    kms_key_arn: str,
-) -> str:
-    """Upload zip to the evidence bucket with Object Lock (COMPLIANCE mode).
-
-    Args:
-        zip_bytes:       Raw bytes of the zip archive.
-        s3_key:          Destination S3 key in the evidence bucket.
-        retain_until:    Object Lock retention timestamp.
-        kms_key_arn:     KMS key ARN to use for SSE-KMS.
-
-    Returns:
-        S3 version ID of the uploaded object.
+class _EvidenceUploadStream:
+    """Write-only stream that uploads to the evidence bucket with Object Lock.
 
-    Raises:
-        ClientError: On upload failure.
+    Bytes are buffered up to ``MULTIPART_PART_SIZE`` and shipped as multipart
+    upload parts, so only one part is held in memory at a time. Packages
+    smaller than a single part are sent with one ``PutObject`` on ``close``.
+    The stream is not seekable; ``zipfile`` writes data descriptors for it.
     """
-    put_args: Dict[str, Any] = {
-        'Bucket': EVIDENCE_BUCKET,
-        'Key': s3_key,
-        'Body': zip_bytes,
-        'ContentType': 'application/zip',
-        'ObjectLockMode': 'COMPLIANCE',
-        'ObjectLockRetainUntilDate': retain_until,
-        'ServerSideEncryption': 'aws:kms',
-        'Metadata': {
-            'phase': '6.1',
-            'generated_by': 'audit_log_packager',
-        },
-    }
-    if kms_key_arn and kms_key_arn != DEFAULT_KMS_KEY_ALIAS:
-        put_args['SSEKMSKeyId'] = kms_key_arn
 
-    response = s3_client.put_object(**put_args)
-    return response.get('VersionId', '')
+    def __init__(self, s3_key: str, retain_until: datetime, kms_key_arn: str) -> None:
+        self.s3_key = s3_key
+        self.version_id = ''
+        self._object_args: Dict[str, Any] = {
+            'Bucket': EVIDENCE_BUCKET,
+            'Key': s3_key,
+            'ContentType': 'application/zip',
+            'ObjectLockMode': 'COMPLIANCE',
+            'ObjectLockRetainUntilDate': retain_until,
+            'ServerSideEncryption': 'aws:kms',
+            'Metadata': {
+                'phase': '6.1',
+                'generated_by': 'audit_log_packager',
+            },
+        }
+        if kms_key_arn and kms_key_arn != DEFAULT_KMS_KEY_ALIAS:
+            self._object_args['SSEKMSKeyId'] = kms_key_arn
+        self._buffer = bytearray()
+        self._position = 0
+        self._upload_id: Optional[str] = None
+        self._parts: List[Dict[str, Any]] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self._position += len(data)
+        while len(self._buffer) >= MULTIPART_PART_SIZE:
+            self._upload_part(bytes(self._buffer[:MULTIPART_PART_SIZE]))
+            del self._buffer[:MULTIPART_PART_SIZE]
+        return len(data)
+
+    def _upload_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            response = s3_client.create_multipart_upload(
+                **self._object_args, ChecksumAlgorithm='SHA256',
+            )
+            self._upload_id = response['UploadId']
+        part_number = len(self._parts) + 1
+        response = s3_client.upload_part(
+            Bucket=EVIDENCE_BUCKET,
+            Key=self.s3_key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
+            ChecksumAlgorithm='SHA256',
+        )
+        part = {'PartNumber': part_number, 'ETag': response['ETag']}
+        if response.get('ChecksumSHA256'):
+            part['ChecksumSHA256'] = response['ChecksumSHA256']
+        self._parts.append(part)
+
+    def close(self) -> str:
+        """Finish the upload and return the S3 version ID."""
+        if self._upload_id is None:
+            response = s3_client.put_object(**self._object_args, Body=bytes(self._buffer))
+        else:
+            if self._buffer:
+                self._upload_part(bytes(self._buffer))
+            response = s3_client.complete_multipart_upload(
+                Bucket=EVIDENCE_BUCKET,
+                Key=self.s3_key,
+                UploadId=self._upload_id,
+                MultipartUpload={'Parts': self._parts},
+            )
+        self._buffer = bytearray()
+        self.version_id = response.get('VersionId', '')
+        return self.version_id
+
+    def abort(self) -> None:
+        """Discard any uploaded parts so no partial package is left behind."""
+        self._buffer = bytearray()
+        if self._upload_id is None:
+            return
+        try:
+            s3_client.abort_multipart_upload(
+                Bucket=EVIDENCE_BUCKET, Key=self.s3_key, UploadId=self._upload_id,
+            )
+        except ClientError as exc:
+            _log('warning', 'Failed to abort multipart upload',
+                 s3_key=self.s3_key, upload_id=self._upload_id, error=str(exc))
 
 
 def _write_evidence_record(
@@ -373,7 +550,7 @@ def _write_evidence_record(
         package_name:      Human-readable package name.
         s3_key:            S3 key of the uploaded zip.
         version_id:        S3 version ID (Object Lock).
-        sha256:            SHA-256 hex digest of the zip.
+        sha256:            SHA-256 hex digest of MANIFEST.json.
         framework:         'SOC2', 'HIPAA', 'FedRAMP', or 'ALL'.
         date_range_start:  Start of the audited date range.
         date_range_end:    End of the audited date range.
@@ -508,16 +685,18 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     # ------------------------------------------------------------------
     # List source objects
     # ------------------------------------------------------------------
+    # Listing continues in the background while the first objects download.
+    objects = _iter_log_objects(
+        AUDIT_SOURCE_BUCKET, customer_id, date_range_start, date_range_end
+    )
     try:
-        objects = _list_log_objects(
-            AUDIT_SOURCE_BUCKET, customer_id, date_range_start, date_range_end
-        )
+        first_object = next(objects, None)
     except ClientError as exc:
         _log('error', 'Failed to list audit log objects',
              customer_id=customer_id, error=str(exc))
         raise RuntimeError(f"S3 list_objects failed: {exc}") from exc
 
-    if not objects:
+    if first_object is None:
         _log('warning', 'No audit log objects found for date range',
              customer_id=customer_id,
              date_range_start=date_range_start.isoformat(),
@@ -533,7 +712,7 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         }
 
     # ------------------------------------------------------------------
-    # Build zip archive with manifest
+    # Package naming and manifest metadata
     # ------------------------------------------------------------------
     # Human-readable display name shown in the portal evidence table.
     month_label = date_range_end.strftime('%B %Y')   # e.g. "May 2026"
@@ -568,10 +747,14 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     retention_until = generated_at + timedelta(days=365 * EVIDENCE_RETENTION_YEARS)
     kms_key_arn = EVIDENCE_KMS_KEY_ARN or DEFAULT_KMS_KEY_ALIAS
 
+    # ------------------------------------------------------------------
+    # Stream the archive straight into the evidence bucket (Object Lock)
+    # ------------------------------------------------------------------
+    upload = _EvidenceUploadStream(s3_key, retention_until, kms_key_arn)
     try:
-        zip_bytes, sha256 = _build_zip_package(
+        package_size_bytes, sha256, log_count = _build_zip_package(
             AUDIT_SOURCE_BUCKET,
-            objects,
+            itertools.chain([first_object], objects),
             manifest_meta,
             {
                 'organization_name': organization_name,
@@ -582,37 +765,27 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 'created_at': generated_at.replace(microsecond=0).isoformat(),
                 'package_id': package_id,
                 'kms_key_arn': kms_key_arn,
-                'log_count': len(objects),
                 'retention_until': retention_until.replace(microsecond=0).isoformat(),
             },
+            upload,
         )
+        version_id = upload.close()
     except ClientError as exc:
-        _log('error', 'Failed to download log objects for packaging',
-             customer_id=customer_id, error=str(exc))
-        raise RuntimeError(f"Failed to build zip package: {exc}") from exc
-
-    _log('info', 'zip archive built',
-         customer_id=customer_id,
-         sha256=sha256,
-         size_bytes=len(zip_bytes),
-         object_count=len(objects))
-
-    # ------------------------------------------------------------------
-    # Upload with Object Lock
-    # ------------------------------------------------------------------
-    try:
-        version_id = _upload_evidence_package(
-            zip_bytes, s3_key, retention_until, kms_key_arn
-        )
-    except ClientError as exc:
-        _log('error', 'Failed to upload evidence package to S3',
+        upload.abort()
+        _log('error', 'Failed to build or upload evidence package',
              customer_id=customer_id, s3_key=s3_key, error=str(exc))
-        raise RuntimeError(f"S3 upload failed: {exc}") from exc
+        raise RuntimeError(f"Failed to build zip package: {exc}") from exc
+    except Exception:
+        upload.abort()
+        raise
 
     _log('info', 'evidence package uploaded',
          customer_id=customer_id,
          s3_key=s3_key,
          version_id=version_id,
+         sha256=sha256,
+         size_bytes=package_size_bytes,
+         object_count=log_count,
          retention_years=EVIDENCE_RETENTION_YEARS)
 
     # ------------------------------------------------------------------
@@ -629,8 +802,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             framework=framework,
             date_range_start=date_range_start,
             date_range_end=date_range_end,
-            log_count=len(objects),
-            package_size_bytes=len(zip_bytes),
+            log_count=log_count,
+            package_size_bytes=package_size_bytes,
             requested_by=requested_by,
             retention_years=EVIDENCE_RETENTION_YEARS,
         )
@@ -645,12 +818,12 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
          customer_id=customer_id,
          package_id=package_id,
          sha256=sha256,
-         log_count=len(objects))
+         log_count=log_count)
 
     return {
         'package_id': package_id,
         's3_key': s3_key,
         'sha256': sha256,
-        'log_count': len(objects),
-        'size_bytes': len(zip_bytes),
+        'log_count': log_count,
+        'size_bytes': package_size_bytes,
     }
@@ -64,15 +64,22 @@ Python: 3.11
 import json
 import logging
 import os
+import time
 import uuid
+from array import array
 from datetime import datetime, timezone
 from decimal import Decimal
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import boto3
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
 
+try:  # Optional: only used by the offline batch-scoring path.
+    import numpy as _np
+except ImportError:  # pragma: no cover - numpy is not in the Lambda package
+    _np = None
+
 # ---------------------------------------------------------------------------
 # Logging — structured JSON for CloudWatch Logs Insights
 # ---------------------------------------------------------------------------
@@ -146,6 +153,23 @@ FRAMEWORK_MAPPING_KEYS = {
 # Fallback: load mappings from Lambda package (when MAPPINGS_BUCKET is empty)
 _LOCAL_MAPPINGS_DIR = os.path.join(os.path.dirname(__file__), 'compliance')
 
+# AWS Config accepts at most 25 rule names per DescribeComplianceByConfigRule call.
+CONFIG_RULE_BATCH_SIZE = 25
+
+# DynamoDB BatchWriteItem accepts at most 25 put requests per call.
+DYNAMODB_BATCH_SIZE = 25
+BATCH_WRITE_MAX_ATTEMPTS = int(os.environ.get('BATCH_WRITE_MAX_ATTEMPTS', '6'))
+BATCH_WRITE_BASE_DELAY_SECONDS = 0.05
+_THROTTLING_ERROR_CODES = {
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+}
+
+# Parsed mappings kept across warm invocations: cache key → (S3 ETag, mapping).
+# S3 entries are revalidated with a conditional GET; bundled files never change.
+_MAPPING_CACHE: Dict[str, Tuple[Optional[str], Dict[str, Any]]] = {}
+
 
 # ---------------------------------------------------------------------------
 # Mapping file loading
@@ -158,6 +182,10 @@ def _load_mapping(framework: str, s3_client: Any) -> Dict[str, Any]:
     Tries S3 first (if MAPPINGS_BUCKET is configured), then falls back to the
     local ``../compliance/`` directory bundled with the Lambda package.
 
+    Parsed mappings are cached for the life of the container. S3 entries are
+    keyed on the object's ETag and revalidated with ``IfNoneMatch``, so a warm
+    invocation only re-downloads and re-parses a mapping that has changed.
+
     Args:
         framework: 'SOC2', 'HIPAA', or 'FedRAMP'.
 
@@ -169,22 +197,42 @@ def _load_mapping(framework: str, s3_client: Any) -> Dict[str, Any]:
     """
     s3_key = FRAMEWORK_MAPPING_KEYS.get(framework)
     if MAPPINGS_BUCKET and s3_key:
+        cache_key = f's3://{MAPPINGS_BUCKET}/{s3_key}'
+        cached_etag, cached_mapping = _MAPPING_CACHE.get(cache_key, (None, None))
+        request: Dict[str, Any] = {'Bucket': MAPPINGS_BUCKET, 'Key': s3_key}
+        if cached_etag:
+            request['IfNoneMatch'] = cached_etag
         try:
-            response = s3_client.get_object(Bucket=MAPPINGS_BUCKET, Key=s3_key)
-            return json.loads(response['Body'].read())
+            response = s3_client.get_object(**request)
+            mapping = json.loads(response['Body'].read())
+            _MAPPING_CACHE[cache_key] = (response.get('ETag'), mapping)
+            return mapping
         except ClientError as exc:
+            if cached_mapping is not None and _is_not_modified(exc):
+                return cached_mapping
             _log('warning', 'Could not load mapping from S3, falling back to local',
                  framework=framework, error=str(exc))
 
     # Local fallback
     filename = s3_key.split('/')[-1] if s3_key else f"{framework.lower()}_mapping.json"
     local_path = os.path.join(_LOCAL_MAPPINGS_DIR, filename)
+    if local_path in _MAPPING_CACHE:
+        return _MAPPING_CACHE[local_path][1]
     if not os.path.exists(local_path):
         raise FileNotFoundError(
             f"Mapping file not found for framework '{framework}': {local_path}"
         )
     with open(local_path) as fh:
-        return json.load(fh)
+        mapping = json.load(fh)
+    _MAPPING_CACHE[local_path] = (None, mapping)
+    return mapping
+
+
+def _is_not_modified(exc: ClientError) -> bool:
+    """True when a conditional S3 GET failed only because the ETag still matches."""
+    error_code = str(exc.response.get('Error', {}).get('Code', ''))
+    status = exc.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    return error_code in ('304', 'NotModified') or status == 304
 
 
 # ---------------------------------------------------------------------------
@@ -195,6 +243,10 @@ def _load_mapping(framework: str, s3_client: Any) -> Dict[str, Any]:
 def _get_config_compliance(rule_names: List[str], config_client: Any) -> Dict[str, str]:
     """Query AWS Config for the compliance status of specific rules.
 
+    Rule names are de-duplicated and requested in batches of
+    ``CONFIG_RULE_BATCH_SIZE`` (the API limit); a failed batch is logged and
+    only its rules are missing from the result.
+
     Args:
         rule_names: List of AWS Config managed rule names.
 
@@ -203,23 +255,27 @@ def _get_config_compliance(rule_names: List[str], config_client: Any) -> Dict[st
         ('COMPLIANT', 'NON_COMPLIANT', 'NOT_APPLICABLE', 'INSUFFICIENT_DATA').
     """
     compliance_map: Dict[str, str] = {}
-    if not rule_names:
+    unique_rules = list(dict.fromkeys(rule_names))
+    if not unique_rules:
         return compliance_map
 
-    try:
-        paginator = config_client.get_paginator('describe_compliance_by_config_rule')
-        for page in paginator.paginate(
-            ConfigRuleNames=rule_names,
-            ComplianceTypes=['COMPLIANT', 'NON_COMPLIANT', 'NOT_APPLICABLE',
-                             'INSUFFICIENT_DATA'],
-        ):
-            for item in page.get('ComplianceByConfigRules', []):
-                rule_name = item['ConfigRuleName']
-                compliance_type = item.get('Compliance', {}).get('ComplianceType',
-                                                                  'INSUFFICIENT_DATA')
-                compliance_map[rule_name] = compliance_type
-    except ClientError as exc:
-        _log('warning', 'AWS Config query failed', error=str(exc))
+    paginator = config_client.get_paginator('describe_compliance_by_config_rule')
+    for start in range(0, len(unique_rules), CONFIG_RULE_BATCH_SIZE):
+        batch = unique_rules[start:start + CONFIG_RULE_BATCH_SIZE]
+        try:
+            for page in paginator.paginate(
+                ConfigRuleNames=batch,
+                ComplianceTypes=['COMPLIANT', 'NON_COMPLIANT', 'NOT_APPLICABLE',
+                                 'INSUFFICIENT_DATA'],
+            ):
+                for item in page.get('ComplianceByConfigRules', []):
+                    rule_name = item['ConfigRuleName']
+                    compliance_type = item.get('Compliance', {}).get('ComplianceType',
+                                                                      'INSUFFICIENT_DATA')
+                    compliance_map[rule_name] = compliance_type
+        except ClientError as exc:
+            _log('warning', 'AWS Config query failed',
+                 error=str(exc), rules_in_batch=len(batch))
 
     return compliance_map
 
@@ -345,6 +401,9 @@ def _calculate_weighted_score(
 ) -> Tuple[float, Dict[str, int]]:
     """Calculate the weighted compliance score for a set of controls.
 
+    Reference implementation for a single framework; ``_score_tenant`` scores
+    all frameworks at once through ``CompiledScoringModel``.
+
     Args:
         controls:       List of control dicts from the mapping file.
                         Each dict must have 'severity' and 'config_rule' keys.
@@ -389,11 +448,302 @@ def _calculate_weighted_score(
     return score, violations
 
 
+# ---------------------------------------------------------------------------
+# Compiled multi-framework scoring
+# ---------------------------------------------------------------------------
+
+VIOLATION_SEVERITIES: Tuple[str, ...] = ('CRITICAL', 'HIGH', 'MEDIUM', 'LOW')
+
+# Rule-status codes used in the compiled status vectors.
+_STATUS_MISSING = 0
+_STATUS_COMPLIANT = 1
+_STATUS_NON_COMPLIANT = 2
+_STATUS_OTHER = 3
+_STATUS_CODES = {
+    None: _STATUS_MISSING,
+    'COMPLIANT': _STATUS_COMPLIANT,
+    'NON_COMPLIANT': _STATUS_NON_COMPLIANT,
+}
+
+
+class CompiledScoringModel:
+    """Framework mappings flattened into parallel per-control arrays.
+
+    Every control becomes one slot holding its rule index (into ``rules``), its
+    severity weight, its violation bucket and its framework index. A tenant's
+    Config results are encoded once as a rule-status vector, and the scores and
+    violation counts for every framework come from a single pass over it.
+    Results are identical to calling ``_calculate_weighted_score`` per
+    framework.
+
+    ``score_batch`` and ``score_matrix`` score many tenants in one call (using
+    numpy, which is optional and not part of the Lambda package) for offline
+    benchmarking and backtesting of scoring changes.
+    """
+
+    def __init__(self, framework_controls: Dict[str, List[Dict[str, Any]]]):
+        self.frameworks: Tuple[str, ...] = tuple(framework_controls)
+        self.controls_total: List[int] = [0] * len(self.frameworks)
+        self.rules_requested: List[int] = [0] * len(self.frameworks)
+        self.control_rule = array('l')
+        self.control_weight = array('d')
+        self.control_severity = array('b')
+        self.control_framework = array('b')
+        self._rule_index: Dict[str, int] = {}
+
+        for fw_idx, controls in enumerate(framework_controls.values()):
+            for control in controls:
+                severity = control.get('severity', 'MEDIUM').upper()
+                rule = control.get('config_rule', '')
+                self.control_rule.append(self._rule_index.setdefault(rule, len(self._rule_index)))
+                self.control_weight.append(SEVERITY_WEIGHTS.get(severity, 1.0))
+                self.control_severity.append(
+                    VIOLATION_SEVERITIES.index(severity)
+                    if severity in VIOLATION_SEVERITIES else VIOLATION_SEVERITIES.index('MEDIUM')
+                )
+                self.control_framework.append(fw_idx)
+                self.controls_total[fw_idx] += 1
+                if rule:
+                    self.rules_requested[fw_idx] += 1
+
+        self.rules: Tuple[str, ...] = tuple(self._rule_index)
+
+    @property
+    def rule_names(self) -> List[str]:
+        """Unique Config rule names referenced by any framework."""
+        return [rule for rule in self.rules if rule]
+
+    def status_vector(self, compliance_map: Dict[str, str]) -> array:
+        """Encode a rule → compliance status map as one status code per rule."""
+        return array('b', [
+            _STATUS_CODES.get(compliance_map.get(rule), _STATUS_OTHER) for rule in self.rules
+        ])
+
+    def score(self, compliance_map: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Score every framework for one tenant.
+
+        Returns:
+            Dict of framework → ``{"score", "violations", "controls_total",
+            "controls_passing", "rules_requested", "rules_reported"}``.
+        """
+        status = self.status_vector(compliance_map)
+        count = len(self.frameworks)
+        total = [0.0] * count
+        passing = [0.0] * count
+        passing_count = [0] * count
+        reported = [0] * count
+        violations = [[0] * len(VIOLATION_SEVERITIES) for _ in range(count)]
+
+        for rule, weight, severity, fw_idx in zip(
+            self.control_rule, self.control_weight,
+            self.control_severity, self.control_framework,
+        ):
+            code = status[rule]
+            total[fw_idx] += weight
+            if code == _STATUS_COMPLIANT:
+                passing[fw_idx] += weight
+                passing_count[fw_idx] += 1
+            elif code == _STATUS_NON_COMPLIANT:
+                violations[fw_idx][severity] += 1
+            if code != _STATUS_MISSING:
+                reported[fw_idx] += 1
+
+        return self._results(total, passing, passing_count, reported, violations)
+
+    def score_batch(
+        self,
+        compliance_maps: Sequence[Dict[str, str]],
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """Score many tenants at once; one ``score()``-shaped result per map."""
+        if _np is None or not compliance_maps:
+            return [self.score(compliance_map) for compliance_map in compliance_maps]
+
+        matrix = self.score_matrix(_np.array(
+            [self.status_vector(m) for m in compliance_maps], dtype=_np.int8,
+        ).reshape(len(compliance_maps), len(self.rules)))
+        total = matrix['total_weight'].tolist()
+        return [
+            self._results(
+                total,
+                matrix['passing_weight'][row].tolist(),
+                matrix['controls_passing'][row].tolist(),
+                matrix['rules_reported'][row].tolist(),
+                matrix['violations'][row].tolist(),
+            )
+            for row in range(len(compliance_maps))
+        ]
+
+    def score_matrix(self, status: Any) -> Dict[str, Any]:
+        """Vectorized scoring over a tenants × rules matrix of status codes.
+
+        Requires numpy. ``status[t, r]`` is the status code of ``rules[r]`` for
+        tenant ``t`` (see ``status_vector``). Returns numpy arrays with one row
+        per tenant and one column per framework (in ``frameworks`` order):
+        ``score``, ``passing_weight``, ``controls_passing``, ``rules_reported``
+        and ``violations`` (a trailing ``VIOLATION_SEVERITIES`` axis), plus the
+        per-framework ``total_weight``.
+        """
+        if _np is None:
+            raise RuntimeError('score_matrix requires numpy')
+
+        framework_count = len(self.frameworks)
+        severity_count = len(VIOLATION_SEVERITIES)
+        control_count = len(self.control_rule)
+        frameworks = _np.array(self.control_framework, dtype=_np.int64)
+        severities = _np.array(self.control_severity, dtype=_np.int64)
+        weights = _np.array(self.control_weight, dtype=_np.float64)
+
+        by_framework = _np.zeros((control_count, framework_count))
+        by_framework[_np.arange(control_count), frameworks] = 1.0
+        by_bucket = _np.zeros((control_count, framework_count * severity_count))
+        by_bucket[_np.arange(control_count), frameworks * severity_count + severities] = 1.0
+
+        per_control = _np.asarray(status)[:, _np.array(self.control_rule, dtype=_np.int64)]
+        compliant = per_control == _STATUS_COMPLIANT
+        # Severity weights are multiples of 0.5, so these float sums are exact.
+        total = weights @ by_framework
+        passing = (compliant * weights) @ by_framework
+        with _np.errstate(divide='ignore', invalid='ignore'):
+            score = _np.where(total > 0, _np.round(100.0 * passing / total, 2), 0.0)
+
+        return {
+            'score': score,
+            'total_weight': total,
+            'passing_weight': passing,
+            'controls_passing': (compliant.astype(_np.float64) @ by_framework).astype(_np.int64),
+            'rules_reported': (
+                (per_control != _STATUS_MISSING).astype(_np.float64) @ by_framework
+            ).astype(_np.int64),
+            'violations': (
+                (per_control == _STATUS_NON_COMPLIANT).astype(_np.float64) @ by_bucket
+            ).astype(_np.int64).reshape(-1, framework_count, severity_count),
+        }
+
+    def _results(
+        self,
+        total: List[float],
+        passing: List[float],
+        passing_count: List[int],
+        reported: List[int],
+        violations: List[List[int]],
+    ) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        for fw_idx, framework in enumerate(self.frameworks):
+            weight = total[fw_idx]
+            results[framework] = {
+                'score': round(100.0 * passing[fw_idx] / weight, 2) if weight else 0.0,
+                'violations': dict(zip(VIOLATION_SEVERITIES, violations[fw_idx])),
+                'controls_total': self.controls_total[fw_idx],
+                'controls_passing': passing_count[fw_idx],
+                'rules_requested': self.rules_requested[fw_idx],
+                'rules_reported': reported[fw_idx],
+            }
+        return results
+
+
+# Compiled model for the most recently loaded mappings. The source control
+# lists are held alongside it so the identity check below stays valid.
+_COMPILED_MODEL: Optional[Tuple[Tuple[Tuple[str, Any], ...], CompiledScoringModel]] = None
+
+
+def _compiled_model(framework_controls: Dict[str, List[Dict[str, Any]]]) -> CompiledScoringModel:
+    """Return a compiled model, recompiling only when a mapping was reloaded."""
+    global _COMPILED_MODEL
+    sources = tuple(framework_controls.items())
+    if _COMPILED_MODEL is not None:
+        cached_sources, model = _COMPILED_MODEL
+        if len(cached_sources) == len(sources) and all(
+            cached_fw == fw and cached_controls is controls
+            for (cached_fw, cached_controls), (fw, controls) in zip(cached_sources, sources)
+        ):
+            return model
+    model = CompiledScoringModel(framework_controls)
+    _COMPILED_MODEL = (sources, model)
+    return model
+
+
 # ---------------------------------------------------------------------------
 # DynamoDB writes
 # ---------------------------------------------------------------------------
 
 
+class _TenantWriteBatch:
+    """Collects a tenant's score and control items for one BatchWriteItem pass.
+
+    Items are keyed on table + PK/SK so a repeated key keeps the last value,
+    matching the previous put_item overwrite semantics. ``flush`` writes in
+    chunks of 25, re-submitting ``UnprocessedItems`` (and retrying throttled
+    calls) with exponential backoff, and counts items written and retries.
+    """
+
+    def __init__(self) -> None:
+        self._items: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self.items_written = 0
+        self.throttle_retries = 0
+        self.items_failed = 0
+
+    def put(self, table_name: str, item: Dict[str, Any]) -> None:
+        self._items[(table_name, item['PK'], item['SK'])] = item
+
+    def flush(self) -> None:
+        pending = [(key[0], item) for key, item in self._items.items()]
+        self._items = {}
+        for start in range(0, len(pending), DYNAMODB_BATCH_SIZE):
+            request_items: Dict[str, List[Dict[str, Any]]] = {}
+            for table_name, item in pending[start:start + DYNAMODB_BATCH_SIZE]:
+                request_items.setdefault(table_name, []).append({'PutRequest': {'Item': item}})
+            self._write_chunk(request_items)
+
+    def _write_chunk(self, request_items: Dict[str, List[Dict[str, Any]]]) -> None:
+        submitted = sum(len(requests) for requests in request_items.values())
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            if attempt:
+                self.throttle_retries += 1
+                time.sleep(BATCH_WRITE_BASE_DELAY_SECONDS * (2 ** (attempt - 1)))
+            try:
+                response = dynamodb.batch_write_item(RequestItems=request_items)
+            except ClientError as exc:
+                if exc.response.get('Error', {}).get('Code') not in _THROTTLING_ERROR_CODES:
+                    raise
+                continue
+            unprocessed = response.get('UnprocessedItems') or {}
+            remaining = sum(len(requests) for requests in unprocessed.values())
+            self.items_written += submitted - remaining
+            if not remaining:
+                return
+            request_items, submitted = unprocessed, remaining
+
+        self.items_failed += submitted
+        _log('error', 'DynamoDB batch write left unprocessed items',
+             unprocessed_items=submitted, attempts=BATCH_WRITE_MAX_ATTEMPTS)
+
+
+def _publish_write_metrics(
+    customer_id: str,
+    batch: _TenantWriteBatch,
+    cloudwatch_client: Any,
+) -> None:
+    """Publish the tenant's DynamoDB write counters for this run."""
+    _log('info', 'compliance score write pass complete',
+         customer_id=customer_id,
+         items_written=batch.items_written,
+         throttle_retries=batch.throttle_retries,
+         items_failed=batch.items_failed)
+    try:
+        dimensions = [{'Name': 'TenantId', 'Value': customer_id}]
+        cloudwatch_client.put_metric_data(
+            Namespace='SecureBase/Compliance',
+            MetricData=[
+                {'MetricName': 'ScoreItemsWritten', 'Dimensions': dimensions,
+                 'Value': batch.items_written, 'Unit': 'Count'},
+                {'MetricName': 'ScoreWriteThrottleRetries', 'Dimensions': dimensions,
+                 'Value': batch.throttle_retries, 'Unit': 'Count'},
+            ],
+        )
+    except ClientError as exc:
+        _log('warning', 'Failed to publish score write metrics', error=str(exc))
+
+
 def _write_score_to_dynamodb(
     customer_id: str,
     framework: str,
@@ -403,6 +753,7 @@ def _write_score_to_dynamodb(
     controls_passing: int,
     cloudwatch_client: Any,
     dry_run: bool = False,
+    batch: Optional[_TenantWriteBatch] = None,
 ) -> None:
     """Write the daily compliance score to DynamoDB.
 
@@ -418,6 +769,8 @@ def _write_score_to_dynamodb(
         controls_passing: Number of passing controls.
         cloudwatch_client: boto3 CloudWatch client from invocation session.
         dry_run:          If True, log the item but skip the actual write.
+        batch:            If given, queue the item on the tenant's write batch
+                          instead of writing it immediately.
     """
     today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
     now = datetime.now(timezone.utc)
@@ -500,6 +853,10 @@ def _write_score_to_dynamodb(
             framework=framework,
         )
 
+    if batch is not None:
+        batch.put(COMPLIANCE_SCORES_TABLE, item)
+        return
+
     table.put_item(Item=item)
     _log('info', 'compliance score written to DynamoDB',
          customer_id=customer_id, framework=framework, score=score,
@@ -512,8 +869,12 @@ def _write_control_violations_to_dynamodb(
     controls: List[Dict[str, Any]],
     compliance_map: Dict[str, str],
     dry_run: bool = False,
+    batch: Optional[_TenantWriteBatch] = None,
 ) -> None:
-    """Write per-control status snapshots to the control_violation_log table."""
+    """Write per-control status snapshots to the control_violation_log table.
+
+    With ``batch``, the snapshots are queued on the tenant's write batch.
+    """
     today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
     now = datetime.now(timezone.utc)
     table = dynamodb.Table(CONTROL_VIOLATION_TABLE)
@@ -541,6 +902,10 @@ def _write_control_violations_to_dynamodb(
         if dry_run:
             continue
 
+        if batch is not None:
+            batch.put(CONTROL_VIOLATION_TABLE, item)
+            continue
+
         table.put_item(Item=item)
 
 
@@ -570,6 +935,7 @@ def _score_tenant(
     s3_client = session.client('s3')
     cloudwatch_client = session.client('cloudwatch')
 
+    framework_controls: Dict[str, List[Dict[str, Any]]] = {}
     for framework in ('SOC2', 'HIPAA', 'FedRAMP'):
         try:
             mapping = _load_mapping(framework, s3_client)
@@ -577,49 +943,53 @@ def _score_tenant(
             _log('warning', 'Mapping file not found, skipping framework',
                  customer_id=customer_id, framework=framework, error=str(exc))
             continue
+        framework_controls[framework] = mapping.get('controls', [])
 
-        controls: List[Dict[str, Any]] = mapping.get('controls', [])
-        rule_names = [c['config_rule'] for c in controls if c.get('config_rule')]
+    # The frameworks share many Config rules: query the union once per tenant
+    # and score every framework from the compiled model in one pass.
+    model = _compiled_model(framework_controls)
+    tenant_compliance = _get_config_compliance(model.rule_names, config_client)
+    results = model.score(tenant_compliance)
+    # Every framework's items go out together in a single write pass.
+    batch = _TenantWriteBatch()
 
-        compliance_map = _get_config_compliance(rule_names, config_client)
+    for framework, controls in framework_controls.items():
+        result = results[framework]
 
         # If the Config query returned nothing (service error, throttle, or
         # Config not enabled in the target account), we have no real signal.
         # Persisting a score now would write a spurious 0 and trip the
         # >10-point drop alarm. Skip this framework entirely for this run.
-        if rule_names and not compliance_map:
+        if result['rules_requested'] and not result['rules_reported']:
             _log('warning',
                  'Empty Config compliance map; skipping write to avoid '
                  'persisting a spurious score=0',
                  customer_id=customer_id, framework=framework,
-                 rules_requested=len(rule_names))
+                 rules_requested=result['rules_requested'])
             scores[framework] = None
             continue
 
-        score, violations = _calculate_weighted_score(controls, compliance_map)
-
-        controls_passing = sum(
-            1 for c in controls
-            if compliance_map.get(c.get('config_rule', ''), '') == 'COMPLIANT'
-        )
+        score = result['score']
 
         try:
             _write_score_to_dynamodb(
                 customer_id=customer_id,
                 framework=framework,
                 score=score,
-                violations=violations,
-                controls_total=len(controls),
-                controls_passing=controls_passing,
+                violations=result['violations'],
+                controls_total=result['controls_total'],
+                controls_passing=result['controls_passing'],
                 cloudwatch_client=cloudwatch_client,
                 dry_run=dry_run,
+                batch=batch,
             )
             _write_control_violations_to_dynamodb(
                 customer_id=customer_id,
                 framework=framework,
                 controls=controls,
-                compliance_map=compliance_map,
+                compliance_map=tenant_compliance,
                 dry_run=dry_run,
+                batch=batch,
             )
         except ClientError as exc:
             _log('error', 'DynamoDB write failed',
@@ -627,6 +997,14 @@ def _score_tenant(
 
         scores[framework] = score
 
+    if not dry_run:
+        try:
+            batch.flush()
+        except ClientError as exc:
+            _log('error', 'DynamoDB write failed',
+                 customer_id=customer_id, error=str(exc))
+        _publish_write_metrics(customer_id, batch, cloudwatch_client)
+
     return scores
 
 
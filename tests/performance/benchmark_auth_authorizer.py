@@ -0,0 +1,182 @@
+"""
+Micro-benchmark: API key authorizer latency before and after the fast path
+
+Replays a skewed stream of authorizer calls (a few hot keys, a long tail)
+through:
+
+  baseline   the previous authenticate_api_key flow: DynamoDB get_item on
+             every call; on a miss a lookup and a separate last_used_at
+             UPDATE, each on its own borrowed connection
+  fast path  auth.authenticate_api_key: per-container LRU, DynamoDB only on
+             a local miss, one connection for lookup + batched last_used_at
+
+DynamoDB and PostgreSQL are simulated in-process with fixed sleeps per
+round trip (tunable below), so the numbers show how many round trips sit
+on the request path rather than real service latency.
+
+Usage:
+    python tests/performance/benchmark_auth_authorizer.py [--requests 2000] [--keys 200]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..', '..', 'phase2-backend', 'lambda_layer', 'python'))
+sys.path.insert(0, os.path.join(HERE, '..', '..', 'phase2-backend', 'functions'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import auth  # noqa: E402
+
+# Simulated round-trip latencies (seconds)
+DYNAMODB_READ = 0.004
+DYNAMODB_WRITE = 0.006
+POSTGRES_QUERY = 0.002
+POSTGRES_COMMIT = 0.002
+
+
+class SimulatedCacheTable:
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, Key, ConsistentRead=False):
+        time.sleep(DYNAMODB_READ)
+        item = self.items.get(Key['SessionId'])
+        return {'Item': dict(item)} if item else {}
+
+    def put_item(self, Item):
+        time.sleep(DYNAMODB_WRITE)
+        self.items[Item['SessionId']] = dict(Item)
+
+
+class SimulatedCursor:
+    def __init__(self, keys):
+        self.keys = keys
+        self.row = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        time.sleep(POSTGRES_QUERY)
+        self.row = self.keys.get(params[0]) if params and 'key_hash' in sql else None
+
+    def fetchone(self):
+        return self.row
+
+
+class SimulatedConnection:
+    def __init__(self, keys):
+        self.keys = keys
+
+    def cursor(self, cursor_factory=None):
+        return SimulatedCursor(self.keys)
+
+    def commit(self):
+        time.sleep(POSTGRES_COMMIT)
+
+    def rollback(self):
+        pass
+
+
+def make_keys(n):
+    keys = {}
+    for i in range(n):
+        api_key = f"sk_live_bench_{i:06d}"
+        keys[hashlib.sha256(api_key.encode()).hexdigest()] = {
+            'id': f"00000000-0000-4000-8000-{i:012d}", 'customer_id': f"cust-{i % 50}",
+            'scopes': ['read:invoices'], 'name': 'Bench', 'tier': 'fintech', 'status': 'active',
+        }
+    return keys
+
+
+def request_stream(n_keys, n_requests, seed=11):
+    """Zipf-like: most traffic comes from a handful of integrations."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(n_keys)]
+    return [f"sk_live_bench_{i:06d}" for i in rng.choices(range(n_keys), weights, k=n_requests)]
+
+
+# ── Baseline: the flow as it was before the fast path ────────────────────────
+
+def legacy_authenticate(api_key, cache_table, borrow_connection):
+    api_key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+    cache_response = cache_table.get_item(Key={'SessionId': f'apikey#{api_key_hash}'})
+    if 'Item' in cache_response:
+        return cache_response['Item']['CustomerId']
+
+    with borrow_connection() as conn, conn.cursor() as cur:
+        cur.execute("SELECT ... FROM api_keys WHERE ak.key_hash = %s", (api_key_hash,))
+        result = cur.fetchone()
+    if not result:
+        return None
+
+    cache_table.put_item(Item={'SessionId': f'apikey#{api_key_hash}', 'CustomerId': result['customer_id']})
+    with borrow_connection() as conn, conn.cursor() as cur:
+        cur.execute("UPDATE api_keys SET last_used_at = NOW() WHERE id = %s", (result['id'],))
+        conn.commit()
+    return result['customer_id']
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000  # noqa: E731
+    return pick(0.50), pick(0.99), statistics.mean(ordered) * 1000
+
+
+def run(calls, authenticate):
+    latencies = []
+    for api_key in calls:
+        started = time.perf_counter()
+        authenticate(api_key)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--keys', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    keys = make_keys(args.keys)
+    calls = request_stream(args.keys, args.requests)
+
+    @contextmanager
+    def borrow(*_args, **_kwargs):
+        yield SimulatedConnection(keys)
+
+    legacy_table = SimulatedCacheTable()
+    legacy = run(calls, lambda k: legacy_authenticate(k, legacy_table, borrow))
+
+    fast_table = SimulatedCacheTable()
+    auth._verified_keys.clear()
+    auth._revocation.update(version=0, checked_at=None)
+    with patch.object(auth, 'cache_table', fast_table), \
+            patch.object(auth, 'borrow_connection', borrow), \
+            patch.object(auth, 'execute_values', lambda cur, sql, rows: cur.execute(sql)), \
+            patch.object(auth.logger, 'info'):
+        fast = run(calls, lambda k: auth.authenticate_api_key({'headers': {'Authorization': f'Bearer {k}'}}, None))
+
+    print(f"{args.requests:,} calls over {args.keys} keys "
+          f"(DynamoDB {DYNAMODB_READ * 1000:.0f}/{DYNAMODB_WRITE * 1000:.0f} ms, "
+          f"PostgreSQL {POSTGRES_QUERY * 1000:.0f} ms per round trip)\n")
+    print(f"{'authorizer':<12}{'p50':>10}{'p99':>10}{'mean':>10}")
+    for name, samples in (('baseline', legacy), ('fast path', fast)):
+        p50, p99, mean = _percentiles(samples)
+        print(f"{name:<12}{p50:>8.2f}ms{p99:>8.2f}ms{mean:>8.2f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
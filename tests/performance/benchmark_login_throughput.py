@@ -0,0 +1,161 @@
+"""
+Load test: portal logins per second per container, bcrypt on vs off the connection
+
+Fires a burst of password logins at session_management.login from a number
+of concurrent callers sharing one small connection pool, the way a single
+warm container sees a Monday-morning SSO fallback.  Two flows are run
+with real bcrypt at the same cost:
+
+  baseline   the previous login: bcrypt.checkpw inline while the pooled
+             connection and its transaction are held
+  offloaded  session_management.login: read user, release the connection,
+             verify on the password_hashing executor, reconnect for writes
+
+PostgreSQL is simulated in-process (fixed latency per statement, pool of
+--pool connections), so the numbers isolate connection hold time.
+
+Usage:
+    python tests/performance/benchmark_login_throughput.py [--logins 200] [--concurrency 8] [--pool 2] [--rounds 10]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..', '..', 'phase2-backend', 'lambda_layer', 'python'))
+sys.path.insert(0, os.path.join(HERE, '..', '..', 'phase2-backend', 'functions'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('JWT_SECRET', 'benchmark-jwt-secret-at-least-32-bytes')
+
+import bcrypt  # noqa: E402
+
+import password_hashing  # noqa: E402
+import session_management  # noqa: E402
+
+STATEMENT_LATENCY = 0.002
+
+
+class SimulatedPool:
+    """Bounded connection pool; tracks how long connections are held and waited for."""
+
+    def __init__(self, size, user_row):
+        self.user_row = user_row
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._borrowed = {}
+        self.held = []
+        self.waited = []
+
+    def get_connection(self):
+        started = time.perf_counter()
+        self._slots.acquire()
+        now = time.perf_counter()
+        conn = SimulatedConnection(self.user_row)
+        with self._lock:
+            self.waited.append(now - started)
+            self._borrowed[id(conn)] = now
+        return conn
+
+    def release_connection(self, conn):
+        with self._lock:
+            self.held.append(time.perf_counter() - self._borrowed.pop(id(conn)))
+        self._slots.release()
+
+
+class SimulatedConnection:
+    def __init__(self, user_row):
+        self.user_row = user_row
+        self.row = None
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        time.sleep(STATEMENT_LATENCY)
+        self.row = self.user_row if 'FROM users u' in sql else (1,)
+
+    def fetchone(self):
+        return self.row
+
+    def commit(self):
+        time.sleep(STATEMENT_LATENCY)
+
+    def rollback(self):
+        pass
+
+
+# ── Baseline: bcrypt while holding the connection ───────────────────────────
+
+def legacy_login(pool, password):
+    conn = pool.get_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT ... FROM users u WHERE u.email = %s", ('a@example.com',))
+        user = cur.fetchone()
+        if not bcrypt.checkpw(password.encode('utf-8'), user[2].encode('utf-8')):
+            return 401
+        cur.execute("UPDATE users SET failed_login_attempts = 0 ... WHERE id = %s", (user[0],))
+        cur.execute("INSERT INTO user_sessions ...")
+        cur.execute("INSERT INTO activity_feed ...")
+        conn.commit()
+        return 200
+    finally:
+        pool.release_connection(conn)
+
+
+def offloaded_login(_pool, password):
+    response = session_management.login(
+        {'email': 'a@example.com', 'password': password}, '10.0.0.1', 'load-test', {}
+    )
+    return response['statusCode']
+
+
+def run(flow, pool, logins, concurrency, password):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        statuses = list(executor.map(lambda _: flow(pool, password), range(logins)))
+    elapsed = time.perf_counter() - started
+    assert statuses == [200] * logins, f"unexpected statuses: {set(statuses)}"
+    return elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--pool', type=int, default=2)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    password = 'correct horse battery staple'
+    password_hashing.BCRYPT_ROUNDS = args.rounds
+    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=args.rounds)).decode()
+    user_row = ('user-1', 'cust-1', password_hash, 'active', False, None, 'analyst',
+                'a@example.com', 'Load Test', 0, None)
+
+    results = []
+    for name, flow in (('baseline', legacy_login), ('offloaded', offloaded_login)):
+        pool = SimulatedPool(args.pool, user_row)
+        with patch.object(session_management, 'get_connection', pool.get_connection), \
+                patch.object(session_management, 'release_connection', pool.release_connection), \
+                patch.object(session_management, 'generate_csrf_token', lambda token: 'csrf'):
+            elapsed = run(flow, pool, args.logins, args.concurrency, password)
+        results.append((name, args.logins / elapsed, statistics.mean(pool.held) * 1000,
+                        statistics.mean(pool.waited) * 1000))
+
+    print(f"{args.logins} logins, {args.concurrency} concurrent callers, pool of {args.pool}, "
+          f"bcrypt cost {args.rounds}, {password_hashing.PASSWORD_HASH_CONCURRENCY} hash workers\n")
+    print(f"{'login flow':<12}{'logins/s':>10}{'conn held':>12}{'pool wait':>12}")
+    for name, rate, held, waited in results:
+        print(f"{name:<12}{rate:>10.1f}{held:>10.1f}ms{waited:>10.1f}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Micro-benchmark: analytics aggregation kernel vs the per-function loops it replaced
+
+Builds N synthetic metric rows shaped like DynamoDB items (Decimal values)
+and times, for the two analytics call sites:
+
+  report_engine       aggregate_by_dimension + calculate_summary
+  analytics_reporter  aggregate_metrics + calculate_trends
+
+once with the original list-of-dicts loops (kept verbatim below as the
+baseline) and once with metrics_kernel, checking that both produce the
+same numbers.
+
+Usage:
+    python tests/performance/benchmark_metrics_kernel.py [--rows 1000000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), '..', '..', 'phase2-backend', 'lambda_layer', 'python')
+)
+
+from metrics_kernel import MetricColumns, aggregate  # noqa: E402
+
+METRIC_NAMES = ['api_calls', 'storage_gb', 'compute_hours', 'data_transfer_gb',
+                'daily_cost', 'security_findings', 'compliance_score']
+SERVICES = ['lambda', 'dynamodb', 's3', 'api-gateway', 'cloudfront', 'rds']
+REGIONS = ['us-east-1', 'us-west-2', 'eu-west-1']
+
+
+def synthetic_rows(n, seed=7):
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1)
+    return [
+        {
+            'customer_id': 'bench-customer',
+            'timestamp': (start + timedelta(seconds=30 * i)).isoformat(),
+            'metric_name': METRIC_NAMES[i % len(METRIC_NAMES)],
+            'service': SERVICES[rng.randrange(len(SERVICES))],
+            'region': REGIONS[rng.randrange(len(REGIONS))],
+            'value': Decimal(str(round(rng.uniform(0, 500), 2))),
+            'cost': Decimal(str(round(rng.uniform(0, 50), 2))),
+            'usage': Decimal(str(rng.randrange(0, 10000))),
+        }
+        for i in range(n)
+    ]
+
+
+# ── Baseline: the loops as they were before the kernel ───────────────────────
+
+def legacy_aggregate_by_dimension(metrics, dimension):
+    aggregated = {}
+    for metric in metrics:
+        key = metric.get(dimension, 'unknown')
+        if key not in aggregated:
+            aggregated[key] = {'dimension': key, 'totalCost': 0, 'totalUsage': 0, 'count': 0}
+        aggregated[key]['totalCost'] += float(metric.get('cost', 0))
+        aggregated[key]['totalUsage'] += float(metric.get('usage', 0))
+        aggregated[key]['count'] += 1
+    return list(aggregated.values())
+
+
+def legacy_calculate_summary(metrics):
+    return {
+        'totalCost': sum(float(m.get('cost', 0)) for m in metrics),
+        'apiCalls': sum(float(m.get('usage', 0)) for m in metrics),
+        'activeResources': len(metrics),
+    }
+
+
+def legacy_aggregate_metrics(metrics):
+    aggregated = {}
+    for metric in metrics:
+        metric_name = metric.get('metric_name')
+        if not metric_name:
+            continue
+        if metric_name not in aggregated:
+            aggregated[metric_name] = {'value': Decimal('0'), 'count': 0, 'samples': []}
+        value = metric.get('value', Decimal('0'))
+        aggregated[metric_name]['value'] += value
+        aggregated[metric_name]['count'] += 1
+        aggregated[metric_name]['samples'].append({'timestamp': metric.get('timestamp'), 'value': value})
+    for metric_name in aggregated:
+        aggregated[metric_name]['average'] = aggregated[metric_name]['value'] / aggregated[metric_name]['count']
+    return aggregated
+
+
+def legacy_calculate_trends(aggregated):
+    trends = {}
+    for metric_name, data in aggregated.items():
+        samples = data['samples']
+        mid_point = len(samples) // 2
+        first_half = sum(float(s['value']) for s in samples[:mid_point]) / mid_point
+        second_half = sum(float(s['value']) for s in samples[mid_point:]) / (len(samples) - mid_point)
+        trends[metric_name] = ((second_half - first_half) / first_half) * 100
+    return trends
+
+
+# ── Kernel equivalents ────────────────────────────────────────────────────────
+
+def kernel_report_engine(rows):
+    columns = MetricColumns.from_rows(rows, ('cost', 'usage'), ('service',))
+    return aggregate(columns, group_by=('service',))
+
+
+def kernel_analytics_reporter(rows):
+    columns = MetricColumns.from_rows(rows, ('value',), ('metric_name',))
+    return aggregate(columns, group_by=('metric_name',), trend_by='metric_name')
+
+
+def _time(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+
+def _check(legacy_engine, kernel_engine, legacy_reporter, kernel_reporter):
+    by_service = {g['dimension']: g for g in legacy_engine[0]}
+    for service, group in kernel_engine['groups']['service'].items():
+        assert abs(group['cost'] - by_service[service]['totalCost']) < 1e-6 * max(1, group['cost'])
+        assert group['count'] == by_service[service]['count']
+    assert abs(kernel_engine['totals']['usage'] - legacy_engine[1]['apiCalls']) < 1e-3
+
+    aggregated, trends = legacy_reporter
+    for name, trend in kernel_reporter['trends'].items():
+        assert abs(trend['change_pct'] - trends[name]) < 1e-6
+        assert abs(kernel_reporter['groups']['metric_name'][name]['value'] - float(aggregated[name]['value'])) < 1e-3
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"Generating {args.rows:,} synthetic metric rows...")
+    rows = synthetic_rows(args.rows)
+
+    legacy_engine_s, legacy_engine = _time(
+        lambda: (legacy_aggregate_by_dimension(rows, 'service'), legacy_calculate_summary(rows)), args.repeat
+    )
+    kernel_engine_s, kernel_engine = _time(lambda: kernel_report_engine(rows), args.repeat)
+    legacy_reporter_s, legacy_reporter = _time(
+        lambda: (lambda agg: (agg, legacy_calculate_trends(agg)))(legacy_aggregate_metrics(rows)), args.repeat
+    )
+    kernel_reporter_s, kernel_reporter = _time(lambda: kernel_analytics_reporter(rows), args.repeat)
+
+    _check(legacy_engine, kernel_engine, legacy_reporter, kernel_reporter)
+
+    print(f"\n{'call site':<22}{'baseline':>12}{'kernel':>12}{'speedup':>10}")
+    for name, before, after in (
+        ('report_engine', legacy_engine_s, kernel_engine_s),
+        ('analytics_reporter', legacy_reporter_s, kernel_reporter_s),
+    ):
+        print(f"{name:<22}{before:>11.3f}s{after:>11.3f}s{before / after:>9.1f}x")
+    print("\nResults match.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Benchmark: notification template rendering with and without the compiled template cache
+
+Renders --renders notifications of a single event type for a customer that
+has no template of its own (the default-template fallback, the most
+expensive lookup).  Three flows are timed:
+
+  uncached     the previous render_template: get_template (customer miss +
+               default hit, two reads) and str.format on every notification
+  format-only  str.format with the template already in hand (parse cost only)
+  cached       notification_worker.render_template through the compiled
+               template cache
+
+DynamoDB is simulated in-process with a fixed --read-ms latency per
+get_item, so the numbers isolate read and parse cost.
+
+Usage:
+    python tests/performance/benchmark_notification_render.py [--renders 10000] [--read-ms 0.5]
+"""
+
+import argparse
+import os
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..', '..', 'phase2-backend', 'functions'))
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+import notification_worker  # noqa: E402
+
+DEFAULT_TEMPLATE = {
+    'customer_id': 'default',
+    'event_type': 'security_alert',
+    'subject': '[{severity}] {service} finding in {region}',
+    'body_html': '<h2>{service}</h2><p>{severity} finding on {resource_id} in {region}.</p>',
+    'body_text': '{service}: {severity} finding on {resource_id} in {region}.',
+}
+
+
+class SimulatedTemplatesTable:
+    """Templates table holding only the default template; counts reads."""
+
+    def __init__(self, read_seconds):
+        self.read_seconds = read_seconds
+        self.reads = 0
+
+    def get_item(self, Key):
+        self.reads += 1
+        time.sleep(self.read_seconds)
+        if Key['customer_id'] == 'default':
+            return {'Item': DEFAULT_TEMPLATE}
+        return {}
+
+
+def notification(i):
+    return {
+        'id': f'notif-{i}',
+        'customer_id': 'customer-1',
+        'type': 'security_alert',
+        'title': 'Finding',
+        'body': 'Finding',
+        'metadata': {'severity': 'HIGH', 'service': 'GuardDuty', 'region': 'us-east-1',
+                     'resource_id': f'i-{i:08x}'},
+    }
+
+
+def legacy_render(n):
+    template = notification_worker.get_template(n['type'], n['customer_id'])
+    metadata = n.get('metadata', {})
+    return {
+        'subject': template.get('subject', n.get('title', '')).format(**metadata),
+        'body_html': template.get('body_html', n.get('body', '')).format(**metadata),
+        'body_text': template.get('body_text', n.get('body', '')).format(**metadata),
+    }
+
+
+def format_only(n):
+    metadata = n['metadata']
+    return {
+        'subject': DEFAULT_TEMPLATE['subject'].format(**metadata),
+        'body_html': DEFAULT_TEMPLATE['body_html'].format(**metadata),
+        'body_text': DEFAULT_TEMPLATE['body_text'].format(**metadata),
+    }
+
+
+def run(render, notifications):
+    started = time.perf_counter()
+    results = [render(n) for n in notifications]
+    return time.perf_counter() - started, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--renders', type=int, default=10000)
+    parser.add_argument('--read-ms', type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    notifications = [notification(i) for i in range(args.renders)]
+    flows = (
+        ('uncached', legacy_render),
+        ('format-only', format_only),
+        ('cached', notification_worker.render_template),
+    )
+
+    results = []
+    expected = None
+    for name, render in flows:
+        notification_worker.clear_template_cache()
+        table = SimulatedTemplatesTable(args.read_ms / 1000)
+        dynamodb = MagicMock()
+        dynamodb.Table.return_value = table
+        with patch.object(notification_worker, 'dynamodb', dynamodb):
+            elapsed, rendered = run(render, notifications)
+        if expected is None:
+            expected = rendered
+        assert rendered == expected, f"{name} rendered different output"
+        results.append((name, elapsed / args.renders * 1e6, table.reads))
+
+    print(f"{args.renders} renders of one event type, default-template fallback, "
+          f"{args.read_ms}ms per DynamoDB read\n")
+    print(f"{'render flow':<14}{'per render':>14}{'reads':>10}")
+    for name, micros, reads in results:
+        print(f"{name:<14}{micros:>12.1f}us{reads:>10}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
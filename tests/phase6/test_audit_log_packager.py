@@ -17,7 +17,7 @@ import os
 import sys
 import zipfile
 from datetime import datetime, timezone
-from unittest.mock import MagicMock, patch, call
+from unittest.mock import ANY, MagicMock, patch, call
 
 import pytest
 
@@ -92,8 +92,8 @@ class TestListLogObjects:
             importlib.reload(audit_log_packager)
 
             mock_paginator = MagicMock()
-            mock_paginator.paginate.return_value = [
-                {'Contents': MOCK_S3_OBJECTS},
+            mock_paginator.paginate.side_effect = lambda Bucket, Prefix: [
+                {'Contents': [o for o in MOCK_S3_OBJECTS if o['Key'].startswith(Prefix)]},
             ]
             audit_log_packager.s3_client = MagicMock()
             audit_log_packager.s3_client.get_paginator.return_value = mock_paginator
@@ -131,6 +131,69 @@ class TestListLogObjects:
             assert result == []
 
 
+    def _setup_listing(self, objects_per_day):
+        import threading
+        import time
+
+        with patch('boto3.client'), patch('boto3.resource'), \
+             patch.dict('sys.modules', {'db_utils': MagicMock()}):
+            import importlib
+            import audit_log_packager
+            importlib.reload(audit_log_packager)
+
+        state = {'active': 0, 'peak': 0}
+        lock = threading.Lock()
+
+        def paginate(Bucket, Prefix):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            # Earlier days answer last, so completion order is reversed.
+            day = int(Prefix.rstrip('/').rsplit('/', 1)[-1])
+            time.sleep(0.002 * (32 - day))
+            with lock:
+                state['active'] -= 1
+            return [{'Contents': [
+                {'Key': f'{Prefix}{i:03d}.log', 'Size': 1,
+                 'LastModified': datetime(2026, 1, day, 12, tzinfo=timezone.utc)}
+                for i in range(objects_per_day)
+            ]}]
+
+        paginator = MagicMock()
+        paginator.paginate.side_effect = paginate
+        audit_log_packager.s3_client = MagicMock()
+        audit_log_packager.s3_client.get_paginator.return_value = paginator
+        return audit_log_packager, state
+
+    def test_day_prefixes_listed_concurrently_in_day_order(self):
+        mod, state = self._setup_listing(objects_per_day=3)
+        mod.LIST_CONCURRENCY = 4
+
+        result = mod._list_log_objects(
+            'test-bucket', 'tenant-id',
+            datetime(2026, 1, 1, tzinfo=timezone.utc),
+            datetime(2026, 1, 31, 23, 59, 59, tzinfo=timezone.utc),
+        )
+
+        keys = [o['Key'] for o in result]
+        assert len(keys) == 31 * 3
+        assert keys == sorted(keys)
+        assert 1 < state['peak'] <= 4
+
+    def test_object_cap_applies_across_all_days(self):
+        mod, _ = self._setup_listing(objects_per_day=5)
+        mod.MAX_OBJECTS_PER_PACKAGE = 12
+
+        result = mod._list_log_objects(
+            'test-bucket', 'tenant-id',
+            datetime(2026, 1, 1, tzinfo=timezone.utc),
+            datetime(2026, 1, 31, 23, 59, 59, tzinfo=timezone.utc),
+        )
+
+        assert len(result) == 12
+        assert result[-1]['Key'] == 'logs/tenant-id/2026/01/03/001.log'
+
+
 # ---------------------------------------------------------------------------
 # Test: _build_zip_package
 # ---------------------------------------------------------------------------
@@ -157,7 +220,8 @@ class TestBuildZipPackage:
             ]
             manifest_meta = {'customer_id': 'tenant-id', 'framework': 'SOC2'}
 
-            zip_bytes, sha256 = audit_log_packager._build_zip_package(
+            output = io.BytesIO()
+            size, sha256, count = audit_log_packager._build_zip_package(
                 'source-bucket',
                 objects,
                 manifest_meta,
@@ -173,7 +237,9 @@ class TestBuildZipPackage:
                     'log_count': 1,
                     'retention_until': '2033-02-01T00:00:00+00:00',
                 },
+                output,
             )
+            zip_bytes = output.getvalue()
 
             # Verify zip contains MANIFEST.json
             with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
@@ -197,7 +263,8 @@ class TestBuildZipPackage:
                 'Body': io.BytesIO(b'content')
             }
 
-            zip_bytes, sha256 = audit_log_packager._build_zip_package(
+            output = io.BytesIO()
+            size, sha256, count = audit_log_packager._build_zip_package(
                 'bucket',
                 [{'Key': 'test.log', 'Size': 7,
                   'LastModified': '2026-01-01T00:00:00+00:00'}],
@@ -214,6 +281,7 @@ class TestBuildZipPackage:
                     'log_count': 1,
                     'retention_until': '2033-02-01T00:00:00+00:00',
                 },
+                output,
             )
             assert len(sha256) == 64
             assert all(c in '0123456789abcdef' for c in sha256)
@@ -236,7 +304,8 @@ class TestBuildZipPackage:
                 '_generate_cover_page_pdf',
                 wraps=audit_log_packager._generate_cover_page_pdf,
             ) as mock_cover_pdf:
-                zip_bytes, sha256 = audit_log_packager._build_zip_package(
+                output = io.BytesIO()
+                size, sha256, count = audit_log_packager._build_zip_package(
                     'bucket',
                     [{'Key': 'log.txt', 'Size': 8,
                       'LastModified': '2026-01-01T00:00:00+00:00'}],
@@ -253,7 +322,9 @@ class TestBuildZipPackage:
                         'log_count': 1,
                         'retention_until': '2033-02-01T00:00:00+00:00',
                     },
+                    output,
                 )
+                zip_bytes = output.getvalue()
             with zipfile.ZipFile(io.BytesIO(zip_bytes)) as zf:
                 expected = hashlib.sha256(zf.read('MANIFEST.json')).hexdigest()
             assert sha256 == expected
@@ -262,6 +333,113 @@ class TestBuildZipPackage:
                 assert call_record.args[0]['sha256_manifest'] == sha256
 
 
+COVER_META = {
+    'organization_name': 'Tenant Inc.',
+    'customer_id': 'tenant-id',
+    'framework': 'SOC2',
+    'date_range_start': '2026-01-01T00:00:00+00:00',
+    'date_range_end': '2026-01-31T23:59:59+00:00',
+    'created_at': '2026-02-01T00:00:00+00:00',
+    'package_id': 'pkg-123',
+    'kms_key_arn': 'arn:aws:kms:us-east-1:123:key/abc',
+    'log_count': 0,
+    'retention_until': '2033-02-01T00:00:00+00:00',
+}
+
+
+class TestStreamingUpload:
+    """The archive is streamed into a multipart upload without buffering it whole."""
+
+    def _setup(self):
+        with patch('boto3.client'), patch('boto3.resource'), \
+             patch.dict('sys.modules', {'db_utils': MagicMock()}):
+            import importlib
+            import audit_log_packager
+            importlib.reload(audit_log_packager)
+        audit_log_packager.EVIDENCE_BUCKET = 'test-evidence'
+        audit_log_packager.s3_client = MagicMock()
+        return audit_log_packager
+
+    def _fake_source(self, mod, contents):
+        mod.s3_client.get_object.side_effect = (
+            lambda Bucket, Key: {'Body': io.BytesIO(contents[Key])}
+        )
+
+    def test_large_package_is_uploaded_in_parts(self):
+        mod = self._setup()
+        mod.MULTIPART_PART_SIZE = 64 * 1024
+        contents = {
+            f'logs/tenant/2026/01/{day:02d}/audit.log': os.urandom(40 * 1024)
+            for day in range(1, 11)
+        }
+        self._fake_source(mod, contents)
+        parts = []
+        mod.s3_client.create_multipart_upload.return_value = {'UploadId': 'up-1'}
+        mod.s3_client.upload_part.side_effect = lambda **kw: (
+            parts.append(kw['Body']) or {'ETag': f'"etag-{kw["PartNumber"]}"'}
+        )
+        mod.s3_client.complete_multipart_upload.return_value = {'VersionId': 'v-9'}
+        upload = mod._EvidenceUploadStream('evidence/key.zip', datetime(2033, 1, 1), '')
+
+        size, sha256, count = mod._build_zip_package(
+            'source', [{'Key': k} for k in reversed(list(contents))], {}, COVER_META, upload,
+        )
+        version_id = upload.close()
+
+        assert version_id == 'v-9'
+        mod.s3_client.put_object.assert_not_called()
+        create_kwargs = mod.s3_client.create_multipart_upload.call_args.kwargs
+        assert create_kwargs['ObjectLockMode'] == 'COMPLIANCE'
+        assert all(len(p) == mod.MULTIPART_PART_SIZE for p in parts[:-1])
+        archive = b''.join(parts)
+        assert len(archive) == size
+        completed = mod.s3_client.complete_multipart_upload.call_args.kwargs
+        assert [p['PartNumber'] for p in completed['MultipartUpload']['Parts']] == \
+            list(range(1, len(parts) + 1))
+
+        with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+            manifest_bytes = zf.read('MANIFEST.json')
+            manifest = json.loads(manifest_bytes)
+            for key, data in contents.items():
+                assert zf.read(key.split('/', 2)[-1]) == data
+        assert hashlib.sha256(manifest_bytes).hexdigest() == sha256
+        assert manifest['object_count'] == len(contents)
+        assert manifest['total_log_bytes'] == sum(len(v) for v in contents.values())
+        assert list(manifest['file_hashes']) == sorted(contents)
+        for key, data in contents.items():
+            assert manifest['file_hashes'][key] == hashlib.sha256(data).hexdigest()
+
+    def test_download_failure_aborts_multipart_upload(self):
+        from botocore.exceptions import ClientError
+
+        mod = self._setup()
+        mod.MULTIPART_PART_SIZE = 16 * 1024
+        mod.AUDIT_SOURCE_BUCKET = 'test-source'
+
+        def get_object(Bucket, Key):
+            if Key.endswith('05/audit.log'):
+                raise ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'no'}},
+                                  'GetObject')
+            return {'Body': io.BytesIO(os.urandom(20 * 1024))}
+
+        mod.s3_client.get_object.side_effect = get_object
+        mod.s3_client.create_multipart_upload.return_value = {'UploadId': 'up-2'}
+        mod.s3_client.upload_part.return_value = {'ETag': '"e"'}
+        objects = [{'Key': f'logs/{VALID_EVENT["customer_id"]}/2026/01/{d:02d}/audit.log'}
+                   for d in range(1, 9)]
+
+        with patch.object(mod, '_iter_log_objects', return_value=iter(objects)), \
+             patch.object(mod, '_write_evidence_record') as mock_write:
+            with pytest.raises(RuntimeError, match='Failed to build zip package'):
+                mod.lambda_handler(VALID_EVENT, _make_context())
+
+        mod.s3_client.abort_multipart_upload.assert_called_once_with(
+            Bucket='test-evidence', Key=ANY, UploadId='up-2',
+        )
+        mod.s3_client.complete_multipart_upload.assert_not_called()
+        mock_write.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # Test: lambda_handler
 # ---------------------------------------------------------------------------
@@ -322,8 +500,8 @@ class TestLambdaHandler:
             audit_log_packager.AUDIT_SOURCE_BUCKET = 'test-source'
             audit_log_packager.EVIDENCE_BUCKET = 'test-evidence'
 
-            # Mock _list_log_objects to return empty list
-            with patch.object(audit_log_packager, '_list_log_objects', return_value=[]):
+            # Mock the listing to return no objects
+            with patch.object(audit_log_packager, '_iter_log_objects', return_value=iter([])):
                 result = audit_log_packager.lambda_handler(VALID_EVENT, _make_context())
 
             assert result['log_count'] == 0
@@ -348,8 +526,8 @@ class TestLambdaHandler:
             fake_s3.get_object.return_value = {'Body': io.BytesIO(b'log content')}
             audit_log_packager.s3_client = fake_s3
 
-            with patch.object(audit_log_packager, '_list_log_objects',
-                               return_value=MOCK_S3_OBJECTS), \
+            with patch.object(audit_log_packager, '_iter_log_objects',
+                               return_value=iter(MOCK_S3_OBJECTS)), \
                  patch.object(audit_log_packager, '_write_evidence_record',
                                return_value='pkg-uuid-001'):
                 audit_log_packager.lambda_handler(VALID_EVENT, _make_context())
@@ -378,8 +556,8 @@ class TestLambdaHandler:
             fake_s3.get_object.return_value = {'Body': io.BytesIO(b'data')}
             audit_log_packager.s3_client = fake_s3
 
-            with patch.object(audit_log_packager, '_list_log_objects',
-                               return_value=MOCK_S3_OBJECTS), \
+            with patch.object(audit_log_packager, '_iter_log_objects',
+                               return_value=iter(MOCK_S3_OBJECTS)), \
                  patch.object(audit_log_packager, '_write_evidence_record',
                                return_value='pkg-uuid-001') as mock_write:
                 result = audit_log_packager.lambda_handler(VALID_EVENT, _make_context())
@@ -18,6 +18,13 @@ from unittest.mock import MagicMock, patch, call
 
 import pytest
 
+try:
+    # Import once up front: the patch.dict('sys.modules') blocks below would
+    # otherwise unload numpy, which cannot be re-imported in the same process.
+    import numpy  # noqa: F401
+except ImportError:
+    pass
+
 # ---------------------------------------------------------------------------
 # Path setup
 # ---------------------------------------------------------------------------
@@ -593,3 +600,292 @@ class TestGetActiveTenants:
         mod.DB_SECRET_ARN = 'arn:aws:secretsmanager:us-east-1:123:secret:db'
         mod._get_db_connection = MagicMock(side_effect=RuntimeError('connect failed'))
         assert mod._get_active_tenants() == []
+
+
+# ---------------------------------------------------------------------------
+# Tests: shared Config lookups and mapping cache
+# ---------------------------------------------------------------------------
+
+class TestConfigLookupBatching:
+    """One deduplicated Config query per tenant, mappings cached by ETag."""
+
+    def _setup(self):
+        with patch('boto3.client'), patch('boto3.resource'), \
+             patch.dict('sys.modules', {'db_utils': MagicMock()}):
+            import importlib
+            import compliance_score_recalculator
+            importlib.reload(compliance_score_recalculator)
+            return compliance_score_recalculator
+
+    def test_score_tenant_queries_config_once_for_all_frameworks(self):
+        """Shared rules across SOC2/HIPAA/FedRAMP are fetched in a single lookup."""
+        mod = self._setup()
+        mod._load_mapping = MagicMock(return_value={'controls': SAMPLE_CONTROLS})
+        mod._write_score_to_dynamodb = MagicMock()
+        mod._write_control_violations_to_dynamodb = MagicMock()
+        mod._get_config_compliance = MagicMock(
+            return_value={c['config_rule']: 'COMPLIANT' for c in SAMPLE_CONTROLS}
+        )
+
+        scores = mod._score_tenant('cust-0001', session=MagicMock(), dry_run=False)
+
+        assert set(scores) == {'SOC2', 'HIPAA', 'FedRAMP'}
+        mod._get_config_compliance.assert_called_once()
+        assert mod._write_score_to_dynamodb.call_count == 3
+
+    def test_config_rules_are_deduplicated_and_batched(self):
+        """Rule names are requested once each, at most 25 per API call."""
+        mod = self._setup()
+        rules = [f'rule-{i}' for i in range(30)]
+        paginator = MagicMock()
+        paginator.paginate.side_effect = lambda ConfigRuleNames, ComplianceTypes: [{
+            'ComplianceByConfigRules': [
+                {'ConfigRuleName': name, 'Compliance': {'ComplianceType': 'COMPLIANT'}}
+                for name in ConfigRuleNames
+            ]
+        }]
+        config_client = MagicMock()
+        config_client.get_paginator.return_value = paginator
+
+        compliance_map = mod._get_config_compliance(rules + rules[:10], config_client)
+
+        assert len(compliance_map) == 30
+        batches = [c.kwargs['ConfigRuleNames'] for c in paginator.paginate.call_args_list]
+        assert [len(b) for b in batches] == [25, 5]
+
+    def test_mapping_cache_revalidates_with_etag(self):
+        """A warm invocation reuses the parsed mapping when S3 returns 304."""
+        from botocore.exceptions import ClientError
+
+        mod = self._setup()
+        mod.MAPPINGS_BUCKET = 'mappings-bucket'
+        body = MagicMock()
+        body.read.return_value = json.dumps({'controls': SAMPLE_CONTROLS}).encode()
+        s3_client = MagicMock()
+        s3_client.get_object.side_effect = [
+            {'Body': body, 'ETag': '"etag-1"'},
+            ClientError({'Error': {'Code': '304', 'Message': 'Not Modified'}}, 'GetObject'),
+        ]
+
+        first = mod._load_mapping('SOC2', s3_client)
+        second = mod._load_mapping('SOC2', s3_client)
+
+        assert second is first
+        assert s3_client.get_object.call_args_list[1].kwargs['IfNoneMatch'] == '"etag-1"'
+        body.read.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# Tests: CompiledScoringModel
+# ---------------------------------------------------------------------------
+
+class TestCompiledScoringModel:
+    """The compiled model must reproduce _calculate_weighted_score exactly."""
+
+    STATUSES = ['COMPLIANT', 'NON_COMPLIANT', 'NOT_APPLICABLE', 'INSUFFICIENT_DATA', None]
+
+    def _setup(self):
+        with patch('boto3.client'), patch('boto3.resource'), \
+             patch.dict('sys.modules', {'db_utils': MagicMock()}):
+            import importlib
+            import compliance_score_recalculator
+            importlib.reload(compliance_score_recalculator)
+            return compliance_score_recalculator
+
+    def _framework_controls(self):
+        controls = {}
+        for framework, filename in (('SOC2', 'soc2_mapping.json'),
+                                    ('HIPAA', 'hipaa_mapping.json'),
+                                    ('FedRAMP', 'fedramp_mapping.json')):
+            with open(os.path.join(COMPLIANCE_DIR, filename)) as fh:
+                controls[framework] = json.load(fh)['controls']
+        controls['SOC2'] = controls['SOC2'] + [
+            {'control_id': 'X-INFO', 'severity': 'INFORMATIONAL', 'config_rule': 'info-rule'},
+            {'control_id': 'X-NORULE', 'severity': 'HIGH'},
+        ]
+        return controls
+
+    def _synthetic_tenants(self, rules, count):
+        import random
+        rng = random.Random(42)
+        tenants = []
+        for _ in range(count):
+            tenant = {}
+            for rule in rules:
+                status = rng.choice(self.STATUSES)
+                if status:
+                    tenant[rule] = status
+            tenants.append(tenant)
+        return tenants + [{}]
+
+    def _assert_matches_reference(self, mod, framework_controls, tenant, result):
+        for framework, controls in framework_controls.items():
+            score, violations = mod._calculate_weighted_score(controls, tenant)
+            assert result[framework]['score'] == score
+            assert result[framework]['violations'] == violations
+            assert result[framework]['controls_total'] == len(controls)
+            assert result[framework]['controls_passing'] == sum(
+                1 for c in controls if tenant.get(c.get('config_rule', '')) == 'COMPLIANT'
+            )
+
+    def test_score_matches_reference_for_every_framework(self):
+        mod = self._setup()
+        framework_controls = self._framework_controls()
+        model = mod.CompiledScoringModel(framework_controls)
+        assert len(model.rule_names) == len(set(model.rule_names))
+
+        for tenant in self._synthetic_tenants(model.rule_names, 200):
+            self._assert_matches_reference(mod, framework_controls, tenant, model.score(tenant))
+
+    @pytest.mark.parametrize('use_numpy', [True, False])
+    def test_score_batch_matches_single_tenant_scoring(self, use_numpy):
+        mod = self._setup()
+        if use_numpy and mod._np is None:
+            pytest.skip('numpy not installed')
+        if not use_numpy:
+            mod._np = None
+        model = mod.CompiledScoringModel(self._framework_controls())
+        tenants = self._synthetic_tenants(model.rule_names, 2000)
+
+        batch = model.score_batch(tenants)
+
+        assert len(batch) == len(tenants)
+        for tenant, result in zip(tenants, batch):
+            assert result == model.score(tenant)
+
+    def test_empty_map_reports_no_rules(self):
+        mod = self._setup()
+        model = mod.CompiledScoringModel({'SOC2': SAMPLE_CONTROLS})
+        result = model.score({})['SOC2']
+        assert result['rules_requested'] == len(SAMPLE_CONTROLS)
+        assert result['rules_reported'] == 0
+        assert result['score'] == 0.0
+
+    def test_compiled_model_reused_until_mapping_reloads(self):
+        mod = self._setup()
+        controls = {'SOC2': list(SAMPLE_CONTROLS)}
+        first = mod._compiled_model(controls)
+        assert mod._compiled_model(dict(controls)) is first
+        assert mod._compiled_model({'SOC2': list(SAMPLE_CONTROLS)}) is not first
+
+    def test_score_matrix_scores_encoded_tenants(self):
+        mod = self._setup()
+        if mod._np is None:
+            pytest.skip('numpy not installed')
+        model = mod.CompiledScoringModel(self._framework_controls())
+        tenants = self._synthetic_tenants(model.rule_names, 50)
+        status = mod._np.array([model.status_vector(t) for t in tenants])
+
+        matrix = model.score_matrix(status)
+
+        assert matrix['score'].shape == (len(tenants), len(model.frameworks))
+        for row, tenant in enumerate(tenants):
+            expected = model.score(tenant)
+            for col, framework in enumerate(model.frameworks):
+                assert matrix['score'][row, col] == pytest.approx(expected[framework]['score'])
+                assert matrix['controls_passing'][row, col] == expected[framework]['controls_passing']
+                assert list(matrix['violations'][row, col]) == list(expected[framework]['violations'].values())
+
+
+# ---------------------------------------------------------------------------
+# Tests: batched DynamoDB writes
+# ---------------------------------------------------------------------------
+
+class TestBatchedDynamoDBWrites:
+    """Scores and control snapshots go out in one BatchWriteItem pass per tenant."""
+
+    def _setup(self):
+        with patch('boto3.client'), patch('boto3.resource'), \
+             patch.dict('sys.modules', {'db_utils': MagicMock()}):
+            import importlib
+            import compliance_score_recalculator
+            importlib.reload(compliance_score_recalculator)
+            mod = compliance_score_recalculator
+        mod.dynamodb = MagicMock()
+        mod.dynamodb.Table.return_value.query.return_value = {'Items': []}
+        mod.dynamodb.batch_write_item.return_value = {'UnprocessedItems': {}}
+        mod.BATCH_WRITE_BASE_DELAY_SECONDS = 0
+        mod._load_mapping = MagicMock(return_value={'controls': SAMPLE_CONTROLS})
+        mod._get_config_compliance = MagicMock(
+            return_value={c['config_rule']: 'COMPLIANT' for c in SAMPLE_CONTROLS}
+        )
+        return mod
+
+    def test_score_tenant_writes_all_frameworks_in_one_pass(self):
+        mod = self._setup()
+        session = MagicMock()
+
+        mod._score_tenant('cust-0001', session=session, dry_run=False)
+
+        mod.dynamodb.Table.return_value.put_item.assert_not_called()
+        requests = [
+            request
+            for c in mod.dynamodb.batch_write_item.call_args_list
+            for table_requests in c.kwargs['RequestItems'].values()
+            for request in table_requests
+        ]
+        # 3 score items + 3 frameworks x 4 control snapshots, 25 per call.
+        assert len(requests) == 15
+        assert mod.dynamodb.batch_write_item.call_count == 1
+        tables = set(mod.dynamodb.batch_write_item.call_args.kwargs['RequestItems'])
+        assert tables == {mod.COMPLIANCE_SCORES_TABLE, mod.CONTROL_VIOLATION_TABLE}
+
+        metrics = session.client.return_value.put_metric_data.call_args.kwargs['MetricData']
+        values = {m['MetricName']: m['Value'] for m in metrics}
+        assert values == {'ScoreItemsWritten': 15, 'ScoreWriteThrottleRetries': 0}
+
+    def test_dry_run_skips_batch_write(self):
+        mod = self._setup()
+        mod._score_tenant('cust-0001', session=MagicMock(), dry_run=True)
+        mod.dynamodb.batch_write_item.assert_not_called()
+
+    def test_unprocessed_items_are_retried_and_counted(self):
+        from botocore.exceptions import ClientError
+
+        mod = self._setup()
+        batch = mod._TenantWriteBatch()
+        for i in range(3):
+            batch.put('scores', {'PK': f'p{i}', 'SK': 's', 'n': i})
+        leftover = {'scores': [{'PutRequest': {'Item': {'PK': 'p2', 'SK': 's'}}}]}
+        throttled = ClientError(
+            {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'slow down'}},
+            'BatchWriteItem',
+        )
+        mod.dynamodb.batch_write_item.side_effect = [
+            {'UnprocessedItems': leftover},
+            throttled,
+            {'UnprocessedItems': {}},
+        ]
+
+        batch.flush()
+
+        assert batch.items_written == 3
+        assert batch.throttle_retries == 2
+        assert batch.items_failed == 0
+        last = mod.dynamodb.batch_write_item.call_args_list[-1].kwargs['RequestItems']
+        assert last == leftover
+
+    def test_duplicate_keys_keep_last_item(self):
+        mod = self._setup()
+        batch = mod._TenantWriteBatch()
+        batch.put('scores', {'PK': 'p', 'SK': 's', 'n': 1})
+        batch.put('scores', {'PK': 'p', 'SK': 's', 'n': 2})
+
+        batch.flush()
+
+        requests = mod.dynamodb.batch_write_item.call_args.kwargs['RequestItems']['scores']
+        assert requests == [{'PutRequest': {'Item': {'PK': 'p', 'SK': 's', 'n': 2}}}]
+
+    def test_items_left_after_max_attempts_are_reported(self):
+        mod = self._setup()
+        mod.BATCH_WRITE_MAX_ATTEMPTS = 2
+        batch = mod._TenantWriteBatch()
+        batch.put('scores', {'PK': 'p', 'SK': 's'})
+        stuck = {'scores': [{'PutRequest': {'Item': {'PK': 'p', 'SK': 's'}}}]}
+        mod.dynamodb.batch_write_item.return_value = {'UnprocessedItems': stuck}
+
+        batch.flush()
+
+        assert batch.items_written == 0
+        assert batch.items_failed == 1
+        assert batch.throttle_retries == 1